@@ -28,6 +28,9 @@ from .utils.solver_utils import (
     SolverDiag,
     SolverLU,
     SolverBiCG,
+    SolverBlockCG,
+    SolverBlockBiCG,
+    Preconditioner,
 )
 
 __version__ = "0.16.0"
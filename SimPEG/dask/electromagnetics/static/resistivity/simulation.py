@@ -1,4 +1,5 @@
 from .....electromagnetics.static.resistivity.simulation import BaseDCSimulation as Sim
+from .....electromagnetics.static.resistivity.utils import _electrode_coefficients
 from .....utils import Zero
 
 from ....utils import compute_chunk_sizes
@@ -38,58 +39,67 @@ def dask_getJ(self, m, f=None):
 
     m_size = self.model.size
     count = 0
-    for source in self.survey.source_list:
-        u_source = f[source, self._solutionType]
-        for rx in source.receiver_list:
-            # wrt f, need possibility wrt m
-            PTv = rx.evalDeriv(source, self.mesh, f).toarray().T
-
-            df_duTFun = getattr(f, "_{0!s}Deriv".format(rx.projField), None)
-            df_duT, df_dmT = df_duTFun(source, None, PTv, adjoint=True)
-
-            # Find a block of receivers
-            n_block_col = int(np.ceil(df_duT.size * 8 * 1e-9 / self.max_ram))
-
-            n_col = int(np.ceil(df_duT.shape[1] / n_block_col))
-
-            nrows = int(
-                m_size / np.ceil(m_size * n_col * 8 * 1e-6 / self.max_chunk_size)
-            )
-            ind = 0
-            for col in range(n_block_col):
-                ATinvdf_duT = da.asarray(
-                    self.Ainv * df_duT[:, ind : ind + n_col]
-                ).rechunk((nrows, n_col))
-
-                dA_dmT = self.getADeriv(u_source, ATinvdf_duT, adjoint=True)
-
-                dRHS_dmT = self.getRHSDeriv(source, ATinvdf_duT, adjoint=True)
-
-                if n_col > 1:
-                    du_dmT = da.from_delayed(
-                        dask.delayed(-dA_dmT), shape=(m_size, n_col), dtype=float
-                    )
-                else:
-                    du_dmT = da.from_delayed(
-                        dask.delayed(-dA_dmT), shape=(m_size,), dtype=float
-                    )
-
-                if not isinstance(dRHS_dmT, Zero):
-                    du_dmT += da.from_delayed(
-                        dask.delayed(dRHS_dmT), shape=(m_size, n_col), dtype=float
-                    )
-
-                if not isinstance(df_dmT, Zero):
-                    du_dmT += da.from_delayed(
-                        df_dmT, shape=(m_size, n_col), dtype=float
-                    )
-
-                blockName = self.sensitivity_path + "J" + str(count) + ".zarr"
-                da.to_zarr((du_dmT.T).rechunk("auto"), blockName)
-                del ATinvdf_duT
-                count += 1
-
-                ind += n_col
+
+    electrodes = _electrode_coefficients(self.survey)
+    if electrodes is not None:
+        # Potential data: one adjoint solve per unique electrode (reciprocity)
+        for Jt_source in self._Jt_reciprocity_blocks(f, self.survey, *electrodes):
+            blockName = self.sensitivity_path + "J" + str(count) + ".zarr"
+            da.to_zarr(da.from_array(Jt_source.T).rechunk("auto"), blockName)
+            count += 1
+    else:
+        for source in self.survey.source_list:
+            u_source = f[source, self._solutionType]
+            for rx in source.receiver_list:
+                # wrt f, need possibility wrt m
+                PTv = rx.evalDeriv(source, self.mesh, f).toarray().T
+
+                df_duTFun = getattr(f, "_{0!s}Deriv".format(rx.projField), None)
+                df_duT, df_dmT = df_duTFun(source, None, PTv, adjoint=True)
+
+                # Find a block of receivers
+                n_block_col = int(np.ceil(df_duT.size * 8 * 1e-9 / self.max_ram))
+
+                n_col = int(np.ceil(df_duT.shape[1] / n_block_col))
+
+                nrows = int(
+                    m_size / np.ceil(m_size * n_col * 8 * 1e-6 / self.max_chunk_size)
+                )
+                ind = 0
+                for col in range(n_block_col):
+                    ATinvdf_duT = da.asarray(
+                        self.Ainv * df_duT[:, ind : ind + n_col]
+                    ).rechunk((nrows, n_col))
+
+                    dA_dmT = self.getADeriv(u_source, ATinvdf_duT, adjoint=True)
+
+                    dRHS_dmT = self.getRHSDeriv(source, ATinvdf_duT, adjoint=True)
+
+                    if n_col > 1:
+                        du_dmT = da.from_delayed(
+                            dask.delayed(-dA_dmT), shape=(m_size, n_col), dtype=float
+                        )
+                    else:
+                        du_dmT = da.from_delayed(
+                            dask.delayed(-dA_dmT), shape=(m_size,), dtype=float
+                        )
+
+                    if not isinstance(dRHS_dmT, Zero):
+                        du_dmT += da.from_delayed(
+                            dask.delayed(dRHS_dmT), shape=(m_size, n_col), dtype=float
+                        )
+
+                    if not isinstance(df_dmT, Zero):
+                        du_dmT += da.from_delayed(
+                            df_dmT, shape=(m_size, n_col), dtype=float
+                        )
+
+                    blockName = self.sensitivity_path + "J" + str(count) + ".zarr"
+                    da.to_zarr((du_dmT.T).rechunk("auto"), blockName)
+                    del ATinvdf_duT
+                    count += 1
+
+                    ind += n_col
 
     dask_arrays = []
     for ii in range(count):
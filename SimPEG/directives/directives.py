@@ -5,7 +5,11 @@ import warnings
 import os
 import scipy.sparse as sp
 from ..data_misfit import BaseDataMisfit
-from ..objective_function import ComboObjectiveFunction
+from ..objective_function import (
+    ComboObjectiveFunction,
+    ParallelComboObjectiveFunction,
+    _JtJ_diagonal,
+)
 from ..maps import IdentityMap, Wires
 from ..regularization import (
     BaseComboRegularization,
@@ -1379,9 +1383,13 @@ class Update_IRLS(InversionDirective):
                 for comp in reg.objfcts:
                     comp.stashedR = None
 
-            for dmis in self.dmisfit.objfcts:
-                if getattr(dmis, "stashedR", None) is not None:
-                    dmis.stashedR = None
+            if isinstance(self.dmisfit, ParallelComboObjectiveFunction):
+                # the misfits are held by the workers
+                self.dmisfit.set_objfcts_attribute("stashedR", None)
+            else:
+                for dmis in self.dmisfit.objfcts:
+                    if getattr(dmis, "stashedR", None) is not None:
+                        dmis.stashedR = None
 
             # Compute new model objective function value
             f_change = np.abs(self.f_old - phim_new) / (self.f_old + 1e-12)
@@ -1488,6 +1496,16 @@ class Update_IRLS(InversionDirective):
         return True
 
 
+def _dmisfit_JtJ_diagonal(dmisfit, m):
+    """
+    Diagonal of JtJ of the simulations of the data misfits, computed by the
+    workers holding them for a ParallelComboObjectiveFunction.
+    """
+    if isinstance(dmisfit, ParallelComboObjectiveFunction):
+        return dmisfit.getJtJdiag(m)
+    return _JtJ_diagonal(dmisfit.objfcts, m)
+
+
 class UpdatePreconditioner(InversionDirective):
     """
     Create a Jacobi preconditioner for the linear problem
@@ -1507,17 +1525,7 @@ class UpdatePreconditioner(InversionDirective):
             if not isinstance(rdg, Zero):
                 regDiag += rdg.diagonal()
 
-        JtJdiag = np.zeros_like(self.invProb.model)
-        for sim, dmisfit in zip(self.simulation, self.dmisfit.objfcts):
-
-            if getattr(sim, "getJtJdiag", None) is None:
-                assert getattr(sim, "getJ", None) is not None, (
-                    "Simulation does not have a getJ attribute."
-                    + "Cannot form the sensitivity explicitly"
-                )
-                JtJdiag += np.sum(np.power((dmisfit.W * sim.getJ(m)), 2), axis=0)
-            else:
-                JtJdiag += sim.getJtJdiag(m, W=dmisfit.W)
+        JtJdiag = _dmisfit_JtJ_diagonal(self.dmisfit, m)
 
         diagA = JtJdiag + self.invProb.beta * regDiag
         diagA[diagA != 0] = diagA[diagA != 0] ** -1.0
@@ -1538,17 +1546,7 @@ class UpdatePreconditioner(InversionDirective):
             # Check if he has wire
             regDiag += reg.deriv2(m).diagonal()
 
-        JtJdiag = np.zeros_like(self.invProb.model)
-        for sim, dmisfit in zip(self.simulation, self.dmisfit.objfcts):
-
-            if getattr(sim, "getJtJdiag", None) is None:
-                assert getattr(sim, "getJ", None) is not None, (
-                    "Simulation does not have a getJ attribute."
-                    + "Cannot form the sensitivity explicitly"
-                )
-                JtJdiag += np.sum(np.power((dmisfit.W * sim.getJ(m)), 2), axis=0)
-            else:
-                JtJdiag += sim.getJtJdiag(m, W=dmisfit.W)
+        JtJdiag = _dmisfit_JtJ_diagonal(self.dmisfit, m)
 
         diagA = JtJdiag + self.invProb.beta * regDiag
         diagA[diagA != 0] = diagA[diagA != 0] ** -1.0
@@ -1622,19 +1620,8 @@ class UpdateSensitivityWeights(InversionDirective):
         Compute explicitly the main diagonal of JtJ
 
         """
-        jtj_diag = np.zeros_like(self.invProb.model)
         m = self.invProb.model
-
-        for sim, dmisfit in zip(self.simulation, self.dmisfit.objfcts):
-            if getattr(sim, "getJtJdiag", None) is None:
-                if getattr(sim, "getJ", None) is None:
-                    raise AttributeError(
-                        "Simulation does not have a getJ attribute."
-                        + "Cannot form the sensitivity explicitly"
-                    )
-                jtj_diag += mkvc(np.sum((dmisfit.W * sim.getJ(m)) ** 2.0, axis=0))
-            else:
-                jtj_diag += sim.getJtJdiag(m, W=dmisfit.W)
+        jtj_diag = _dmisfit_JtJ_diagonal(self.dmisfit, m)
 
         # Normalize and threshold weights
         wr = np.zeros_like(self.invProb.model)
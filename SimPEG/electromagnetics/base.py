@@ -17,6 +17,11 @@ from .. import props
 __all__ = ["BaseEMSimulation", "BaseEMSrc"]
 
 
+def _is_stacked(u):
+    """Whether u holds several fields as the columns of an array"""
+    return isinstance(u, np.ndarray) and u.ndim > 1 and u.shape[1] > 1
+
+
 ###############################################################################
 #                                                                             #
 #                             Base EM Simulation                                 #
@@ -219,6 +224,8 @@ class BaseEMSimulation(BaseSimulation):
             )
 
         if v is not None:
+            if adjoint and _is_stacked(u):
+                return self._MfRhoDeriv.T.dot(np.sum(u * v, axis=1))
             if not isinstance(u, Zero):
                 u = u.flatten()
                 if v.ndim > 1:
@@ -290,6 +297,8 @@ class BaseEMSimulation(BaseSimulation):
             )
 
         if v is not None:
+            if adjoint and _is_stacked(u):
+                return self._MfRhoDeriv.T.dot(np.sum(u * v, axis=1))
             if not isinstance(u, Zero):
                 u = u.flatten()
                 if v.ndim > 1:
@@ -350,6 +359,9 @@ class BaseEMSimulation(BaseSimulation):
     def MeSigmaDeriv(self, u, v=None, adjoint=False):
         """
         Derivative of MeSigma with respect to the model times a vector (u)
+
+        In adjoint mode, u and v can be (nE, k) arrays, for k fields and
+        adjoint vectors, and the sum of the k products is returned.
         """
         if self.sigmaMap is None:
             return Zero()
@@ -363,6 +375,8 @@ class BaseEMSimulation(BaseSimulation):
             )
 
         if v is not None:
+            if adjoint and _is_stacked(u):
+                return self._MeSigmaDeriv.T * np.sum(u * v, axis=1)
             if not isinstance(u, Zero):
                 u = u.flatten()  # u is either nUx1 or nU
                 if v.ndim > 1:
@@ -420,6 +434,9 @@ class BaseEMSimulation(BaseSimulation):
     def MfRhoDeriv(self, u, v=None, adjoint=False):
         """
         Derivative of :code:`MfRho` with respect to the model.
+
+        In adjoint mode, u and v can be (nF, k) arrays, for k fields and
+        adjoint vectors, and the sum of the k products is returned.
         """
         if self.rhoMap is None:
             return Zero()
@@ -433,6 +450,8 @@ class BaseEMSimulation(BaseSimulation):
             )
 
         if v is not None:
+            if adjoint and _is_stacked(u):
+                return self._MfRhoDeriv.T.dot(np.sum(u * v, axis=1))
             if not isinstance(u, Zero):
                 u = u.flatten()
                 if v.ndim > 1:
@@ -6,6 +6,53 @@ from ..utils import omega
 from ...utils.code_utils import deprecate_class
 
 
+class SourceColumns(object):
+    """
+    Stands in for the (nE or nF, nSrc) array of a field in the fields object,
+    while only holding the columns of the sources that were set last (the
+    sources of one frequency). Setting new columns releases the previous ones.
+
+    :param tuple shape: shape of the full field array
+    :param dtype: type of the field
+    """
+
+    ndim = 2
+
+    def __init__(self, shape, dtype=complex):
+        self.shape = shape
+        self.dtype = dtype
+        self._columns = {}
+        self._values = None
+
+    @property
+    def size(self):
+        return self.shape[0] * self.shape[1]
+
+    def __setitem__(self, key, value):
+        _, srcInd = key
+        columns = np.arange(self.shape[1])[srcInd].reshape(-1)
+        self._values = None  # release the previous columns first
+        self._values = np.asarray(value, dtype=self.dtype).reshape(
+            (self.shape[0], len(columns)), order="F"
+        )
+        self._columns = {column: i for i, column in enumerate(columns)}
+
+    def __getitem__(self, key):
+        _, srcInd = key
+        columns = np.arange(self.shape[1])[srcInd]
+        try:
+            ind = [self._columns[column] for column in columns.reshape(-1)]
+        except KeyError:
+            raise KeyError(
+                "Only the fields of the sources {} are held".format(
+                    sorted(self._columns)
+                )
+            )
+        if columns.ndim == 0:
+            return self._values[:, ind[0]]
+        return self._values[:, ind]
+
+
 class FieldsFDEM(Fields):
     """
 
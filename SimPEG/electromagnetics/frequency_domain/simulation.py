@@ -7,7 +7,7 @@ from discretize.utils import Zero
 
 from ... import props
 from ...data import Data
-from ...utils import mkvc
+from ...utils import mkvc, parallel_map
 from ..base import BaseEMSimulation
 from ..utils import omega
 from .survey import Survey
@@ -17,6 +17,7 @@ from .fields import (
     Fields3DMagneticFluxDensity,
     Fields3DMagneticField,
     Fields3DCurrentDensity,
+    SourceColumns,
 )
 
 
@@ -64,12 +65,55 @@ class BaseFDEMSimulation(BaseEMSimulation):
     props.Reciprocal(mu, mui)
 
     forward_only = properties.Boolean(
-        "If True, A-inverse not stored at each frequency in forward simulation",
+        "If True, A-inverse not stored at each frequency in forward simulation, "
+        "and dpred without fields only holds the fields of the frequencies being "
+        "solved, projecting them on the receivers as soon as they are computed",
         default=False,
     )
 
     survey = properties.Instance("a survey object", Survey, required=True)
 
+    n_cpu = properties.Integer(
+        "Number of frequencies factored and solved at once, by a pool of threads",
+        default=1,
+        min=1,
+    )
+
+    max_factors = properties.Integer(
+        "Maximum number of factorizations kept in memory after the forward "
+        "simulation, for Jvec and Jtvec. The factors of the other frequencies "
+        "are recomputed when needed. Each thread holds one more while solving.",
+        required=False,
+        min=0,
+    )
+
+    def _frequency_map(self, fun):
+        """
+        Apply fun(nf, freq) to every frequency of the survey, with n_cpu
+        frequencies handled at once. The results are in the frequency order.
+
+        The first frequency is handled alone, so that the matrices shared by
+        all of them and built on first use (mass matrices, mesh operators)
+        are created before the threads start.
+        """
+        items = list(enumerate(self.survey.frequencies))
+        return [fun(*items[0])] + parallel_map(
+            lambda item: fun(*item), items[1:], n_workers=self.n_cpu
+        )
+
+    def _keep_factors(self, nf):
+        """Whether the factors of the nf-th frequency are kept after fields"""
+        if self.forward_only:
+            return False
+        return self.max_factors is None or nf < self.max_factors
+
+    def _get_Ainv(self, nf, freq):
+        """Factors of A at a frequency, refactored if they were not kept"""
+        Ainv = self.Ainv[nf]
+        if Ainv is None:
+            Ainv = self.solver(self.getA(freq), **self.solver_opts)
+        return Ainv
+
     # @profile
     def fields(self, m=None):
         """
@@ -90,28 +134,69 @@ class BaseFDEMSimulation(BaseEMSimulation):
                 print("num_frequencies =", self.survey.num_frequencies)
             self.Ainv = [None for i in range(self.survey.num_frequencies)]
 
-        if self.Ainv[0] is not None:
-            for i in range(self.survey.num_frequencies):
-                self.Ainv[i].clean()
+        if any(Ainv is not None for Ainv in self.Ainv):
+            for i in range(len(self.Ainv)):
+                if self.Ainv[i] is not None:
+                    self.Ainv[i].clean()
+                    self.Ainv[i] = None
 
             if self.verbose:
                 print("Cleaning Ainv")
 
         f = self.fieldsPair(self)
 
-        for nf, freq in enumerate(self.survey.frequencies):
-            A = self.getA(freq)
-            rhs = self.getRHS(freq)
-            self.Ainv[nf] = self.solver(A, **self.solver_opts)
-            u = self.Ainv[nf] * rhs
-            Srcs = self.survey.get_sources_by_frequency(freq)
-            f[Srcs, self._solutionType] = u
-            if self.forward_only:
+        def solve_frequency(nf, freq):
+            Ainv = self._solve_frequency(f, freq)
+            if self._keep_factors(nf):
+                self.Ainv[nf] = Ainv
+            else:
                 if self.verbose:
                     print("Fields simulated for frequency {}".format(nf))
-                self.Ainv[nf].clean()
+                Ainv.clean()
+
+        self._frequency_map(solve_frequency)
         return f
 
+    def _solve_frequency(self, f, freq):
+        """
+        Solve for the fields of the sources at a frequency, stored in f, and
+        return the factors of A
+        """
+        A = self.getA(freq)
+        rhs = self.getRHS(freq)
+        Ainv = self.solver(A, **self.solver_opts)
+        u = Ainv * rhs
+        Srcs = self.survey.get_sources_by_frequency(freq)
+        f[Srcs, self._solutionType] = u
+        return Ainv
+
+    def dpred(self, m=None, f=None):
+        if f is not None or not self.forward_only:
+            return super().dpred(m=m, f=f)
+
+        # the fields of each frequency are projected on the receivers as soon
+        # as they are computed, and released
+        if m is not None:
+            self.model = m
+
+        def dpred_frequency(nf, freq):
+            f = self.fieldsPair(self)
+            for name, loc in f.knownFields.items():
+                dtype = f.dtype[name] if isinstance(f.dtype, dict) else f.dtype
+                f._fields[name] = SourceColumns(f._storageShape(loc), dtype)
+            self._solve_frequency(f, freq).clean()
+            return [
+                (src, rx, rx.eval(src, self.mesh, f))
+                for src in self.survey.get_sources_by_frequency(freq)
+                for rx in src.receiver_list
+            ]
+
+        data = Data(self.survey)
+        for data_frequency in self._frequency_map(dpred_frequency):
+            for src, rx, d in data_frequency:
+                data[src, rx] = d
+        return mkvc(data)
+
     # @profile
     def Jvec(self, m, v, f=None):
         """
@@ -130,18 +215,23 @@ class BaseFDEMSimulation(BaseEMSimulation):
 
         self.model = m
 
-        # Jv = Data(self.survey)
-        Jv = []
-
-        for nf, freq in enumerate(self.survey.frequencies):
+        def Jvec_frequency(nf, freq):
+            Ainv = self._get_Ainv(nf, freq)
+            Jv = []
             for src in self.survey.get_sources_by_frequency(freq):
                 u_src = f[src, self._solutionType]
                 dA_dm_v = self.getADeriv(freq, u_src, v, adjoint=False)
                 dRHS_dm_v = self.getRHSDeriv(freq, src, v)
-                du_dm_v = self.Ainv[nf] * (-dA_dm_v + dRHS_dm_v)
+                du_dm_v = Ainv * (-dA_dm_v + dRHS_dm_v)
 
                 for rx in src.receiver_list:
                     Jv.append(rx.evalDeriv(src, self.mesh, f, du_dm_v=du_dm_v, v=v))
+            if self.Ainv[nf] is None:
+                Ainv.clean()
+            return Jv
+
+        # Jv = Data(self.survey)
+        Jv = sum(self._frequency_map(Jvec_frequency), [])
         return np.hstack(Jv)
 
     # @profile
@@ -165,9 +255,9 @@ class BaseFDEMSimulation(BaseEMSimulation):
         if not isinstance(v, Data):
             v = Data(self.survey, v)
 
-        Jtv = np.zeros(m.size)
-
-        for nf, freq in enumerate(self.survey.frequencies):
+        def Jtvec_frequency(nf, freq):
+            Ainv = self._get_Ainv(nf, freq)
+            Jtv = np.zeros(m.size)
             for src in self.survey.get_sources_by_frequency(freq):
                 u_src = f[src, self._solutionType]
                 df_duT_sum = 0
@@ -181,7 +271,7 @@ class BaseFDEMSimulation(BaseEMSimulation):
                     if not isinstance(df_dmT, Zero):
                         df_dmT_sum += df_dmT
 
-                ATinvdf_duT = self.Ainv[nf] * df_duT_sum
+                ATinvdf_duT = Ainv * df_duT_sum
 
                 dA_dmT = self.getADeriv(freq, u_src, ATinvdf_duT, adjoint=True)
                 dRHS_dmT = self.getRHSDeriv(freq, src, ATinvdf_duT, adjoint=True)
@@ -189,6 +279,13 @@ class BaseFDEMSimulation(BaseEMSimulation):
 
                 df_dmT_sum += du_dmT
                 Jtv += np.real(df_dmT_sum)
+            if self.Ainv[nf] is None:
+                Ainv.clean()
+            return Jtv
+
+        Jtv = np.zeros(m.size)
+        for Jtv_freq in self._frequency_map(Jtvec_frequency):
+            Jtv += Jtv_freq
 
         return mkvc(Jtv)
 
@@ -49,13 +49,14 @@ class BaseNSEMSimulation(BaseFDEMSimulation):
         # Initiate the Jv object
         Jv = Data(self.survey)
 
-        # Loop all the frequenies
-        for freq in self.survey.frequencies:
+        # Frequencies are independent, n_cpu of them are handled at once
+        def Jvec_frequency(nf, freq):
             # Get the system
             A = self.getA(freq)
             # Factor
             Ainv = self.solver(A, **self.solver_opts)
 
+            Jv_freq = []
             for src in self.survey.get_sources_by_frequency(freq):
                 # We need fDeriv_m = df/du*du/dm + df/dm
                 # Construct du/dm, it requires a solve
@@ -76,10 +77,15 @@ class BaseNSEMSimulation(BaseFDEMSimulation):
                 # Calculate the projection derivatives
                 for rx in src.receiver_list:
                     # Calculate dP/du*du/dm*v
-                    Jv[src, rx] = rx.evalDeriv(
-                        src, self.mesh, f, mkvc(du_dm_v)
+                    Jv_freq.append(
+                        (src, rx, rx.evalDeriv(src, self.mesh, f, mkvc(du_dm_v)))
                     )  # wrt uPDeriv_u(mkvc(du_dm))
             Ainv.clean()
+            return Jv_freq
+
+        for Jv_freq in self._frequency_map(Jvec_frequency):
+            for src, rx, Jv_rx in Jv_freq:
+                Jv[src, rx] = Jv_rx
         # Return the vectorized sensitivities
         return mkvc(Jv)
 
@@ -103,13 +109,13 @@ class BaseNSEMSimulation(BaseFDEMSimulation):
         if not isinstance(v, Data):
             v = Data(self.survey, v)
 
-        Jtv = np.zeros(m.size)
-
-        for freq in self.survey.frequencies:
+        # Frequencies are independent, n_cpu of them are handled at once
+        def Jtvec_frequency(nf, freq):
             AT = self.getA(freq).T
 
             ATinv = self.solver(AT, **self.solver_opts)
 
+            Jtv = np.zeros(m.size)
             for src in self.survey.get_sources_by_frequency(freq):
                 # u_src needs to have both polarizations
                 u_src = f[src, :]
@@ -137,6 +143,11 @@ class BaseNSEMSimulation(BaseFDEMSimulation):
                         raise Exception("Must be real or imag")
             # Clean the factorization, clear memory.
             ATinv.clean()
+            return Jtv
+
+        Jtv = np.zeros(m.size)
+        for Jtv_freq in self._frequency_map(Jtvec_frequency):
+            Jtv += Jtv_freq
         return Jtv
 
 
@@ -459,31 +470,39 @@ class Simulation3DPrimarySecondary(BaseNSEMSimulation):
             self.model = m
 
         F = self.fieldsPair(self)
-        for freq in self.survey.frequencies:
+
+        # Frequencies are independent, n_cpu of them are handled at once
+        def solve_frequency(nf, freq):
             if self.verbose:
                 startTime = time.time()
                 print("Starting work for {:.3e}".format(freq))
                 sys.stdout.flush()
-            A = self.getA(freq)
-            rhs = self.getRHS(freq)
-            # Solve the system
-            Ainv = self.solver(A, **self.solver_opts)
-            e_s = Ainv * rhs
-
-            # Store the fields
-            Src = self.survey.get_sources_by_frequency(freq)[0]
-            # Store the fields
-            # Use self._solutionType
-            F[Src, "e_pxSolution"] = e_s[:, 0]
-            F[Src, "e_pySolution"] = e_s[:, 1]
-            # Note curl e = -iwb so b = -curl/iw
+            Ainv = self._solve_frequency(F, freq)
 
             if self.verbose:
                 print("Ran for {:f} seconds".format(time.time() - startTime))
                 sys.stdout.flush()
             Ainv.clean()
+
+        self._frequency_map(solve_frequency)
         return F
 
+    def _solve_frequency(self, F, freq):
+        A = self.getA(freq)
+        rhs = self.getRHS(freq)
+        # Solve the system
+        Ainv = self.solver(A, **self.solver_opts)
+        e_s = Ainv * rhs
+
+        # Store the fields
+        Src = self.survey.get_sources_by_frequency(freq)[0]
+        # Store the fields
+        # Use self._solutionType
+        F[Src, "e_pxSolution"] = e_s[:, 0]
+        F[Src, "e_pySolution"] = e_s[:, 1]
+        # Note curl e = -iwb so b = -curl/iw
+        return Ainv
+
     # def fields2(self, freq):
     #     """
     #     Function to calculate all the fields for the model m.
@@ -4,7 +4,7 @@ from ....utils.code_utils import deprecate_class, deprecate_property
 
 from .... import props
 from ....data import Data
-from ....utils import sdiag
+from ....utils import sdiag, JtJ_diagonal
 
 from ..resistivity.simulation import BaseDCSimulation
 from ..resistivity.fields import Fields3DCellCentered, Fields3DNodal
@@ -88,17 +88,12 @@ class BaseIPSimulation(BaseDCSimulation):
         """
         Return the diagonal of JtJ
         """
+        if self.gtgdiag is None and self.n_jtj_probes is None:
+            f = self.fields(m)
+            w = self._scale if W is None else self._scale * W.diagonal()
+            self.gtgdiag = JtJ_diagonal(self._getJt_blocks(m, f=f), w)
 
-        if self.gtgdiag is None:
-            J = self.getJ(m)
-            if W is None:
-                W = self._scale ** 2
-            else:
-                W = (self._scale * W.diagonal()) ** 2
-
-            self.gtgdiag = np.einsum("i,ij,ij->j", W, J, J)
-
-        return self.gtgdiag
+        return super().getJtJdiag(m, W=W)
 
     # @profile
     def Jvec(self, m, v, f=None):
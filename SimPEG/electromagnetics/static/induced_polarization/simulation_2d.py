@@ -3,7 +3,7 @@ import properties
 from ....utils.code_utils import deprecate_class, deprecate_property
 
 from .... import props
-from ....utils import sdiag
+from ....utils import sdiag, JtJ_diagonal
 from ....data import Data
 
 from ..resistivity.fields_2d import Fields2D, Fields2DCellCentered, Fields2DNodal
@@ -77,16 +77,12 @@ class BaseIPSimulation2D(BaseDCSimulation2D):
         return self._pred
 
     def getJtJdiag(self, m, W=None):
-        if self.gtgdiag is None:
+        if self.gtgdiag is None and self.n_jtj_probes is None:
             J = self.getJ(m)
-            if W is None:
-                W = self._scale ** 2
-            else:
-                W = (self._scale * W.diagonal()) ** 2
-
-            self.gtgdiag = np.einsum("i,ij,ij->j", W, J, J)
+            w = self._scale if W is None else self._scale * W.diagonal()
+            self.gtgdiag = JtJ_diagonal([J.T], w)
 
-        return self.gtgdiag
+        return super().getJtJdiag(m, W=W)
 
     def Jvec(self, m, v, f=None):
         return self._scale * super().Jvec(m, v, f)
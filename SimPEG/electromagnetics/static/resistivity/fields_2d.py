@@ -124,7 +124,7 @@ class Fields2D(TimeFields):
         return phiSolution
 
     def _phi(self, phiSolution, source_list):
-        return phiSolution.dot(self.simulation._quad_weights)
+        return phiSolution.dot(self.simulation._ky_weights(self))
 
     def _phiDeriv_u(self, kyInd, src, v, adjoint=False):
         return Identity() * v
@@ -3,12 +3,12 @@ import scipy.sparse as sp
 import properties
 from ....utils.code_utils import deprecate_class
 
-from ....utils import mkvc, Zero
+from ....utils import mkvc, Zero, JtJ_diagonal, estimate_JtJ_diagonal
 from ....data import Data
 from ...base import BaseEMSimulation
 from .survey import Survey
 from .fields import Fields3DCellCentered, Fields3DNodal
-from .utils import _mini_pole_pole
+from .utils import _mini_pole_pole, _electrode_coefficients, _electrode_chunks
 from discretize.utils import make_boundary_bool
 
 
@@ -21,6 +21,20 @@ class BaseDCSimulation(BaseEMSimulation):
 
     storeJ = properties.Bool("store the sensitivity matrix?", default=False)
 
+    n_jtj_probes = properties.Integer(
+        "number of probing vectors for a matrix-free estimate of diag(JtJ), "
+        "J is used if None",
+        required=False,
+        min=1,
+    )
+
+    max_electrodes = properties.Integer(
+        "Maximum number of potential electrodes whose adjoint fields are "
+        "solved for at once when the sensitivities are built by reciprocity",
+        default=100,
+        min=1,
+    )
+
     _mini_survey = None
 
     Ainv = None
@@ -77,20 +91,32 @@ class BaseDCSimulation(BaseEMSimulation):
         Return the diagonal of JtJ
         """
         if self.gtgdiag is None:
-            J = self.getJ(m)
-
-            if W is None:
-                W = np.ones(J.shape[0])
+            w = None if W is None else W.diagonal()
+            if self.n_jtj_probes is not None:
+                f = self.fields(m)
+                self.gtgdiag = estimate_JtJ_diagonal(
+                    lambda v: self.Jvec(m, v, f=f),
+                    lambda v: self.Jtvec(m, v, f=f),
+                    self.model.size,
+                    w=w,
+                    k=self.n_jtj_probes,
+                )
             else:
-                W = W.diagonal() ** 2
-
-            diag = np.zeros(J.shape[1])
-            for i in range(J.shape[0]):
-                diag += (W[i]) * (J[i] * J[i])
-
-            self.gtgdiag = diag
+                self.gtgdiag = JtJ_diagonal(self._getJt_blocks(m), w)
         return self.gtgdiag
 
+    def _getJt_blocks(self, m, f=None):
+        """
+        Transposed blocks of rows of J. Unless J is stored, they are
+        computed one source (or receiver) at a time and J is never formed.
+        """
+        if self.storeJ or self._Jmatrix is not None or self._mini_survey is not None:
+            yield self.getJ(m, f=f).T
+        else:
+            if f is None:
+                f = self.fields(m)
+            yield from self._Jt_blocks(f, self.survey)
+
     def Jvec(self, m, v, f=None):
         """
         Compute sensitivity matrix (J) and vector (v) product.
@@ -150,28 +176,27 @@ class BaseDCSimulation(BaseEMSimulation):
         else:
             survey = self.survey
 
-        if v is not None:
-            if isinstance(v, Data):
-                v = v.dobs
-            v = self._mini_survey_dataT(v)
-            v = Data(survey, v)
-            Jtv = np.zeros(m.size)
-        else:
+        if v is None:
             # This is for forming full sensitivity matrix
             Jtv = np.zeros((self.model.size, survey.nD), order="F")
-            istrt = int(0)
-            iend = int(0)
+            istrt = 0
+            for Jt_block in self._Jt_blocks(f, survey):
+                iend = istrt + Jt_block.shape[1]
+                Jtv[:, istrt:iend] = Jt_block
+                istrt = iend
+            return (self._mini_survey_data(Jtv.T)).T
+
+        if isinstance(v, Data):
+            v = v.dobs
+        v = self._mini_survey_dataT(v)
+        v = Data(survey, v)
+        Jtv = np.zeros(m.size)
 
         for source in survey.source_list:
             u_source = f[source, self._solutionType].copy()
             for rx in source.receiver_list:
                 # wrt f, need possibility wrt m
-                if v is not None:
-                    PTv = rx.evalDeriv(
-                        source, self.mesh, f, v[source, rx], adjoint=True
-                    )
-                else:
-                    PTv = rx.evalDeriv(source, self.mesh, f).toarray().T
+                PTv = rx.evalDeriv(source, self.mesh, f, v[source, rx], adjoint=True)
 
                 df_duTFun = getattr(f, "_{0!s}Deriv".format(rx.projField), None)
                 df_duT, df_dmT = df_duTFun(source, None, PTv, adjoint=True)
@@ -181,20 +206,65 @@ class BaseDCSimulation(BaseEMSimulation):
                 dA_dmT = self.getADeriv(u_source, ATinvdf_duT, adjoint=True)
                 dRHS_dmT = self.getRHSDeriv(source, ATinvdf_duT, adjoint=True)
                 du_dmT = -dA_dmT + dRHS_dmT
-                if v is not None:
-                    Jtv += (df_dmT + du_dmT).astype(float)
-                else:
-                    iend = istrt + rx.nD
-                    if rx.nD == 1:
-                        Jtv[:, istrt] = df_dmT + du_dmT
-                    else:
-                        Jtv[:, istrt:iend] = df_dmT + du_dmT
-                    istrt += rx.nD
-
-        if v is not None:
-            return mkvc(Jtv)
-        else:
-            return (self._mini_survey_data(Jtv.T)).T
+                Jtv += (df_dmT + du_dmT).astype(float)
+
+        return mkvc(Jtv)
+
+    def _Jt_blocks(self, f, survey):
+        """
+        Yields the (transposed) sensitivities of the data of the survey, one
+        block of rows of J at a time.
+        """
+        electrodes = _electrode_coefficients(survey)
+        if electrodes is not None:
+            yield from self._Jt_reciprocity_blocks(f, survey, *electrodes)
+            return
+
+        for source in survey.source_list:
+            u_source = f[source, self._solutionType].copy()
+            for rx in source.receiver_list:
+                # wrt f, need possibility wrt m
+                PTv = rx.evalDeriv(source, self.mesh, f).toarray().T
+
+                df_duTFun = getattr(f, "_{0!s}Deriv".format(rx.projField), None)
+                df_duT, df_dmT = df_duTFun(source, None, PTv, adjoint=True)
+
+                ATinvdf_duT = self.Ainv * df_duT
+
+                dA_dmT = self.getADeriv(u_source, ATinvdf_duT, adjoint=True)
+                dRHS_dmT = self.getRHSDeriv(source, ATinvdf_duT, adjoint=True)
+                du_dmT = -dA_dmT + dRHS_dmT
+                yield np.reshape(df_dmT + du_dmT, (self.model.size, rx.nD))
+
+    def _Jt_reciprocity_blocks(self, f, survey, electrodes, coefficients):
+        """
+        Transposed sensitivities of potential data, from one adjoint solve
+        per unique potential electrode. The data of a source are combinations
+        of the potentials at the electrodes, so are their sensitivities
+        (reciprocity). The adjoint fields are solved for max_electrodes
+        electrodes at a time and added to the sensitivities of every source
+        using them, so the whole of Jt is held. Yields one block per source.
+        """
+        Q = self.mesh.getInterpolationMat(electrodes, f._GLoc("phi")).tocsr()
+        offsets = np.r_[0, np.cumsum([C.shape[0] for C in coefficients])]
+        Jt = np.zeros((self.model.size, offsets[-1]), order="F")
+
+        for chunk, sources in _electrode_chunks(coefficients, self.max_electrodes):
+            # Adjoint fields of a chunk of electrodes
+            ATinvQT = self.Ainv * Q[chunk].T.toarray()
+            ATinvQT = ATinvQT.reshape((Q.shape[1], -1), order="F")
+            for i_src, in_source in sources:
+                source = survey.source_list[i_src]
+                u_source = f[source, self._solutionType].copy()
+                v = ATinvQT[:, in_source]
+                dA_dmT = self.getADeriv(u_source, v, adjoint=True)
+                dRHS_dmT = self.getRHSDeriv(source, v, adjoint=True)
+                du_dmT = np.reshape(-dA_dmT + dRHS_dmT, (self.model.size, v.shape[1]))
+                C = coefficients[i_src][:, chunk[in_source]]
+                Jt[:, offsets[i_src] : offsets[i_src + 1]] += (C @ du_dmT.T).T
+
+        for i_src in range(len(coefficients)):
+            yield Jt[:, offsets[i_src] : offsets[i_src + 1]]
 
     def getSourceTerm(self):
         """
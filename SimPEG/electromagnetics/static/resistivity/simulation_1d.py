@@ -1,15 +1,14 @@
 import numpy as np
+import scipy.sparse as sp
 import properties
 
-from ....utils import mkvc
+from ....utils import mkvc, Zero, Identity
 from ...base import BaseEMSimulation
 from ....data import Data
 from .... import props
 
 from .survey import Survey
 
-from empymod.transform import dlf
-
 try:
     from empymod.transform import get_spline_values as get_dlf_points
 except ImportError:
@@ -18,9 +17,67 @@ from empymod.utils import check_hankel
 from ..utils import static_utils
 
 
+def _layer_kernel(rho, thicknesses, lambd, return_derivs=False):
+    """
+    Kernel of the potential of a point source at the surface of a layered
+    earth, for many soundings at once.
+
+    The recursion runs over the layers, from the bottom one up, and is
+    vectorized over the rows, e.g. the electrode separations of every
+    sounding. With return_derivs, the derivatives with respect to the
+    resistivities and thicknesses of the layers are computed by a sweep back
+    down the layers.
+
+    :param numpy.ndarray rho: (n_rows, n_layer) resistivities of the layers
+    :param numpy.ndarray thicknesses: (n_rows, n_layer - 1) thicknesses
+    :param numpy.ndarray lambd: (n_rows, n_filter) spatial frequencies
+    :param bool return_derivs: also return the derivatives
+    :rtype: numpy.ndarray or tuple
+    :return: (n_rows, n_filter) kernel and, with return_derivs, its
+        (n_layer, n_rows, n_filter) and (n_layer - 1, n_rows, n_filter)
+        derivatives with respect to rho and thicknesses
+    """
+    n_layer = rho.shape[1]
+    T = [None] * n_layer
+    th = [None] * (n_layer - 1)
+    den = [None] * (n_layer - 1)
+
+    T[-1] = rho[:, -1:] * np.ones_like(lambd)
+    for ii in range(n_layer - 2, -1, -1):
+        r = rho[:, ii : ii + 1]
+        th[ii] = np.tanh(lambd * thicknesses[:, ii : ii + 1])
+        den[ii] = 1.0 + T[ii + 1] * th[ii] / r
+        T[ii] = (T[ii + 1] + r * th[ii]) / den[ii]
+
+    if not return_derivs:
+        return T[0]
+
+    dT_drho = np.empty((n_layer,) + lambd.shape)
+    dT_dt = np.empty((n_layer - 1,) + lambd.shape)
+    # derivative of the top kernel with respect to the kernel of layer ii
+    dT0 = np.ones_like(lambd)
+    for ii in range(n_layer - 1):
+        r = rho[:, ii : ii + 1]
+        dT_drho[ii] = dT0 * (
+            th[ii] / den[ii] + T[ii] * T[ii + 1] * th[ii] / (r ** 2 * den[ii])
+        )
+        dT_dth = (r - T[ii] * T[ii + 1] / r) / den[ii]
+        dT_dt[ii] = dT0 * dT_dth * lambd * (1.0 - th[ii] ** 2)
+        dT0 = dT0 * (1.0 - th[ii] ** 2) / den[ii] ** 2
+    dT_drho[-1] = dT0
+
+    return T[0], dT_drho, dT_dt
+
+
 class Simulation1DLayers(BaseEMSimulation):
     """
     1D DC Simulation
+
+    Several soundings, each with its own layered model, can be simulated at
+    once by giving the sounding of each source in sounding_index. The model
+    then holds the resistivities of the layers of each sounding in turn, and
+    the thicknesses are either shared by every sounding or also given for
+    each sounding in turn.
     """
 
     thicknesses, thicknessesMap, thicknessesDeriv = props.Invertible(
@@ -31,6 +88,20 @@ class Simulation1DLayers(BaseEMSimulation):
 
     storeJ = properties.Bool("store the sensitivity", default=False)
 
+    sounding_index = properties.Array(
+        "index of the sounding of each source. By default, all the sources "
+        "are in a single sounding",
+        dtype=int,
+        required=False,
+    )
+
+    max_kernel_rows = properties.Integer(
+        "Maximum number of rows, i.e. electrode separations, whose layer "
+        "kernel (and its derivatives) is computed at once",
+        default=2000,
+        min=1,
+    )
+
     data_type = "volt"
     hankel_pts_per_dec = None  # Default: Standard DLF
 
@@ -58,6 +129,11 @@ class Simulation1DLayers(BaseEMSimulation):
             self.hankel_pts_per_dec = htarg["pts_per_dec"]  # Store pts_per_dec
         self.hankel_filter = self.fhtfilt.name  # Store name
         self.n_filter = self.fhtfilt.base.size
+        if self.hankel_pts_per_dec != 0:
+            raise NotImplementedError(
+                "Only the standard DLF is implemented (hankel_pts_per_dec=None), "
+                "the kernel is evaluated at the filter points of each offset"
+            )
 
     def fields(self, m):
 
@@ -67,40 +143,66 @@ class Simulation1DLayers(BaseEMSimulation):
         if self.verbose:
             print(">> Compute fields")
 
-        # TODO: this for loop can slow down the speed, cythonize below for loop
-        T1 = self.rho[self.n_layer - 1] * np.ones_like(self.lambd)
-        for ii in range(self.n_layer - 1, 0, -1):
-            rho0 = self.rho[ii - 1]
-            t0 = self.thicknesses[ii - 1]
-            T0 = (T1 + rho0 * np.tanh(self.lambd * t0)) / (
-                1.0 + (T1 * np.tanh(self.lambd * t0) / rho0)
-            )
-            T1 = T0
-        PJ = (T0, None, None)
-        try:
-            voltage = dlf(
-                PJ,
-                self.lambd,
-                self.offset,
-                self.fhtfilt,
-                self.hankel_pts_per_dec,
-                factAng=None,
-                ab=33,
-            ).real / (2 * np.pi)
-        except TypeError:
-            voltage = dlf(
-                PJ,
-                self.lambd,
-                self.offset,
-                self.fhtfilt,
-                self.hankel_pts_per_dec,
-                ang_fact=None,
-                ab=33,
-            ).real / (2 * np.pi)
+        return self._data_from_voltage(self._voltage())
+
+    def _layer_model(self):
+        """
+        Resistivities and thicknesses of the layers below each row, i.e.
+        electrode separation, of the survey.
+        """
+        n_layer = self.n_layer
+        rho = np.reshape(self.rho, (self.n_sounding, n_layer))[self._row_sounding]
+        if n_layer == 1:
+            return rho, np.zeros((rho.shape[0], 0))
+        thicknesses = np.reshape(self.thicknesses, (-1, n_layer - 1))
+        if thicknesses.shape[0] == 1:
+            thicknesses = np.repeat(thicknesses, rho.shape[0], axis=0)
+        else:
+            thicknesses = thicknesses[self._row_sounding]
+        return rho, thicknesses
 
+    def _voltage(self, return_derivs=False):
+        """
+        Potential of each row, i.e. electrode separation, from the digital
+        linear filter (Hankel transform) of its kernel. The kernel is computed
+        for max_kernel_rows rows at a time. With return_derivs, also returns
+        the (n_layer, n_rows) and (n_layer - 1, n_rows) derivatives of the
+        potentials with respect to the resistivities and thicknesses.
+        """
+        rho, thicknesses = self._layer_model()
+        lambd = self.lambd
+        n_rows, n_layer = rho.shape
+        scale = 1.0 / (2 * np.pi * self.offset)
+        j0 = self.fhtfilt.j0
+
+        voltage = np.empty(n_rows)
+        if return_derivs:
+            dv_drho = np.empty((n_layer, n_rows))
+            dv_dt = np.empty((n_layer - 1, n_rows))
+        for start in range(0, n_rows, self.max_kernel_rows):
+            rows = slice(start, start + self.max_kernel_rows)
+            kernel = _layer_kernel(
+                rho[rows], thicknesses[rows], lambd[rows], return_derivs=return_derivs
+            )
+            if not return_derivs:
+                voltage[rows] = np.dot(kernel, j0) * scale[rows]
+                continue
+            T, dT_drho, dT_dt = kernel
+            voltage[rows] = np.dot(T, j0) * scale[rows]
+            dv_drho[:, rows] = np.dot(dT_drho, j0) * scale[rows]
+            dv_dt[:, rows] = np.dot(dT_dt, j0) * scale[rows]
+
+        if return_derivs:
+            return voltage, dv_drho, dv_dt
+        return voltage
+
+    def _data_from_voltage(self, voltage):
+        """
+        Data from the potentials of each row, or from their derivatives.
+        """
         # Assume dipole-dipole
-        V = voltage.reshape((self.survey.nD, 4), order="F")
-        data = V[:, 0] + V[:, 1] - (V[:, 2] + V[:, 3])
+        V = voltage.reshape(voltage.shape[:-1] + (4, self.survey.nD))
+        data = V[..., 0, :] + V[..., 1, :] - (V[..., 2, :] + V[..., 3, :])
 
         if self.data_type == "apparent_resistivity":
             data /= self.geometric_factor
@@ -125,40 +227,61 @@ class Simulation1DLayers(BaseEMSimulation):
 
         return f
 
-    def getJ(self, m, f=None, factor=1e-2):
+    def getJ(self, m, f=None):
         """
-        Generate Full sensitivity matrix using central difference
+        Generate Full sensitivity matrix, from the derivatives of the layer
+        recursion.
+
+        With several soundings, each datum only depends on the model of its
+        sounding and the sensitivity is stored as a sparse matrix.
         """
         if self._Jmatrix is not None:
             return self._Jmatrix
-        else:
-            if self.verbose:
-                print("Calculating J and storing")
-            self.model = m
-
-            # TODO: this makes code quite slow derive analytic sensitivity
-            N = self.survey.nD
-            M = self.model.size
-            Jmatrix = np.zeros((N, M), dtype=float, order="F")
-            for ii in range(M):
-                m0 = m.copy()
-                dm = m[ii] * factor
-                m0[ii] = m[ii] - dm * 0.5
-                m1 = m.copy()
-                m1[ii] = m[ii] + dm * 0.5
-                d0 = self.fields(m0)
-                d1 = self.fields(m1)
-                Jmatrix[:, ii] = (d1 - d0) / (dm)
-            self._Jmatrix = Jmatrix
+        if self.verbose:
+            print("Calculating J and storing")
+        self.model = m
+
+        _, dv_drho, dv_dt = self._voltage(return_derivs=True)
+
+        J = 0.0
+        if not isinstance(self.rhoDeriv, Zero):
+            dd_drho = self._data_from_voltage(dv_drho)
+            J = J + self._stitch(dd_drho, self.rho, self.rhoDeriv)
+        if not isinstance(self.thicknessesDeriv, Zero) and self.n_layer > 1:
+            dd_dt = self._data_from_voltage(dv_dt)
+            J = J + self._stitch(dd_dt, self.thicknesses, self.thicknessesDeriv)
+
+        if self.n_sounding == 1 and sp.issparse(J):
+            J = J.toarray()
+        self._Jmatrix = J
         return self._Jmatrix
 
+    def _stitch(self, dd, prop, deriv):
+        """
+        Sensitivity to the model from the (n_param, nD) derivatives of each
+        datum with respect to a property of the layers of its sounding. The
+        property is either shared by every sounding or given for each one.
+        """
+        n_param, nD = dd.shape
+        rows = np.repeat(np.arange(nD), n_param)
+        cols = np.tile(np.arange(n_param), nD)
+        n_sounding = np.size(prop) // n_param
+        if n_sounding > 1:
+            cols += n_param * np.repeat(self._row_sounding[:nD], n_param)
+        J = sp.csr_matrix(
+            (dd.T.ravel(), (rows, cols)), shape=(nD, n_sounding * n_param)
+        )
+        if isinstance(deriv, Identity):
+            return J
+        return J * deriv
+
     def Jvec(self, m, v, f=None):
         """
         Compute sensitivity matrix (J) and vector (v) product.
         """
 
         J = self.getJ(m, f=f)
-        Jv = mkvc(np.dot(J, v))
+        Jv = J.dot(v)
 
         return mkvc(Jv)
 
@@ -168,7 +291,7 @@ class Simulation1DLayers(BaseEMSimulation):
         """
 
         J = self.getJ(m, f=f)
-        Jtv = mkvc(np.dot(J.T, v))
+        Jtv = mkvc(J.T.dot(v))
 
         return Jtv
 
@@ -216,10 +339,7 @@ class Simulation1DLayers(BaseEMSimulation):
         """
         # TODO: only works isotropic sigma
         if getattr(self, "_lambd", None) is None:
-            self._lambd = np.empty(
-                [self.offset.size, self.n_filter], order="F", dtype=complex
-            )
-            self.lambd[:, :], _ = get_dlf_points(
+            self._lambd, _ = get_dlf_points(
                 self.fhtfilt, self.offset, self.hankel_pts_per_dec
             )
         return self._lambd
@@ -240,9 +360,36 @@ class Simulation1DLayers(BaseEMSimulation):
         number of layers
         """
         # TODO: only works isotropic sigma
-        if getattr(self, "_n_layer", None) is None:
-            self._n_layer = self.thicknesses.size + 1
-        return self._n_layer
+        return np.size(self.rho) // self.n_sounding
+
+    @property
+    def n_sounding(self):
+        """
+        number of soundings
+        """
+        if self.sounding_index is None:
+            return 1
+        return int(self.sounding_index.max()) + 1
+
+    @property
+    def _row_sounding(self):
+        """
+        Sounding of each row, i.e. electrode separation, of the survey
+        """
+        if getattr(self, "_row_soundings", None) is None:
+            if self.sounding_index is None:
+                sounding = np.zeros(self.survey.nD, dtype=int)
+            else:
+                sounding = np.repeat(
+                    self.sounding_index,
+                    [src.nD for src in self.survey.source_list],
+                )
+            self._row_soundings = np.tile(sounding, 4)
+        return self._row_soundings
+
+    @properties.observer("sounding_index")
+    def _clear_row_soundings(self, change):
+        self._row_soundings = None
 
     @property
     def geometric_factor(self):
@@ -1,17 +1,25 @@
 import numpy as np
 from scipy.optimize import minimize
+import threading
 import warnings
 import properties
 from ....utils.code_utils import deprecate_class
 
-from ....utils import mkvc, sdiag, Zero
+from ....utils import (
+    mkvc,
+    sdiag,
+    Zero,
+    parallel_map,
+    JtJ_diagonal,
+    estimate_JtJ_diagonal,
+)
 from ...base import BaseEMSimulation
 from ....data import Data
 
 from .survey import Survey
 from .fields_2d import Fields2D, Fields2DCellCentered, Fields2DNodal
 from .fields import FieldsDC, Fields3DCellCentered, Fields3DNodal
-from .utils import _mini_pole_pole
+from .utils import _mini_pole_pole, _electrode_coefficients, _electrode_chunks
 from scipy.special import k0e, k1e, k0
 from discretize.utils import make_boundary_bool
 
@@ -25,14 +33,51 @@ class BaseDCSimulation2D(BaseEMSimulation):
 
     storeJ = properties.Bool("store the sensitivity matrix?", default=False)
 
+    n_jtj_probes = properties.Integer(
+        "number of probing vectors for a matrix-free estimate of diag(JtJ), "
+        "J is used if None",
+        required=False,
+        min=1,
+    )
+
     nky = properties.Integer(
         "Number of kys to use in wavenumber space", required=False, default=11
     )
 
+    n_cpu = properties.Integer(
+        "Number of wavenumbers factored and solved at once, by a pool of threads",
+        default=1,
+        min=1,
+    )
+
+    max_factors = properties.Integer(
+        "Maximum number of factorizations kept in memory after the forward "
+        "simulation, for Jvec and Jtvec. The factors of the other wavenumbers "
+        "are recomputed when needed. Each thread holds one more while solving.",
+        required=False,
+        min=0,
+    )
+
+    ky_tolerance = properties.Float(
+        "Wavenumbers whose weighted contribution to the data is below this "
+        "fraction of the data norm are dropped from the data and sensitivities "
+        "of the fields, with their quadrature weights set to zero",
+        default=0.0,
+        min=0.0,
+    )
+
+    max_electrodes = properties.Integer(
+        "Maximum number of potential electrodes whose adjoint fields are "
+        "solved for at once when the sensitivities are built by reciprocity",
+        default=100,
+        min=1,
+    )
+
     fieldsPair = Fields2D  # SimPEG.EM.Static.Fields_2D
     fieldsPair_fwd = FieldsDC
     # there's actually nT+1 fields, so we don't need to store the last one
     _Jmatrix = None
+    gtgdiag = None
     fix_Jmatrix = False
     _mini_survey = None
 
@@ -118,25 +163,107 @@ class BaseDCSimulation2D(BaseEMSimulation):
             print(">> Compute fields")
         if m is not None:
             self.model = m
-        if self.Ainv[0] is not None:
-            for i in range(self.nky):
+        for i in range(self.nky):
+            if self.Ainv[i] is not None:
                 self.Ainv[i].clean()
+                self.Ainv[i] = None
         f = self.fieldsPair(self)
-        kys = self._quad_points
         f._quad_weights = self._quad_weights
-        for iky, ky in enumerate(kys):
+
+        def solve_ky(iky, ky):
             A = self.getA(ky)
-            if self.Ainv[iky] is not None:
-                self.Ainv[iky].clean()
-            self.Ainv[iky] = self.solver(A, **self.solver_opts)
+            Ainv = self.solver(A, **self.solver_opts)
             RHS = self.getRHS(ky)
-            u = self.Ainv[iky] * RHS
+            u = Ainv * RHS
             f[:, self._solutionType, iky] = u
+            if self.max_factors is None or iky < self.max_factors:
+                self.Ainv[iky] = Ainv
+            else:
+                Ainv.clean()
+
+        self._ky_map(solve_ky, range(self.nky))
+
+        # The wavenumbers used by the sensitivities belong to these fields
+        f._active_kys = np.ones(self.nky, dtype=bool)
+        if self.ky_tolerance > 0:
+            f._active_kys = self._significant_kys(f)
+            for iky in np.where(~f._active_kys)[0]:
+                if self.Ainv[iky] is not None:
+                    self.Ainv[iky].clean()
+                    self.Ainv[iky] = None
         return f
 
+    def _ky_map(self, fun, kys_index):
+        """
+        Apply fun(iky, ky) to the given wavenumbers, with n_cpu of them
+        handled at once. The results are in the order of kys_index.
+
+        The first wavenumber is handled alone, so that the matrices shared by
+        all of them and built on first use (mass matrices, mesh operators)
+        are created before the threads start.
+        """
+        kys = self._quad_points
+        kys_index = list(kys_index)
+        if len(kys_index) == 0:
+            return []
+        return [fun(kys_index[0], kys[kys_index[0]])] + parallel_map(
+            lambda iky: fun(iky, kys[iky]), kys_index[1:], n_workers=self.n_cpu
+        )
+
+    def _get_Ainv(self, iky, ky):
+        """Factors of A at a wavenumber, refactored if they were not kept"""
+        Ainv = self.Ainv[iky]
+        if Ainv is None:
+            Ainv = self.solver(self.getA(ky), **self.solver_opts)
+        return Ainv
+
+    def _release_Ainv(self, iky, Ainv):
+        """Clean factors that were computed on demand"""
+        if self.Ainv[iky] is None:
+            Ainv.clean()
+
+    def _significant_kys(self, f):
+        """
+        Wavenumbers whose weighted contribution to the (miniaturized) data is
+        above ky_tolerance times the norm of the data.
+        """
+        if self._mini_survey is not None:
+            survey = self._mini_survey
+        else:
+            survey = self.survey
+
+        d_ky = np.vstack(
+            [
+                np.atleast_2d(rx.eval(src, self.mesh, f)).reshape(rx.nD, self.nky)
+                for src in survey.source_list
+                for rx in src.receiver_list
+            ]
+        )
+        d_ky = d_ky * self._quad_weights
+        contribution = np.linalg.norm(d_ky, axis=0)
+        return contribution > self.ky_tolerance * np.linalg.norm(d_ky.sum(axis=1))
+
+    def _kys_index(self, f):
+        """Indices of the wavenumbers of the fields used by the sensitivities"""
+        active = getattr(f, "_active_kys", None)
+        if active is None:
+            return range(self.nky)
+        return np.where(active)[0]
+
+    def _ky_weights(self, f):
+        """
+        Quadrature weights of the wavenumbers of the fields, zero for those
+        skipped with ky_tolerance, so that the data and the sensitivities
+        integrate the same wavenumbers.
+        """
+        active = getattr(f, "_active_kys", None)
+        if active is None:
+            return self._quad_weights
+        return np.where(active, self._quad_weights, 0.0)
+
     def fields_to_space(self, f, y=0.0):
         f_fwd = self.fieldsPair_fwd(self)
-        phi = f[:, self._solutionType, :].dot(self._quad_weights)
+        phi = f[:, self._solutionType, :].dot(self._ky_weights(f))
         f_fwd[:, self._solutionType] = phi
         return f_fwd
 
@@ -152,7 +279,7 @@ class BaseDCSimulation2D(BaseEMSimulation):
                 m = self.model
             f = self.fields(m)
 
-        weights = self._quad_weights
+        weights = self._ky_weights(f)
         if self._mini_survey is not None:
             survey = self._mini_survey
         else:
@@ -183,6 +310,26 @@ class BaseDCSimulation2D(BaseEMSimulation):
             self._Jmatrix = (self._Jtvec(m, v=None, f=f)).T
         return self._Jmatrix
 
+    def getJtJdiag(self, m, W=None):
+        """
+        Return the diagonal of JtJ
+        """
+        if self.gtgdiag is None:
+            w = None if W is None else W.diagonal()
+            if self.n_jtj_probes is not None:
+                f = self.fields(m)
+                self.gtgdiag = estimate_JtJ_diagonal(
+                    lambda v: self.Jvec(m, v, f=f),
+                    lambda v: self.Jtvec(m, v, f=f),
+                    self.model.size,
+                    w=w,
+                    k=self.n_jtj_probes,
+                )
+            else:
+                # the wavenumbers of a datum all add to the same row of J
+                self.gtgdiag = JtJ_diagonal([self.getJ(m).T], w)
+        return self.gtgdiag
+
     def Jvec(self, m, v, f=None):
         """
         Compute sensitivity matrix (J) and vector (v) product.
@@ -202,22 +349,22 @@ class BaseDCSimulation2D(BaseEMSimulation):
         else:
             survey = self.survey
 
-        kys = self._quad_points
         weights = self._quad_weights
 
-        Jv = np.zeros(survey.nD)
         # Assume y=0.
         # This needs some thoughts to implement in general when src is dipole
 
-        # TODO: this loop is pretty slow .. (Parellize)
-        for iky, ky in enumerate(kys):
+        # Wavenumbers are independent, n_cpu of them are handled at once
+        def Jvec_ky(iky, ky):
+            Ainv = self._get_Ainv(iky, ky)
+            Jv = np.zeros(survey.nD)
             u_ky = f[:, self._solutionType, iky]
             count = 0
             for i_src, src in enumerate(survey.source_list):
                 u_src = u_ky[:, i_src]
                 dA_dm_v = self.getADeriv(ky, u_src, v, adjoint=False)
                 # dRHS_dm_v = self.getRHSDeriv(ky, src, v) = 0
-                du_dm_v = self.Ainv[iky] * (-dA_dm_v)  # + dRHS_dm_v)
+                du_dm_v = Ainv * (-dA_dm_v)  # + dRHS_dm_v)
                 for rx in src.receiver_list:
                     df_dmFun = getattr(f, "_{0!s}Deriv".format(rx.projField), None)
                     df_dm_v = df_dmFun(iky, src, du_dm_v, v, adjoint=False)
@@ -225,6 +372,12 @@ class BaseDCSimulation2D(BaseEMSimulation):
                     # Trapezoidal intergration
                     Jv[count : count + len(Jv1_temp)] += weights[iky] * Jv1_temp
                     count += len(Jv1_temp)
+            self._release_Ainv(iky, Ainv)
+            return Jv
+
+        Jv = np.zeros(survey.nD)
+        for Jv_ky in self._ky_map(Jvec_ky, self._kys_index(f)):
+            Jv += Jv_ky
 
         return self._mini_survey_data(Jv)
 
@@ -249,7 +402,6 @@ class BaseDCSimulation2D(BaseEMSimulation):
         Compute adjoint sensitivity matrix (J^T) and vector (v) product.
         Full J matrix can be computed by inputing v=None
         """
-        kys = self._quad_points
         weights = self._quad_weights
         if self._mini_survey is not None:
             survey = self._mini_survey
@@ -261,9 +413,11 @@ class BaseDCSimulation2D(BaseEMSimulation):
             if isinstance(v, Data):
                 v = v.dobs
             v = self._mini_survey_dataT(v)
-            Jtv = np.zeros(m.size, dtype=float)
 
-            for iky, ky in enumerate(kys):
+            # Wavenumbers are independent, n_cpu of them are handled at once
+            def Jtvec_ky(iky, ky):
+                Ainv = self._get_Ainv(iky, ky)
+                Jtv = np.zeros(m.size, dtype=float)
                 u_ky = f[:, self._solutionType, iky]
                 count = 0
                 for i_src, src in enumerate(survey.source_list):
@@ -280,36 +434,75 @@ class BaseDCSimulation2D(BaseEMSimulation):
                         df_duT_sum += df_duT
                         df_dmT_sum += df_dmT
 
-                    ATinvdf_duT = self.Ainv[iky] * df_duT_sum
+                    ATinvdf_duT = Ainv * df_duT_sum
 
                     dA_dmT = self.getADeriv(ky, u_src, ATinvdf_duT, adjoint=True)
                     # dRHS_dmT = self.getRHSDeriv(ky, src, ATinvdf_duT,
                     #                            adjoint=True)
                     du_dmT = -dA_dmT  # + dRHS_dmT=0
                     Jtv += weights[iky] * (df_dmT + du_dmT).astype(float)
+                self._release_Ainv(iky, Ainv)
+                return Jtv
+
+            Jtv = np.zeros(m.size, dtype=float)
+            for Jtv_ky in self._ky_map(Jtvec_ky, self._kys_index(f)):
+                Jtv += Jtv_ky
             return mkvc(Jtv)
 
         else:
             # This is for forming full sensitivity matrix
+            electrodes = _electrode_coefficients(survey)
+            if electrodes is not None:
+                electrodes, coefficients = electrodes
+                Q = self.mesh.getInterpolationMat(electrodes, f._GLoc("phi")).tocsr()
+
+            # The wavenumbers all add to one Jt, a block at a time
             Jt = np.zeros((self.model.size, survey.nD), order="F")
-            for iky, ky in enumerate(kys):
+            lock = threading.Lock()
+
+            def Jt_ky(iky, ky):
+                Ainv = self._get_Ainv(iky, ky)
                 u_ky = f[:, self._solutionType, iky]
                 istrt = 0
+                if electrodes is not None:
+                    # One adjoint solve per unique electrode (reciprocity), for
+                    # max_electrodes electrodes at a time
+                    offsets = np.r_[0, np.cumsum([C.shape[0] for C in coefficients])]
+                    for chunk, sources in _electrode_chunks(
+                        coefficients, self.max_electrodes
+                    ):
+                        ATinvQT = Ainv * Q[chunk].T.toarray()
+                        ATinvQT = ATinvQT.reshape((Q.shape[1], -1), order="F")
+                        for i_src, in_source in sources:
+                            v = ATinvQT[:, in_source]
+                            dA_dmT = self.getADeriv(ky, u_ky[:, i_src], v, adjoint=True)
+                            dA_dmT = np.reshape(dA_dmT, (self.model.size, v.shape[1]))
+                            C = coefficients[i_src][:, chunk[in_source]]
+                            Jt_src = weights[iky] * (C @ dA_dmT.T).T
+                            with lock:
+                                Jt[:, offsets[i_src] : offsets[i_src + 1]] -= Jt_src
+                    self._release_Ainv(iky, Ainv)
+                    return
+
                 for i_src, src in enumerate(survey.source_list):
                     u_src = u_ky[:, i_src]
                     for rx in src.receiver_list:
                         # wrt f, need possibility wrt m
                         PT = rx.evalDeriv(src, self.mesh, f).toarray().T
-                        ATinvdf_duT = self.Ainv[iky] * PT
+                        ATinvdf_duT = Ainv * PT
 
                         dA_dmT = self.getADeriv(ky, u_src, ATinvdf_duT, adjoint=True)
                         Jtv = -weights[iky] * dA_dmT  # RHS=0
                         iend = istrt + rx.nD
-                        if rx.nD == 1:
-                            Jt[:, istrt] += Jtv
-                        else:
-                            Jt[:, istrt:iend] += Jtv
+                        with lock:
+                            if rx.nD == 1:
+                                Jt[:, istrt] += Jtv
+                            else:
+                                Jt[:, istrt:iend] += Jtv
                         istrt += rx.nD
+                self._release_Ainv(iky, Ainv)
+
+            self._ky_map(Jt_ky, self._kys_index(f))
             return (self._mini_survey_data(Jt.T)).T
 
     def getSourceTerm(self, ky):
@@ -351,6 +544,8 @@ class BaseDCSimulation2D(BaseEMSimulation):
 
         if self._Jmatrix is not None:
             toDelete += ["_Jmatrix"]
+        if self.gtgdiag is not None:
+            toDelete += ["gtgdiag"]
         return toDelete
 
     def _mini_survey_data(self, d_mini):
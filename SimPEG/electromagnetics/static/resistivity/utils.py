@@ -1,5 +1,7 @@
 import numpy as np
+import scipy.sparse as sp
 
+from ....utils import sdiag
 from . import receivers
 from . import sources
 from .survey import Survey
@@ -107,3 +109,77 @@ def _mini_pole_pole(survey, verbose=False):
     invs = [inv_AM, inv_AN, inv_BM, inv_BN]
     mini_survey = Survey(unique_sources)
     return dipoles, invs, mini_survey
+
+
+def _electrode_coefficients(survey):
+    """Express the potential receivers of a survey from their unique electrodes.
+
+    With reciprocity, the sensitivities of every receiver follow from one
+    adjoint solve per unique potential (M/N) electrode, rather than one per
+    datum. The projection of the data of each source is
+
+        P_src = coefficients[i_src] @ Q
+
+    where Q interpolates the potential at the unique electrodes.
+
+    Returns (electrodes, coefficients), with electrodes the (n_electrodes, dim)
+    array of unique locations and coefficients a list, for each source, of
+    sparse (nD_src, n_electrodes) matrices. Returns None if a receiver does not
+    measure the potential.
+    """
+    locations = []
+    for src in survey.source_list:
+        for rx in src.receiver_list:
+            if rx.projField != "phi" or not isinstance(
+                rx, (receivers.Pole, receivers.Dipole)
+            ):
+                return None
+            if isinstance(rx, receivers.Dipole):
+                locations += [rx.locations_m, rx.locations_n]
+            else:
+                locations.append(rx.locations)
+
+    electrodes, inverse = np.unique(np.vstack(locations), axis=0, return_inverse=True)
+    n_electrodes = electrodes.shape[0]
+
+    coefficients = []
+    count = 0
+    for src in survey.source_list:
+        rows = []
+        for rx in src.receiver_list:
+            n_poles = 2 if isinstance(rx, receivers.Dipole) else 1
+            C = 0
+            for i_pole, sign in zip(range(n_poles), [1.0, -1.0]):
+                columns = inverse[count : count + rx.nD]
+                count += rx.nD
+                C = C + sp.csr_matrix(
+                    (sign * np.ones(rx.nD), (np.arange(rx.nD), columns)),
+                    shape=(rx.nD, n_electrodes),
+                )
+            if rx.data_type == "apparent_resistivity":
+                C = sdiag(1.0 / rx.geometric_factor[src]) @ C
+            rows.append(C)
+        coefficients.append(sp.vstack(rows).tocsr())
+
+    return electrodes, coefficients
+
+
+def _electrode_chunks(coefficients, max_electrodes):
+    """Split the electrodes used by the data in chunks of max_electrodes.
+
+    Yields (chunk, sources), with chunk the indices of at most
+    max_electrodes unique electrodes and sources a list of
+    (i_src, in_source) for the sources using electrodes of the chunk,
+    in_source masking those electrodes in chunk. Every electrode is in
+    exactly one chunk, so its adjoint field is solved for once.
+    """
+    used = [np.unique(C.indices) for C in coefficients]
+    electrodes = np.unique(np.hstack(used)).astype(int)
+    for start in range(0, len(electrodes), max_electrodes):
+        chunk = electrodes[start : start + max_electrodes]
+        sources = []
+        for i_src, source_electrodes in enumerate(used):
+            in_source = np.isin(chunk, source_electrodes, assume_unique=True)
+            if np.any(in_source):
+                sources.append((i_src, in_source))
+        yield chunk, sources
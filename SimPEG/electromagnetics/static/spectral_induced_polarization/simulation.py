@@ -8,7 +8,7 @@ import properties
 from .... import props
 from .... import maps
 from .data import Data
-from ....utils import sdiag
+from ....utils import sdiag, Zero, JtJ_diagonal
 
 from ...base import BaseEMSimulation
 from ..resistivity.fields import FieldsDC, Fields3DCellCentered, Fields3DNodal
@@ -152,7 +152,7 @@ class BaseSIPSimulation(BaseEMSimulation):
             if v.ndim == 1:
                 return etaDeriv.T * (dpetadeta * v)
             else:
-                return etaDeriv.T * (Utils.sdiag(dpetadeta) * v)
+                return etaDeriv.T * (sdiag(dpetadeta) * v)
         else:
             return dpetadeta * (etaDeriv * v)
 
@@ -192,7 +192,7 @@ class BaseSIPSimulation(BaseEMSimulation):
             if v.ndim == 1:
                 return tauiDeriv.T * (dpetadtaui * v)
             else:
-                return tauiDeriv.T * (Utils.sdiag(dpetadtaui) * v)
+                return tauiDeriv.T * (sdiag(dpetadtaui) * v)
         else:
             return dpetadtaui * (tauiDeriv * v)
 
@@ -233,7 +233,7 @@ class BaseSIPSimulation(BaseEMSimulation):
             if v.ndim == 1:
                 return cDeriv.T * (dpetadc * v)
             else:
-                return cDeriv.T * (Utils.sdiag(dpetadc) * v)
+                return cDeriv.T * (sdiag(dpetadc) * v)
         else:
             return dpetadc * (cDeriv * v)
 
@@ -318,26 +318,39 @@ class BaseSIPSimulation(BaseEMSimulation):
 
             return self._Jmatrix
 
-    def getJtJdiag(self, m, Wd):
+    def getJtJdiag(self, m, W=None):
         """
         Compute JtJ using adjoint problem. Still we never form
-        JtJ
+        JtJ, the squared sensitivities are summed over blocks of
+        receivers, one time channel at a time.
         """
         if self.verbose:
             print(">> Compute trace(JtJ)")
         ntime = len(self.survey.unique_times)
-        JtJdiag = np.zeros_like(m)
         J = self.getJ(m, f=None)
-        wd = (Wd.diagonal()).reshape((self.survey.locations_n, ntime), order="F")
-        for tind in range(ntime):
-            t = self.survey.unique_times[tind]
-            Jtv = self.actMap.P * J.T * Utils.sdiag(wd[:, tind])
-            JtJdiag += (
-                (self.PetaEtaDeriv(t, Jtv, adjoint=True) ** 2).sum(axis=1)
-                + (self.PetaTauiDeriv(t, Jtv, adjoint=True) ** 2).sum(axis=1)
-                + (self.PetaCDeriv(t, Jtv, adjoint=True) ** 2).sum(axis=1)
-            )
-        return JtJdiag
+        if W is None:
+            wd = np.ones((self.survey.n_locations, ntime))
+        else:
+            wd = W.diagonal().reshape((self.survey.n_locations, ntime), order="F")
+
+        # about 8 Mb of J per block
+        n_rows = max(int(1e6 // J.shape[1]), 1)
+
+        def Jt_blocks():
+            for tind, t in enumerate(self.survey.unique_times):
+                for istrt in range(0, J.shape[0], n_rows):
+                    iend = istrt + n_rows
+                    Jtv = self.actMap.P * (J[istrt:iend].T * wd[istrt:iend, tind])
+                    for PetaDeriv in [
+                        self.PetaEtaDeriv,
+                        self.PetaTauiDeriv,
+                        self.PetaCDeriv,
+                    ]:
+                        Jt = PetaDeriv(t, Jtv, adjoint=True)
+                        if not isinstance(Jt, Zero):
+                            yield Jt
+
+        return JtJ_diagonal(Jt_blocks())
 
     # @profile
     def forward(self, m, f=None):
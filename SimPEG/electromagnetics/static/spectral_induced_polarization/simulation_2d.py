@@ -93,6 +93,7 @@ class BaseSIPSimulation2D(BaseIPSimulation2D, BaseSIPSimulation):
                 order="F",
             )
             for iky, ky in enumerate(kys):
+                Ainv = self._get_Ainv(iky, ky)
                 u_ky = f[:, self._solutionType, iky]
                 istrt = 0
                 for i_src, src in enumerate(survey.source_list):
@@ -101,7 +102,7 @@ class BaseSIPSimulation2D(BaseIPSimulation2D, BaseSIPSimulation):
                         # wrt f, need possibility wrt m
                         P = rx.getP(self.mesh, rx.projGLoc(f)).toarray()
 
-                        ATinvdf_duT = self.Ainv[iky] * (P.T)
+                        ATinvdf_duT = Ainv * (P.T)
 
                         dA_dmT = self.getADeriv(ky, u_src, ATinvdf_duT, adjoint=True)
                         Jtv = -weights[iky] * dA_dmT  # RHS=0
@@ -111,6 +112,7 @@ class BaseSIPSimulation2D(BaseIPSimulation2D, BaseSIPSimulation):
                         else:
                             Jt[:, istrt:iend] += Jtv
                         istrt += rx.nD
+                self._release_Ainv(iky, Ainv)
 
             self._Jmatrix = self._mini_survey_data(Jt.T)
             # delete fields after computing sensitivity
@@ -118,9 +120,10 @@ class BaseSIPSimulation2D(BaseIPSimulation2D, BaseSIPSimulation):
             if self._f is not None:
                 self._f = []
             # clean all factorization
-            if self.Ainv[0] is not None:
-                for i in range(self.nky):
+            for i in range(self.nky):
+                if self.Ainv[i] is not None:
                     self.Ainv[i].clean()
+                    self.Ainv[i] = None
             return self._Jmatrix
 
     def forward(self, m, f=None):
@@ -194,23 +197,8 @@ class BaseSIPSimulation2D(BaseIPSimulation2D, BaseSIPSimulation):
 
         return self.sign * Jtvec
 
-    def getJtJdiag(self, m):
-        """
-        Compute JtJ using adjoint problem. Still we never form
-        JtJ
-        """
-        ntime = len(self.survey.unique_times)
-        JtJdiag = np.zeros_like(m)
-        J = self.getJ(m, f=None)
-        for tind in range(ntime):
-            t = self.survey.unique_times[tind]
-            Jtv = self.actMap.P * J.T
-            JtJdiag += (
-                (self.PetaEtaDeriv(t, Jtv, adjoint=True) ** 2).sum(axis=1)
-                + (self.PetaTauiDeriv(t, Jtv, adjoint=True) ** 2).sum(axis=1)
-                + (self.PetaCDeriv(t, Jtv, adjoint=True) ** 2).sum(axis=1)
-            )
-        return JtJdiag
+    def getJtJdiag(self, m, W=None):
+        return BaseSIPSimulation.getJtJdiag(self, m, W=W)
 
     @property
     def MfRhoDerivMat(self):
@@ -90,6 +90,94 @@ class FieldsTDEM(TimeFields):
         return self._jDeriv_u(tInd, src, dun_dm_v) + self._jDeriv_m(tInd, src, v)
 
 
+class CheckpointedSolution(object):
+    """
+    Stands in for the (nE or nF, nSrc, nT+1) array of the solution of a TDEM
+    simulation in the fields object, while only storing it at checkpoint time
+    indices. The time steps in between are recomputed from the previous
+    checkpoint, one segment (for all the sources) at a time, when they are
+    accessed. Sweeping through time, forward or backward, recomputes each
+    segment once. The steps can only be recomputed with the model of the
+    simulation that computed the checkpoints.
+
+    :param BaseTDEMSimulation simulation: the simulation that takes the steps
+    :param tuple shape: shape of the full solution array
+    :param numpy.ndarray checkpoints: sorted time indices to store, from 0
+    """
+
+    ndim = 3
+    dtype = float
+
+    def __init__(self, simulation, shape, checkpoints):
+        self.simulation = simulation
+        self.shape = shape
+        self.checkpoints = np.asarray(checkpoints)
+        self._stored = {}
+        self._segment_start = None
+        self._segment = None
+        # the model the checkpoints were computed with
+        self._model = None if simulation.model is None else np.copy(simulation.model)
+
+    def _get_step(self, tInd):
+        if tInd < 0:
+            tInd += self.shape[2]
+        if tInd in self._stored:
+            return self._stored[tInd]
+
+        start = self._segment_start
+        if start is None or not 0 <= tInd - start < self._segment.shape[2]:
+            model = self.simulation.model
+            if (model is None) != (self._model is None) or (
+                model is not None and not np.array_equal(model, self._model)
+            ):
+                raise ValueError(
+                    "The model of the simulation changed since the fields were "
+                    "computed, the time steps between the checkpoints can no "
+                    "longer be recomputed. Compute the fields again."
+                )
+            # recompute the steps from the previous checkpoint to the next one
+            i = np.searchsorted(self.checkpoints, tInd, side="right")
+            checkpoint = self.checkpoints[i - 1]
+            if i < len(self.checkpoints):
+                end = self.checkpoints[i]
+            else:
+                end = self.shape[2]
+
+            self._segment = None  # release the previous segment first
+            segment = np.empty(self.shape[:2] + (end - checkpoint - 1,))
+            u = self._stored[checkpoint]
+            for j, t in enumerate(range(checkpoint, end - 1)):
+                u = self.simulation._time_step(t, u)
+                segment[:, :, j] = u
+            self._segment_start, self._segment = checkpoint + 1, segment
+            start = checkpoint + 1
+
+        return self._segment[:, :, tInd - start]
+
+    def __getitem__(self, key):
+        _, srcInd, timeInd = key
+        if np.ndim(timeInd) == 0 and not isinstance(timeInd, slice):
+            return self._get_step(int(timeInd))[:, srcInd]
+        timeII = np.arange(self.shape[2])[timeInd]
+        return np.stack([self._get_step(t)[:, srcInd] for t in timeII], axis=-1)
+
+    def hold(self, tInd, u):
+        """
+        Only hold the solution u, for all the sources, at time index tInd,
+        releasing the other stored steps. Used to stream through the time
+        steps.
+        """
+        self._stored = {}
+        self._stored[tInd] = u
+
+    def __setitem__(self, key, value):
+        _, srcInd, tInd = key
+        if tInd in self.checkpoints:
+            if tInd not in self._stored:
+                self._stored[tInd] = np.zeros(self.shape[:2], dtype=self.dtype)
+            self._stored[tInd][:, srcInd] = value
+
+
 class FieldsDerivativesEB(FieldsTDEM):
     """
     A fields object for satshing derivs in the EB formulation
@@ -654,7 +742,7 @@ class Fields3DCurrentDensity(FieldsTDEM):
         )
 
     def _dbdt(self, jSolution, source_list, tInd):
-        dhdt = mkvc(self._dhdt(jSolution, source_list, tInd))
+        dhdt = self._dhdt(jSolution, source_list, tInd)
         return self.simulation.MeI * (self.simulation.MeMu * dhdt)
 
     def _dbdtDeriv_u(self, tInd, src, dun_dm_v, adjoint=False):
@@ -2,12 +2,14 @@ import numpy as np
 import scipy.sparse as sp
 from scipy.constants import mu_0
 import time
+import warnings
 import properties
 from ...utils.code_utils import deprecate_class
 
 from ...data import Data
 from ...simulation import BaseTimeSimulation
 from ...utils import mkvc, sdiag, speye, Zero
+from ...utils.solver_utils import FactorCache
 from ..base import BaseEMSimulation
 from .survey import Survey
 from .fields import (
@@ -17,6 +19,7 @@ from .fields import (
     Fields3DCurrentDensity,
     FieldsDerivativesEB,
     FieldsDerivativesHJ,
+    CheckpointedSolution,
 )
 
 
@@ -27,11 +30,26 @@ class BaseTDEMSimulation(BaseTimeSimulation, BaseEMSimulation):
     Euler.
     """
 
-    clean_on_model_update = ["_Adcinv"]  #: clear DC matrix factors on any model updates
+    #: clear DC and time-stepping matrix factors on any model updates
+    clean_on_model_update = ["_Adcinv", "_Adiag_factors"]
     dt_threshold = 1e-8
 
     survey = properties.Instance("a survey object", Survey, required=True)
 
+    max_fields_memory = properties.Float(
+        "memory (GB) available to store the solution at the time steps. If it "
+        "cannot hold every time step, the solution is only stored at "
+        "checkpoints and the steps in between are recomputed when needed",
+        required=False,
+        min=0.0,
+    )
+
+    forward_only = properties.Boolean(
+        "If True, dpred without fields only holds the solution at one time "
+        "step, projecting it on the receivers as soon as it is computed",
+        default=False,
+    )
+
     # def fields_nostore(self, m):
     #     """
     #     Solve the forward problem without storing fields
@@ -55,55 +73,140 @@ class BaseTDEMSimulation(BaseTimeSimulation, BaseEMSimulation):
         self.model = m
 
         f = self.fieldsPair(self)
+        ftype = self._fieldType + "Solution"
 
         # set initial fields
-        f[:, self._fieldType + "Solution", 0] = self.getInitialFields()
+        u = self.getInitialFields()
+        checkpoints = self._checkpoints()
+        if checkpoints is not None:
+            f._fields[ftype] = CheckpointedSolution(
+                self, u.shape + (self.nT + 1,), checkpoints
+            )
+
+        def store(tInd, u):
+            if checkpoints is None:
+                f[:, ftype, tInd] = u
+            else:
+                f._fields[ftype][:, :, tInd] = u
+
+        store(0, u)
 
         if self.verbose:
             print("{}\nCalculating fields(m)\n{}".format("*" * 50, "*" * 50))
 
         # timestep to solve forward
-        Ainv = None
         for tInd, dt in enumerate(self.time_steps):
-            # keep factors if dt is the same as previous step b/c A will be the
-            # same
-            if Ainv is not None and (
-                tInd > 0 and abs(dt - self.time_steps[tInd - 1]) > self.dt_threshold
-            ):
-                Ainv.clean()
-                Ainv = None
-
-            if Ainv is None:
-                A = self.getAdiag(tInd)
-                if self.verbose:
-                    print("Factoring...   (dt = {:e})".format(dt))
-                Ainv = self.solver(A, **self.solver_opts)
-                if self.verbose:
-                    print("Done")
-
-            rhs = self.getRHS(tInd + 1)  # this is on the nodes of the time mesh
-            Asubdiag = self.getAsubdiag(tInd)
-
             if self.verbose:
                 print("    Solving...   (tInd = {:d})".format(tInd + 1))
 
             # taking a step
-            sol = Ainv * (rhs - Asubdiag * f[:, (self._fieldType + "Solution"), tInd])
+            u = self._time_step(tInd, u)
 
             if self.verbose:
                 print("    Done...")
 
-            if sol.ndim == 1:
-                sol.shape = (sol.size, 1)
-            f[:, self._fieldType + "Solution", tInd + 1] = sol
+            store(tInd + 1, u)
 
         if self.verbose:
             print("{}\nDone calculating fields(m)\n{}".format("*" * 50, "*" * 50))
 
-        # clean factors and return
-        Ainv.clean()
+        # factors are kept for Jvec and Jtvec, until the model changes
         return f
 
+    def _time_step(self, tInd, u):
+        """
+        Solution at time index tInd + 1 from the solution u at tInd, for all
+        the sources (columns).
+        """
+        # factors are shared by all the time steps of the same length
+        Ainv = self.getAdiagSolver(tInd)
+
+        rhs = self.getRHS(tInd + 1)  # this is on the nodes of the time mesh
+        Asubdiag = self.getAsubdiag(tInd)
+
+        sol = Ainv * (rhs - Asubdiag * u)
+        if sol.ndim == 1:
+            sol.shape = (sol.size, 1)
+        return sol
+
+    def _checkpoints(self):
+        """
+        Time indices at which the solution is stored, given max_fields_memory,
+        or None if every time step fits.
+
+        The checkpoints are evenly spaced and, in the adjoint sweep, one
+        segment between two of them is recomputed and held at a time. The
+        most checkpoints that fit in the memory budget with their segment are
+        used, which keeps the recomputed steps to a minimum.
+        """
+        if self.max_fields_memory is None:
+            return None
+
+        n = self.mesh.nE if self._fieldType in ["e", "h"] else self.mesh.nF
+        step_size = 8.0 * n * self.survey.nSrc / 1024 ** 3
+        n_steps = int(self.max_fields_memory // step_size)
+        n_times = self.nT + 1
+        if n_steps >= n_times:
+            return None
+
+        # checkpoints and the other steps of a segment, for each spacing
+        spacings = np.arange(2, n_times + 1)
+        memory = np.ceil(n_times / spacings) + spacings - 1
+        fits = np.where(memory <= n_steps)[0]
+        if len(fits) > 0:
+            spacing = spacings[fits[0]]
+        else:
+            spacing = spacings[np.argmin(memory)]
+            warnings.warn(
+                "max_fields_memory ({:g} GB) is below the minimum needed to "
+                "checkpoint the fields ({:g} GB)".format(
+                    self.max_fields_memory, memory.min() * step_size
+                )
+            )
+        return np.arange(0, n_times, spacing)
+
+    def _receiver_projections(self, f):
+        """Projections of all the receivers, applied one time step at a time"""
+        return self.survey.get_receiver_projections(self.mesh, self.time_mesh, f)
+
+    def _stream_fields(self, f):
+        """
+        Step through time, yielding each time index once f holds the solution
+        there. Only the current time step is held.
+        """
+        u = self.getInitialFields()
+        solution = CheckpointedSolution(
+            self, u.shape + (self.nT + 1,), np.arange(self.nT + 1)
+        )
+        f._fields[self._fieldType + "Solution"] = solution
+        for tInd in range(self.nT + 1):
+            if tInd > 0:
+                u = self._time_step(tInd - 1, u)
+            solution.hold(tInd, u)
+            yield tInd
+
+    def dpred(self, m=None, f=None):
+        if f is None and self.forward_only:
+            # the solution at each time step is projected on the receivers as
+            # soon as it is computed
+            if m is not None:
+                self.model = m
+            f = self.fieldsPair(self)
+            steps = self._stream_fields(f)
+        else:
+            if f is None:
+                f = self.fields(m)
+            steps = range(self.nT + 1)
+
+        # project the fields of all the sources one time step at a time
+        projections = self._receiver_projections(f)
+        data = np.zeros(self.survey.nD)
+        for tInd in steps:
+            for field in projections.fields_at(tInd):
+                data += projections.project(field, tInd, f[:, field, tInd])
+
+        return data
+
     def Jvec(self, m, v, f=None):
         """
         Jvec computes the sensitivity times a vector
@@ -146,38 +249,28 @@ class BaseTDEMSimulation(BaseTimeSimulation, BaseEMSimulation):
                 for src in self.survey.source_list
             ]
         )
-        # can over-write this at each timestep
-        # store the field derivs we need to project to calc full deriv
-        df_dm_v = self.Fields_Derivs(self)
-
-        Adiaginv = None
+        # project the field derivs of all the sources one time step at a time
+        projections = self._receiver_projections(f)
+        Jv = np.zeros(self.survey.nD)
 
         for tInd, dt in zip(range(self.nT), self.time_steps):
-            # keep factors if dt is the same as previous step b/c A will be the
-            # same
-            if Adiaginv is not None and (tInd > 0 and dt != self.time_steps[tInd - 1]):
-                Adiaginv.clean()
-                Adiaginv = None
-
-            if Adiaginv is None:
-                A = self.getAdiag(tInd)
-                Adiaginv = self.solver(A, **self.solver_opts)
+            Adiaginv = self.getAdiagSolver(tInd)
 
             Asubdiag = self.getAsubdiag(tInd)
 
-            for i, src in enumerate(self.survey.source_list):
-
-                # here, we are lagging by a timestep, so filling in as we go
-                for projField in set([rx.projField for rx in src.receiver_list]):
-                    df_dmFun = getattr(f, "_%sDeriv" % projField, None)
-                    # df_dm_v is dense, but we only need the times at
-                    # (rx.P.T * ones > 0)
-                    # This should be called rx.footprint
-
-                    df_dm_v[src, "{}Deriv".format(projField), tInd] = df_dmFun(
-                        tInd, src, dun_dm_v[:, i], v
-                    )
+            # here, we are lagging by a timestep, so filling in as we go
+            for field in projections.fields_at(tInd):
+                df_dmFun = getattr(f, "_%sDeriv" % field, None)
+                df_dm_v = None
+                for i in projections.sources[field][tInd]:
+                    src = self.survey.source_list[i]
+                    df_dm_v_src = mkvc(df_dmFun(tInd, src, dun_dm_v[:, i], v))
+                    if df_dm_v is None:
+                        df_dm_v = np.zeros((len(df_dm_v_src), self.survey.nSrc))
+                    df_dm_v[:, i] = df_dm_v_src
+                Jv += projections.project(field, tInd, df_dm_v)
 
+            for i, src in enumerate(self.survey.source_list):
                 un_src = f[src, ftype, tInd + 1]
 
                 # cell centered on time mesh
@@ -193,22 +286,7 @@ class BaseTDEMSimulation(BaseTimeSimulation, BaseEMSimulation):
                 if tInd != len(self.time_steps + 1):
                     dun_dm_v[:, i] = Adiaginv * (JRHS - Asubdiag * dun_dm_v[:, i])
 
-        Jv = []
-        for src in self.survey.source_list:
-            for rx in src.receiver_list:
-                Jv.append(
-                    rx.evalDeriv(
-                        src,
-                        self.mesh,
-                        self.time_mesh,
-                        f,
-                        mkvc(df_dm_v[src, "%sDeriv" % rx.projField, :]),
-                    )
-                )
-        Adiaginv.clean()
-        # del df_dm_v, dun_dm_v, Asubdiag
-        # return mkvc(Jv)
-        return np.hstack(Jv)
+        return Jv
 
     def Jtvec(self, m, v, f=None):
 
@@ -240,8 +318,6 @@ class BaseTDEMSimulation(BaseTimeSimulation, BaseEMSimulation):
         if not isinstance(v, Data):
             v = Data(self.survey, v)
 
-        df_duT_v = self.Fields_Derivs(self)
-
         # same size as fields at a single timestep
         ATinv_df_duT_v = np.zeros(
             (
@@ -252,104 +328,97 @@ class BaseTDEMSimulation(BaseTimeSimulation, BaseEMSimulation):
         )
         JTv = np.zeros(m.shape, dtype=float)
 
-        # Loop over sources and receivers to create a fields object:
-        # PT_v, df_duT_v, df_dmT_v
-        # initialize storage for PT_v (don't need to preserve over sources)
-        PT_v = self.Fields_Derivs(self)
-        for src in self.survey.source_list:
-            # Looping over initializing field class is appending memory!
-            # PT_v = Fields_Derivs(self.mesh) # initialize storage
-            # #for PT_v (don't need to preserve over sources)
-            # initialize size
-            df_duT_v[src, "{}Deriv".format(self._fieldType), :] = np.zeros_like(
-                f[src, self._fieldType, :]
-            )
-
-            for rx in src.receiver_list:
-                PT_v[src, "{}Deriv".format(rx.projField), :] = rx.evalDeriv(
-                    src, self.mesh, self.time_mesh, f, mkvc(v[src, rx]), adjoint=True
-                )  # this is +=
-
-                # PT_v = np.reshape(curPT_v,(len(curPT_v)/self.time_mesh.nN,
-                # self.time_mesh.nN), order='F')
-                df_duTFun = getattr(f, "_{}Deriv".format(rx.projField), None)
-
-                for tInd in range(self.nT + 1):
-                    cur = df_duTFun(
-                        tInd,
-                        src,
-                        None,
-                        mkvc(PT_v[src, "{}Deriv".format(rx.projField), tInd]),
-                        adjoint=True,
-                    )
-
-                    df_duT_v[src, "{}Deriv".format(self._fieldType), tInd] = df_duT_v[
-                        src, "{}Deriv".format(self._fieldType), tInd
-                    ] + mkvc(cur[0], 2)
-                    JTv = cur[1] + JTv
-
-        del PT_v  # no longer need this
-
-        AdiagTinv = None
+        # adjoint of the fields derivatives, from the last time index
+        df_duT_v = self._df_duT_v(f, v)
 
         # Do the back-solve through time
-        # if the previous timestep is the same: no need to refactor the matrix
+        # the factors of each time step length are shared with fields and Jvec
         # for tInd, dt in zip(range(self.nT), self.time_steps):
 
         for tInd in reversed(range(self.nT)):
-            # tInd = tIndP - 1
-            if AdiagTinv is not None and (
-                tInd <= self.nT and self.time_steps[tInd] != self.time_steps[tInd + 1]
-            ):
-                AdiagTinv.clean()
-                AdiagTinv = None
-
-            # refactor if we need to
-            if AdiagTinv is None:  # and tInd > -1:
-                Adiag = self.getAdiag(tInd)
-                AdiagTinv = self.solver(Adiag.T, **self.solver_opts)
+            AdiagTinv = self.getAdiagSolver(tInd, adjoint=True)
 
+            # solve against df_duT_v, with the sources stacked as columns
+            rhs, df_dmT_v = next(df_duT_v)
+            JTv = df_dmT_v + JTv
             if tInd < self.nT - 1:
+                # all but the last timestep (first to be solved)
                 Asubdiag = self.getAsubdiag(tInd + 1)
+                rhs = rhs - Asubdiag.T * ATinv_df_duT_v.T
+            ATinv_df_duT_v[:] = np.reshape(AdiagTinv * rhs, rhs.shape, order="F").T
 
-            for isrc, src in enumerate(self.survey.source_list):
+            # the adjoint derivatives are linear in the products of the fields
+            # and adjoint fields, so the sources are summed in one call each
+            JTv = JTv + self._JTv_step(f, tInd, ATinv_df_duT_v.T)
 
-                # solve against df_duT_v
-                if tInd >= self.nT - 1:
-                    # last timestep (first to be solved)
-                    ATinv_df_duT_v[isrc, :] = (
-                        AdiagTinv
-                        * df_duT_v[src, "{}Deriv".format(self._fieldType), tInd + 1]
-                    )
-                elif tInd > -1:
-                    ATinv_df_duT_v[isrc, :] = AdiagTinv * (
-                        mkvc(df_duT_v[src, "{}Deriv".format(self._fieldType), tInd + 1])
-                        - Asubdiag.T * mkvc(ATinv_df_duT_v[isrc, :])
-                    )
+        _, df_dmT_v = next(df_duT_v)
+        JTv = df_dmT_v + JTv
 
-                dAsubdiagT_dm_v = self.getAsubdiagDeriv(
-                    tInd, f[src, ftype, tInd], ATinv_df_duT_v[isrc, :], adjoint=True
-                )
+        # Treat the initial condition
 
-                dRHST_dm_v = self.getRHSDeriv(
-                    tInd + 1, src, ATinv_df_duT_v[isrc, :], adjoint=True
-                )  # on nodes of time mesh
+        # del df_duT_v, ATinv_df_duT_v, A, Asubdiag
 
-                un_src = f[src, ftype, tInd + 1]
-                # cell centered on time mesh
-                dAT_dm_v = self.getAdiagDeriv(
-                    tInd, un_src, ATinv_df_duT_v[isrc, :], adjoint=True
-                )
+        return mkvc(JTv).astype(float)
 
-                JTv = JTv + mkvc(-dAT_dm_v - dAsubdiagT_dm_v + dRHST_dm_v)
+    def _df_duT_v(self, f, v):
+        """
+        Adjoint of the receiver projections and fields derivatives times the
+        data vector v. Yields, from the last time index to the first, the
+        (nE or nF, nSrc) array at that time index and the model terms.
 
-        # Treat the initial condition
+        Each time index is projected as it is reached, for all the sources at
+        once, rather than storing them all.
+        """
+        projections = self._receiver_projections(f)
+        v = mkvc(v.dobs if isinstance(v, Data) else v)
+        n = self.mesh.nE if self._fieldType in ["e", "h"] else self.mesh.nF
+        for tInd in reversed(range(self.nT + 1)):
+            df_duT_v = np.zeros((n, self.survey.nSrc))
+            df_dmT_v = Zero()
+            for field in projections.fields_at(tInd):
+                df_duTFun = getattr(f, "_{}Deriv".format(field), None)
+                PT_v = projections.project_adjoint(field, tInd, v)
+                for i in projections.sources[field][tInd]:
+                    cur = df_duTFun(
+                        tInd, self.survey.source_list[i], None, PT_v[:, i], adjoint=True
+                    )
+                    df_duT_v[:, i] += mkvc(cur[0])
+                    df_dmT_v = cur[1] + df_dmT_v
+            yield df_duT_v, df_dmT_v
 
-        # del df_duT_v, ATinv_df_duT_v, A, Asubdiag
-        if AdiagTinv is not None:
-            AdiagTinv.clean()
+    def _fields_at(self, f, tInd):
+        """(n, nSrc) array of the solution of all the sources at a time index"""
+        u = f[:, self._fieldType + "Solution", tInd]
+        return np.reshape(u, (-1, self.survey.nSrc), order="F")
 
-        return mkvc(JTv).astype(float)
+    def _JTv_step(self, f, tInd, ATinv_df_duT_v):
+        """
+        Model terms of Jtvec at a time step, summed over the sources, with
+        ATinv_df_duT_v the (n, nSrc) adjoint fields of all the sources.
+        """
+        # cell centered on time mesh
+        dAT_dm_v = self.getAdiagDeriv(
+            tInd, self._fields_at(f, tInd + 1), ATinv_df_duT_v, adjoint=True
+        )
+        dAsubdiagT_dm_v = self.getAsubdiagDeriv(
+            tInd, self._fields_at(f, tInd), ATinv_df_duT_v, adjoint=True
+        )
+        # on nodes of time mesh
+        dRHST_dm_v = self._getRHSDerivT(tInd + 1, ATinv_df_duT_v)
+        return mkvc(-dAT_dm_v) - mkvc(dAsubdiagT_dm_v) + mkvc(dRHST_dm_v)
+
+    def _getRHSDerivT(self, tInd, v):
+        """
+        Adjoint derivative of the right hand side, summed over the sources,
+        with v the (n, nSrc) adjoint fields of all the sources.
+        """
+        dRHST_dm_v = Zero()
+        for isrc, src in enumerate(self.survey.source_list):
+            dRHST_dm_v = (
+                mkvc(self.getRHSDeriv(tInd, src, v[:, isrc], adjoint=True))
+                + dRHST_dm_v
+            )
+        return dRHST_dm_v
 
     def getSourceTerm(self, tInd):
         """
@@ -435,6 +504,52 @@ class BaseTDEMSimulation(BaseTimeSimulation, BaseEMSimulation):
             self._Adcinv = self.solver(Adc)
         return self._Adcinv
 
+    @properties.observer(["mu", "mui"])
+    def _clean_Adiag_factors_on_mu_update(self, change):
+        if change["previous"] is change["value"]:
+            return
+        if getattr(self, "_Adiag_factors", None) is not None:
+            self._Adiag_factors.clean()
+
+    @property
+    def _Adiag_symmetric(self):
+        """The system matrices are symmetric, A and A.T share their factors"""
+        return self._makeASymmetric
+
+    def getAdiagSolver(self, tInd, adjoint=False):
+        """
+        Factors of the system matrix at a given time index.
+
+        Factors are computed once per distinct time step length (within
+        dt_threshold) and kept until the model changes, so that fields, Jvec
+        and Jtvec share them. Unless the system is symmetric, the factors of
+        the transposed matrix used by the adjoint are kept separately.
+
+        :param int tInd: time index
+        :param bool adjoint: factors of the transposed system matrix
+        :return: solver for Adiag (or Adiag.T)
+        """
+        if getattr(self, "_Adiag_factors", None) is None:
+            self._Adiag_factors = FactorCache()
+
+        dt = self.time_steps[tInd]
+        for key in self._Adiag_factors:
+            if abs(key[0] - dt) <= self.dt_threshold:
+                dt = key[0]
+                break
+
+        key = (dt, adjoint and not self._Adiag_symmetric)
+        if key not in self._Adiag_factors:
+            A = self.getAdiag(tInd)
+            if key[1]:
+                A = A.T
+            if self.verbose:
+                print("Factoring...   (dt = {:e})".format(dt))
+            self._Adiag_factors[key] = self.solver(A, **self.solver_opts)
+            if self.verbose:
+                print("Done")
+        return self._Adiag_factors[key]
+
 
 ###############################################################################
 #                                                                             #
@@ -627,6 +742,28 @@ class Simulation3DMagneticFluxDensity(BaseTDEMSimulation):
             return self.MfMui.T * RHSDeriv
         return RHSDeriv
 
+    def _getRHSDerivT(self, tInd, v):
+        C = self.mesh.edgeCurl
+        if self._makeASymmetric is True:
+            v = self.MfMui * v
+        CT_v = C.T * v
+
+        # the electric source terms of all the sources at once
+        _, s_e = self.getSourceTerm(tInd)
+        RHSDeriv = Zero()
+        if np.any(s_e):
+            RHSDeriv = mkvc(self.MeSigmaIDeriv(s_e, CT_v, adjoint=True))
+
+        MeSigmaIT_CT_v = self.MeSigmaI.T * CT_v
+        for isrc, src in enumerate(self.survey.source_list):
+            s_mDeriv, s_eDeriv = src.evalDeriv(self, self.times[tInd], adjoint=True)
+            RHSDeriv = (
+                mkvc(s_eDeriv(MeSigmaIT_CT_v[:, isrc]))
+                + mkvc(s_mDeriv(v[:, isrc]))
+                + RHSDeriv
+            )
+        return RHSDeriv
+
 
 # ------------------------------- Simulation3DElectricField ------------------------------- #
 class Simulation3DElectricField(BaseTDEMSimulation):
@@ -669,6 +806,7 @@ class Simulation3DElectricField(BaseTDEMSimulation):
     _formulation = "EB"
     fieldsPair = Fields3DElectricField  #: A Fields3DElectricField
     Fields_Derivs = FieldsDerivativesEB
+    _Adiag_symmetric = True
 
     # @profile
     def Jtvec(self, m, v, f=None):
@@ -687,8 +825,6 @@ class Simulation3DElectricField(BaseTDEMSimulation):
         if not isinstance(v, Data):
             v = Data(self.survey, v)
 
-        df_duT_v = self.Fields_Derivs(self)
-
         # same size as fields at a single timestep
         ATinv_df_duT_v = np.zeros(
             (
@@ -699,136 +835,54 @@ class Simulation3DElectricField(BaseTDEMSimulation):
         )
         JTv = np.zeros(m.shape, dtype=float)
 
-        # Loop over sources and receivers to create a fields object:
-        # PT_v, df_duT_v, df_dmT_v
-        # initialize storage for PT_v (don't need to preserve over sources)
-        PT_v = self.Fields_Derivs(self)
-        for src in self.survey.source_list:
-            # Looping over initializing field class is appending memory!
-            # PT_v = Fields_Derivs(self.mesh) # initialize storage
-            # #for PT_v (don't need to preserve over sources)
-            # initialize size
-            df_duT_v[src, "{}Deriv".format(self._fieldType), :] = np.zeros_like(
-                f[src, self._fieldType, :]
-            )
-
-            for rx in src.receiver_list:
-                PT_v[src, "{}Deriv".format(rx.projField), :] = rx.evalDeriv(
-                    src, self.mesh, self.time_mesh, f, mkvc(v[src, rx]), adjoint=True
-                )
-                # this is +=
-
-                # PT_v = np.reshape(curPT_v,(len(curPT_v)/self.time_mesh.nN,
-                # self.time_mesh.nN), order='F')
-                df_duTFun = getattr(f, "_{}Deriv".format(rx.projField), None)
-
-                for tInd in range(self.nT + 1):
-                    cur = df_duTFun(
-                        tInd,
-                        src,
-                        None,
-                        mkvc(PT_v[src, "{}Deriv".format(rx.projField), tInd]),
-                        adjoint=True,
-                    )
-
-                    df_duT_v[src, "{}Deriv".format(self._fieldType), tInd] = df_duT_v[
-                        src, "{}Deriv".format(self._fieldType), tInd
-                    ] + mkvc(cur[0], 2)
-                    JTv = cur[1] + JTv
-
-        # no longer need this
-        del PT_v
-
-        AdiagTinv = None
+        # adjoint of the fields derivatives, from the last time index
+        df_duT_v = self._df_duT_v(f, v)
 
         # Do the back-solve through time
-        # if the previous timestep is the same: no need to refactor the matrix
+        # the factors of each time step length are shared with fields and Jvec
         # for tInd, dt in zip(range(self.nT), self.time_steps):
 
         for tInd in reversed(range(self.nT)):
-            # tInd = tIndP - 1
-            if AdiagTinv is not None and (
-                tInd <= self.nT and self.time_steps[tInd] != self.time_steps[tInd + 1]
-            ):
-                AdiagTinv.clean()
-                AdiagTinv = None
-
-            # refactor if we need to
-            if AdiagTinv is None:  # and tInd > -1:
-                Adiag = self.getAdiag(tInd)
-                AdiagTinv = self.solver(Adiag.T, **self.solver_opts)
+            AdiagTinv = self.getAdiagSolver(tInd, adjoint=True)
 
+            # solve against df_duT_v, with the sources stacked as columns
+            rhs, df_dmT_v = next(df_duT_v)
+            JTv = df_dmT_v + JTv
             if tInd < self.nT - 1:
+                # all but the last timestep (first to be solved)
                 Asubdiag = self.getAsubdiag(tInd + 1)
+                rhs = rhs - Asubdiag.T * ATinv_df_duT_v.T
+            ATinv_df_duT_v[:] = np.reshape(AdiagTinv * rhs, rhs.shape, order="F").T
 
-            for isrc, src in enumerate(self.survey.source_list):
-
-                # solve against df_duT_v
-                if tInd >= self.nT - 1:
-                    # last timestep (first to be solved)
-                    ATinv_df_duT_v[isrc, :] = (
-                        AdiagTinv
-                        * df_duT_v[src, "{}Deriv".format(self._fieldType), tInd + 1]
-                    )
-                elif tInd > -1:
-                    ATinv_df_duT_v[isrc, :] = AdiagTinv * (
-                        mkvc(df_duT_v[src, "{}Deriv".format(self._fieldType), tInd + 1])
-                        - Asubdiag.T * mkvc(ATinv_df_duT_v[isrc, :])
-                    )
-
-                dAsubdiagT_dm_v = self.getAsubdiagDeriv(
-                    tInd, f[src, ftype, tInd], ATinv_df_duT_v[isrc, :], adjoint=True
-                )
+            # the adjoint derivatives are linear in the products of the fields
+            # and adjoint fields, so the sources are summed in one call each
+            JTv = JTv + self._JTv_step(f, tInd, ATinv_df_duT_v.T)
 
-                dRHST_dm_v = self.getRHSDeriv(
-                    tInd + 1, src, ATinv_df_duT_v[isrc, :], adjoint=True
-                )  # on nodes of time mesh
-
-                un_src = f[src, ftype, tInd + 1]
-                # cell centered on time mesh
-                dAT_dm_v = self.getAdiagDeriv(
-                    tInd, un_src, ATinv_df_duT_v[isrc, :], adjoint=True
-                )
-
-                JTv = JTv + mkvc(-dAT_dm_v - dAsubdiagT_dm_v + dRHST_dm_v)
+        df_duT_v, df_dmT_v = next(df_duT_v)  # at the first time index
+        JTv = df_dmT_v + JTv
 
         # Treating initial condition when a galvanic source is included
-        tInd = -1
-        Grad = self.mesh.nodalGrad
-
-        for isrc, src in enumerate(self.survey.source_list):
-            if src.srcType == "galvanic":
-
-                ATinv_df_duT_v[isrc, :] = Grad * (
-                    self.Adcinv
-                    * (
-                        Grad.T
-                        * (
-                            mkvc(
-                                df_duT_v[
-                                    src, "{}Deriv".format(self._fieldType), tInd + 1
-                                ]
-                            )
-                            - Asubdiag.T * mkvc(ATinv_df_duT_v[isrc, :])
-                        )
-                    )
-                )
-
-                dRHST_dm_v = self.getRHSDeriv(
-                    tInd + 1, src, ATinv_df_duT_v[isrc, :], adjoint=True
-                )  # on nodes of time mesh
-
-                un_src = f[src, ftype, tInd + 1]
-                # cell centered on time mesh
-                dAT_dm_v = self.MeSigmaDeriv(
-                    un_src, ATinv_df_duT_v[isrc, :], adjoint=True
-                )
+        galvanic = np.array(
+            [src.srcType == "galvanic" for src in self.survey.source_list]
+        )
+        if np.any(galvanic):
+            Grad = self.mesh.nodalGrad
+
+            # the DC adjoint fields of the galvanic sources, solved together,
+            # and zero for the other sources
+            rhs = df_duT_v[:, galvanic] - Asubdiag.T * ATinv_df_duT_v[galvanic].T
+            ATinv_dc = np.zeros((self.mesh.nE, self.survey.nSrc))
+            ATinv_dc[:, galvanic] = Grad * np.reshape(
+                self.Adcinv * (Grad.T * rhs), (Grad.shape[1], -1), order="F"
+            )
 
-                JTv = JTv + mkvc(-dAT_dm_v + dRHST_dm_v)
+            dRHST_dm_v = self._getRHSDerivT(0, ATinv_dc)
+            dAT_dm_v = self.MeSigmaDeriv(
+                self._fields_at(f, 0), ATinv_dc, adjoint=True
+            )
+            JTv = JTv + mkvc(-dAT_dm_v) + mkvc(dRHST_dm_v)
 
         # del df_duT_v, ATinv_df_duT_v, A, Asubdiag
-        if AdiagTinv is not None:
-            AdiagTinv.clean()
 
         return mkvc(JTv).astype(float)
 
@@ -899,6 +953,9 @@ class Simulation3DElectricField(BaseTDEMSimulation):
         # right now, we are assuming that s_e, s_m do not depend on the model.
         return Zero()
 
+    def _getRHSDerivT(self, tInd, v):
+        return Zero()
+
     def getAdc(self):
         MeSigma = self.MeSigma
         Grad = self.mesh.nodalGrad
@@ -965,6 +1022,7 @@ class Simulation3DMagneticField(BaseTDEMSimulation):
     _formulation = "HJ"
     fieldsPair = Fields3DMagneticField  #: Fields object pair
     Fields_Derivs = FieldsDerivativesHJ
+    _Adiag_symmetric = True
 
     def getAdiag(self, tInd):
         """
@@ -1021,6 +1079,9 @@ class Simulation3DMagneticField(BaseTDEMSimulation):
     def getRHSDeriv(self, tInd, src, v, adjoint=False):
         return Zero()  # assumes no derivs on sources
 
+    def _getRHSDerivT(self, tInd, v):
+        return Zero()
+
     def getAdc(self):
         D = sdiag(self.mesh.vol) * self.mesh.faceDiv
         G = D.T
@@ -1126,6 +1187,9 @@ class Simulation3DCurrentDensity(BaseTDEMSimulation):
     def getRHSDeriv(self, tInd, src, v, adjoint=False):
         return Zero()  # assumes no derivs on sources
 
+    def _getRHSDerivT(self, tInd, v):
+        return Zero()
+
     def getAdc(self):
         D = sdiag(self.mesh.vol) * self.mesh.faceDiv
         G = D.T
@@ -1,3 +1,5 @@
+import numpy as np
+import scipy.sparse as sp
 import properties
 from ...survey import BaseSurvey
 from .sources import BaseTDEMSrc
@@ -21,3 +23,138 @@ class Survey(BaseSurvey):
 
     def __init__(self, source_list=None, **kwargs):
         super(Survey, self).__init__(source_list, **kwargs)
+
+    @properties.observer("source_list")
+    def _clear_receiver_projections(self, change):
+        self._receiver_projections = None
+
+    def get_receiver_projections(self, mesh, time_mesh, f):
+        """
+        Projections of all the receivers of the survey onto the data, for a
+        mesh, time mesh and type of fields. They are kept until they are
+        requested for another one, or the receivers change.
+
+        :param discretize.base.BaseMesh mesh: mesh
+        :param discretize.TensorMesh time_mesh: time mesh
+        :param SimPEG.electromagnetics.time_domain.fields.FieldsTDEM f: fields
+        :rtype: ReceiverProjections
+        """
+        receivers = [rx for src in self.source_list for rx in src.receiver_list]
+        key = [mesh, time_mesh, type(f)] + receivers
+        cached = getattr(self, "_receiver_projections", None)
+        if (
+            cached is None
+            or len(cached[0]) != len(key)
+            or any(a is not b for a, b in zip(cached[0], key))
+        ):
+            cached = (key, ReceiverProjections(self, mesh, time_mesh, f))
+            self._receiver_projections = cached
+        return cached[1]
+
+
+class ReceiverProjections(object):
+    """
+    Projections of all the receivers of a survey onto the data, applied one
+    time step at a time to the fields of all the sources.
+
+    The spatial projections of the receivers measuring the same field are
+    stacked in one sparse matrix, where receivers sharing their locations
+    (e.g. the same geometry for every source of an airborne survey) only
+    appear once. Each source only needs the rows of its own receivers, so at
+    each time step only the entries of these rows are gathered from the
+    field of that source. The cost is linear in the number of sources, even
+    when every source has its own receiver locations. The projected values
+    are scattered to the data with the time projections of the receivers.
+
+    :param Survey survey: TDEM survey
+    :param discretize.base.BaseMesh mesh: mesh
+    :param discretize.TensorMesh time_mesh: time mesh
+    :param SimPEG.electromagnetics.time_domain.fields.FieldsTDEM f: fields
+    """
+
+    def __init__(self, survey, mesh, time_mesh, f):
+        self.nSrc = survey.nSrc
+        self.nD = survey.nD
+
+        Ps = {}  # unique spatial projections, by field
+        rows = {}  # first row of the unique locations in Ps
+        entries = {}  # data index, row, source index, time index, weight
+        offset = 0
+        for isrc, src in enumerate(survey.source_list):
+            for rx in src.receiver_list:
+                field = rx.projField
+                locations = np.atleast_2d(rx.locations)
+                key = (field, rx.projGLoc(f), locations.shape, locations.tobytes())
+                if key not in rows:
+                    Ps.setdefault(field, [])
+                    rows[key] = sum(P.shape[0] for P in Ps[field])
+                    Ps[field].append(rx.getSpatialP(mesh, f))
+
+                # data of the receiver are ordered locations first, then times
+                Pt = sp.coo_matrix(rx.getTimeP(time_mesh, f))
+                n_loc = locations.shape[0]
+                loc = np.arange(n_loc)
+                entries.setdefault(field, []).append(
+                    (
+                        offset + (loc[None, :] + n_loc * Pt.row[:, None]).ravel(),
+                        np.tile(rows[key] + loc, Pt.nnz),
+                        np.full(Pt.nnz * n_loc, isrc),
+                        np.repeat(Pt.col, n_loc),
+                        np.repeat(Pt.data, n_loc),
+                    )
+                )
+                offset += rx.nD
+
+        self.Ps = {}
+        self.gather = {}
+        self.Q = {}
+        self.sources = {}
+        for field in Ps:
+            self.Ps[field] = sp.vstack(Ps[field]).tocsr()
+            n_rows = self.Ps[field].shape[0]
+            data, row, isrc, tInd, weight = [
+                np.hstack(entry) for entry in zip(*entries[field])
+            ]
+            # rows of Ps used by each source, as (row, grid index, source,
+            # weight) entries gathering the projected values of every pair
+            pairs, column = np.unique(row + n_rows * isrc, return_inverse=True)
+            P = self.Ps[field][pairs % n_rows].tocoo()
+            self.gather[field] = (P.row, P.col, (pairs // n_rows)[P.row], P.data)
+            self.Q[field] = {}
+            self.sources[field] = {}
+            for t in np.unique(tInd):
+                at_t = tInd == t
+                self.Q[field][t] = sp.csr_matrix(
+                    (weight[at_t], (data[at_t], column[at_t])),
+                    shape=(self.nD, len(pairs)),
+                )
+                self.sources[field][t] = np.unique(isrc[at_t])
+
+    def fields_at(self, tInd):
+        """Fields measured by the receivers at a time index"""
+        return [field for field in self.Q if tInd in self.Q[field]]
+
+    def project(self, field, tInd, u):
+        """
+        Data from the field u, (nE or nF, nSrc), at a time index. The data
+        not measured at that time are zero.
+        """
+        row, grid, isrc, weight = self.gather[field]
+        u = np.reshape(u, (-1, self.nSrc), order="F")
+        Q = self.Q[field][tInd]
+        Pu = np.bincount(row, weights=weight * u[grid, isrc], minlength=Q.shape[1])
+        return Q * Pu
+
+    def project_adjoint(self, field, tInd, v):
+        """
+        Adjoint of project, the (nE or nF, nSrc) array from the data vector v
+        """
+        row, grid, isrc, weight = self.gather[field]
+        n_grid = self.Ps[field].shape[1]
+        Qv = self.Q[field][tInd].T * v
+        PTv = np.bincount(
+            grid * self.nSrc + isrc,
+            weights=weight * Qv[row],
+            minlength=n_grid * self.nSrc,
+        )
+        return PTv.reshape((n_grid, self.nSrc))
@@ -1,7 +1,13 @@
+import itertools
+import multiprocessing
+import threading
+from collections import Counter
+from functools import partial
+
 import numpy as np
 import scipy.sparse as sp
 import properties
-from ...utils.code_utils import deprecate_class, deprecate_property
+from ...utils.code_utils import deprecate_class, deprecate_property, parallel_map
 
 from ...simulation import BaseSimulation
 from ... import props
@@ -12,6 +18,133 @@ from .survey import SurveyVRM
 from .receivers import Point, SquareLoop
 
 
+# Gaussian quadrature weights
+_QUADRATURE_WEIGHTS = [
+    np.r_[2.0],
+    np.r_[1.0, 1.0],
+    np.r_[0.555556, 0.888889, 0.555556],
+    np.r_[0.347855, 0.652145, 0.652145, 0.347855],
+    np.r_[0.236927, 0.478629, 0.568889, 0.478629, 0.236927],
+    np.r_[0.171324, 0.467914, 0.360762, 0.360762, 0.467914, 0.171324],
+    np.r_[0.129485, 0.279705, 0.381830, 0.417959, 0.381830, 0.279705, 0.129485],
+]
+
+# Gaussian quadrature locations on [-1,1]
+_QUADRATURE_POINTS = [
+    np.r_[0.0],
+    np.r_[-0.57735, 0.57735],
+    np.r_[-0.774597, 0.0, 0.774597],
+    np.r_[-0.861136, -0.339981, 0.339981, 0.861136],
+    np.r_[-0.906180, -0.538469, 0, 0.538469, 0.906180],
+    np.r_[-0.932470, -0.238619, -0.661209, 0.661209, 0.238619, 0.932470],
+    np.r_[-0.949108, -0.741531, -0.405845, 0.0, 0.405845, 0.741531, 0.949108],
+]
+
+
+def _receiver_key(rxObj):
+    """Receivers with the same key have the same rows of the geometry matrix"""
+    key = (
+        type(rxObj),
+        rxObj.orientation.lower(),
+        rxObj.locations.shape,
+        rxObj.locations.tobytes(),
+    )
+    if isinstance(rxObj, SquareLoop):
+        key += (rxObj.width, rxObj.nTurns, rxObj.quadOrder)
+    return key
+
+
+class _GeometryCache(object):
+    """
+    Rows of the geometry matrix of the receivers shared by several sources.
+    Receivers used by a single source are not kept, and the rows of the
+    others are dropped once the last source using them has taken them.
+    """
+
+    def __init__(self, source_list):
+        self._remaining = Counter(
+            _receiver_key(rxObj)
+            for srcObj in source_list
+            for rxObj in srcObj.receiver_list
+        )
+        self._rows = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, compute):
+        """Rows of the receivers with key, from compute() if not kept"""
+        with self._lock:
+            rows = self._rows.get(key)
+        if rows is None:
+            rows = compute()
+        with self._lock:
+            self._remaining[key] -= 1
+            if self._remaining[key] > 0:
+                self._rows.setdefault(key, rows)
+            else:
+                self._rows.pop(key, None)
+        return rows
+
+    def __len__(self):
+        return len(self._rows)
+
+
+def _geometry_rows(locs, orientation, bounds, hmin, shifts=None):
+    """
+    Rows of the geometry matrix for point receivers measuring one component,
+    vectorized over the receiver locations and the cells.
+
+    :param numpy.ndarray locs: (nLoc, 3) receiver locations
+    :param str orientation: 'x', 'y' or 'z' component
+    :param tuple bounds: (ax, bx, ay, by, az, bz) bounds of the N cells
+    :param numpy.ndarray hmin: smallest cell widths along x, y and z
+    :param numpy.ndarray shifts: (nLoc, 3) shifts of the receiver locations,
+        e.g. to quadrature points
+    :rtype: numpy.ndarray
+    :return: (nLoc, 3N) rows of the geometry operator
+    """
+    c = -(1 / (4 * np.pi))
+    tol = 1e-10  # Tolerance constant for numerical stability
+    tol2 = 1000.0  # Tolerance constant for numerical stability
+
+    if shifts is None:
+        shifts = np.zeros_like(locs)
+
+    # distances to the lower (1) and upper (2) bounds of the cells
+    dist = []
+    for ii in range(3):
+        d1 = locs[:, ii : ii + 1] - bounds[2 * ii] + shifts[:, ii : ii + 1]
+        d1[np.abs(d1) < tol] = hmin[ii] / tol2
+        d2 = locs[:, ii : ii + 1] - bounds[2 * ii + 1] + shifts[:, ii : ii + 1]
+        d2[np.abs(d2) < tol] = -hmin[ii] / tol2
+        dist.append((d1, d2))
+    u, v, w = dist
+
+    orientation = orientation.lower()
+    Lu, Lv, Lw, Ax, Ay = 0.0, 0.0, 0.0, 0.0, 0.0
+
+    # sum over the corners of the cells
+    for i, j, k in itertools.product(range(2), repeat=3):
+        sign = -1.0 if (i + j + k) % 2 else 1.0
+        d = np.sqrt(u[i] ** 2 + v[j] ** 2 + w[k] ** 2)
+        if orientation in "xz":
+            Lv = Lv + sign * np.log(d - v[j])
+            Ax = Ax + sign * np.arctan((v[j] * w[k]) / (u[i] * d + tol))
+        if orientation in "yz":
+            Lu = Lu + sign * np.log(d - u[i])
+            Ay = Ay + sign * np.arctan((u[i] * w[k]) / (v[j] * d + tol))
+        if orientation in "xy":
+            Lw = Lw + sign * np.log(d - w[k])
+
+    if orientation == "x":
+        G = np.c_[Ax, Lw, Lv]
+    elif orientation == "y":
+        G = np.c_[Lw, Ay, Lu]
+    else:
+        G = np.c_[Lv, Lu, -Ax - Ay]
+
+    return c * G
+
+
 ############################################
 # BASE VRM PROBLEM CLASS
 ############################################
@@ -27,6 +160,20 @@ class BaseVRMSimulation(BaseSimulation):
     )
     indActive = properties.Array("Topography active cells", dtype=bool)
 
+    n_cpu = properties.Integer(
+        "Number of sources for which the A matrix is computed at once, by a pool "
+        "of threads",
+        default=int(multiprocessing.cpu_count()),
+        min=1,
+    )
+
+    max_block_size = properties.Float(
+        "Approximate size (Mb) of the arrays computed for one block of receiver "
+        "locations",
+        default=8.0,
+        min=0.0,
+    )
+
     ref_factor = deprecate_property(
         refinement_factor,
         "ref_factor",
@@ -118,37 +265,36 @@ class BaseVRMSimulation(BaseSimulation):
                 )
             )
 
-    def _getH0matrix(self, xyz, pp):
+    def _getH0(self, G, xyzc, pp):
 
         """
-                Creates sparse matrix containing inducing field components
-                for source pp
+                Applies the inducing field of source pp to the geometry matrix G
+                of the cells at xyzc, i.e. G*H0
 
         ..        REQUIRED ARGUMENTS:
         ..
-        ..        xyz: N X 3 array of locations to predict field
+        ..        G: nRx by 3N geometry matrix
+        ..
+        ..        xyzc: N by 3 numpy array containing cell center locations
         ..
         ..        pp: Source index
         ..
         ..        OUTPUTS:
         ..
-        ..        H0: A 3N X N sparse array containing Hx, Hy and Hz at all locations
+        ..        A: nRx by N matrix
         ..
         """
 
-        srcObj = self.survey.source_list[pp]
-
-        h0 = srcObj.getH0(xyz)
-
-        hx0 = sp.diags(h0[:, 0], format="csr")
-        hy0 = sp.diags(h0[:, 1], format="csr")
-        hz0 = sp.diags(h0[:, 2], format="csr")
-
-        h0 = sp.vstack([hx0, hy0, hz0])
+        h0 = self.survey.source_list[pp].getH0(xyzc)
+        nC = np.shape(xyzc)[0]
 
-        return h0
+        return (
+            G[:, :nC] * h0[:, 0]
+            + G[:, nC : 2 * nC] * h0[:, 1]
+            + G[:, 2 * nC :] * h0[:, 2]
+        )
 
-    def _getGeometryMatrix(self, xyzc, xyzh, pp):
+    def _getGeometryMatrix(self, xyzc, xyzh, pp, geometry=None):
 
         """
                 Creates the dense geometry matrix which maps from the magnetized voxel
@@ -162,538 +308,96 @@ class BaseVRMSimulation(BaseSimulation):
         ..
         ..        pp: Source index
         ..
+        ..        OPTIONAL ARGUMENTS:
+        ..
+        ..        geometry: _GeometryCache of the rows of the receivers for
+        ..        these cells, shared by the sources with the same receivers
+        ..
         ..        OUTPUTS:
         ..
         ..        G: Linear geometry operator
 
         """
 
-        srcObj = self.survey.source_list[pp]
-
-        nC = np.shape(xyzc)[0]  # Number of cells
-        nRx = srcObj.nRx  # Number of receiver in all receiver_list
-
-        ax = np.reshape(xyzc[:, 0] - xyzh[:, 0] / 2, (1, nC))
-        bx = np.reshape(xyzc[:, 0] + xyzh[:, 0] / 2, (1, nC))
-        ay = np.reshape(xyzc[:, 1] - xyzh[:, 1] / 2, (1, nC))
-        by = np.reshape(xyzc[:, 1] + xyzh[:, 1] / 2, (1, nC))
-        az = np.reshape(xyzc[:, 2] - xyzh[:, 2] / 2, (1, nC))
-        bz = np.reshape(xyzc[:, 2] + xyzh[:, 2] / 2, (1, nC))
-
-        G = np.zeros((nRx, 3 * nC))
-        c = -(1 / (4 * np.pi))
-        tol = 1e-10  # Tolerance constant for numerical stability
-        tol2 = 1000.0  # Tolerance constant for numerical stability
-
-        COUNT = 0
-
-        for qq in range(0, len(srcObj.receiver_list)):
-
-            rxObj = srcObj.receiver_list[qq]
-            dComp = rxObj.orientation
-            locs = rxObj.locations
-            nLoc = np.shape(locs)[0]
-
-            if isinstance(rxObj, Point) and not isinstance(rxObj, SquareLoop):
-
-                if dComp.lower() == "x":
-                    for rr in range(0, nLoc):
-                        u1 = locs[rr, 0] - ax
-                        u1[np.abs(u1) < tol] = np.min(xyzh[:, 0]) / tol2
-                        u2 = locs[rr, 0] - bx
-                        u2[np.abs(u2) < tol] = -np.min(xyzh[:, 0]) / tol2
-                        v1 = locs[rr, 1] - ay
-                        v1[np.abs(v1) < tol] = np.min(xyzh[:, 1]) / tol2
-                        v2 = locs[rr, 1] - by
-                        v2[np.abs(v2) < tol] = -np.min(xyzh[:, 1]) / tol2
-                        w1 = locs[rr, 2] - az
-                        w1[np.abs(w1) < tol] = np.min(xyzh[:, 2]) / tol2
-                        w2 = locs[rr, 2] - bz
-                        w2[np.abs(w2) < tol] = -np.min(xyzh[:, 2]) / tol2
-
-                        d111 = np.sqrt(u1 ** 2 + v1 ** 2 + w1 ** 2)
-                        d211 = np.sqrt(u2 ** 2 + v1 ** 2 + w1 ** 2)
-                        d221 = np.sqrt(u2 ** 2 + v2 ** 2 + w1 ** 2)
-                        d121 = np.sqrt(u1 ** 2 + v2 ** 2 + w1 ** 2)
-                        d122 = np.sqrt(u1 ** 2 + v2 ** 2 + w2 ** 2)
-                        d112 = np.sqrt(u1 ** 2 + v1 ** 2 + w2 ** 2)
-                        d212 = np.sqrt(u2 ** 2 + v1 ** 2 + w2 ** 2)
-                        d222 = np.sqrt(u2 ** 2 + v2 ** 2 + w2 ** 2)
-
-                        Gxx = (
-                            np.arctan((v1 * w1) / (u1 * d111 + tol))
-                            - np.arctan((v1 * w1) / (u2 * d211 + tol))
-                            + np.arctan((v2 * w1) / (u2 * d221 + tol))
-                            - np.arctan((v2 * w1) / (u1 * d121 + tol))
-                            + np.arctan((v2 * w2) / (u1 * d122 + tol))
-                            - np.arctan((v1 * w2) / (u1 * d112 + tol))
-                            + np.arctan((v1 * w2) / (u2 * d212 + tol))
-                            - np.arctan((v2 * w2) / (u2 * d222 + tol))
-                        )
-
-                        Gyx = (
-                            np.log(d111 - w1)
-                            - np.log(d211 - w1)
-                            + np.log(d221 - w1)
-                            - np.log(d121 - w1)
-                            + np.log(d122 - w2)
-                            - np.log(d112 - w2)
-                            + np.log(d212 - w2)
-                            - np.log(d222 - w2)
-                        )
-
-                        Gzx = (
-                            np.log(d111 - v1)
-                            - np.log(d211 - v1)
-                            + np.log(d221 - v2)
-                            - np.log(d121 - v2)
-                            + np.log(d122 - v2)
-                            - np.log(d112 - v1)
-                            + np.log(d212 - v1)
-                            - np.log(d222 - v2)
-                        )
-
-                        G[COUNT, :] = c * np.c_[Gxx, Gyx, Gzx]
-                        COUNT = COUNT + 1
-
-                elif dComp.lower() == "y":
-                    for rr in range(0, nLoc):
-                        u1 = locs[rr, 0] - ax
-                        u1[np.abs(u1) < tol] = np.min(xyzh[:, 0]) / tol2
-                        u2 = locs[rr, 0] - bx
-                        u2[np.abs(u2) < tol] = -np.min(xyzh[:, 0]) / tol2
-                        v1 = locs[rr, 1] - ay
-                        v1[np.abs(v1) < tol] = np.min(xyzh[:, 1]) / tol2
-                        v2 = locs[rr, 1] - by
-                        v2[np.abs(v2) < tol] = -np.min(xyzh[:, 1]) / tol2
-                        w1 = locs[rr, 2] - az
-                        w1[np.abs(w1) < tol] = np.min(xyzh[:, 2]) / tol2
-                        w2 = locs[rr, 2] - bz
-                        w2[np.abs(w2) < tol] = -np.min(xyzh[:, 2]) / tol2
-
-                        d111 = np.sqrt(u1 ** 2 + v1 ** 2 + w1 ** 2)
-                        d211 = np.sqrt(u2 ** 2 + v1 ** 2 + w1 ** 2)
-                        d221 = np.sqrt(u2 ** 2 + v2 ** 2 + w1 ** 2)
-                        d121 = np.sqrt(u1 ** 2 + v2 ** 2 + w1 ** 2)
-                        d122 = np.sqrt(u1 ** 2 + v2 ** 2 + w2 ** 2)
-                        d112 = np.sqrt(u1 ** 2 + v1 ** 2 + w2 ** 2)
-                        d212 = np.sqrt(u2 ** 2 + v1 ** 2 + w2 ** 2)
-                        d222 = np.sqrt(u2 ** 2 + v2 ** 2 + w2 ** 2)
-
-                        Gxy = (
-                            np.log(d111 - w1)
-                            - np.log(d211 - w1)
-                            + np.log(d221 - w1)
-                            - np.log(d121 - w1)
-                            + np.log(d122 - w2)
-                            - np.log(d112 - w2)
-                            + np.log(d212 - w2)
-                            - np.log(d222 - w2)
-                        )
-
-                        Gyy = (
-                            np.arctan((u1 * w1) / (v1 * d111 + tol))
-                            - np.arctan((u2 * w1) / (v1 * d211 + tol))
-                            + np.arctan((u2 * w1) / (v2 * d221 + tol))
-                            - np.arctan((u1 * w1) / (v2 * d121 + tol))
-                            + np.arctan((u1 * w2) / (v2 * d122 + tol))
-                            - np.arctan((u1 * w2) / (v1 * d112 + tol))
-                            + np.arctan((u2 * w2) / (v1 * d212 + tol))
-                            - np.arctan((u2 * w2) / (v2 * d222 + tol))
-                        )
-
-                        Gzy = (
-                            np.log(d111 - u1)
-                            - np.log(d211 - u2)
-                            + np.log(d221 - u2)
-                            - np.log(d121 - u1)
-                            + np.log(d122 - u1)
-                            - np.log(d112 - u1)
-                            + np.log(d212 - u2)
-                            - np.log(d222 - u2)
-                        )
-
-                        G[COUNT, :] = c * np.c_[Gxy, Gyy, Gzy]
-                        COUNT = COUNT + 1
-
-                elif dComp.lower() == "z":
-                    for rr in range(0, nLoc):
-                        u1 = locs[rr, 0] - ax
-                        u1[np.abs(u1) < tol] = np.min(xyzh[:, 0]) / tol2
-                        u2 = locs[rr, 0] - bx
-                        u2[np.abs(u2) < tol] = -np.min(xyzh[:, 0]) / tol2
-                        v1 = locs[rr, 1] - ay
-                        v1[np.abs(v1) < tol] = np.min(xyzh[:, 1]) / tol2
-                        v2 = locs[rr, 1] - by
-                        v2[np.abs(v2) < tol] = -np.min(xyzh[:, 1]) / tol2
-                        w1 = locs[rr, 2] - az
-                        w1[np.abs(w1) < tol] = np.min(xyzh[:, 2]) / tol2
-                        w2 = locs[rr, 2] - bz
-                        w2[np.abs(w2) < tol] = -np.min(xyzh[:, 2]) / tol2
-
-                        d111 = np.sqrt(u1 ** 2 + v1 ** 2 + w1 ** 2)
-                        d211 = np.sqrt(u2 ** 2 + v1 ** 2 + w1 ** 2)
-                        d221 = np.sqrt(u2 ** 2 + v2 ** 2 + w1 ** 2)
-                        d121 = np.sqrt(u1 ** 2 + v2 ** 2 + w1 ** 2)
-                        d122 = np.sqrt(u1 ** 2 + v2 ** 2 + w2 ** 2)
-                        d112 = np.sqrt(u1 ** 2 + v1 ** 2 + w2 ** 2)
-                        d212 = np.sqrt(u2 ** 2 + v1 ** 2 + w2 ** 2)
-                        d222 = np.sqrt(u2 ** 2 + v2 ** 2 + w2 ** 2)
-
-                        Gxz = (
-                            np.log(d111 - v1)
-                            - np.log(d211 - v1)
-                            + np.log(d221 - v2)
-                            - np.log(d121 - v2)
-                            + np.log(d122 - v2)
-                            - np.log(d112 - v1)
-                            + np.log(d212 - v1)
-                            - np.log(d222 - v2)
-                        )
-
-                        Gyz = (
-                            np.log(d111 - u1)
-                            - np.log(d211 - u2)
-                            + np.log(d221 - u2)
-                            - np.log(d121 - u1)
-                            + np.log(d122 - u1)
-                            - np.log(d112 - u1)
-                            + np.log(d212 - u2)
-                            - np.log(d222 - u2)
-                        )
-
-                        Gzz = (
-                            -np.arctan((v1 * w1) / (u1 * d111 + tol))
-                            + np.arctan((v1 * w1) / (u2 * d211 + tol))
-                            - np.arctan((v2 * w1) / (u2 * d221 + tol))
-                            + np.arctan((v2 * w1) / (u1 * d121 + tol))
-                            - np.arctan((v2 * w2) / (u1 * d122 + tol))
-                            + np.arctan((v1 * w2) / (u1 * d112 + tol))
-                            - np.arctan((v1 * w2) / (u2 * d212 + tol))
-                            + np.arctan((v2 * w2) / (u2 * d222 + tol))
-                        )
-
-                        Gzz = (
-                            Gzz
-                            - np.arctan((u1 * w1) / (v1 * d111 + tol))
-                            + np.arctan((u2 * w1) / (v1 * d211 + tol))
-                            - np.arctan((u2 * w1) / (v2 * d221 + tol))
-                            + np.arctan((u1 * w1) / (v2 * d121 + tol))
-                            - np.arctan((u1 * w2) / (v2 * d122 + tol))
-                            + np.arctan((u1 * w2) / (v1 * d112 + tol))
-                            - np.arctan((u2 * w2) / (v1 * d212 + tol))
-                            + np.arctan((u2 * w2) / (v2 * d222 + tol))
-                        )
-
-                        G[COUNT, :] = c * np.c_[Gxz, Gyz, Gzz]
-                        COUNT = COUNT + 1
-
-            elif isinstance(rxObj, SquareLoop):
-
-                # Gaussian quadrature weights
-                wt = [
-                    np.r_[2.0],
-                    np.r_[1.0, 1.0],
-                    np.r_[0.555556, 0.888889, 0.555556],
-                    np.r_[0.347855, 0.652145, 0.652145, 0.347855],
-                    np.r_[0.236927, 0.478629, 0.568889, 0.478629, 0.236927],
-                    np.r_[0.171324, 0.467914, 0.360762, 0.360762, 0.467914, 0.171324],
-                    np.r_[
-                        0.129485,
-                        0.279705,
-                        0.381830,
-                        0.417959,
-                        0.381830,
-                        0.279705,
-                        0.129485,
-                    ],
-                ]
-                wt = wt[rxObj.quadOrder - 1]
-                nw = len(wt)
-                wt = (
-                    rxObj.nTurns
-                    * (rxObj.width / 2) ** 2
-                    * np.reshape(np.outer(wt, wt), (1, nw ** 2))
-                )
+        G = []
 
-                # Gaussian quadrature locations on [-1,1]
-                ds = [
-                    np.r_[0.0],
-                    np.r_[-0.57735, 0.57735],
-                    np.r_[-0.774597, 0.0, 0.774597],
-                    np.r_[-0.861136, -0.339981, 0.339981, 0.861136],
-                    np.r_[-0.906180, -0.538469, 0, 0.538469, 0.906180],
-                    np.r_[
-                        -0.932470, -0.238619, -0.661209, 0.661209, 0.238619, 0.932470
-                    ],
-                    np.r_[
-                        -0.949108,
-                        -0.741531,
-                        -0.405845,
-                        0.0,
-                        0.405845,
-                        0.741531,
-                        0.949108,
-                    ],
-                ]
-
-                s1 = (
-                    0.5
-                    * rxObj.width
-                    * np.reshape(
-                        np.kron(ds[rxObj.quadOrder - 1], np.ones(nw)), (nw ** 2, 1)
-                    )
-                )
-                s2 = (
-                    0.5
-                    * rxObj.width
-                    * np.reshape(
-                        np.kron(np.ones(nw), ds[rxObj.quadOrder - 1]), (nw ** 2, 1)
-                    )
-                )
+        for rxObj in self.survey.source_list[pp].receiver_list:
+
+            compute = partial(self._getReceiverGeometry, xyzc, xyzh, rxObj)
+            if geometry is None:
+                G.append(compute())
+            else:
+                G.append(geometry.get(_receiver_key(rxObj), compute))
+
+        return np.vstack(G)
+
+    def _getReceiverGeometry(self, xyzc, xyzh, rxObj):
+
+        """
+                Rows of the geometry matrix for one receiver object, computed for
+                blocks of locations of at most max_block_size
+        ..
+        ..        REQUIRED ARGUMENTS:
+        ..
+        ..        xyzc: N by 3 numpy array containing cell center locations [xc,yc,zc]
+        ..
+        ..        xyzh: N by 3 numpy array containing cell dimensions [hx,hy,hz]
+        ..
+        ..        rxObj: Point or SquareLoop receiver
+        ..
+        ..        OUTPUTS:
+        ..
+        ..        G: nLoc by 3N rows of the geometry operator
 
-                if dComp.lower() == "x":
-                    for rr in range(0, nLoc):
-
-                        u1 = np.kron(np.ones((nw ** 2, 1)), locs[rr, 0] - ax)
-                        u1[np.abs(u1) < tol] = np.min(xyzh[:, 0]) / tol2
-                        u2 = np.kron(np.ones((nw ** 2, 1)), locs[rr, 0] - bx)
-                        u2[np.abs(u2) < tol] = -np.min(xyzh[:, 0]) / tol2
-
-                        v1 = np.kron(np.ones((nw ** 2, 1)), locs[rr, 1] - ay) + np.kron(
-                            s1, np.ones((1, nC))
-                        )
-                        v1[np.abs(v1) < tol] = np.min(xyzh[:, 1]) / tol2
-                        v2 = np.kron(np.ones((nw ** 2, 1)), locs[rr, 1] - by) + np.kron(
-                            s1, np.ones((1, nC))
-                        )
-                        v2[np.abs(v2) < tol] = -np.min(xyzh[:, 1]) / tol2
-
-                        w1 = np.kron(np.ones((nw ** 2, 1)), locs[rr, 2] - az) + np.kron(
-                            s2, np.ones((1, nC))
-                        )
-                        w1[np.abs(w1) < tol] = np.min(xyzh[:, 2]) / tol2
-                        w2 = np.kron(np.ones((nw ** 2, 1)), locs[rr, 2] - bz) + np.kron(
-                            s2, np.ones((1, nC))
-                        )
-                        w2[np.abs(w2) < tol] = -np.min(xyzh[:, 2]) / tol2
-
-                        d111 = np.sqrt(u1 ** 2 + v1 ** 2 + w1 ** 2)
-                        d211 = np.sqrt(u2 ** 2 + v1 ** 2 + w1 ** 2)
-                        d221 = np.sqrt(u2 ** 2 + v2 ** 2 + w1 ** 2)
-                        d121 = np.sqrt(u1 ** 2 + v2 ** 2 + w1 ** 2)
-                        d122 = np.sqrt(u1 ** 2 + v2 ** 2 + w2 ** 2)
-                        d112 = np.sqrt(u1 ** 2 + v1 ** 2 + w2 ** 2)
-                        d212 = np.sqrt(u2 ** 2 + v1 ** 2 + w2 ** 2)
-                        d222 = np.sqrt(u2 ** 2 + v2 ** 2 + w2 ** 2)
-
-                        Gxx = (
-                            np.arctan((v1 * w1) / (u1 * d111 + tol))
-                            - np.arctan((v1 * w1) / (u2 * d211 + tol))
-                            + np.arctan((v2 * w1) / (u2 * d221 + tol))
-                            - np.arctan((v2 * w1) / (u1 * d121 + tol))
-                            + np.arctan((v2 * w2) / (u1 * d122 + tol))
-                            - np.arctan((v1 * w2) / (u1 * d112 + tol))
-                            + np.arctan((v1 * w2) / (u2 * d212 + tol))
-                            - np.arctan((v2 * w2) / (u2 * d222 + tol))
-                        )
-
-                        Gxx = np.dot(wt, Gxx)
-
-                        Gyx = (
-                            np.log(d111 - w1)
-                            - np.log(d211 - w1)
-                            + np.log(d221 - w1)
-                            - np.log(d121 - w1)
-                            + np.log(d122 - w2)
-                            - np.log(d112 - w2)
-                            + np.log(d212 - w2)
-                            - np.log(d222 - w2)
-                        )
-
-                        Gyx = np.dot(wt, Gyx)
-
-                        Gzx = (
-                            np.log(d111 - v1)
-                            - np.log(d211 - v1)
-                            + np.log(d221 - v2)
-                            - np.log(d121 - v2)
-                            + np.log(d122 - v2)
-                            - np.log(d112 - v1)
-                            + np.log(d212 - v1)
-                            - np.log(d222 - v2)
-                        )
-
-                        Gzx = np.dot(wt, Gzx)
-
-                        G[COUNT, :] = c * np.c_[Gxx, Gyx, Gzx]
-                        COUNT = COUNT + 1
-
-                elif dComp.lower() == "y":
-                    for rr in range(0, nLoc):
-
-                        u1 = np.kron(np.ones((nw ** 2, 1)), locs[rr, 0] - ax) + np.kron(
-                            s1, np.ones((1, nC))
-                        )
-                        u1[np.abs(u1) < tol] = np.min(xyzh[:, 0]) / tol2
-                        u2 = np.kron(np.ones((nw ** 2, 1)), locs[rr, 0] - bx) + np.kron(
-                            s1, np.ones((1, nC))
-                        )
-                        u2[np.abs(u2) < tol] = -np.min(xyzh[:, 0]) / tol2
-
-                        v1 = np.kron(np.ones((nw ** 2, 1)), locs[rr, 1] - ay)
-                        v1[np.abs(v1) < tol] = np.min(xyzh[:, 1]) / tol2
-                        v2 = np.kron(np.ones((nw ** 2, 1)), locs[rr, 1] - by)
-                        v2[np.abs(v2) < tol] = -np.min(xyzh[:, 1]) / tol2
-
-                        w1 = np.kron(np.ones((nw ** 2, 1)), locs[rr, 2] - az) + np.kron(
-                            s2, np.ones((1, nC))
-                        )
-                        w1[np.abs(w1) < tol] = np.min(xyzh[:, 2]) / tol2
-                        w2 = np.kron(np.ones((nw ** 2, 1)), locs[rr, 2] - bz) + np.kron(
-                            s2, np.ones((1, nC))
-                        )
-                        w2[np.abs(w2) < tol] = -np.min(xyzh[:, 2]) / tol2
-
-                        d111 = np.sqrt(u1 ** 2 + v1 ** 2 + w1 ** 2)
-                        d211 = np.sqrt(u2 ** 2 + v1 ** 2 + w1 ** 2)
-                        d221 = np.sqrt(u2 ** 2 + v2 ** 2 + w1 ** 2)
-                        d121 = np.sqrt(u1 ** 2 + v2 ** 2 + w1 ** 2)
-                        d122 = np.sqrt(u1 ** 2 + v2 ** 2 + w2 ** 2)
-                        d112 = np.sqrt(u1 ** 2 + v1 ** 2 + w2 ** 2)
-                        d212 = np.sqrt(u2 ** 2 + v1 ** 2 + w2 ** 2)
-                        d222 = np.sqrt(u2 ** 2 + v2 ** 2 + w2 ** 2)
-
-                        Gxy = (
-                            np.log(d111 - w1)
-                            - np.log(d211 - w1)
-                            + np.log(d221 - w1)
-                            - np.log(d121 - w1)
-                            + np.log(d122 - w2)
-                            - np.log(d112 - w2)
-                            + np.log(d212 - w2)
-                            - np.log(d222 - w2)
-                        )
-
-                        Gxy = np.dot(wt, Gxy)
-
-                        Gyy = (
-                            np.arctan((u1 * w1) / (v1 * d111 + tol))
-                            - np.arctan((u2 * w1) / (v1 * d211 + tol))
-                            + np.arctan((u2 * w1) / (v2 * d221 + tol))
-                            - np.arctan((u1 * w1) / (v2 * d121 + tol))
-                            + np.arctan((u1 * w2) / (v2 * d122 + tol))
-                            - np.arctan((u1 * w2) / (v1 * d112 + tol))
-                            + np.arctan((u2 * w2) / (v1 * d212 + tol))
-                            - np.arctan((u2 * w2) / (v2 * d222 + tol))
-                        )
-
-                        Gyy = np.dot(wt, Gyy)
-
-                        Gzy = (
-                            np.log(d111 - u1)
-                            - np.log(d211 - u2)
-                            + np.log(d221 - u2)
-                            - np.log(d121 - u1)
-                            + np.log(d122 - u1)
-                            - np.log(d112 - u1)
-                            + np.log(d212 - u2)
-                            - np.log(d222 - u2)
-                        )
-
-                        Gzy = np.dot(wt, Gzy)
-
-                        G[COUNT, :] = c * np.c_[Gxy, Gyy, Gzy]
-                        COUNT = COUNT + 1
-
-                elif dComp.lower() == "z":
-                    for rr in range(0, nLoc):
-
-                        u1 = np.kron(np.ones((nw ** 2, 1)), locs[rr, 0] - ax) + np.kron(
-                            s1, np.ones((1, nC))
-                        )
-                        u1[np.abs(u1) < tol] = np.min(xyzh[:, 0]) / tol2
-                        u2 = np.kron(np.ones((nw ** 2, 1)), locs[rr, 0] - bx) + np.kron(
-                            s1, np.ones((1, nC))
-                        )
-
-                        u2[np.abs(u2) < tol] = -np.min(xyzh[:, 0]) / tol2
-                        v1 = np.kron(np.ones((nw ** 2, 1)), locs[rr, 1] - ay) + np.kron(
-                            s2, np.ones((1, nC))
-                        )
-                        v1[np.abs(v1) < tol] = np.min(xyzh[:, 1]) / tol2
-                        v2 = np.kron(np.ones((nw ** 2, 1)), locs[rr, 1] - by) + np.kron(
-                            s2, np.ones((1, nC))
-                        )
-                        v2[np.abs(v2) < tol] = -np.min(xyzh[:, 1]) / tol2
-
-                        w1 = np.kron(np.ones((nw ** 2, 1)), locs[rr, 2] - az)
-                        w1[np.abs(w1) < tol] = np.min(xyzh[:, 2]) / tol2
-                        w2 = np.kron(np.ones((nw ** 2, 1)), locs[rr, 2] - bz)
-                        w2[np.abs(w2) < tol] = -np.min(xyzh[:, 2]) / tol2
-
-                        d111 = np.sqrt(u1 ** 2 + v1 ** 2 + w1 ** 2)
-                        d211 = np.sqrt(u2 ** 2 + v1 ** 2 + w1 ** 2)
-                        d221 = np.sqrt(u2 ** 2 + v2 ** 2 + w1 ** 2)
-                        d121 = np.sqrt(u1 ** 2 + v2 ** 2 + w1 ** 2)
-                        d122 = np.sqrt(u1 ** 2 + v2 ** 2 + w2 ** 2)
-                        d112 = np.sqrt(u1 ** 2 + v1 ** 2 + w2 ** 2)
-                        d212 = np.sqrt(u2 ** 2 + v1 ** 2 + w2 ** 2)
-                        d222 = np.sqrt(u2 ** 2 + v2 ** 2 + w2 ** 2)
-
-                        Gxz = (
-                            np.log(d111 - v1)
-                            - np.log(d211 - v1)
-                            + np.log(d221 - v2)
-                            - np.log(d121 - v2)
-                            + np.log(d122 - v2)
-                            - np.log(d112 - v1)
-                            + np.log(d212 - v1)
-                            - np.log(d222 - v2)
-                        )
-
-                        Gxz = np.dot(wt, Gxz)
-
-                        Gyz = (
-                            np.log(d111 - u1)
-                            - np.log(d211 - u2)
-                            + np.log(d221 - u2)
-                            - np.log(d121 - u1)
-                            + np.log(d122 - u1)
-                            - np.log(d112 - u1)
-                            + np.log(d212 - u2)
-                            - np.log(d222 - u2)
-                        )
-
-                        Gyz = np.dot(wt, Gyz)
-
-                        Gzz = (
-                            -np.arctan((v1 * w1) / (u1 * d111 + tol))
-                            + np.arctan((v1 * w1) / (u2 * d211 + tol))
-                            - np.arctan((v2 * w1) / (u2 * d221 + tol))
-                            + np.arctan((v2 * w1) / (u1 * d121 + tol))
-                            - np.arctan((v2 * w2) / (u1 * d122 + tol))
-                            + np.arctan((v1 * w2) / (u1 * d112 + tol))
-                            - np.arctan((v1 * w2) / (u2 * d212 + tol))
-                            + np.arctan((v2 * w2) / (u2 * d222 + tol))
-                        )
-
-                        Gzz = (
-                            Gzz
-                            - np.arctan((u1 * w1) / (v1 * d111 + tol))
-                            + np.arctan((u2 * w1) / (v1 * d211 + tol))
-                            - np.arctan((u2 * w1) / (v2 * d221 + tol))
-                            + np.arctan((u1 * w1) / (v2 * d121 + tol))
-                            - np.arctan((u1 * w2) / (v2 * d122 + tol))
-                            + np.arctan((u1 * w2) / (v1 * d112 + tol))
-                            - np.arctan((u2 * w2) / (v1 * d212 + tol))
-                            + np.arctan((u2 * w2) / (v2 * d222 + tol))
-                        )
-
-                        Gzz = np.dot(wt, Gzz)
-
-                        G[COUNT, :] = c * np.c_[Gxz, Gyz, Gzz]
-                        COUNT = COUNT + 1
+        """
+
+        nC = np.shape(xyzc)[0]
+        locs = rxObj.locations
+        nLoc = np.shape(locs)[0]
+
+        bounds = (
+            xyzc[:, 0] - xyzh[:, 0] / 2,
+            xyzc[:, 0] + xyzh[:, 0] / 2,
+            xyzc[:, 1] - xyzh[:, 1] / 2,
+            xyzc[:, 1] + xyzh[:, 1] / 2,
+            xyzc[:, 2] - xyzh[:, 2] / 2,
+            xyzc[:, 2] + xyzh[:, 2] / 2,
+        )
+        hmin = np.min(xyzh, axis=0)
+
+        if isinstance(rxObj, SquareLoop):
+            # Gaussian quadrature over the loop, as point receivers at the
+            # quadrature locations
+            ds = _QUADRATURE_POINTS[rxObj.quadOrder - 1]
+            wt = _QUADRATURE_WEIGHTS[rxObj.quadOrder - 1]
+            nw = len(wt)
+            wt = rxObj.nTurns * (rxObj.width / 2) ** 2 * mkvc(np.outer(wt, wt))
+            s1 = 0.5 * rxObj.width * np.kron(ds, np.ones(nw))
+            s2 = 0.5 * rxObj.width * np.kron(np.ones(nw), ds)
+            # the loop lies in the plane normal to its orientation
+            normal = "xyz".index(rxObj.orientation.lower())
+            shifts = np.zeros((nw ** 2, 3))
+            shifts[:, np.delete(np.arange(3), normal)] = np.c_[s1, s2]
+        else:
+            wt = np.ones(1)
+            shifts = np.zeros((1, 3))
+
+        nq = len(wt)
+        n_block = max(int(self.max_block_size * 1e6 / (8.0 * nq * nC)), 1)
+
+        G = np.empty((nLoc, 3 * nC))
+        for ind in range(0, nLoc, n_block):
+            block = locs[ind : ind + n_block]
+            rows = _geometry_rows(
+                np.repeat(block, nq, axis=0),
+                rxObj.orientation,
+                bounds,
+                hmin,
+                shifts=np.tile(shifts, (len(block), 1)),
+            )
+            G[ind : ind + n_block] = np.dot(
+                wt, rows.reshape((len(block), nq, 3 * nC))
+            )
 
         return G
 
@@ -708,31 +412,39 @@ class BaseVRMSimulation(BaseSimulation):
         xyzc = meshObj.gridCC[indActive, :]
         xyzh = meshObj.h_gridded[indActive, :]
 
-        # GET LIST OF A MATRICIES
-        A = []
-        for pp in range(0, self.survey.nSrc):
+        # GET LIST OF A MATRICIES, n_cpu sources at once. The geometry of the
+        # receivers is shared by the sources
+        geometry = _GeometryCache(self.survey.source_list)
+        return parallel_map(
+            partial(self._getAMatrix, xyzc, xyzh, geometry),
+            range(self.survey.nSrc),
+            n_workers=self.n_cpu,
+        )
 
-            # Create initial A matrix
-            G = self._getGeometryMatrix(xyzc, xyzh, pp)
-            H0 = self._getH0matrix(xyzc, pp)
-            A.append(G * H0)
+    def _getAMatrix(self, xyzc, xyzh, geometry, pp):
 
-            # Refine A matrix
-            refinement_factor = self.refinement_factor
-            refinement_distance = self.refinement_distance
+        """Returns the geometric operator for source pp"""
 
-            if refinement_factor > 0:
+        # Create initial A matrix
+        G = self._getGeometryMatrix(xyzc, xyzh, pp, geometry=geometry)
+        A = self._getH0(G, xyzc, pp)
 
-                srcObj = self.survey.source_list[pp]
-                refFlag = srcObj._getRefineFlags(
-                    xyzc, refinement_factor, refinement_distance
-                )
+        # Refine A matrix
+        refinement_factor = self.refinement_factor
+        refinement_distance = self.refinement_distance
 
-                for qq in range(1, refinement_factor + 1):
-                    if len(refFlag[refFlag == qq]) != 0:
-                        A[pp][:, refFlag == qq] = self._getSubsetAcolumns(
-                            xyzc, xyzh, pp, qq, refFlag
-                        )
+        if refinement_factor > 0:
+
+            srcObj = self.survey.source_list[pp]
+            refFlag = srcObj._getRefineFlags(
+                xyzc, refinement_factor, refinement_distance
+            )
+
+            for qq in range(1, refinement_factor + 1):
+                if np.any(refFlag == qq):
+                    A[:, refFlag == qq] = self._getSubsetAcolumns(
+                        xyzc, xyzh, pp, qq, refFlag
+                    )
 
         return A
 
@@ -741,6 +453,8 @@ class BaseVRMSimulation(BaseSimulation):
         """
                 This method returns the refined sensitivities for columns that will be
                 replaced in the A matrix for source pp and refinement factor qq.
+                The sensitivities of the n**3 sub-cells of every refined cell
+                are summed for blocks of sub-cell positions.
         ..
         ..        INPUTS:
         ..
@@ -760,33 +474,29 @@ class BaseVRMSimulation(BaseSimulation):
 
         """
 
-        # GET SUBMESH GRID
         n = 2 ** qq
-        [nx, ny, nz] = np.meshgrid(
-            np.linspace(1, n, n) - 0.5,
-            np.linspace(1, n, n) - 0.5,
-            np.linspace(1, n, n) - 0.5,
-        )
-        nxyz_sub = np.c_[mkvc(nx), mkvc(ny), mkvc(nz)]
 
-        xyzh_sub = xyzh[refFlag == qq, :]  # Get widths of cells to be refined
-        xyzc_sub = (
+        xyzh_sub = xyzh[refFlag == qq, :] / n  # Widths of the sub-cells
+        xyz0 = (
             xyzc[refFlag == qq, :] - xyzh[refFlag == qq, :] / 2
         )  # Get bottom southwest corners of cells to be refined
-        m = np.shape(xyzc_sub)[0]
-        xyzc_sub = np.kron(
-            xyzc_sub, np.ones((n ** 3, 1))
-        )  # Kron for n**3 refined cells
-        xyzh_sub = np.kron(
-            xyzh_sub / n, np.ones((n ** 3, 1))
-        )  # Kron for n**3 refined cells with widths h/n
-        nxyz_sub = np.kron(np.ones((m, 1)), nxyz_sub)  # Kron for n**3 refined cells
-        xyzc_sub = xyzc_sub + xyzh_sub * nxyz_sub
-
-        # GET SUBMESH A MATRIX AND COLLAPSE TO COLUMNS
-        G = self._getGeometryMatrix(xyzc_sub, xyzh_sub, pp)
-        H0 = self._getH0matrix(xyzc_sub, pp)
-        Acols = (G * H0) * sp.kron(sp.diags(np.ones(m)), np.ones((n ** 3, 1)))
+        m = np.shape(xyz0)[0]
+
+        # Sub-cell positions within the cells, nb of them at once
+        nxyz = np.array(list(itertools.product(np.arange(n) + 0.5, repeat=3)))
+        nRx = self.survey.source_list[pp].nRx
+        nb = max(int(self.max_block_size * 1e6 / (8.0 * 3 * nRx * m)), 1)
+
+        Acols = 0.0
+        for ind in range(0, n ** 3, nb):
+            nxyz_block = nxyz[ind : ind + nb]
+            xyzc_sub = np.reshape(
+                xyz0 + xyzh_sub * nxyz_block[:, None, :], (-1, 3)
+            )
+            xyzh_block = np.tile(xyzh_sub, (len(nxyz_block), 1))
+            G = self._getGeometryMatrix(xyzc_sub, xyzh_block, pp)
+            A = self._getH0(G, xyzc_sub, pp)
+            Acols = Acols + A.reshape((nRx, len(nxyz_block), m)).sum(axis=1)
 
         return Acols
 
@@ -8,6 +8,7 @@ import scipy.sparse as sp
 import time
 import properties
 from ...utils.code_utils import deprecate_class
+from ...utils.solver_utils import FactorCache
 import warnings
 
 from ... import utils
@@ -49,6 +50,16 @@ class SimulationNDCellCentered(BaseTimeSimulation):
 
     root_finder_tol = properties.Float("tolerance of the root_finder", default=1e-4)
 
+    max_jacobian_steps = properties.Integer(
+        "Maximum number of time steps whose Jacobian blocks and factors are "
+        "kept for Jvec and Jtvec. The other time steps are recomputed when "
+        "needed. By default, every time step is kept.",
+        required=False,
+        min=0,
+    )
+
+    clean_on_model_update = ["_jacobian_factors"]
+
     @properties.observer("model")
     def _on_model_change(self, change):
         """Update the nested model functions when the
@@ -225,6 +236,62 @@ class SimulationNDCellCentered(BaseTimeSimulation):
 
         return Asub, Adiag, B
 
+    def getJacobianBlocks(self, m, f, ii, adjoint=False):
+        """
+        Blocks of the Jacobian system at time step ii, and the factors of
+        Adiag (or Adiag.T for the adjoint).
+
+        The blocks and factors only depend on the model and the fields, so
+        they are kept (for up to max_jacobian_steps time steps) until either
+        changes, and the Jvec and Jtvec of a Gauss-Newton step only do
+        triangular solves. The blocks are shared by Jvec and Jtvec, the
+        factors of Adiag and Adiag.T are kept separately.
+
+        :param numpy.ndarray m: model
+        :param list f: fields
+        :param int ii: time index
+        :param bool adjoint: factors of the transposed Adiag
+        :rtype: tuple
+        :return: Asub, solver for Adiag (or Adiag.T), B
+        """
+        if m is not None:
+            self.model = m
+
+        if getattr(self, "_jacobian_factors", None) is None or (
+            self._jacobian_fields is not f
+        ):
+            if getattr(self, "_jacobian_factors", None) is not None:
+                self._jacobian_factors.clean()
+            self._jacobian_factors = FactorCache()
+            self._jacobian_blocks = {}
+            self._jacobian_fields = f
+
+        keep = (
+            self.max_jacobian_steps is None
+            or ii in self._jacobian_blocks
+            or len(self._jacobian_blocks) < self.max_jacobian_steps
+        )
+
+        if ii in self._jacobian_blocks:
+            Asub, Adiag, B = self._jacobian_blocks[ii]
+        else:
+            bc = self.getBoundaryConditions(ii, f[ii])
+            Asub, Adiag, B = self.diagsJacobian(
+                m, f[ii], f[ii + 1], self.time_steps[ii], bc
+            )
+            if keep:
+                self._jacobian_blocks[ii] = (Asub, Adiag, B)
+
+        key = (ii, adjoint)
+        if key in self._jacobian_factors:
+            Adiaginv = self._jacobian_factors[key]
+        else:
+            Adiaginv = self.solver(Adiag.T if adjoint else Adiag, **self.solver_opts)
+            if keep:
+                self._jacobian_factors[key] = Adiaginv
+
+        return Asub, Adiaginv, B
+
     @utils.timeIt
     def getResidual(self, m, hn, h, dt, bc, return_g=True):
         """Used by the root finder when going between timesteps
@@ -299,18 +366,14 @@ class SimulationNDCellCentered(BaseTimeSimulation):
         JvC = list(range(len(f) - 1))  # Cell to hold each row of the long vector
 
         # This is done via forward substitution.
-        bc = self.getBoundaryConditions(0, f[0])
-        temp, Adiag, B = self.diagsJacobian(m, f[0], f[1], self.time_steps[0], bc)
-        Adiaginv = self.solver(Adiag, **self.solver_opts)
-        JvC[0] = Adiaginv * (B * v)
-
-        for ii in range(1, len(f) - 1):
-            bc = self.getBoundaryConditions(ii, f[ii])
-            Asub, Adiag, B = self.diagsJacobian(
-                m, f[ii], f[ii + 1], self.time_steps[ii], bc
-            )
-            Adiaginv = self.solver(Adiag, **self.solver_opts)
-            JvC[ii] = Adiaginv * (B * v - Asub * JvC[ii - 1])
+        for ii in range(len(f) - 1):
+            Asub, Adiaginv, B = self.getJacobianBlocks(m, f, ii)
+            rhs = B * v
+            if ii > 0:
+                rhs = rhs - Asub * JvC[ii - 1]
+            JvC[ii] = Adiaginv * rhs
+            if (ii, False) not in self._jacobian_factors:
+                Adiaginv.clean()
 
         du_dm_v = np.concatenate([np.zeros(self.mesh.nC)] + JvC)
         Jv = self.survey.deriv(self, f, du_dm_v=du_dm_v, v=v)
@@ -319,7 +382,7 @@ class SimulationNDCellCentered(BaseTimeSimulation):
     @utils.timeIt
     def Jtvec(self, m, v, f=None):
         if f is None:
-            f = self.field(m)
+            f = self.fields(m)
 
         PTv, PTdv = self.survey.derivAdjoint(self, f, v=v)
 
@@ -327,16 +390,14 @@ class SimulationNDCellCentered(BaseTimeSimulation):
         minus = 0
         BJtv = 0
         for ii in range(len(f) - 1, 0, -1):
-            bc = self.getBoundaryConditions(ii - 1, f[ii - 1])
-            Asub, Adiag, B = self.diagsJacobian(
-                m, f[ii - 1], f[ii], self.time_steps[ii - 1], bc
-            )
+            Asub, AdiaginvT, B = self.getJacobianBlocks(m, f, ii - 1, adjoint=True)
             # select the correct part of v
-            vpart = list(range((ii) * Adiag.shape[0], (ii + 1) * Adiag.shape[0]))
-            AdiaginvT = self.solver(Adiag.T, **self.solver_opts)
-            JTvC = AdiaginvT * (PTv[vpart] - minus)
+            n = B.shape[0]
+            JTvC = AdiaginvT * (PTv[ii * n : (ii + 1) * n] - minus)
             minus = Asub.T * JTvC  # this is now the super diagonal.
             BJtv = BJtv + B.T * JTvC
+            if (ii - 1, True) not in self._jacobian_factors:
+                AdiaginvT.clean()
 
         return BJtv + PTdv
 
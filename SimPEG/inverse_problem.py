@@ -7,7 +7,11 @@ import gc
 from .data_misfit import BaseDataMisfit
 from .props import BaseSimPEG, Model
 from .regularization import BaseRegularization, BaseComboRegularization, Sparse
-from .objective_function import BaseObjectiveFunction, ComboObjectiveFunction
+from .objective_function import (
+    BaseObjectiveFunction,
+    ComboObjectiveFunction,
+    ParallelComboObjectiveFunction,
+)
 from .utils import callHooks, timeIt
 
 
@@ -145,6 +149,9 @@ class BaseInvProblem(BaseSimPEG):
             if isinstance(self.dmisfit, BaseDataMisfit):
                 f = self.dmisfit.simulation.fields(m)
 
+            elif isinstance(self.dmisfit, ParallelComboObjectiveFunction):
+                f = self.dmisfit.fields(m)
+
             elif isinstance(self.dmisfit, BaseObjectiveFunction):
                 f = []
                 for objfct in self.dmisfit.objfcts:
@@ -163,6 +170,8 @@ class BaseInvProblem(BaseSimPEG):
     def get_dpred(self, m, f):
         if isinstance(self.dmisfit, BaseDataMisfit):
             return self.dmisfit.simulation.dpred(m, f=f)
+        elif isinstance(self.dmisfit, ParallelComboObjectiveFunction):
+            return self.dmisfit.dpred(m, f=f)
         elif isinstance(self.dmisfit, BaseObjectiveFunction):
             dpred = []
             for i, objfct in enumerate(self.dmisfit.objfcts):
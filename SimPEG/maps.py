@@ -7,6 +7,8 @@ from .utils.code_utils import deprecate_class
 from six import integer_types
 from six import string_types
 from collections import namedtuple
+from functools import lru_cache
+import inspect
 import warnings
 
 import numpy as np
@@ -127,6 +129,18 @@ class IdentityMap(properties.HasProperties):
             return sp.identity(self.nP)
         return Identity()
 
+    def deriv_T(self, m, v):
+        """
+        The transpose of the derivative of the transformation times a vector.
+
+        :param numpy.ndarray m: model
+        :param numpy.ndarray v: vector to multiply
+        :rtype: numpy.ndarray
+        :return: transpose of the derivative times v
+
+        """
+        return self.deriv(m).T * v
+
     def test(self, m=None, num=4, **kwargs):
         """Test the derivative of the mapping.
 
@@ -224,6 +238,24 @@ class IdentityMap(properties.HasProperties):
         return 1
 
 
+@lru_cache(maxsize=None)
+def _takes_vector(map_class):
+    """Whether the derivative of a class of maps can be given the vector to
+    multiply, v"""
+    try:
+        return "v" in inspect.signature(map_class.deriv).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+def _deriv_vector(mapping, m, v):
+    """Derivative of a map times a vector, without forming the derivative
+    when the map can apply it to v"""
+    if _takes_vector(type(mapping)):
+        return mapping.deriv(m, v=v)
+    return mapping.deriv(m) * v
+
+
 class ComboMap(IdentityMap):
     """
     Combination of various maps.
@@ -286,18 +318,39 @@ class ComboMap(IdentityMap):
             m = map_i * m
         return m
 
+    def _intermediate_models(self, m):
+        """
+        Models given to each map of the chain, from the last map to the
+        first.
+        """
+        models = []
+        mi = m
+        for map_i in reversed(self.maps):
+            models.append(mi)
+            mi = map_i * mi
+        return models
+
     def deriv(self, m, v=None):
+        models = self._intermediate_models(m)
 
-        if v is not None:
-            deriv = v
-        else:
+        if v is None:
             deriv = 1
+            for map_i, mi in zip(reversed(self.maps), models):
+                deriv = map_i.deriv(mi) * deriv
+            return deriv
 
-        mi = m
-        for map_i in reversed(self.maps):
-            deriv = map_i.deriv(mi) * deriv
-            mi = map_i * mi
-        return deriv
+        # chain rule right to left, only with products of vectors
+        for map_i, mi in zip(reversed(self.maps), models):
+            v = _deriv_vector(map_i, mi, v)
+        return v
+
+    def deriv_T(self, m, v):
+        models = self._intermediate_models(m)
+
+        # chain rule left to right, with the transposed derivatives
+        for map_i, mi in zip(self.maps, reversed(models)):
+            v = map_i.deriv_T(mi, v)
+        return v
 
     def __str__(self):
         return "ComboMap[{0!s}]({1!s},{2!s})".format(
@@ -444,6 +497,9 @@ class SumMap(ComboMap):
 
         return sumDeriv
 
+    def deriv_T(self, m, v):
+        return sum(map_i.deriv_T(m, v) for map_i in self.maps)
+
 
 class SurjectUnits(IdentityMap):
     """
@@ -3311,6 +3367,46 @@ class ParametricBlockInLayer(ParametricLayer):
             return sp.csr_matrix(self._deriv3d(m))
 
 
+def _containing_tree_cells(mesh, fine_mesh, cells):
+    """
+    Index of the cell of a TreeMesh holding each of the given cells of a
+    finer TreeMesh, or None unless both share the same base mesh and every
+    cell of mesh is a cell of fine_mesh or a coarsening of them.
+
+    The cells of a TreeMesh are ordered along a Z-order curve, on which a
+    cell covers 2 ** (dim * (max_level - level)) cells of the finest level.
+    The position of the end of each cell along the curve follows from the
+    cell levels alone, and a cell is held by the coarse cell it ends in.
+    """
+    dim = mesh.dim
+    max_level = mesh.max_level
+    if (
+        fine_mesh.dim != dim
+        or fine_mesh.max_level != max_level
+        or not np.allclose(fine_mesh.x0, mesh.x0)
+        or any(
+            len(h) != len(fine_h) or not np.allclose(h, fine_h)
+            for h, fine_h in zip(mesh.h, fine_mesh.h)
+        )
+    ):
+        return None
+
+    def curve_ends(tree_mesh):
+        levels = tree_mesh.cell_levels_by_index(np.arange(tree_mesh.nC))
+        return np.cumsum(np.left_shift(1, dim * (max_level - levels), dtype=np.int64))
+
+    ends = curve_ends(mesh)
+    fine_ends = curve_ends(fine_mesh)
+    # Last fine cell of each coarse cell, where they must end together
+    last = np.searchsorted(fine_ends, ends)
+    if fine_ends[-1] != ends[-1] or np.any(
+        fine_ends[np.minimum(last, fine_mesh.nC - 1)] != ends
+    ):
+        return None
+    holder = np.repeat(np.arange(mesh.nC), np.diff(np.r_[-1, last]))
+    return holder[cells]
+
+
 class TileMap(IdentityMap):
     """
     Mapping for tiled inversion.
@@ -3375,29 +3471,36 @@ class TileMap(IdentityMap):
         """
         if getattr(self, "_P", None) is None:
 
-            in_local = self.local_mesh._get_containing_cell_indexes(
-                self.global_mesh.gridCC
+            # Only the active global cells contribute. When the local cells
+            # are global cells or coarsenings of them, the local cell holding
+            # each global cell follows from the levels of the cells, otherwise
+            # the global cell centers are located on the local mesh.
+            active = np.where(self.global_active)[0]
+            in_local = _containing_tree_cells(
+                self.local_mesh, self.global_mesh, active
             )
-
-            P = (
-                sp.csr_matrix(
-                    (self.global_mesh.vol, (in_local, np.arange(self.global_mesh.nC))),
-                    shape=(self.local_mesh.nC, self.global_mesh.nC),
+            if in_local is None:
+                in_local = self.local_mesh._get_containing_cell_indexes(
+                    self.global_mesh.gridCC[active]
                 )
-                * speye(self.global_mesh.nC)[:, self.global_active]
-            )
 
-            self.local_active = mkvc(np.sum(P, axis=1) > 0)
-
-            P = P[self.local_active, :]
+            self.local_active = (
+                np.bincount(in_local, minlength=self.local_mesh.nC) > 0
+            )
 
-            self._P = sp.block_diag(
-                [
-                    sdiag(1.0 / self.local_mesh.vol[self.local_active]) * P
-                    for ii in range(self.components)
-                ]
+            # Renumber the local cells that receive a global cell
+            local_index = np.cumsum(self.local_active) - 1
+            P = sp.csr_matrix(
+                (
+                    self.global_mesh.vol[active]
+                    / self.local_mesh.vol[in_local],
+                    (local_index[in_local], np.arange(len(active))),
+                ),
+                shape=(self.local_active.sum(), len(active)),
             )
 
+            self._P = sp.block_diag([P for ii in range(self.components)])
+
         return self._P
 
     def _transform(self, m):
@@ -3,6 +3,8 @@ from __future__ import print_function
 from __future__ import unicode_literals
 from __future__ import division
 
+import multiprocessing
+import weakref
 import numpy as np
 import scipy.sparse as sp
 from six import integer_types
@@ -12,9 +14,14 @@ from discretize.tests import checkDerivative
 
 from .maps import IdentityMap
 from .props import BaseSimPEG
-from .utils import setKwargs, timeIt, Zero, Identity
+from .utils import setKwargs, timeIt, Zero, Identity, mkvc
 
-__all__ = ["BaseObjectiveFunction", "ComboObjectiveFunction", "L2ObjectiveFunction"]
+__all__ = [
+    "BaseObjectiveFunction",
+    "ComboObjectiveFunction",
+    "ParallelComboObjectiveFunction",
+    "L2ObjectiveFunction",
+]
 
 
 class BaseObjectiveFunction(BaseSimPEG):
@@ -395,6 +402,315 @@ class ComboObjectiveFunction(BaseObjectiveFunction):
         return sp.vstack(W)
 
 
+def _evaluate_objfcts(objfcts, multipliers, method, m, v=None, f=None):
+    """
+    Weighted sum of the value, deriv or deriv2 of the objective functions, as
+    in ComboObjectiveFunction.
+    """
+    out = 0.0 if method == "__call__" else Zero()
+    for i, (multiplier, objfct) in enumerate(zip(multipliers, objfcts)):
+        if multiplier == 0.0:  # don't evaluate the fct
+            continue
+        kwargs = {}
+        if f is not None and f[i] is not None and objfct._hasFields:
+            kwargs["f"] = f[i]
+        args = (m,) if method != "deriv2" else (m, v)
+        aux = getattr(objfct, method)(*args, **kwargs)
+        if not isinstance(aux, Zero):
+            out = out + multiplier * aux
+    return out
+
+
+def _JtJ_diagonal(objfcts, m, W=None):
+    """
+    Sum of the diagonals of JtJ of the simulations of data misfits, weighted
+    by W, one per misfit, or by the W of each misfit by default.
+    """
+    if W is None:
+        W = [objfct.W for objfct in objfcts]
+    JtJdiag = np.zeros_like(m)
+    for objfct, W_i in zip(objfcts, W):
+        sim = objfct.simulation
+        if getattr(sim, "getJtJdiag", None) is None:
+            if getattr(sim, "getJ", None) is None:
+                raise AttributeError(
+                    "Simulation does not have a getJ attribute."
+                    + "Cannot form the sensitivity explicitly"
+                )
+            JtJdiag += mkvc(np.sum((W_i * sim.getJ(m)) ** 2.0, axis=0))
+        else:
+            JtJdiag += sim.getJtJdiag(m, W=W_i)
+    return JtJdiag
+
+
+def _objfcts_worker(connection, objfcts):
+    """
+    Loop of a worker process holding some objective functions of a
+    ParallelComboObjectiveFunction, with their fields, until it receives None.
+    """
+    fields = [None] * len(objfcts)
+    tags = [None] * len(objfcts)
+
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        method, args = message
+        try:
+            if method == "fields":
+                m, tag = args
+                for i, objfct in enumerate(objfcts):
+                    if hasattr(objfct, "simulation"):
+                        fields[i] = objfct.simulation.fields(m)
+                        tags[i] = tag
+                out = None
+            elif method == "dpred":
+                m, tag = args
+                out = [
+                    objfct.simulation.dpred(m, f=f if t == tag else None)
+                    for objfct, f, t in zip(objfcts, fields, tags)
+                    if hasattr(objfct, "simulation")
+                ]
+            elif method == "getJtJdiag":
+                m, W = args
+                out = _JtJ_diagonal(objfcts, m, W=W)
+            elif method == "setattr":
+                name, value = args
+                for objfct in objfcts:
+                    if hasattr(objfct, name):
+                        setattr(objfct, name, value)
+                out = None
+            else:
+                multipliers, m, v, tag = args
+                f = None
+                if tag is not None:
+                    f = [fi if t == tag else None for fi, t in zip(fields, tags)]
+                out = _evaluate_objfcts(objfcts, multipliers, method, m, v=v, f=f)
+        except Exception as err:
+            connection.send((False, err))
+        else:
+            connection.send((True, out))
+    connection.close()
+
+
+class _WorkerFields(object):
+    """
+    Handle on the fields held by the worker processes of a
+    ParallelComboObjectiveFunction, for the model they were computed for.
+    """
+
+    def __init__(self, tag):
+        self.tag = tag
+
+
+def _close_workers(workers):
+    for process, connection in workers:
+        try:
+            connection.send(None)
+            connection.close()
+        except (OSError, ValueError):
+            pass
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+    del workers[:]
+
+
+class ParallelComboObjectiveFunction(ComboObjectiveFunction):
+    """
+    A ComboObjectiveFunction evaluating its objective functions, e.g. the data
+    misfits of a tiled or of a joint inversion, in parallel.
+
+    The objective functions are split between n_workers long-lived worker
+    processes, started on the first evaluation. Each worker keeps its
+    objective functions resident, with their simulations, fields, matrix
+    factors and sensitivities, so only the models, the vectors and the
+    results are exchanged with the workers.
+
+    .. code::python
+
+        dmis = ParallelComboObjectiveFunction(
+            [L2DataMisfit(data=d, simulation=sim) for d, sim in tiles],
+            n_workers=4,
+        )
+
+    The fields of the simulations stay in the workers: :meth:`fields` only
+    returns a handle on them, understood by the methods of this objective
+    function. Changes to the multipliers are passed to the workers, but the
+    objective functions in this process are copies, so other changes made to
+    them after the workers started are not. Use :meth:`getJtJdiag` and
+    :meth:`set_objfcts_attribute` to reach the objective functions held by
+    the workers. Call :meth:`close` to stop the workers.
+
+    The workers are started with the default method of multiprocessing, or
+    with the given context, e.g. "spawn" or "forkserver" when the process
+    holds threads or resources that should not be forked. The objective
+    functions are then pickled to the workers.
+    """
+
+    def __init__(
+        self, objfcts=[], multipliers=None, n_workers=None, context=None, **kwargs
+    ):
+        super(ParallelComboObjectiveFunction, self).__init__(
+            objfcts=objfcts, multipliers=multipliers, **kwargs
+        )
+        if n_workers is None:
+            n_workers = multiprocessing.cpu_count()
+        self.n_workers = max(min(n_workers, len(objfcts)), 1)
+        self.context = context
+        self._workers = []
+        self._n_fields = 0
+        self._finalizer = weakref.finalize(self, _close_workers, self._workers)
+
+    @property
+    def _worker_objfcts(self):
+        """
+        Indices of the objective functions held by each worker
+        """
+        return np.array_split(np.arange(len(self.objfcts)), self.n_workers)
+
+    def _start_workers(self):
+        context = self.context
+        if context is None or isinstance(context, str):
+            context = multiprocessing.get_context(context)
+        for indices in self._worker_objfcts:
+            connection, child_connection = context.Pipe()
+            process = context.Process(
+                target=_objfcts_worker,
+                args=(child_connection, [self.objfcts[i] for i in indices]),
+                daemon=True,
+            )
+            process.start()
+            child_connection.close()
+            self._workers.append((process, connection))
+
+    def _run(self, method, worker_args):
+        """
+        Send a method and its arguments to every worker, then gather their
+        results, in the order of the workers.
+        """
+        if not self._workers:
+            self._start_workers()
+        for (_, connection), args in zip(self._workers, worker_args):
+            connection.send((method, args))
+        results = [connection.recv() for _, connection in self._workers]
+        for success, out in results:
+            if not success:
+                raise out
+        return [out for _, out in results]
+
+    def _evaluate(self, method, m, v=None, f=None):
+        if self.n_workers == 1:
+            # nothing to distribute, evaluate the objective functions here
+            return _evaluate_objfcts(self.objfcts, self.multipliers, method, m, v, f)
+        tag = f.tag if isinstance(f, _WorkerFields) else None
+        worker_args = [
+            ([self.multipliers[i] for i in indices], m, v, tag)
+            for indices in self._worker_objfcts
+        ]
+        out = 0.0 if method == "__call__" else Zero()
+        for aux in self._run(method, worker_args):
+            if not isinstance(aux, Zero):
+                out = out + aux
+        return out
+
+    def fields(self, m):
+        """
+        Fields of the simulations of the objective functions. With more than
+        one worker, they are kept in the workers and a handle on them is
+        returned.
+
+        :param numpy.ndarray m: model
+        """
+        if self.n_workers == 1:
+            return [
+                objfct.simulation.fields(m) if hasattr(objfct, "simulation") else None
+                for objfct in self.objfcts
+            ]
+        self._n_fields += 1
+        self._run("fields", [(m, self._n_fields)] * self.n_workers)
+        return _WorkerFields(self._n_fields)
+
+    def dpred(self, m, f=None):
+        """
+        Predicted data of the simulations of the objective functions, as a
+        list.
+
+        :param numpy.ndarray m: model
+        :param f: fields, as returned by :meth:`fields`
+        """
+        if self.n_workers == 1:
+            if f is None:
+                f = self.fields(m)
+            return [
+                objfct.simulation.dpred(m, f=fi)
+                for objfct, fi in zip(self.objfcts, f)
+                if hasattr(objfct, "simulation")
+            ]
+        tag = f.tag if isinstance(f, _WorkerFields) else None
+        return sum(self._run("dpred", [(m, tag)] * self.n_workers), [])
+
+    def __call__(self, m, f=None):
+        return self._evaluate("__call__", m, f=f)
+
+    def deriv(self, m, f=None):
+        """
+        First derivative of the composite objective function, the weighted sum
+        of the derivatives computed by the workers.
+
+        :param numpy.ndarray m: model
+        :param f: fields, as returned by :meth:`fields`
+        """
+        return self._evaluate("deriv", m, f=f)
+
+    def deriv2(self, m, v=None, f=None):
+        """
+        Second derivative of the composite objective function, the weighted
+        sum of the second derivatives computed by the workers.
+
+        :param numpy.ndarray m: model
+        :param numpy.ndarray v: vector we are multiplying by
+        :param f: fields, as returned by :meth:`fields`
+        """
+        return self._evaluate("deriv2", m, v=v, f=f)
+
+    def getJtJdiag(self, m, W=None):
+        """
+        Sum of the diagonals of JtJ of the simulations of the data misfits,
+        computed where the misfits are held.
+
+        :param numpy.ndarray m: model
+        :param list W: weights of the data of each misfit, their W by default
+        """
+        if self.n_workers == 1:
+            return _JtJ_diagonal(self.objfcts, m, W=W)
+        worker_args = [
+            (m, None if W is None else [W[i] for i in indices])
+            for indices in self._worker_objfcts
+        ]
+        return sum(self._run("getJtJdiag", worker_args))
+
+    def set_objfcts_attribute(self, name, value):
+        """
+        Set an attribute of the objective functions that have it, both in
+        this process and in the workers, e.g. to reset stored matrices.
+
+        :param str name: name of the attribute
+        :param value: new value
+        """
+        for objfct in self.objfcts:
+            if hasattr(objfct, name):
+                setattr(objfct, name, value)
+        if self._workers:
+            self._run("setattr", [(name, value)] * self.n_workers)
+
+    def close(self):
+        """
+        Stop the worker processes.
+        """
+        _close_workers(self._workers)
+
+
 class L2ObjectiveFunction(BaseObjectiveFunction):
     """
     An L2-Objective Function
@@ -2,5 +2,7 @@ from __future__ import absolute_import
 
 from . import magnetics
 from . import gravity
+from . import tiling
 
 from .base import get_dist_wgt
+from .tiling import tile_locations, create_local_mesh, create_tiled_misfit
@@ -4,13 +4,18 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 import os
+import json
 import warnings
 import properties
 import numpy as np
 import multiprocessing
+from functools import partial
 from ..simulation import LinearSimulation
+import scipy.sparse as sp
 from scipy.sparse import csr_matrix as csr
-from SimPEG.utils import mkvc
+from scipy.spatial import cKDTree
+from SimPEG.utils import mkvc, parallel_map, parallel_imap
+from SimPEG.utils.hmatrix_utils import HierarchicalMatrix
 
 ###############################################################################
 #                                                                             #
@@ -27,12 +32,61 @@ class BasePFSimulation(LinearSimulation):
     n_cpu = properties.Integer(
         "Number of processors used for the forward simulation",
         default=int(multiprocessing.cpu_count()),
+        min=1,
+    )
+
+    parallel_backend = properties.StringChoice(
+        "Pool of workers used to compute blocks of receivers",
+        choices=["thread", "process"],
+        default="thread",
+    )
+
+    max_block_size = properties.Float(
+        "Approximate size (Mb) of the arrays computed for one block of receivers",
+        default=8.0,
+        min=0.0,
     )
 
     store_sensitivities = properties.StringChoice(
         "Compute and store G", choices=["disk", "ram", "forward_only"], default="ram"
     )
 
+    sensitivity_dtype = properties.StringChoice(
+        "Precision used to store G. With 'int16', each row is quantized with "
+        "its own scale factor (see G_scale)",
+        choices=["float64", "float32", "int16"],
+        default="float64",
+    )
+
+    sensitivity_cutoff = properties.Float(
+        "Distance (m) between receiver and cell center beyond which the "
+        "contributions to G are dropped, storing G as a sparse matrix",
+        default=np.inf,
+        min=0.0,
+    )
+
+    sensitivity_tolerance = properties.Float(
+        "Relative tolerance, with respect to the largest entry of each row, "
+        "below which the contributions to G are dropped, storing G as a "
+        "sparse matrix",
+        default=0.0,
+        min=0.0,
+    )
+
+    hierarchical_tolerance = properties.Float(
+        "Relative accuracy of the low-rank far-field blocks of G, stored as a "
+        "hierarchical matrix if greater than 0",
+        default=0.0,
+        min=0.0,
+    )
+
+    hierarchical_leaf_size = properties.Integer(
+        "Maximum number of receivers or cells in the dense blocks of a "
+        "hierarchical G",
+        default=64,
+        min=1,
+    )
+
     def __init__(self, mesh, **kwargs):
 
         LinearSimulation.__init__(self, mesh, **kwargs)
@@ -74,47 +128,419 @@ class BasePFSimulation(LinearSimulation):
 
         self.nC = self.modelMap.shape[0]
 
-        components = np.array(list(self.survey.components.keys()))
-        active_components = np.hstack(
-            [np.c_[values] for values in self.survey.components.values()]
-        ).tolist()
-        nD = self.survey.nD
+        if self.compact_sensitivities and self.store_sensitivities != "forward_only":
+            if self.store_sensitivities == "disk":
+                raise ValueError(
+                    "Sparse sensitivities, from sensitivity_cutoff or "
+                    "sensitivity_tolerance, are stored in ram. "
+                    "Set store_sensitivities='ram'."
+                )
+            if self.sensitivity_dtype == "int16":
+                raise ValueError(
+                    "Sparse sensitivities cannot be quantized to int16. "
+                    "Use sensitivity_dtype 'float64' or 'float32'."
+                )
+
+        if self.hierarchical_tolerance > 0 and self.store_sensitivities != "forward_only":
+            if self.store_sensitivities == "disk" or self.compact_sensitivities:
+                raise ValueError(
+                    "A hierarchical G is stored in ram, and is not truncated. "
+                    "Set store_sensitivities='ram' and leave sensitivity_cutoff "
+                    "and sensitivity_tolerance to their defaults."
+                )
+            return self._hierarchical_linear_operator()
 
         if self.store_sensitivities == "disk":
-            sens_name = self.sensitivity_path + "sensitivity.npy"
-            if os.path.exists(sens_name):
-                # do not pull array completely into ram, just need to check the size
-                kernel = np.load(sens_name, mmap_mode="r")
-                if kernel.shape == (nD, self.nC):
-                    print(f"Found sensitivity file at {sens_name} with expected shape")
-                    kernel = np.asarray(kernel)
-                    return kernel
-        # Single threaded
-        if self.store_sensitivities != "forward_only":
-            kernel = np.vstack(
-                [
-                    self.evaluate_integral(receiver, components[component])
-                    for receiver, component in zip(
-                        self.survey.receiver_locations.tolist(), active_components
-                    )
-                ]
+            return self._linear_operator_to_disk()
+
+        # Blocks of receivers evaluated in parallel
+        forward_only = self.store_sensitivities == "forward_only"
+        blocks = parallel_map(
+            partial(self._evaluate_block, forward_only=forward_only),
+            self._receiver_blocks(),
+            n_workers=self.n_cpu,
+            backend=self.parallel_backend,
+        )
+        if forward_only:
+            return np.hstack(blocks)
+
+        rows, scales, errors = zip(*blocks)
+        if self.sensitivity_dtype == "int16":
+            self._G_scale = np.hstack(scales)
+
+        if self.compact_sensitivities:
+            self._G_truncation_error = np.hstack(errors)
+            return sp.vstack(rows, format="csr")
+
+        return np.vstack(rows)
+
+    def _linear_operator_to_disk(self):
+        """
+        Stream the blocks of rows of G into a memory-mapped .npy file, as they
+        are computed. A manifest of the finished blocks is updated along the
+        way, so that an interrupted calculation resumes where it stopped.
+
+        :rtype: numpy.memmap
+        :return: read-only memory map of G
+        """
+        sens_name = self.sensitivity_path + "sensitivity.npy"
+        scale_name = self.sensitivity_path + "sensitivity_scale.npy"
+        manifest_name = self.sensitivity_path + "sensitivity.json"
+        shape = (self.survey.nD, self.nC)
+        dtype = self.sensitivity_dtype
+        quantized = dtype == "int16"
+
+        blocks = self._receiver_blocks()
+        n_rows = np.cumsum(
+            [0] + [len(locations) * len(components) for locations, components in blocks]
+        )
+        row_ranges = [
+            [int(start), int(end)] for start, end in zip(n_rows[:-1], n_rows[1:])
+        ]
+
+        completed = None
+        if os.path.exists(sens_name):
+            # do not pull array completely into ram, just need to check the size
+            kernel = np.load(sens_name, mmap_mode="r")
+            if kernel.shape == shape and kernel.dtype == dtype:
+                if not os.path.exists(manifest_name):
+                    if not quantized:
+                        print(
+                            f"Found sensitivity file at {sens_name} with expected shape"
+                        )
+                        return kernel
+                else:
+                    with open(manifest_name, "r") as file:
+                        manifest = json.load(file)
+                    if (
+                        tuple(manifest["shape"]) == shape
+                        and manifest.get("dtype", "float64") == dtype
+                    ):
+                        completed = manifest["completed"]
+            del kernel
+
+        if completed is None:
+            print(f"writing sensitivity to {sens_name}")
+            os.makedirs(self.sensitivity_path, exist_ok=True)
+            completed = []
+            self._write_manifest(manifest_name, shape, dtype, completed)
+            kernel = np.lib.format.open_memmap(
+                sens_name, mode="w+", dtype=dtype, shape=shape
             )
+            if quantized:
+                scale = np.lib.format.open_memmap(
+                    scale_name, mode="w+", dtype=np.float64, shape=shape[:1]
+                )
         else:
-            kernel = np.hstack(
-                [
-                    self.evaluate_integral(receiver, components[component]).dot(
-                        self.model
-                    )
-                    for receiver, component in zip(
-                        self.survey.receiver_locations.tolist(), active_components
+            kernel = np.load(sens_name, mmap_mode="r+")
+            if quantized:
+                scale = np.load(scale_name, mmap_mode="r+")
+
+        remaining = [
+            ind for ind, rows in enumerate(row_ranges) if rows not in completed
+        ]
+        if len(remaining) == 0:
+            print(f"Found sensitivity file at {sens_name} with expected shape")
+        elif len(completed) > 0:
+            print(
+                f"Resuming sensitivity in {sens_name}: "
+                f"{len(remaining)} of {len(blocks)} blocks left"
+            )
+
+        rows = parallel_imap(
+            self._evaluate_block,
+            [blocks[ind] for ind in remaining],
+            n_workers=self.n_cpu,
+            backend=self.parallel_backend,
+        )
+        for ind, (block, block_scale, _) in zip(remaining, rows):
+            start, end = row_ranges[ind]
+            kernel[start:end] = block
+            kernel.flush()
+            if quantized:
+                scale[start:end] = block_scale
+                scale.flush()
+            completed.append(row_ranges[ind])
+            self._write_manifest(manifest_name, shape, dtype, completed)
+
+        del kernel
+        if quantized:
+            del scale
+            self._G_scale = np.load(scale_name)
+
+        return np.load(sens_name, mmap_mode="r")
+
+    def _hierarchical_linear_operator(self):
+        """
+        Hierarchical matrix approximation of G, with the rows clustered by
+        receiver location and the columns by cell center.
+
+        :rtype: SimPEG.utils.hmatrix_utils.HierarchicalMatrix
+        """
+        components = list(self.survey.components.keys())
+        active_components = np.hstack(
+            [np.c_[values] for values in self.survey.components.values()]
+        )
+        # Receiver and component of each row of G
+        self._row_receivers, self._row_components = np.nonzero(active_components)
+
+        centers = np.c_[
+            self.Xn.mean(axis=1), self.Yn.mean(axis=1), self.Zn.mean(axis=1)
+        ]
+        n_cells = centers.shape[0]
+
+        def get_block(rows, columns):
+            receivers, rx_inverse = np.unique(
+                self._row_receivers[rows], return_inverse=True
+            )
+            cells, cell_inverse = np.unique(columns % n_cells, return_inverse=True)
+            block = self.evaluate_integral(
+                self.survey.receiver_locations[receivers], components, cells=cells
+            ).reshape((len(receivers), len(components), -1))
+
+            # Vector models repeat the cells for each component
+            columns = cell_inverse + (columns // n_cells) * len(cells)
+            return block[rx_inverse, self._row_components[rows]][:, columns]
+
+        return HierarchicalMatrix(
+            get_block,
+            self.survey.receiver_locations[self._row_receivers],
+            np.tile(centers, (self.nC // n_cells, 1)),
+            tol=self.hierarchical_tolerance,
+            leaf_size=self.hierarchical_leaf_size,
+            row_groups=self._row_receivers,
+        )
+
+    @staticmethod
+    def _write_manifest(manifest_name, shape, dtype, completed):
+        """
+        Record the rows of G already written to disk.
+        """
+        manifest = {"shape": list(shape), "dtype": dtype, "completed": completed}
+
+        # Write then rename, so an interruption never leaves a partial manifest
+        with open(manifest_name + ".tmp", "w") as file:
+            json.dump(manifest, file)
+        os.replace(manifest_name + ".tmp", manifest_name)
+
+    def _row_slices(self, n_rows, step=1):
+        """
+        Slices over blocks of rows of G, sized to fit in max_block_size.
+        The number of rows in each block is a multiple of step.
+        """
+        n_block = int(self.max_block_size * 1e6 / (8.0 * self.G.shape[1]))
+        n_block = max(n_block // step, 1) * step
+        for start in range(0, n_rows, n_block):
+            yield slice(start, min(start + n_block, n_rows))
+
+    @property
+    def compact_sensitivities(self):
+        """
+        Whether contributions to G are dropped by distance or tolerance, and G
+        stored as a sparse matrix.
+        """
+        return np.isfinite(self.sensitivity_cutoff) or self.sensitivity_tolerance > 0
+
+    @property
+    def G_truncation_error(self):
+        """
+        Sum of the absolute values of the entries dropped from each row of a
+        sparse G. For any model m, the error on each datum is then bounded by
+        ``|G m - G_sparse m| <= G_truncation_error * max(|m|)``.
+        """
+        if not self.compact_sensitivities:
+            return None
+        if getattr(self, "_G_truncation_error", None) is None:
+            self.G
+        return self._G_truncation_error
+
+    def sensitivity_error_bound(self, m):
+        """
+        Upper bound on the absolute error of each predicted datum, introduced
+        by the dropped contributions of a sparse G, for the model m.
+
+        :param numpy.ndarray m: model
+        :rtype: numpy.ndarray
+        :return: error bound for each datum
+        """
+        if not self.compact_sensitivities:
+            return np.zeros(self.survey.nD)
+        return self.G_truncation_error * np.abs(self.modelMap @ m).max()
+
+    @property
+    def G_scale(self):
+        """
+        Scale factor of each row of G, if stored as quantized int16 integers.
+        The sensitivities are then G_scale[:, None] * G.
+        """
+        if self.sensitivity_dtype != "int16":
+            return None
+        if getattr(self, "_G_scale", None) is None:
+            self.G
+        return self._G_scale
+
+    def _G_rows(self, rows):
+        """
+        Block of rows of G, in float64 and scaled back if quantized.
+        """
+        block = np.asarray(self.G[rows], dtype=np.float64)
+        if self.G_scale is not None:
+            block *= self.G_scale[rows, None]
+        return block
+
+    def _G_in_blocks(self):
+        """
+        Whether G must be read by blocks of rows: stored on disk, or in a
+        reduced precision that should not be cast to float64 all at once.
+        """
+        return isinstance(self.G, np.ndarray) and (
+            isinstance(self.G, np.memmap) or self.G.dtype != np.float64
+        )
+
+    def _G_dot(self, v):
+        """
+        Product of G with a vector, accumulated in float64. A G stored on disk
+        or in reduced precision is read one block of rows at a time.
+        """
+        if not self._G_in_blocks():
+            return self.G @ v
+
+        out = np.empty(self.G.shape[0], dtype=np.result_type(np.float64, v.dtype))
+        for rows in self._row_slices(self.G.shape[0]):
+            out[rows] = self._G_rows(rows) @ v
+        return out
+
+    def _G_T_dot(self, v):
+        """
+        Product of the transpose of G with a vector, accumulated in float64.
+        A G stored on disk or in reduced precision is read one block of rows
+        at a time.
+        """
+        if not self._G_in_blocks():
+            return self.G.T @ v
+
+        out = np.zeros(self.G.shape[1], dtype=np.result_type(np.float64, v.dtype))
+        for rows in self._row_slices(self.G.shape[0]):
+            out += self._G_rows(rows).T @ v[rows]
+        return out
+
+    def _G_squared_column_sum(self, W, row_weights=None):
+        """
+        Weighted sum of the squared columns of G, sum_i W_i * (G_i)**2, computed
+        one block of rows at a time.
+
+        If row_weights of shape (n_combined, nD) are given, the rows of G are
+        first combined as sum_k row_weights[k, i] * G[n_combined * i + k].
+        """
+        n_combined = 1 if row_weights is None else row_weights.shape[0]
+
+        if sp.issparse(self.G):
+            G = self.G.tocsr()
+            if row_weights is not None:
+                G = sum(
+                    sp.diags(row_weights[k]) @ G[k::n_combined]
+                    for k in range(n_combined)
+                )
+            return np.asarray(W @ G.power(2)).ravel()
+
+        if isinstance(self.G, HierarchicalMatrix):
+            if row_weights is not None:
+                # The rows of each receiver are kept in the same blocks
+                return self.G.squared_column_sum(W, row_weights=row_weights.T.ravel())
+            return self.G.squared_column_sum(W)
+
+        diag = np.zeros(self.G.shape[1])
+        for rows in self._row_slices(self.G.shape[0], step=n_combined):
+            block = self._G_rows(rows)
+            data = slice(rows.start // n_combined, rows.stop // n_combined)
+            if row_weights is not None:
+                block = sum(
+                    row_weights[k, data, None] * block[k::n_combined]
+                    for k in range(n_combined)
+                )
+            diag += W[data] @ (block * block)
+        return diag
+
+    def _receiver_blocks(self):
+        """
+        Split the receivers into consecutive blocks sharing the same
+        active components, sized to fit in max_block_size.
+
+        :rtype: list
+        :return: list of tuples (receiver_locations, components)
+        """
+        components = np.array(list(self.survey.components.keys()))
+        active_components = np.hstack(
+            [np.c_[values] for values in self.survey.components.values()]
+        )
+        receiver_locations = self.survey.receiver_locations
+        n_receivers = receiver_locations.shape[0]
+
+        # Number of receivers evaluated at once
+        n_block = max(int(self.max_block_size * 1e6 / (8.0 * self.Xn.shape[0])), 1)
+
+        # Break the blocks wherever the active components change
+        changes = np.any(active_components[1:] != active_components[:-1], axis=1)
+        breaks = np.r_[0, np.where(changes)[0] + 1, n_receivers]
+
+        blocks = []
+        for start, end in zip(breaks[:-1], breaks[1:]):
+            for ind in range(start, end, n_block):
+                blocks.append(
+                    (
+                        receiver_locations[ind : min(ind + n_block, end)],
+                        components[active_components[ind]],
                     )
+                )
+        return blocks
+
+    def _evaluate_block(self, block, forward_only=False):
+        """
+        Evaluate the rows of G for a block of receivers, or their product with
+        the model if forward_only.
+
+        :rtype: tuple
+        :return: rows of G in the sensitivity_dtype, their scale factors
+            (None unless quantized) and the sum of the absolute values
+            dropped from each row (None unless sparse)
+        """
+        receiver_locations, components = block
+        rows = self.evaluate_integral(receiver_locations, components)
+        if forward_only:
+            return rows.dot(self.model)
+
+        if self.compact_sensitivities:
+            keep = np.ones(rows.shape, dtype=bool)
+
+            if np.isfinite(self.sensitivity_cutoff):
+                centers = np.c_[
+                    self.Xn.mean(axis=1), self.Yn.mean(axis=1), self.Zn.mean(axis=1)
                 ]
-            )
-        if self.store_sensitivities == "disk":
-            print(f"writing sensitivity to {sens_name}")
-            os.makedirs(self.sensitivity_path, exist_ok=True)
-            np.save(sens_name, kernel)
-        return kernel
+                distance = np.linalg.norm(
+                    centers[None, :, :] - receiver_locations[:, None, :], axis=2
+                )
+                near = np.repeat(
+                    distance <= self.sensitivity_cutoff, len(components), axis=0
+                )
+                # Vector models repeat the cells for each component
+                keep &= np.tile(near, (1, rows.shape[1] // near.shape[1]))
+
+            if self.sensitivity_tolerance > 0:
+                amplitude = np.abs(rows)
+                keep &= amplitude >= self.sensitivity_tolerance * amplitude.max(
+                    axis=1, keepdims=True
+                )
+
+            error = np.abs(np.where(keep, 0.0, rows)).sum(axis=1)
+            rows[~keep] = 0.0
+            return csr(rows.astype(self.sensitivity_dtype, copy=False)), None, error
+
+        if self.sensitivity_dtype == "int16":
+            scale = np.abs(rows).max(axis=1) / np.iinfo(np.int16).max
+            scale[scale == 0] = 1.0
+            return np.round(rows / scale[:, None]).astype(np.int16), scale, None
+
+        return rows.astype(self.sensitivity_dtype, copy=False), None, None
 
     def evaluate_integral(self):
         """
@@ -163,23 +589,6 @@ class BasePFSimulation(LinearSimulation):
             "loading dask for parallelism by doing ``import SimPEG.dask``."
         )
 
-    @property
-    def n_cpu(self):
-        """The parallelized property has been removed. If interested, try out
-        loading dask for parallelism by doing ``import SimPEG.dask``.
-        """
-        raise TypeError(
-            "n_cpu has been removed. If interested, try out "
-            "loading dask for parallelism by doing ``import SimPEG.dask``."
-        )
-
-    @parallelized.setter
-    def n_cpu(self, other):
-        raise TypeError(
-            "Do not set n_cpu. If interested, try out "
-            "loading dask for parallelism by doing ``import SimPEG.dask``."
-        )
-
 
 def progress(iter, prog, final):
     """
@@ -199,19 +608,39 @@ def progress(iter, prog, final):
     return prog
 
 
-def get_dist_wgt(mesh, receiver_locations, actv, R, R0):
+def _inverse_power(r, R):
+    """r ** -R, by repeated products for integer decay factors"""
+    if float(R) != int(R) or R < 1:
+        return r ** -R
+    np.reciprocal(r, out=r)
+    out = r.copy()
+    for _ in range(int(R) - 1):
+        out *= r
+    return out
+
+
+def get_dist_wgt(
+    mesh, receiver_locations, actv, R, R0, n_neighbors=None, max_block_size=8.0
+):
     """
-    get_dist_wgt(xn,yn,zn,receiver_locations,R,R0)
+    get_dist_wgt(mesh,receiver_locations,actv,R,R0)
 
     Function creating a distance weighting function required for the magnetic
     inverse problem.
 
+    The kernel decay is sampled at eight points inside each cell and summed
+    over the stations, in blocks of cells. With n_neighbors, the sum for
+    each cell is restricted to its n_neighbors nearest stations, found with
+    a KD-tree.
+
     INPUT
-    xn, yn, zn : Node location
+    mesh        : TensorMesh or TreeMesh
     receiver_locations       : Observation locations [obsx, obsy, obsz]
     actv        : Active cell vector [0:air , 1: ground]
     R           : Decay factor (mag=3, grav =2)
     R0          : Small factor added (default=dx/4)
+    n_neighbors : Number of nearest stations per cell (default=all)
+    max_block_size : Memory (Mb) of the distances computed at once
 
     OUTPUT
     wr       : [nC] Vector of distance weighting
@@ -223,75 +652,61 @@ def get_dist_wgt(mesh, receiver_locations, actv, R, R0):
 
     # Find non-zero cells
     if actv.dtype == "bool":
-        inds = (
-            np.asarray([inds for inds, elem in enumerate(actv, 1) if elem], dtype=int)
-            - 1
-        )
+        inds = np.where(actv)[0]
     else:
         inds = actv
 
     nC = len(inds)
-
-    # Create active cell projector
-    P = csr((np.ones(nC), (inds, range(nC))), shape=(mesh.nC, nC))
+    receiver_locations = np.atleast_2d(receiver_locations)
+    ndata = receiver_locations.shape[0]
 
     # Geometrical constant
     p = 1 / np.sqrt(3)
 
-    # Create cell center location
-    Ym, Xm, Zm = np.meshgrid(mesh.vectorCCy, mesh.vectorCCx, mesh.vectorCCz)
-    hY, hX, hZ = np.meshgrid(mesh.hy, mesh.hx, mesh.hz)
-
-    # Remove air cells
-    Xm = P.T * mkvc(Xm)
-    Ym = P.T * mkvc(Ym)
-    Zm = P.T * mkvc(Zm)
+    # Cell centers and sizes of the active cells
+    centers = mesh.gridCC[inds]
+    h = mesh.h_gridded[inds]
+    V = mesh.vol[inds]
 
-    hX = P.T * mkvc(hX)
-    hY = P.T * mkvc(hY)
-    hZ = P.T * mkvc(hZ)
-
-    V = P.T * mkvc(mesh.vol)
-    wr = np.zeros(nC)
+    if n_neighbors is not None and n_neighbors < ndata:
+        tree = cKDTree(receiver_locations)
+        _, neighbors = tree.query(centers, k=n_neighbors)
+        neighbors = neighbors.reshape(nC, -1)
+    else:
+        neighbors = None
+        n_neighbors = ndata
 
-    ndata = receiver_locations.shape[0]
-    count = -1
     print("Begin calculation of distance weighting for R= " + str(R))
 
-    for dd in range(ndata):
-
-        nx1 = (Xm - hX * p - receiver_locations[dd, 0]) ** 2
-        nx2 = (Xm + hX * p - receiver_locations[dd, 0]) ** 2
-
-        ny1 = (Ym - hY * p - receiver_locations[dd, 1]) ** 2
-        ny2 = (Ym + hY * p - receiver_locations[dd, 1]) ** 2
-
-        nz1 = (Zm - hZ * p - receiver_locations[dd, 2]) ** 2
-        nz2 = (Zm + hZ * p - receiver_locations[dd, 2]) ** 2
-
-        R1 = np.sqrt(nx1 + ny1 + nz1)
-        R2 = np.sqrt(nx1 + ny1 + nz2)
-        R3 = np.sqrt(nx2 + ny1 + nz1)
-        R4 = np.sqrt(nx2 + ny1 + nz2)
-        R5 = np.sqrt(nx1 + ny2 + nz1)
-        R6 = np.sqrt(nx1 + ny2 + nz2)
-        R7 = np.sqrt(nx2 + ny2 + nz1)
-        R8 = np.sqrt(nx2 + ny2 + nz2)
-
-        temp = (
-            (R1 + R0) ** -R
-            + (R2 + R0) ** -R
-            + (R3 + R0) ** -R
-            + (R4 + R0) ** -R
-            + (R5 + R0) ** -R
-            + (R6 + R0) ** -R
-            + (R7 + R0) ** -R
-            + (R8 + R0) ** -R
-        )
-
-        wr = wr + (V * temp / 8.0) ** 2.0
+    # Number of cells per block, for a few (n_cells, n_neighbors) arrays
+    n_block = int(max_block_size * 1e6 / (8.0 * 10.0 * n_neighbors))
+    n_block = int(np.clip(n_block, 1, nC))
 
-        count = progress(dd, count, ndata)
+    wr = np.zeros(nC)
+    for start in range(0, nC, n_block):
+        cells = slice(start, start + n_block)
+        if neighbors is None:
+            rx = receiver_locations[None, :, :]
+        else:
+            rx = receiver_locations[neighbors[cells]]
+
+        # Squared distances to the inner points, on either side of the center
+        dr = [
+            [
+                (centers[cells, ii, None] + sign * p * h[cells, ii, None] - rx[..., ii])
+                ** 2
+                for sign in [-1.0, 1.0]
+            ]
+            for ii in range(3)
+        ]
+
+        temp = 0.0
+        for nx in dr[0]:
+            for ny in dr[1]:
+                for nz in dr[2]:
+                    temp = temp + _inverse_power(np.sqrt(nx + ny + nz) + R0, R)
+
+        wr[cells] = ((V[cells, None] * temp / 8.0) ** 2.0).sum(axis=1)
 
     wr = np.sqrt(wr) / V
     wr = mkvc(wr)
@@ -31,7 +31,7 @@ class Simulation3DIntegral(BasePFSimulation):
             # Compute the linear operation without forming the full dense G
             fields = mkvc(self.linear_operator())
         else:
-            fields = self.G @ (self.rhoMap @ m).astype(np.float32)
+            fields = self._G_dot(self.rhoMap @ m)
 
         return np.asarray(fields)
 
@@ -47,9 +47,7 @@ class Simulation3DIntegral(BasePFSimulation):
             W = W.diagonal() ** 2
         if getattr(self, "_gtg_diagonal", None) is None:
 
-            diag = np.zeros(self.G.shape[1])
-            for i in range(len(W)):
-                diag += W[i] * (self.G[i] * self.G[i])
+            diag = self._G_squared_column_sum(W)
             self._gtg_diagonal = diag
         else:
             diag = self._gtg_diagonal
@@ -65,15 +63,15 @@ class Simulation3DIntegral(BasePFSimulation):
         """
         Sensitivity times a vector
         """
-        dmu_dm_v = self.rhoDeriv @ v
-        return self.G @ dmu_dm_v.astype(np.float32)
+        dmu_dm_v = self._deriv_product("rho", v)
+        return self._G_dot(dmu_dm_v)
 
     def Jtvec(self, m, v, f=None):
         """
         Sensitivity transposed times a vector
         """
-        Jtvec = self.G.T @ v.astype(np.float32)
-        return np.asarray(self.rhoDeriv.T @ Jtvec)
+        Jtvec = self._G_T_dot(v)
+        return np.asarray(self._deriv_product("rho", Jtvec, adjoint=True))
 
     @property
     def G(self):
@@ -96,15 +94,18 @@ class Simulation3DIntegral(BasePFSimulation):
 
         return self._gtg_diagonal
 
-    def evaluate_integral(self, receiver_location, components):
+    def evaluate_integral(self, receiver_location, components, cells=None):
         """
         Compute the forward linear relationship between the model and the physics at a point
         and for all components of the survey.
 
-        :param numpy.ndarray receiver_location:  array with shape (n_receivers, 3)
-            Array of receiver locations as x, y, z columns.
+        :param numpy.ndarray receiver_location:  array with shape (3,) or (n_receivers, 3)
+            Array of receiver locations as x, y, z columns. A block of receivers
+            is evaluated at once by broadcasting over the first axis.
         :param list[str] components: List of gravity components chosen from:
             'gx', 'gy', 'gz', 'gxx', 'gxy', 'gxz', 'gyy', 'gyz', 'gzz', 'guv'
+        :param numpy.ndarray cells: indices of the active cells to evaluate,
+            all by default
 
         :rtype numpy.ndarray: rows
         :returns: ndarray with shape (n_components, n_cells)
@@ -116,6 +117,9 @@ class Simulation3DIntegral(BasePFSimulation):
                            ...
                     g_c = [g_cx g_cy g_cz]
 
+            For a block of receivers, the rows are ordered by receiver, then by
+            component, with shape (n_receivers * n_components, n_cells).
+
         """
         tol1 = 1e-4
         tol2 = 1e-10
@@ -127,39 +131,44 @@ class Simulation3DIntegral(BasePFSimulation):
             self.mesh.hz.min(),
         )
 
-        dx = self.Xn - receiver_location[0]
+        # Broadcast over receivers along the first axis
+        receiver_location = np.atleast_2d(receiver_location)
+        if cells is None:
+            cells = slice(None)
+        Xn, Yn, Zn = self.Xn[cells], self.Yn[cells], self.Zn[cells]
+        shape = (receiver_location.shape[0], Xn.shape[0])
+
+        dx = Xn - receiver_location[:, 0, None, None]
         dx[np.abs(dx) / min_hx < tol1] = tol1 * min_hx
-        dy = self.Yn - receiver_location[1]
+        dy = Yn - receiver_location[:, 1, None, None]
         dy[np.abs(dy) / min_hy < tol1] = tol1 * min_hy
-        dz = self.Zn - receiver_location[2]
+        dz = Zn - receiver_location[:, 2, None, None]
         dz[np.abs(dz) / min_hz < tol1] = tol1 * min_hz
 
-        rows = {component: np.zeros(self.Xn.shape[0]) for component in components}
+        rows = {component: np.zeros(shape) for component in components}
 
-        gxx = np.zeros(self.Xn.shape[0])
-        gyy = np.zeros(self.Xn.shape[0])
+        gxx = np.zeros(shape)
+        gyy = np.zeros(shape)
 
         for aa in range(2):
             for bb in range(2):
                 for cc in range(2):
 
                     r = (
-                        mkvc(dx[:, aa]) ** 2
-                        + mkvc(dy[:, bb]) ** 2
-                        + mkvc(dz[:, cc]) ** 2
+                        dx[..., aa] ** 2 + dy[..., bb] ** 2 + dz[..., cc] ** 2
                     ) ** (0.50)
 
-                    dz_r = dz[:, cc] + r
-                    dy_r = dy[:, bb] + r
-                    dx_r = dx[:, aa] + r
+                    dz_r = dz[..., cc] + r
+                    dy_r = dy[..., bb] + r
+                    dx_r = dx[..., aa] + r
 
-                    dxr = dx[:, aa] * r
-                    dyr = dy[:, bb] * r
-                    dzr = dz[:, cc] * r
+                    dxr = dx[..., aa] * r
+                    dyr = dy[..., bb] * r
+                    dzr = dz[..., cc] * r
 
-                    dydz = dy[:, bb] * dz[:, cc]
-                    dxdy = dx[:, aa] * dy[:, bb]
-                    dxdz = dx[:, aa] * dz[:, cc]
+                    dydz = dy[..., bb] * dz[..., cc]
+                    dxdy = dx[..., aa] * dy[..., bb]
+                    dxdz = dx[..., aa] * dz[..., cc]
 
                     if "gx" in components:
                         rows["gx"] += (
@@ -167,9 +176,9 @@ class Simulation3DIntegral(BasePFSimulation):
                             * (-1) ** bb
                             * (-1) ** cc
                             * (
-                                dy[:, bb] * np.log(dz_r)
-                                + dz[:, cc] * np.log(dy_r)
-                                - dx[:, aa] * np.arctan(dydz / dxr)
+                                dy[..., bb] * np.log(dz_r)
+                                + dz[..., cc] * np.log(dy_r)
+                                - dx[..., aa] * np.arctan(dydz / dxr)
                             )
                         )
 
@@ -179,9 +188,9 @@ class Simulation3DIntegral(BasePFSimulation):
                             * (-1) ** bb
                             * (-1) ** cc
                             * (
-                                dx[:, aa] * np.log(dz_r)
-                                + dz[:, cc] * np.log(dx_r)
-                                - dy[:, bb] * np.arctan(dxdz / dyr)
+                                dx[..., aa] * np.log(dz_r)
+                                + dz[..., cc] * np.log(dx_r)
+                                - dy[..., bb] * np.arctan(dxdz / dyr)
                             )
                         )
 
@@ -191,13 +200,13 @@ class Simulation3DIntegral(BasePFSimulation):
                             * (-1) ** bb
                             * (-1) ** cc
                             * (
-                                dx[:, aa] * np.log(dy_r)
-                                + dy[:, bb] * np.log(dx_r)
-                                - dz[:, cc] * np.arctan(dxdy / dzr)
+                                dx[..., aa] * np.log(dy_r)
+                                + dy[..., bb] * np.log(dx_r)
+                                - dz[..., cc] * np.arctan(dxdy / dzr)
                             )
                         )
 
-                    arg = dy[:, bb] * dz[:, cc] / dxr
+                    arg = dy[..., bb] * dz[..., cc] / dxr
 
                     if (
                         ("gxx" in components)
@@ -212,11 +221,11 @@ class Simulation3DIntegral(BasePFSimulation):
                                 dxdy / (r * dz_r)
                                 + dxdz / (r * dy_r)
                                 - np.arctan(arg)
-                                + dx[:, aa]
+                                + dx[..., aa]
                                 * (1.0 / (1 + arg ** 2.0))
                                 * dydz
                                 / dxr ** 2.0
-                                * (r + dx[:, aa] ** 2.0 / r)
+                                * (r + dx[..., aa] ** 2.0 / r)
                             )
                         )
 
@@ -227,12 +236,12 @@ class Simulation3DIntegral(BasePFSimulation):
                             * (-1) ** cc
                             * (
                                 np.log(dz_r)
-                                + dy[:, bb] ** 2.0 / (r * dz_r)
-                                + dz[:, cc] / r
+                                + dy[..., bb] ** 2.0 / (r * dz_r)
+                                + dz[..., cc] / r
                                 - 1.0
                                 / (1 + arg ** 2.0)
-                                * (dz[:, cc] / r ** 2)
-                                * (r - dy[:, bb] ** 2.0 / r)
+                                * (dz[..., cc] / r ** 2)
+                                * (r - dy[..., bb] ** 2.0 / r)
                             )
                         )
 
@@ -243,16 +252,16 @@ class Simulation3DIntegral(BasePFSimulation):
                             * (-1) ** cc
                             * (
                                 np.log(dy_r)
-                                + dz[:, cc] ** 2.0 / (r * dy_r)
-                                + dy[:, bb] / r
+                                + dz[..., cc] ** 2.0 / (r * dy_r)
+                                + dy[..., bb] / r
                                 - 1.0
                                 / (1 + arg ** 2.0)
-                                * (dy[:, bb] / (r ** 2))
-                                * (r - dz[:, cc] ** 2.0 / r)
+                                * (dy[..., bb] / (r ** 2))
+                                * (r - dz[..., cc] ** 2.0 / r)
                             )
                         )
 
-                    arg = dx[:, aa] * dz[:, cc] / dyr
+                    arg = dx[..., aa] * dz[..., cc] / dyr
 
                     if (
                         ("gyy" in components)
@@ -267,11 +276,11 @@ class Simulation3DIntegral(BasePFSimulation):
                                 dxdy / (r * dz_r)
                                 + dydz / (r * dx_r)
                                 - np.arctan(arg)
-                                + dy[:, bb]
+                                + dy[..., bb]
                                 * (1.0 / (1 + arg ** 2.0))
                                 * dxdz
                                 / dyr ** 2.0
-                                * (r + dy[:, bb] ** 2.0 / r)
+                                * (r + dy[..., bb] ** 2.0 / r)
                             )
                         )
 
@@ -282,12 +291,12 @@ class Simulation3DIntegral(BasePFSimulation):
                             * (-1) ** cc
                             * (
                                 np.log(dx_r)
-                                + dz[:, cc] ** 2.0 / (r * (dx_r))
-                                + dx[:, aa] / r
+                                + dz[..., cc] ** 2.0 / (r * (dx_r))
+                                + dx[..., aa] / r
                                 - 1.0
                                 / (1 + arg ** 2.0)
-                                * (dx[:, aa] / (r ** 2))
-                                * (r - dz[:, cc] ** 2.0 / r)
+                                * (dx[..., aa] / (r ** 2))
+                                * (r - dz[..., cc] ** 2.0 / r)
                             )
                         )
 
@@ -309,7 +318,9 @@ class Simulation3DIntegral(BasePFSimulation):
             else:
                 rows[component] *= constants.G * 1e8  # conversion for mGal
 
-        return np.vstack([rows[component] for component in components])
+        return np.stack([rows[component] for component in components], axis=1).reshape(
+            (-1, shape[1])
+        )
 
 
 class Simulation3DDifferential(BaseSimulation):
@@ -97,7 +97,7 @@ class Simulation3DIntegral(BasePFSimulation):
             self.model = model
             fields = mkvc(self.linear_operator())
         else:
-            fields = np.asarray(self.G @ model.astype(np.float32))
+            fields = np.asarray(self._G_dot(model))
 
         if self.is_amplitude_data:
             fields = self.compute_amplitude(fields)
@@ -171,22 +171,10 @@ class Simulation3DIntegral(BasePFSimulation):
         else:
             W = W.diagonal() ** 2
         if getattr(self, "_gtg_diagonal", None) is None:
-            diag = np.zeros(self.G.shape[1])
             if not self.is_amplitude_data:
-                for i in range(len(W)):
-                    diag += W[i] * (self.G[i] * self.G[i])
+                diag = self._G_squared_column_sum(W)
             else:
-                fieldDeriv = self.fieldDeriv
-                Gx = self.G[::3]
-                Gy = self.G[1::3]
-                Gz = self.G[2::3]
-                for i in range(len(W)):
-                    row = (
-                        fieldDeriv[0, i] * Gx[i]
-                        + fieldDeriv[1, i] * Gy[i]
-                        + fieldDeriv[2, i] * Gz[i]
-                    )
-                    diag += W[i] * (row * row)
+                diag = self._G_squared_column_sum(W, row_weights=self.fieldDeriv)
             self._gtg_diagonal = diag
         else:
             diag = self._gtg_diagonal
@@ -194,9 +182,9 @@ class Simulation3DIntegral(BasePFSimulation):
 
     def Jvec(self, m, v, f=None):
         self.model = m
-        dmu_dm_v = self.chiDeriv @ v
+        dmu_dm_v = self._deriv_product("chi", v)
 
-        Jvec = self.G @ dmu_dm_v.astype(np.float32)
+        Jvec = self._G_dot(dmu_dm_v)
 
         if self.is_amplitude_data:
             Jvec = Jvec.reshape((-1, 3)).T
@@ -210,8 +198,8 @@ class Simulation3DIntegral(BasePFSimulation):
 
         if self.is_amplitude_data:
             v = (self.fieldDeriv * v).T.reshape(-1)
-        Jtvec = self.G.T @ v.astype(np.float32)
-        return np.asarray(self.chiDeriv.T @ Jtvec)
+        Jtvec = self._G_T_dot(v)
+        return np.asarray(self._deriv_product("chi", Jtvec, adjoint=True))
 
     @property
     def fieldDeriv(self):
@@ -220,7 +208,7 @@ class Simulation3DIntegral(BasePFSimulation):
             self.model = np.zeros(self.chiMap.nP)
 
         if getattr(self, "_fieldDeriv", None) is None:
-            fields = np.asarray(self.G.dot((self.chiMap @ self.chi).astype(np.float32)))
+            fields = np.asarray(self._G_dot(self.chiMap @ self.chi))
             b_xyz = self.normalized_fields(fields)
 
             self._fieldDeriv = b_xyz
@@ -248,32 +236,56 @@ class Simulation3DIntegral(BasePFSimulation):
 
         return amplitude
 
-    def evaluate_integral(self, receiver_location, components):
+    def evaluate_integral(self, receiver_location, components, cells=None):
         """
         Load in the active nodes of a tensor mesh and computes the magnetic
         forward relation between a cuboid and a given observation
         location outside the Earth [obsx, obsy, obsz]
 
         INPUT:
-        receiver_location:  [obsx, obsy, obsz] nC x 3 Array
+        receiver_location:  [obsx, obsy, obsz] 3 Array, or n_receivers x 3 Array
+            to evaluate a block of receivers at once
 
         components: list[str]
             List of magnetic components chosen from:
             'bx', 'by', 'bz', 'bxx', 'bxy', 'bxz', 'byy', 'byz', 'bzz'
 
+        cells: numpy.ndarray
+            Indices of the active cells to evaluate, all by default
+
         OUTPUT:
         Tx = [Txx Txy Txz]
         Ty = [Tyx Tyy Tyz]
         Tz = [Tzx Tzy Tzz]
+
+        For a block of receivers, the rows are ordered by receiver, then by
+        component, with shape (n_receivers * n_components, n_cells).
         """
         # TODO: This should probably be converted to C
         tol1 = 1e-10  # Tolerance 1 for numerical stability over nodes and edges
         tol2 = 1e-4  # Tolerance 2 for numerical stability over nodes and edges
 
-        rows = {component: np.zeros(3 * self.Xn.shape[0]) for component in components}
+        rows = {}
+
+        # Broadcast over receivers along the first axis
+        receiver_location = np.atleast_2d(receiver_location)
+        n_rx = receiver_location.shape[0]
 
         # number of cells in mesh
         nC = self.Xn.shape[0]
+        M = self.M
+        Xn, Yn, Zn = self.Xn, self.Yn, self.Zn
+
+        if cells is not None:
+            # Restrict the magnetization to the components of the cells
+            indices = np.r_[cells, nC + cells, 2 * nC + cells]
+            M = M.tocsr()[indices]
+            if M.shape[1] == nC:
+                M = M[:, cells]
+            else:
+                M = M[:, indices]
+            Xn, Yn, Zn = Xn[cells], Yn[cells], Zn[cells]
+            nC = len(cells)
 
         # base cell dimensions
         min_hx, min_hy, min_hz = (
@@ -284,19 +296,19 @@ class Simulation3DIntegral(BasePFSimulation):
 
         # comp. pos. differences for tne, bsw nodes. Adjust if location within
         # tolerance of a node or edge
-        dz2 = self.Zn[:, 1] - receiver_location[2]
+        dz2 = Zn[:, 1] - receiver_location[:, 2, None]
         dz2[np.abs(dz2) / min_hz < tol2] = tol2 * min_hz
-        dz1 = self.Zn[:, 0] - receiver_location[2]
+        dz1 = Zn[:, 0] - receiver_location[:, 2, None]
         dz1[np.abs(dz1) / min_hz < tol2] = tol2 * min_hz
 
-        dy2 = self.Yn[:, 1] - receiver_location[1]
+        dy2 = Yn[:, 1] - receiver_location[:, 1, None]
         dy2[np.abs(dy2) / min_hy < tol2] = tol2 * min_hy
-        dy1 = self.Yn[:, 0] - receiver_location[1]
+        dy1 = Yn[:, 0] - receiver_location[:, 1, None]
         dy1[np.abs(dy1) / min_hy < tol2] = tol2 * min_hy
 
-        dx2 = self.Xn[:, 1] - receiver_location[0]
+        dx2 = Xn[:, 1] - receiver_location[:, 0, None]
         dx2[np.abs(dx2) / min_hx < tol2] = tol2 * min_hx
-        dx1 = self.Xn[:, 0] - receiver_location[0]
+        dx1 = Xn[:, 0] - receiver_location[:, 0, None]
         dx1[np.abs(dx1) / min_hx < tol2] = tol2 * min_hx
 
         # comp. squared diff
@@ -383,9 +395,9 @@ class Simulation3DIntegral(BasePFSimulation):
         arg40 = dz1 + r8
 
         if ("bxx" in components) or ("bzz" in components):
-            rows["bxx"] = np.zeros((1, 3 * nC))
+            rows["bxx"] = np.zeros((n_rx, 3 * nC))
 
-            rows["bxx"][0, 0:nC] = 2 * (
+            rows["bxx"][:, 0:nC] = 2 * (
                 ((dx1 ** 2 - r1 * arg1) / (r1 * arg1 ** 2 + dx1 ** 2 * r1))
                 - ((dx2 ** 2 - r2 * arg6) / (r2 * arg6 ** 2 + dx2 ** 2 * r2))
                 + ((dx2 ** 2 - r3 * arg11) / (r3 * arg11 ** 2 + dx2 ** 2 * r3))
@@ -396,7 +408,7 @@ class Simulation3DIntegral(BasePFSimulation):
                 - ((dx2 ** 2 - r8 * arg36) / (r8 * arg36 ** 2 + dx2 ** 2 * r8))
             )
 
-            rows["bxx"][0, nC : 2 * nC] = (
+            rows["bxx"][:, nC : 2 * nC] = (
                 dx2 / (r5 * arg25)
                 - dx2 / (r2 * arg10)
                 + dx2 / (r3 * arg15)
@@ -407,7 +419,7 @@ class Simulation3DIntegral(BasePFSimulation):
                 - dx1 / (r4 * arg20)
             )
 
-            rows["bxx"][0, 2 * nC :] = (
+            rows["bxx"][:, 2 * nC :] = (
                 dx1 / (r1 * arg4)
                 - dx2 / (r2 * arg9)
                 + dx2 / (r3 * arg14)
@@ -419,13 +431,13 @@ class Simulation3DIntegral(BasePFSimulation):
             )
 
             rows["bxx"] /= 4 * np.pi
-            rows["bxx"] *= self.M
+            rows["bxx"] *= M
 
         if ("byy" in components) or ("bzz" in components):
 
-            rows["byy"] = np.zeros((1, 3 * nC))
+            rows["byy"] = np.zeros((n_rx, 3 * nC))
 
-            rows["byy"][0, 0:nC] = (
+            rows["byy"][:, 0:nC] = (
                 dy2 / (r3 * arg15)
                 - dy2 / (r2 * arg10)
                 + dy1 / (r5 * arg25)
@@ -435,7 +447,7 @@ class Simulation3DIntegral(BasePFSimulation):
                 + dy1 / (r7 * arg35)
                 - dy1 / (r6 * arg30)
             )
-            rows["byy"][0, nC : 2 * nC] = 2 * (
+            rows["byy"][:, nC : 2 * nC] = 2 * (
                 ((dy2 ** 2 - r1 * arg2) / (r1 * arg2 ** 2 + dy2 ** 2 * r1))
                 - ((dy2 ** 2 - r2 * arg7) / (r2 * arg7 ** 2 + dy2 ** 2 * r2))
                 + ((dy2 ** 2 - r3 * arg12) / (r3 * arg12 ** 2 + dy2 ** 2 * r3))
@@ -445,7 +457,7 @@ class Simulation3DIntegral(BasePFSimulation):
                 + ((dy1 ** 2 - r7 * arg32) / (r7 * arg32 ** 2 + dy1 ** 2 * r7))
                 - ((dy1 ** 2 - r8 * arg37) / (r8 * arg37 ** 2 + dy1 ** 2 * r8))
             )
-            rows["byy"][0, 2 * nC :] = (
+            rows["byy"][:, 2 * nC :] = (
                 dy2 / (r1 * arg3)
                 - dy2 / (r2 * arg8)
                 + dy2 / (r3 * arg13)
@@ -457,16 +469,16 @@ class Simulation3DIntegral(BasePFSimulation):
             )
 
             rows["byy"] /= 4 * np.pi
-            rows["byy"] *= self.M
+            rows["byy"] *= M
 
         if "bzz" in components:
 
             rows["bzz"] = -rows["bxx"] - rows["byy"]
 
         if "bxy" in components:
-            rows["bxy"] = np.zeros((1, 3 * nC))
+            rows["bxy"] = np.zeros((n_rx, 3 * nC))
 
-            rows["bxy"][0, 0:nC] = 2 * (
+            rows["bxy"][:, 0:nC] = 2 * (
                 ((dx1 * arg4) / (r1 * arg1 ** 2 + (dx1 ** 2) * r1))
                 - ((dx2 * arg9) / (r2 * arg6 ** 2 + (dx2 ** 2) * r2))
                 + ((dx2 * arg14) / (r3 * arg11 ** 2 + (dx2 ** 2) * r3))
@@ -476,7 +488,7 @@ class Simulation3DIntegral(BasePFSimulation):
                 + ((dx1 * arg34) / (r7 * arg31 ** 2 + (dx1 ** 2) * r7))
                 - ((dx2 * arg39) / (r8 * arg36 ** 2 + (dx2 ** 2) * r8))
             )
-            rows["bxy"][0, nC : 2 * nC] = (
+            rows["bxy"][:, nC : 2 * nC] = (
                 dy2 / (r1 * arg5)
                 - dy2 / (r2 * arg10)
                 + dy2 / (r3 * arg15)
@@ -486,18 +498,18 @@ class Simulation3DIntegral(BasePFSimulation):
                 + dy1 / (r7 * arg35)
                 - dy1 / (r8 * arg40)
             )
-            rows["bxy"][0, 2 * nC :] = (
+            rows["bxy"][:, 2 * nC :] = (
                 1 / r1 - 1 / r2 + 1 / r3 - 1 / r4 + 1 / r5 - 1 / r6 + 1 / r7 - 1 / r8
             )
 
             rows["bxy"] /= 4 * np.pi
 
-            rows["bxy"] *= self.M
+            rows["bxy"] *= M
 
         if "bxz" in components:
-            rows["bxz"] = np.zeros((1, 3 * nC))
+            rows["bxz"] = np.zeros((n_rx, 3 * nC))
 
-            rows["bxz"][0, 0:nC] = 2 * (
+            rows["bxz"][:, 0:nC] = 2 * (
                 ((dx1 * arg5) / (r1 * (arg1 ** 2) + (dx1 ** 2) * r1))
                 - ((dx2 * arg10) / (r2 * (arg6 ** 2) + (dx2 ** 2) * r2))
                 + ((dx2 * arg15) / (r3 * (arg11 ** 2) + (dx2 ** 2) * r3))
@@ -507,10 +519,10 @@ class Simulation3DIntegral(BasePFSimulation):
                 + ((dx1 * arg35) / (r7 * (arg31 ** 2) + (dx1 ** 2) * r7))
                 - ((dx2 * arg40) / (r8 * (arg36 ** 2) + (dx2 ** 2) * r8))
             )
-            rows["bxz"][0, nC : 2 * nC] = (
+            rows["bxz"][:, nC : 2 * nC] = (
                 1 / r1 - 1 / r2 + 1 / r3 - 1 / r4 + 1 / r5 - 1 / r6 + 1 / r7 - 1 / r8
             )
-            rows["bxz"][0, 2 * nC :] = (
+            rows["bxz"][:, 2 * nC :] = (
                 dz2 / (r1 * arg4)
                 - dz2 / (r2 * arg9)
                 + dz1 / (r3 * arg14)
@@ -523,15 +535,15 @@ class Simulation3DIntegral(BasePFSimulation):
 
             rows["bxz"] /= 4 * np.pi
 
-            rows["bxz"] *= self.M
+            rows["bxz"] *= M
 
         if "byz" in components:
-            rows["byz"] = np.zeros((1, 3 * nC))
+            rows["byz"] = np.zeros((n_rx, 3 * nC))
 
-            rows["byz"][0, 0:nC] = (
+            rows["byz"][:, 0:nC] = (
                 1 / r3 - 1 / r2 + 1 / r5 - 1 / r8 + 1 / r1 - 1 / r4 + 1 / r7 - 1 / r6
             )
-            rows["byz"][0, nC : 2 * nC] = 2 * (
+            rows["byz"][:, nC : 2 * nC] = 2 * (
                 (((dy2 * arg5) / (r1 * (arg2 ** 2) + (dy2 ** 2) * r1)))
                 - (((dy2 * arg10) / (r2 * (arg7 ** 2) + (dy2 ** 2) * r2)))
                 + (((dy2 * arg15) / (r3 * (arg12 ** 2) + (dy2 ** 2) * r3)))
@@ -541,7 +553,7 @@ class Simulation3DIntegral(BasePFSimulation):
                 + (((dy1 * arg35) / (r7 * (arg32 ** 2) + (dy1 ** 2) * r7)))
                 - (((dy1 * arg40) / (r8 * (arg37 ** 2) + (dy1 ** 2) * r8)))
             )
-            rows["byz"][0, 2 * nC :] = (
+            rows["byz"][:, 2 * nC :] = (
                 dz2 / (r1 * arg3)
                 - dz2 / (r2 * arg8)
                 + dz1 / (r3 * arg13)
@@ -554,12 +566,12 @@ class Simulation3DIntegral(BasePFSimulation):
 
             rows["byz"] /= 4 * np.pi
 
-            rows["byz"] *= self.M
+            rows["byz"] *= M
 
         if ("bx" in components) or ("tmi" in components):
-            rows["bx"] = np.zeros((1, 3 * nC))
+            rows["bx"] = np.zeros((n_rx, 3 * nC))
 
-            rows["bx"][0, 0:nC] = (
+            rows["bx"][:, 0:nC] = (
                 (-2 * np.arctan2(dx1, arg1 + tol1))
                 - (-2 * np.arctan2(dx2, arg6 + tol1))
                 + (-2 * np.arctan2(dx2, arg11 + tol1))
@@ -569,7 +581,7 @@ class Simulation3DIntegral(BasePFSimulation):
                 + (-2 * np.arctan2(dx1, arg31 + tol1))
                 - (-2 * np.arctan2(dx2, arg36 + tol1))
             )
-            rows["bx"][0, nC : 2 * nC] = (
+            rows["bx"][:, nC : 2 * nC] = (
                 np.log(arg5)
                 - np.log(arg10)
                 + np.log(arg15)
@@ -579,7 +591,7 @@ class Simulation3DIntegral(BasePFSimulation):
                 + np.log(arg35)
                 - np.log(arg40)
             )
-            rows["bx"][0, 2 * nC :] = (
+            rows["bx"][:, 2 * nC :] = (
                 (np.log(arg4) - np.log(arg9))
                 + (np.log(arg14) - np.log(arg19))
                 + (np.log(arg24) - np.log(arg29))
@@ -587,12 +599,12 @@ class Simulation3DIntegral(BasePFSimulation):
             )
             rows["bx"] /= -4 * np.pi
 
-            rows["bx"] *= self.M
+            rows["bx"] *= M
 
         if ("by" in components) or ("tmi" in components):
-            rows["by"] = np.zeros((1, 3 * nC))
+            rows["by"] = np.zeros((n_rx, 3 * nC))
 
-            rows["by"][0, 0:nC] = (
+            rows["by"][:, 0:nC] = (
                 np.log(arg5)
                 - np.log(arg10)
                 + np.log(arg15)
@@ -602,7 +614,7 @@ class Simulation3DIntegral(BasePFSimulation):
                 + np.log(arg35)
                 - np.log(arg40)
             )
-            rows["by"][0, nC : 2 * nC] = (
+            rows["by"][:, nC : 2 * nC] = (
                 (-2 * np.arctan2(dy2, arg2 + tol1))
                 - (-2 * np.arctan2(dy2, arg7 + tol1))
                 + (-2 * np.arctan2(dy2, arg12 + tol1))
@@ -612,7 +624,7 @@ class Simulation3DIntegral(BasePFSimulation):
                 + (-2 * np.arctan2(dy1, arg32 + tol1))
                 - (-2 * np.arctan2(dy1, arg37 + tol1))
             )
-            rows["by"][0, 2 * nC :] = (
+            rows["by"][:, 2 * nC :] = (
                 (np.log(arg3) - np.log(arg8))
                 + (np.log(arg13) - np.log(arg18))
                 + (np.log(arg23) - np.log(arg28))
@@ -621,12 +633,12 @@ class Simulation3DIntegral(BasePFSimulation):
 
             rows["by"] /= -4 * np.pi
 
-            rows["by"] *= self.M
+            rows["by"] *= M
 
         if ("bz" in components) or ("tmi" in components):
-            rows["bz"] = np.zeros((1, 3 * nC))
+            rows["bz"] = np.zeros((n_rx, 3 * nC))
 
-            rows["bz"][0, 0:nC] = (
+            rows["bz"][:, 0:nC] = (
                 np.log(arg4)
                 - np.log(arg9)
                 + np.log(arg14)
@@ -636,13 +648,13 @@ class Simulation3DIntegral(BasePFSimulation):
                 + np.log(arg34)
                 - np.log(arg39)
             )
-            rows["bz"][0, nC : 2 * nC] = (
+            rows["bz"][:, nC : 2 * nC] = (
                 (np.log(arg3) - np.log(arg8))
                 + (np.log(arg13) - np.log(arg18))
                 + (np.log(arg23) - np.log(arg28))
                 + (np.log(arg33) - np.log(arg38))
             )
-            rows["bz"][0, 2 * nC :] = (
+            rows["bz"][:, 2 * nC :] = (
                 (-2 * np.arctan2(dz2, arg1_ + tol1))
                 - (-2 * np.arctan2(dz2, arg6_ + tol1))
                 + (-2 * np.arctan2(dz1, arg11_ + tol1))
@@ -654,15 +666,16 @@ class Simulation3DIntegral(BasePFSimulation):
             )
             rows["bz"] /= -4 * np.pi
 
-            rows["bz"] *= self.M
+            rows["bz"] *= M
 
         if "tmi" in components:
 
-            rows["tmi"] = np.dot(
-                self.tmi_projection, np.r_[rows["bx"], rows["by"], rows["bz"]]
-            )
+            tmi = mkvc(self.tmi_projection)
+            rows["tmi"] = tmi[0] * rows["bx"] + tmi[1] * rows["by"] + tmi[2] * rows["bz"]
 
-        return np.vstack([rows[component] for component in components])
+        return np.stack([rows[component] for component in components], axis=1).reshape(
+            (-1, rows[components[0]].shape[1])
+        )
 
     @property
     def deleteTheseOnModelUpdate(self):
@@ -0,0 +1,270 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import os
+import numpy as np
+from scipy.spatial import cKDTree
+from discretize import TreeMesh
+
+from .. import maps, props
+from ..data import Data
+from ..data_misfit import L2DataMisfit
+from ..objective_function import ComboObjectiveFunction, ParallelComboObjectiveFunction
+
+# Properties of the global simulation that are not copied to the local ones
+_local_properties = ["mesh", "survey", "actInd", "model", "counter", "sensitivity_path"]
+
+
+def tile_locations(locations, n_tiles=None, max_locations=None):
+    """
+    Cluster receiver locations spatially into tiles.
+
+    The locations are recursively bisected at the median of their widest
+    dimension, always splitting the largest tile, until there are at least
+    n_tiles tiles and none holds more than max_locations.
+
+    Parameters
+    ----------
+    locations : (n, dim) numpy.ndarray
+        Receiver locations.
+    n_tiles : int, optional
+        Number of tiles.
+    max_locations : int, optional
+        Maximum number of locations in a tile.
+
+    Returns
+    -------
+    list of numpy.ndarray
+        Indices of the locations in each tile, sorted.
+    """
+    locations = np.atleast_2d(locations)
+    n_locations = locations.shape[0]
+    n_tiles = 1 if n_tiles is None else min(max(int(n_tiles), 1), n_locations)
+    max_locations = n_locations if max_locations is None else max(max_locations, 1)
+
+    tiles = [np.arange(n_locations)]
+    sizes = [n_locations]
+    while len(tiles) < n_tiles or max(sizes) > max_locations:
+        tile = tiles.pop(np.argmax(sizes))
+        xyz = locations[tile]
+        axis = np.argmax(xyz.max(axis=0) - xyz.min(axis=0))
+        order = np.argsort(xyz[:, axis], kind="stable")
+        half = len(tile) // 2
+        tiles += [np.sort(tile[order[:half]]), np.sort(tile[order[half:]])]
+        sizes = [len(tile) for tile in tiles]
+
+    # Keep the tiles in order of their first location
+    return sorted(tiles, key=lambda tile: tile[0])
+
+
+def create_local_mesh(global_mesh, locations, padding_distance, coarse_level=None):
+    """
+    Create a local TreeMesh sharing the cells of a global TreeMesh near the
+    receivers.
+
+    The local mesh has the same extent as the global one. Global cells within
+    padding_distance of a receiver keep their size, while the others are
+    coarsened down to coarse_level, so that every local cell contains whole
+    global cells, as required by the :class:`SimPEG.maps.TileMap`.
+
+    Parameters
+    ----------
+    global_mesh : discretize.TreeMesh
+        Global mesh.
+    locations : (n, dim) numpy.ndarray
+        Receiver locations of the tile.
+    padding_distance : float
+        Distance (m) from the receivers within which the global cells are kept.
+    coarse_level : int, optional
+        Finest level of the cells beyond padding_distance. Defaults to three
+        levels coarser than the finest level of the global mesh.
+
+    Returns
+    -------
+    discretize.TreeMesh
+        Local mesh.
+    """
+    if global_mesh._meshType != "TREE":
+        raise ValueError("global_mesh must be a TreeMesh")
+    if coarse_level is None:
+        coarse_level = global_mesh.max_level - 3
+
+    levels = global_mesh.cell_levels_by_index(np.arange(global_mesh.nC))
+    distance, _ = cKDTree(np.atleast_2d(locations)).query(global_mesh.gridCC)
+    far = distance > padding_distance
+    levels[far] = np.minimum(levels[far], max(coarse_level, 0))
+
+    local_mesh = TreeMesh(global_mesh.h, x0=global_mesh.x0)
+    local_mesh.insert_cells(global_mesh.gridCC, levels, finalize=True)
+    return local_mesh
+
+
+def _tile_survey(survey, indices):
+    """
+    Survey of the receivers at indices, and the indices of their data in the
+    global survey.
+    """
+    source = survey.source_field
+    receiver = source.receiver_list[0]
+    components = receiver.components
+
+    local_receiver = type(receiver)(
+        receiver.locations[indices], components=list(components.keys())
+    )
+    local_receiver.components = {
+        component: active[indices] for component, active in components.items()
+    }
+
+    kwargs = {}
+    if getattr(source, "parameters", None) is not None:
+        kwargs["parameters"] = source.parameters
+    local_survey = type(survey)(type(source)(receiver_list=[local_receiver], **kwargs))
+
+    # Data are ordered by receiver, with the active components of each one
+    n_components = np.sum([active for active in components.values()], axis=0)
+    offsets = np.r_[0, np.cumsum(n_components)]
+    data_indices = np.hstack(
+        [np.arange(offsets[ii], offsets[ii + 1]) for ii in indices]
+    ).astype(int)
+
+    return local_survey, data_indices
+
+
+def create_tiled_misfit(
+    simulation,
+    data,
+    n_tiles=None,
+    max_locations=None,
+    max_memory=None,
+    padding_distance=None,
+    coarse_level=None,
+    n_workers=None,
+    **simulation_kwargs
+):
+    """
+    Split a potential fields problem into tiles of receivers, each simulated
+    on its own local mesh, and combine their data misfits.
+
+    The receivers are clustered with :func:`tile_locations`, a padded local
+    TreeMesh is built for each tile with :func:`create_local_mesh` and the
+    global model is projected onto it with a :class:`SimPEG.maps.TileMap`.
+
+    Parameters
+    ----------
+    simulation : SimPEG.potential_fields.base.BasePFSimulation
+        Simulation of the whole survey on a global TreeMesh, with its active
+        cells (actInd) and model map. Its settings are copied to the local
+        simulations.
+    data : SimPEG.data.Data
+        Observed data and uncertainties of the whole survey.
+    n_tiles : int, optional
+        Number of tiles.
+    max_locations : int, optional
+        Maximum number of receivers in a tile.
+    max_memory : float, optional
+        Approximate size (Mb) of the sensitivities of a tile, used to bound
+        its number of receivers.
+    padding_distance : float, optional
+        Distance (m) from the receivers within which the local meshes keep the
+        global cells. Defaults to half the horizontal extent of the survey.
+    coarse_level : int, optional
+        Finest level of the local cells beyond padding_distance.
+    n_workers : int, optional
+        Evaluate the tiles in that many worker processes with a
+        :class:`SimPEG.objective_function.ParallelComboObjectiveFunction`.
+    simulation_kwargs :
+        Overrides of the settings of the local simulations.
+
+    Returns
+    -------
+    SimPEG.objective_function.ComboObjectiveFunction
+        Sum of the L2DataMisfit of each tile.
+    """
+    mesh = simulation.mesh
+    survey = simulation.survey
+    locations = survey.receiver_locations
+
+    if simulation.actInd is None:
+        global_active = np.ones(mesh.nC, dtype=bool)
+    else:
+        global_active = np.zeros(mesh.nC, dtype=bool)
+        global_active[simulation.actInd] = True
+    model_type = getattr(simulation, "model_type", "scalar")
+    components = 3 if model_type == "vector" else 1
+
+    if max_memory is not None:
+        # Upper bound on the size of the rows of G for one receiver
+        n_components = len(survey.components)
+        row_size = 8.0 * n_components * components * global_active.sum()
+        n_memory = max(int(max_memory * 1e6 / row_size), 1)
+        if max_locations is None:
+            max_locations = n_memory
+        else:
+            max_locations = min(max_locations, n_memory)
+
+    tiles = tile_locations(locations, n_tiles=n_tiles, max_locations=max_locations)
+
+    if padding_distance is None:
+        extent = locations.max(axis=0) - locations.min(axis=0)
+        padding_distance = 0.5 * extent[:2].max()
+
+    # Settings shared by all the local simulations
+    kwargs = {}
+    for name, prop in type(simulation)._props.items():
+        if name in _local_properties or isinstance(
+            prop, (props.PhysicalProperty, props.Mapping, props.Derivative)
+        ):
+            continue
+        value = getattr(simulation, name)
+        if value is not None:
+            kwargs[name] = value
+    if hasattr(simulation, "model_type"):
+        kwargs["model_type"] = model_type
+    kwargs.update(simulation_kwargs)
+
+    # The maps defining the global model
+    map_names = simulation._act_map_names
+    if len(map_names) == 0:
+        raise ValueError("The simulation must have a model map")
+
+    misfits = []
+    for ii, indices in enumerate(tiles):
+        local_survey, data_indices = _tile_survey(survey, indices)
+        local_mesh = create_local_mesh(
+            mesh, locations[indices], padding_distance, coarse_level=coarse_level
+        )
+        tile_map = maps.TileMap(
+            mesh, global_active, local_mesh, components=components
+        )
+
+        local_maps = {}
+        for name in map_names:
+            mapping = getattr(simulation, name)
+            if type(mapping) is maps.IdentityMap:
+                local_maps[name] = tile_map
+            else:
+                local_maps[name] = tile_map * mapping
+
+        local_simulation = type(simulation)(
+            local_mesh,
+            survey=local_survey,
+            actInd=tile_map.local_active,
+            sensitivity_path=os.path.join(
+                simulation.sensitivity_path, "Tile{}".format(ii), ""
+            ),
+            **local_maps,
+            **kwargs
+        )
+
+        local_data = Data(
+            local_survey,
+            dobs=data.dobs[data_indices],
+            standard_deviation=data.standard_deviation[data_indices],
+        )
+        misfits.append(L2DataMisfit(data=local_data, simulation=local_simulation))
+
+    if n_workers is not None:
+        return ParallelComboObjectiveFunction(objfcts=misfits, n_workers=n_workers)
+    return ComboObjectiveFunction(objfcts=misfits)
@@ -7,7 +7,7 @@ import properties
 import numpy as np
 import warnings
 
-from .maps import IdentityMap, ReciprocalMap
+from .maps import IdentityMap, ReciprocalMap, _deriv_vector
 from .utils import Zero, Identity
 
 
@@ -359,6 +359,19 @@ class HasModel(properties.HasProperties):
                 return True
         return False
 
+    def _deriv_product(self, name, v, adjoint=False):
+        """
+        Derivative of the physical property name wrt the model times v, or
+        its transpose times v when adjoint. Maps that can apply their
+        derivative to a vector do so without forming the matrix.
+        """
+        mapping = getattr(self, self._props[name].mapping.name)
+        if mapping is None or self.model is None:
+            return Zero()
+        if adjoint:
+            return mapping.deriv_T(self.model, v)
+        return _deriv_vector(mapping, self.model, v)
+
     @properties.validator("model")
     def _check_model_valid(self, change):
         """Checks the model length and necessity"""
@@ -9,6 +9,48 @@ from ..objective_function import BaseObjectiveFunction, ComboObjectiveFunction
 from .. import utils
 from .regularization_mesh import RegularizationMesh
 
+
+def _same_objects(key, other):
+    """
+    Whether two cache keys hold the same objects, or equal scalars
+    """
+    return len(key) == len(other) and all(
+        a is b or (np.isscalar(a) and np.isscalar(b) and a == b)
+        for a, b in zip(key, other)
+    )
+
+
+def _cached(obj, name, key, compute):
+    """
+    Value returned by compute, stored on obj as attribute name and only
+    recomputed when the objects in key change.
+    """
+    cache = getattr(obj, name, None)
+    if cache is None or not _same_objects(cache[0], key):
+        cache = (key, compute())
+        setattr(obj, name, cache)
+    return cache[1]
+
+
+def _defined_in(cls, name):
+    for klass in cls.__mro__:
+        if name in vars(klass):
+            return klass
+
+
+def _is_factored(objfct):
+    """
+    Whether the factors of W describe the whole objective function, i.e. a
+    subclass does not override W or its evaluation below the class that
+    factors W.
+    """
+    cls = type(objfct)
+    owner = _defined_in(cls, "_weighting")
+    return all(
+        issubclass(owner, _defined_in(cls, name))
+        for name in ["W", "__call__", "deriv", "deriv2"]
+    )
+
 ###############################################################################
 #                                                                             #
 #                          Base Regularization                                #
@@ -121,6 +163,25 @@ class BaseRegularization(BaseObjectiveFunction):
             return m
         return -self.mref + m  # in case self.mref is Zero, returns type m
 
+    @property
+    def _model_reference(self):
+        """
+        Reference model subtracted from the model inside the norm
+        """
+        return self.mref
+
+    @property
+    def _weighting(self):
+        """
+        Factors of the weighting matrix, W = sdiag(weights) * stencil, or None
+        if W is not factored. The stencil is fixed for the mesh, while the
+        weights follow the cell weights, scales and IRLS weights.
+
+        :rtype: tuple
+        :return: (weights, stencil)
+        """
+        return None
+
     @utils.timeIt
     def __call__(self, m):
         """
@@ -384,6 +445,164 @@ class BaseComboRegularization(SimpleComboRegularization):
                     self._nC_residual, len(change["value"])
                 )
 
+    def _fused_operators(self):
+        """
+        Weighting operators of all the terms, stacked for each reference model
+        they subtract, or None if any term must be evaluated on its own.
+
+        The stacked stencils are kept until the stencils of the terms change,
+        and the squared weights, including the multipliers, until the weights
+        of the terms or the multipliers change.
+
+        :rtype: list
+        :return: list of tuples (reference, stencil, squared weights)
+        """
+        terms = [
+            (multiplier, objfct)
+            for multiplier, objfct in zip(self.multipliers, self.objfcts)
+            if multiplier != 0.0
+        ]
+        if len(terms) == 0:
+            return None
+
+        factors = []
+        for multiplier, objfct in terms:
+            if (
+                multiplier < 0.0
+                or objfct.mapping is not self.mapping
+                or not _is_factored(objfct)
+            ):
+                return None
+            weighting = objfct._weighting
+            if weighting is None:
+                return None
+            reference = objfct._model_reference
+            if isinstance(reference, utils.Zero):
+                reference = None
+            factors.append((reference, multiplier) + tuple(weighting))
+
+        # Group the terms by reference model
+        references = []
+        groups = []
+        for reference, _, _, _ in factors:
+            for ii, other in enumerate(references):
+                if other is reference:
+                    break
+            else:
+                ii = len(references)
+                references.append(reference)
+            groups.append(ii)
+
+        def stack_stencils():
+            return [
+                sp.vstack(
+                    [
+                        stencil
+                        for group, (_, _, _, stencil) in zip(groups, factors)
+                        if group == ii
+                    ]
+                ).tocsr()
+                for ii in range(len(references))
+            ]
+
+        def stack_weights():
+            return [
+                np.hstack(
+                    [
+                        multiplier * weights ** 2
+                        for group, (_, multiplier, weights, _) in zip(groups, factors)
+                        if group == ii
+                    ]
+                )
+                for ii in range(len(references))
+            ]
+
+        stencils = _cached(
+            self,
+            "_fused_stencils",
+            tuple(groups) + tuple(stencil for _, _, _, stencil in factors),
+            stack_stencils,
+        )
+        weights = _cached(
+            self,
+            "_fused_weights",
+            tuple(groups)
+            + tuple(value for factor in factors for value in factor[1:3]),
+            stack_weights,
+        )
+        return _cached(
+            self,
+            "_fused",
+            tuple(references) + (stencils, weights),
+            lambda: list(zip(references, stencils, weights)),
+        )
+
+    def _fused_residuals(self, m, operators):
+        """
+        Mapped model differences, their weighted stencils and the mapping
+        derivatives for each group of terms, kept for the last model.
+        """
+        cache = getattr(self, "_fused_residuals_cache", None)
+        if (
+            cache is not None
+            and cache[1] is operators
+            and cache[2] is self.mapping
+            and np.array_equal(cache[0], m)
+        ):
+            return cache[3]
+
+        residuals = []
+        for reference, stencil, _ in operators:
+            delta = m if reference is None else m - reference
+            residuals.append(
+                (stencil * (self.mapping * delta), self.mapping.deriv(delta))
+            )
+        self._fused_residuals_cache = (
+            np.array(m, copy=True),
+            operators,
+            self.mapping,
+            residuals,
+        )
+        return residuals
+
+    def __call__(self, m, f=None):
+        operators = self._fused_operators()
+        if operators is None:
+            return super(BaseComboRegularization, self).__call__(m, f=f)
+
+        residuals = self._fused_residuals(m, operators)
+        return 0.5 * sum(
+            r.dot(weights * r)
+            for (_, _, weights), (r, _) in zip(operators, residuals)
+        )
+
+    def deriv(self, m, f=None):
+        operators = self._fused_operators()
+        if operators is None:
+            return super(BaseComboRegularization, self).deriv(m, f=f)
+
+        residuals = self._fused_residuals(m, operators)
+        return sum(
+            mD.T * (stencil.T * (weights * r))
+            for (_, stencil, weights), (r, mD) in zip(operators, residuals)
+        )
+
+    def deriv2(self, m, v=None, f=None):
+        operators = self._fused_operators()
+        if operators is None:
+            return super(BaseComboRegularization, self).deriv2(m, v=v, f=f)
+
+        residuals = self._fused_residuals(m, operators)
+        if v is None:
+            return sum(
+                mD.T * stencil.T * utils.sdiag(weights) * stencil * mD
+                for (_, stencil, weights), (_, mD) in zip(operators, residuals)
+            )
+        return sum(
+            mD.T * (stencil.T * (weights * (stencil * (mD * v))))
+            for (_, stencil, weights), (_, mD) in zip(operators, residuals)
+        )
+
 
 ###############################################################################
 #                                                                             #
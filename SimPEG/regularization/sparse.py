@@ -3,7 +3,7 @@ import scipy.sparse as sp
 import warnings
 import properties
 
-from .base import BaseRegularization, BaseComboRegularization
+from .base import BaseRegularization, BaseComboRegularization, _cached
 from .. import utils
 
 
@@ -52,6 +52,27 @@ class BaseSparse(BaseRegularization):
     def stashedR(self, value):
         self._stashedR = value
 
+    def _irls_weights(self):
+        """
+        IRLS weights of the rows of W, or None before a model is set
+        """
+        if getattr(self, "model", None) is None:
+            return None
+        if self.stashedR is not None:
+            return self.stashedR
+        return self.R(self.f_m)
+
+    def _scaled_weights(self):
+        """
+        Cell weights, including the volumes and scale
+        """
+        weights = self.scale * self.regmesh.vol
+
+        if self.cell_weights is not None:
+            weights *= self.cell_weights
+
+        return weights
+
 
 class SparseSmall(BaseSparse):
     """
@@ -77,21 +98,28 @@ class SparseSmall(BaseSparse):
 
     @property
     def W(self):
-        if getattr(self, "model", None) is None:
-            R = utils.speye(self.mapping.shape[0])
-        else:
-            r = self.R(self.f_m)
-            R = utils.sdiag(r)
+        weights, _ = self._weighting
+        return utils.sdiag(weights)
 
+    @property
+    def _weighting(self):
+        r = self._irls_weights()
         if self.scale is None:
             self.scale = np.ones(self.mapping.shape[0])
 
-        weights = self.scale * self.regmesh.vol
-
-        if self.cell_weights is not None:
-            weights *= self.cell_weights
-
-        return utils.sdiag((weights ** 0.5)) * R
+        def weights():
+            weights = self._scaled_weights() ** 0.5
+            if r is not None:
+                weights *= r
+            return weights
+
+        n = self.mapping.shape[0]
+        return (
+            _cached(
+                self, "_weights_cache", (r, self.scale, self.cell_weights), weights
+            ),
+            _cached(self, "_stencil_cache", (n,), lambda: utils.speye(n).tocsr()),
+        )
 
     def R(self, f_m):
         # if R is stashed, return that instead
@@ -142,8 +170,9 @@ class SparseSmall(BaseSparse):
         """
 
         mD = self.mapping.deriv(self._delta_m(m))
-        r = self.W * (self.mapping * (self._delta_m(m)))
-        return mD.T * (self.W.T * r)
+        W = self.W
+        r = W * (self.mapping * (self._delta_m(m)))
+        return mD.T * (W.T * r)
 
 
 class SparseDeriv(BaseSparse):
@@ -288,7 +317,9 @@ class SparseDeriv(BaseSparse):
             r = W * dm_dx
 
         else:
-            r = self.W * (self.mapping * model)
+            W = self.W
+            r = W * (self.mapping * model)
+            return self.mapping.deriv(model).T * (W.T * r)
 
         mD = self.mapping.deriv(model)
         return mD.T * (self.W.T * r)
@@ -353,24 +384,43 @@ class SparseDeriv(BaseSparse):
 
     @property
     def W(self):
+        weights, stencil = self._weight_factors()
+        return utils.sdiag(weights) * stencil
 
-        ave_cc_f = getattr(self.regmesh, "aveCC2F{}".format(self.orientation))
+    @property
+    def _model_reference(self):
+        if self.mrefInSmooth:
+            return self.mref
+        return None
 
-        if getattr(self, "model", None) is None:
-            R = utils.speye(self.cellDiffStencil.shape[0])
+    @property
+    def _weighting(self):
+        # The spherical differences are wrapped, which W does not describe
+        if self.space == "spherical":
+            return None
+        return self._weight_factors()
 
-        else:
-            r = self.R(self.f_m)
-            R = utils.sdiag(r)
+    def _weight_factors(self):
+        r = self._irls_weights()
         if self.scale is None:
             self.scale = np.ones(self.mapping.shape[0])
 
-        weights = self.scale * self.regmesh.vol
-
-        if self.cell_weights is not None:
-            weights *= self.cell_weights
-
-        return utils.sdiag((ave_cc_f * weights ** 0.5)) * R * self.cellDiffStencil
+        def weights():
+            ave_cc_f = getattr(self.regmesh, "aveCC2F{}".format(self.orientation))
+            weights = (ave_cc_f * self._scaled_weights() ** 0.5) * self.length_scales
+            if r is not None:
+                weights *= r
+            return weights
+
+        return (
+            _cached(
+                self,
+                "_weights_cache",
+                (r, self.scale, self.cell_weights, self.length_scales),
+                weights,
+            ),
+            getattr(self.regmesh, "cellDiff{}Stencil".format(self.orientation)),
+        )
 
     @property
     def length_scales(self):
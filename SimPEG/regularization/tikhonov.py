@@ -3,7 +3,7 @@ import scipy.sparse as sp
 import warnings
 import properties
 
-from .base import BaseRegularization, BaseComboRegularization
+from .base import BaseRegularization, BaseComboRegularization, _cached
 from .. import utils
 
 
@@ -60,6 +60,24 @@ class SimpleSmall(BaseRegularization):
         else:
             return utils.Identity()
 
+    @property
+    def _weighting(self):
+        n = self._nC_residual
+        if n == "*":
+            return None
+
+        def weights():
+            if self.cell_weights is not None:
+                return np.sqrt(self.cell_weights * self.regmesh.vol)
+            return np.ones(n)
+
+        return (
+            _cached(self, "_weights_cache", (n, self.cell_weights), weights),
+            _cached(
+                self, "_stencil_cache", (n,), lambda: sp.identity(n, format="csr")
+            ),
+        )
+
 
 class SimpleSmoothDeriv(BaseRegularization):
     """
@@ -128,6 +146,25 @@ class SimpleSmoothDeriv(BaseRegularization):
 
         return W
 
+    @property
+    def _weighting(self):
+        def weights():
+            Ave = getattr(self.regmesh, "aveCC2F{}".format(self.orientation))
+            vol = self.regmesh.vol
+            if self.cell_weights is not None:
+                vol = self.cell_weights * vol
+            return self.length_scales * (Ave * vol) ** 0.5
+
+        return (
+            _cached(
+                self,
+                "_weights_cache",
+                (self.cell_weights, self.length_scales),
+                weights,
+            ),
+            getattr(self.regmesh, "cellDiff{}Stencil".format(self.orientation)),
+        )
+
     @property
     def length_scales(self):
         """
@@ -269,6 +306,21 @@ class Small(BaseRegularization):
             return utils.sdiag(np.sqrt(self.regmesh.vol * self.cell_weights))
         return utils.sdiag(np.sqrt(self.regmesh.vol))
 
+    @property
+    def _weighting(self):
+        def weights():
+            if self.cell_weights is not None:
+                return np.sqrt(self.regmesh.vol * self.cell_weights)
+            return np.sqrt(self.regmesh.vol)
+
+        n = self.regmesh.nC
+        return (
+            _cached(self, "_weights_cache", (self.cell_weights,), weights),
+            _cached(
+                self, "_stencil_cache", (n,), lambda: sp.identity(n, format="csr")
+            ),
+        )
+
 
 class SmoothDeriv(BaseRegularization):
     """
@@ -336,6 +388,20 @@ class SmoothDeriv(BaseRegularization):
 
         return utils.sdiag(np.sqrt(Ave * vol)) * D
 
+    @property
+    def _weighting(self):
+        def weights():
+            vol = self.regmesh.vol
+            if self.cell_weights is not None:
+                vol = vol * self.cell_weights
+            Ave = getattr(self.regmesh, "aveCC2F{}".format(self.orientation))
+            return np.sqrt(Ave * vol)
+
+        return (
+            _cached(self, "_weights_cache", (self.cell_weights,), weights),
+            getattr(self.regmesh, "cellDiff{}".format(self.orientation)),
+        )
+
 
 class SmoothDeriv2(BaseRegularization):
     """
@@ -398,6 +464,26 @@ class SmoothDeriv2(BaseRegularization):
         )
         return W
 
+    @property
+    def _weighting(self):
+        def weights():
+            vol = self.regmesh.vol
+            if self.cell_weights is not None:
+                vol = vol * self.cell_weights
+            return vol ** 0.5
+
+        face_diff = getattr(self.regmesh, "faceDiff{}".format(self.orientation))
+        cell_diff = getattr(self.regmesh, "cellDiff{}".format(self.orientation))
+        return (
+            _cached(self, "_weights_cache", (self.cell_weights,), weights),
+            _cached(
+                self,
+                "_stencil_cache",
+                (face_diff, cell_diff),
+                lambda: face_diff * cell_diff,
+            ),
+        )
+
 
 class Tikhonov(BaseComboRegularization):
     """
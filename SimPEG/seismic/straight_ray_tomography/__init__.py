@@ -1,5 +1,5 @@
 from .simulation import Simulation2DIntegral as Simulation
-from .simulation import lengthInCell
+from .simulation import lengthInCell, line_integral_matrix
 from .survey import StraightRaySurvey as Survey
 from ...survey import BaseSrc as Src
 from ...survey import BaseRx as Rx
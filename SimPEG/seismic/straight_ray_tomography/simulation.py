@@ -4,7 +4,6 @@ import matplotlib.pyplot as plt
 from ...utils.code_utils import deprecate_class
 
 from ...simulation import LinearSimulation
-from ...utils import sub2ind
 from ... import props
 
 
@@ -61,19 +60,74 @@ def lengthInCell(O, D, x, y, plotIt=False):
 
 
 def lineintegral(M, Tx, Rx):
-    O, D = Tx, Rx - Tx
-    I, J, V = [], [], []
-    for i in range(M.nCx):
-        for j in range(M.nCy):
-            x = M.vectorNx[[i, i + 1]]
-            y = M.vectorNy[[j, j + 1]]
-            v = lengthInCell(O, D, x, y)
-            if v is not None:
-                I += [i]
-                J += [j]
-                V += [v]
-    inds = sub2ind(M.vnC, np.array([I, J]).T)
-    return inds, V
+    A = line_integral_matrix(M, np.atleast_2d(Tx), np.atleast_2d(Rx))
+    return A.indices, A.data
+
+
+def line_integral_matrix(mesh, sources, receivers, max_batch_size=int(1e7)):
+    """
+    Lengths of the straight rays from the sources to the receivers in each
+    cell of a 2D or 3D tensor mesh.
+
+    The rays are traversed as in Siddon's algorithm, vectorized over batches
+    of rays: the ray parameters where a ray crosses the planes of nodes are
+    sorted, and the cell of each segment between two crossings is found from
+    its midpoint.
+
+    :param discretize.TensorMesh mesh: tensor mesh
+    :param numpy.ndarray sources: (n_rays, dim) start points of the rays
+    :param numpy.ndarray receivers: (n_rays, dim) end points of the rays
+    :param int max_batch_size: largest number of ray-plane crossings held at once
+    :rtype: scipy.sparse.csr_matrix
+    :return: (n_rays, nC) lengths of the rays in the cells
+    """
+    sources = np.atleast_2d(sources).astype(float)
+    receivers = np.atleast_2d(receivers).astype(float)
+    nodes = [mesh.vectorNx, mesh.vectorNy, mesh.vectorNz][: mesh.dim]
+    n_rays = sources.shape[0]
+    n_planes = sum(len(x) for x in nodes)
+    batch_size = max(1, max_batch_size // n_planes)
+
+    indices, data, counts = [], [], []
+    for start in range(0, n_rays, batch_size):
+        O = sources[start : start + batch_size]
+        D = receivers[start : start + batch_size] - O
+
+        # ray parameters (0 at the source, 1 at the receiver) of the crossings
+        with np.errstate(divide="ignore", invalid="ignore"):
+            alpha = np.hstack(
+                [(x[None, :] - O[:, [k]]) / D[:, [k]] for k, x in enumerate(nodes)]
+            )
+        alpha[~np.isfinite(alpha)] = 0.0
+        alpha = np.sort(np.clip(alpha, 0.0, 1.0), axis=1)
+        alpha = np.hstack([np.zeros((len(O), 1)), alpha, np.ones((len(O), 1))])
+
+        lengths = np.diff(alpha, axis=1) * np.linalg.norm(D, axis=1)[:, None]
+        midpoint = 0.5 * (alpha[:, 1:] + alpha[:, :-1])
+
+        # cell of each segment
+        inside = lengths > 0.0
+        cell = np.zeros(lengths.shape, dtype=int)
+        stride = 1
+        for k, x in enumerate(nodes):
+            position = O[:, [k]] + midpoint * D[:, [k]]
+            inside &= (position >= x[0]) & (position <= x[-1])
+            ind = np.clip(np.searchsorted(x, position, side="right") - 1, 0, len(x) - 2)
+            cell += stride * ind
+            stride *= len(x) - 1
+
+        ray, segment = np.nonzero(inside)
+        indices.append(cell[ray, segment])
+        data.append(lengths[ray, segment])
+        counts.append(np.bincount(ray, minlength=len(O)))
+
+    A = sp.csr_matrix(
+        (np.hstack(data), np.hstack(indices), np.r_[0, np.hstack(counts).cumsum()]),
+        shape=(n_rays, mesh.nC),
+    )
+    # segments in the same cell (crossings at the same point) are summed
+    A.sum_duplicates()
+    return A
 
 
 class Simulation2DIntegral(LinearSimulation):
@@ -85,17 +139,16 @@ class Simulation2DIntegral(LinearSimulation):
         if getattr(self, "_A", None) is not None:
             return self._A
 
-        self._A = sp.lil_matrix((self.survey.nD, self.mesh.nC))
-        row = 0
+        sources, receivers = [], []
         for src in self.survey.source_list:
             for rx in src.receiver_list:
-                for loc_i in range(rx.locations.shape[0]):
-                    inds, V = lineintegral(
-                        self.mesh, src.location, rx.locations[loc_i, :]
-                    )
-                    self._A[inds * 0 + row, inds] = V
-                    row += 1
-
+                locations = np.atleast_2d(rx.locations)
+                source = np.atleast_2d(src.location)
+                sources.append(np.repeat(source, len(locations), axis=0))
+                receivers.append(locations)
+        self._A = line_integral_matrix(
+            self.mesh, np.vstack(sources), np.vstack(receivers)
+        )
         return self._A
 
     def fields(self, m):
@@ -106,13 +159,13 @@ class Simulation2DIntegral(LinearSimulation):
         self.model = m
         # mt = self.model.transformDeriv
         # return self.A * ( mt * v )
-        return self.A * self.slownessDeriv * v
+        return self.A * self._deriv_product("slowness", v)
 
     def Jtvec(self, m, v, f=None):
         self.model = m
         # mt = self.model.transformDeriv
         # return mt.T * ( self.A.T * v )
-        return self.slownessDeriv.T * self.A.T * v
+        return self._deriv_product("slowness", self.A.T * v, adjoint=True)
 
 
 ############
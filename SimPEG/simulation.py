@@ -16,6 +16,7 @@ from .data import SyntheticData, Data
 from .survey import BaseSurvey
 from .utils import Counter, timeIt, count, mkvc
 from .utils.code_utils import deprecate_property
+from .utils.solver_utils import Preconditioner
 
 try:
     from pymatsolver import Pardiso as DefaultSolver
@@ -199,6 +200,11 @@ class BaseSimulation(props.HasModel):
                 getattr(self, mat).clean()  # clean factors
                 setattr(self, mat, None)  # set to none
 
+        # preconditioners shared through the solver options, to be rebuilt
+        for opt in self.solver_opts.values():
+            if isinstance(opt, Preconditioner):
+                opt.clean()
+
     Solver = deprecate_property(
         solver,
         "Solver",
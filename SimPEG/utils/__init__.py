@@ -22,6 +22,8 @@ from .mat_utils import (
     makePropertyTensor,
     invPropertyTensor,
     diagEst,
+    JtJ_diagonal,
+    estimate_JtJ_diagonal,
     Zero,
     Identity,
     uniqueRows,
@@ -44,6 +46,8 @@ from .code_utils import (
     dependentProperty,
     asArray_N_x_Dim,
     requires,
+    parallel_map,
+    parallel_imap,
     Report,
 )
 from .mesh_utils import exampleLrmGrid, meshTensor, closestPoints, ExtractCoreMesh
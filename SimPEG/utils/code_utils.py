@@ -1,5 +1,6 @@
 from __future__ import print_function, division
 import types
+from collections import deque
 import numpy as np
 from functools import wraps
 import warnings
@@ -271,6 +272,102 @@ def requires(var):
     return requiresVar
 
 
+def parallel_map(fun, items, n_workers=1, backend="thread"):
+    """
+    Apply a function to every item of a sequence, distributed over a pool of
+    workers. The results are returned as a list, in the order of the items.
+
+    :param callable fun: function of a single item
+    :param list items: items to be processed
+    :param int n_workers: number of workers, runs serially if 1
+    :param str backend: 'thread' or 'process' pool of workers
+    :rtype: list
+    :return: fun(item) for each item
+
+    With the 'process' backend, the function (and the object it is bound to)
+    is pickled once per worker, and the items and results for every call.
+    """
+    return list(parallel_imap(fun, items, n_workers=n_workers, backend=backend))
+
+
+def parallel_imap(fun, items, n_workers=1, backend="thread", max_pending=None):
+    """
+    Generator version of :func:`parallel_map`, yielding the results in the
+    order of the items as soon as they are available.
+
+    At most max_pending items (default 2 * n_workers) are submitted ahead of
+    the result being yielded, so that the results are not buffered when the
+    consumer is slower than the workers.
+    """
+    items = list(items)
+    n_workers = min(n_workers, len(items))
+
+    if n_workers <= 1:
+        for item in items:
+            yield fun(item)
+        return
+
+    if max_pending is None:
+        max_pending = 2 * n_workers
+    max_pending = max(max_pending, 1)
+
+    if backend == "thread":
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            yield from _bounded_map(executor, fun, items, max_pending)
+
+    elif backend == "process":
+        from concurrent.futures import ProcessPoolExecutor
+
+        # Ship the function once to each worker, then only the items
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            initializer=_set_worker_function,
+            initargs=(fun,),
+        ) as executor:
+            yield from _bounded_map(
+                executor, _call_worker_function, items, max_pending
+            )
+
+    else:
+        raise ValueError(
+            f"backend must be one of 'thread' or 'process'. Value {backend} provided."
+        )
+
+
+def _bounded_map(executor, fun, items, max_pending):
+    """
+    Ordered results of fun over the items, keeping at most max_pending
+    futures in flight.
+    """
+    pending = deque()
+    items = iter(items)
+    try:
+        for item in items:
+            pending.append(executor.submit(fun, item))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # Do not run the remaining items if the consumer stops early
+        for future in pending:
+            future.cancel()
+
+
+_worker_function = None
+
+
+def _set_worker_function(fun):
+    global _worker_function
+    _worker_function = fun
+
+
+def _call_worker_function(item):
+    return _worker_function(item)
+
+
 class Report(ScoobyReport):
     """Print date, time, and version information.
 
@@ -0,0 +1,288 @@
+from __future__ import division
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import LinearOperator
+
+
+def adaptive_cross_approximation(
+    get_rows, get_columns, shape, tol=1e-4, max_rank=None
+):
+    """
+    Low-rank approximation A ~ U @ V of a matrix known through its rows and
+    columns, by adaptive cross approximation with partial pivoting.
+
+    :param callable get_rows: get_rows(i) returns the row i of A
+    :param callable get_columns: get_columns(j) returns the column j of A
+    :param tuple shape: shape of A
+    :param float tol: relative accuracy of the approximation (Frobenius norm)
+    :param int max_rank: maximum rank, defaults to min(shape) // 2
+    :rtype: tuple
+    :return: (U, V), or None if A is not found to be of low rank
+
+    Based on Bebendorf (2000) https://doi.org/10.1007/PL00005410
+    """
+    n_rows, n_cols = shape
+    if max_rank is None:
+        max_rank = min(shape) // 2
+
+    U, V = [], []
+    norm2 = 0.0
+    used = np.zeros(n_rows, dtype=bool)
+    row = 0
+
+    while len(U) < max_rank:
+        used[row] = True
+
+        # Residual of the pivot row
+        v = get_rows(row).astype(np.float64)
+        for u_l, v_l in zip(U, V):
+            v -= u_l[row] * v_l
+        col = np.argmax(np.abs(v))
+
+        if v[col] == 0.0:
+            if used.all():
+                break
+            row = np.where(~used)[0][0]
+            continue
+
+        # Residual of the pivot column
+        v /= v[col]
+        u = get_columns(col).astype(np.float64)
+        for u_l, v_l in zip(U, V):
+            u -= v_l[col] * u_l
+
+        # Update the Frobenius norm of the approximation
+        norm_uv = np.linalg.norm(u) * np.linalg.norm(v)
+        norm2 += norm_uv ** 2 + 2.0 * sum(
+            (u @ u_l) * (v @ v_l) for u_l, v_l in zip(U, V)
+        )
+        U.append(u)
+        V.append(v)
+
+        if norm_uv <= tol * np.sqrt(abs(norm2)) or used.all():
+            break
+
+        # Next pivot at the largest entry of the column
+        u_abs = np.abs(u)
+        u_abs[used] = -1.0
+        row = np.argmax(u_abs)
+    else:
+        # Reached the maximum rank without converging
+        return None
+
+    if len(U) == 0:
+        return np.zeros((n_rows, 0)), np.zeros((0, n_cols))
+
+    return np.vstack(U).T, np.vstack(V)
+
+
+class ClusterTree(object):
+    """
+    Binary tree of points, split recursively along the largest extent of
+    their bounding box until a leaf holds at most leaf_size points.
+
+    :param numpy.ndarray points: (n, dim) array of locations
+    :param numpy.ndarray indices: indices of the points in the cluster
+    :param int leaf_size: maximum number of points in a leaf
+    """
+
+    def __init__(self, points, indices=None, leaf_size=64):
+        if indices is None:
+            indices = np.arange(points.shape[0])
+
+        self.indices = indices
+        self.lower = points[indices].min(axis=0)
+        self.upper = points[indices].max(axis=0)
+        self.children = []
+
+        if len(indices) > leaf_size:
+            axis = np.argmax(self.upper - self.lower)
+            order = np.argsort(points[indices, axis], kind="stable")
+            half = len(indices) // 2
+            self.children = [
+                ClusterTree(points, indices[order[:half]], leaf_size),
+                ClusterTree(points, indices[order[half:]], leaf_size),
+            ]
+
+    def expand(self, points, members):
+        """
+        Replace the indices of the points by the indices of their members, for
+        a tree built on one point per group of members.
+
+        :param numpy.ndarray points: (n, dim) locations of the members
+        :param list members: indices of the members of each point
+        """
+        self.indices = np.hstack([members[ii] for ii in self.indices])
+        self.lower = points[self.indices].min(axis=0)
+        self.upper = points[self.indices].max(axis=0)
+        for child in self.children:
+            child.expand(points, members)
+
+    @property
+    def diameter(self):
+        return np.linalg.norm(self.upper - self.lower)
+
+    def distance(self, other):
+        """Distance between the bounding boxes of two clusters"""
+        gap = np.maximum(
+            0.0, np.maximum(self.lower - other.upper, other.lower - self.upper)
+        )
+        return np.linalg.norm(gap)
+
+
+class HierarchicalMatrix(LinearOperator):
+    """
+    Hierarchical matrix approximation of a dense matrix, known through a
+    function evaluating any block of its entries.
+
+    The rows and columns are clustered from the locations they are attached
+    to. Blocks of clusters that are far apart relative to their size, with
+    ``min(diameter) <= eta * distance``, are stored as low-rank factors from
+    adaptive cross approximation. The other blocks are split further, down
+    to dense blocks between leaves. Storage and products then cost roughly
+    O(N log N) instead of O(n_rows * n_cols).
+
+    :param callable get_block: get_block(rows, columns) returns the dense
+        block of entries A[rows][:, columns]
+    :param numpy.ndarray row_points: (n_rows, dim) locations of the rows
+    :param numpy.ndarray column_points: (n_cols, dim) locations of the columns
+    :param float tol: relative accuracy of the low-rank blocks
+    :param int leaf_size: maximum number of rows or columns in a dense block
+    :param float eta: admissibility parameter of the far-field blocks
+    :param numpy.ndarray row_groups: group of each row, the rows of a group
+        sharing a location. The rows of a group are kept in the same blocks,
+        so that they can be combined (see :meth:`squared_column_sum`), and a
+        leaf then holds at most leaf_size groups.
+    """
+
+    def __init__(
+        self,
+        get_block,
+        row_points,
+        column_points,
+        tol=1e-4,
+        leaf_size=64,
+        eta=1.0,
+        row_groups=None,
+    ):
+        super().__init__(
+            dtype=np.float64, shape=(row_points.shape[0], column_points.shape[0])
+        )
+        self.tol = tol
+        self.eta = eta
+        self.row_groups = None if row_groups is None else np.asarray(row_groups)
+        self.dense_blocks = []
+        self.low_rank_blocks = []
+        self._get_block = get_block
+
+        if row_groups is None:
+            row_tree = ClusterTree(row_points, leaf_size=leaf_size)
+        else:
+            _, labels = np.unique(row_groups, return_inverse=True)
+            order = np.argsort(labels, kind="stable")
+            n_members = np.bincount(labels)
+            members = np.split(order, np.cumsum(n_members)[:-1])
+            first = np.r_[0, np.cumsum(n_members)[:-1]]
+            row_tree = ClusterTree(row_points[order[first]], leaf_size=leaf_size)
+            row_tree.expand(row_points, members)
+
+        self._partition(row_tree, ClusterTree(column_points, leaf_size=leaf_size))
+        del self._get_block
+
+    def _partition(self, rows, columns):
+        leaves = not rows.children and not columns.children
+
+        # Far-field blocks, unless small enough to be computed at once
+        if not leaves and min(
+            rows.diameter, columns.diameter
+        ) <= self.eta * rows.distance(columns):
+            factors = adaptive_cross_approximation(
+                lambda i: self._get_block(rows.indices[[i]], columns.indices)[0],
+                lambda j: self._get_block(rows.indices, columns.indices[[j]])[:, 0],
+                (len(rows.indices), len(columns.indices)),
+                tol=self.tol,
+            )
+            if factors is not None:
+                self.low_rank_blocks.append((rows.indices, columns.indices) + factors)
+                return
+
+        if leaves:
+            self.dense_blocks.append(
+                (
+                    rows.indices,
+                    columns.indices,
+                    self._get_block(rows.indices, columns.indices),
+                )
+            )
+            return
+
+        # Split the clusters that are not leaves
+        row_children = rows.children or [rows]
+        column_children = columns.children or [columns]
+        for row_child in row_children:
+            for column_child in column_children:
+                self._partition(row_child, column_child)
+
+    @property
+    def n_stored(self):
+        """Number of floats stored by the approximation"""
+        return sum(block.size for _, _, block in self.dense_blocks) + sum(
+            U.size + V.size for _, _, U, V in self.low_rank_blocks
+        )
+
+    def _matvec(self, x):
+        x = np.ravel(x)
+        y = np.zeros(self.shape[0], dtype=np.result_type(self.dtype, x.dtype))
+        for rows, columns, block in self.dense_blocks:
+            y[rows] += block @ x[columns]
+        for rows, columns, U, V in self.low_rank_blocks:
+            y[rows] += U @ (V @ x[columns])
+        return y
+
+    def _rmatvec(self, x):
+        x = np.ravel(x)
+        y = np.zeros(self.shape[1], dtype=np.result_type(self.dtype, x.dtype))
+        for rows, columns, block in self.dense_blocks:
+            y[columns] += block.T @ x[rows]
+        for rows, columns, U, V in self.low_rank_blocks:
+            y[columns] += V.T @ (U.T @ x[rows])
+        return y
+
+    def squared_column_sum(self, W, row_weights=None):
+        """
+        Weighted sum of the squared columns, sum_i W_i * (A_i)**2.
+
+        If row_weights are given, the rows of each group are first combined
+        as sum_{row in group} row_weights[row] * A[row], and W holds the
+        weights of the groups.
+
+        :param numpy.ndarray W: weights of the rows, or of the groups
+        :param numpy.ndarray row_weights: weights combining the rows of a group
+        :rtype: numpy.ndarray
+        """
+        if row_weights is not None and self.row_groups is None:
+            raise ValueError("Rows can only be combined with row_groups")
+
+        diag = np.zeros(self.shape[1])
+        for rows, columns, block in self.dense_blocks:
+            if row_weights is not None:
+                rows, block = self._combine_rows(rows, block, row_weights)
+            diag[columns] += W[rows] @ (block * block)
+        for rows, columns, U, V in self.low_rank_blocks:
+            if row_weights is not None:
+                rows, U = self._combine_rows(rows, U, row_weights)
+            UtWU = U.T @ (W[rows, None] * U)
+            diag[columns] += np.einsum("ij,ik,kj->j", V, UtWU, V)
+        return diag
+
+    def _combine_rows(self, rows, block, row_weights):
+        """
+        Groups of a block of rows, and the block with the rows of each group
+        combined.
+        """
+        groups, inverse = np.unique(self.row_groups[rows], return_inverse=True)
+        combine = sp.csr_matrix(
+            (row_weights[rows], (inverse, np.arange(len(rows)))),
+            shape=(len(groups), len(rows)),
+        )
+        return groups, combine @ block
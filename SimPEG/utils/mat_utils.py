@@ -56,7 +56,7 @@ def diagEst(matFun, n, k=None, approach="Probing"):
             return A.dot(v)
 
     if k is None:
-        k = np.floor(n / 10.0)
+        k = int(np.floor(n / 10.0))
 
     if approach.upper() == "ONES":
 
@@ -91,6 +91,52 @@ def diagEst(matFun, n, k=None, approach="Probing"):
     return d
 
 
+def JtJ_diagonal(Jt_blocks, w=None):
+    """
+    Diagonal of J^T W^T W J, accumulated over blocks of rows of J so that
+    J never needs to be held in full.
+
+    :param iterable Jt_blocks: transposed blocks of consecutive rows of J,
+        (n_model, n_rows) arrays, in the order of the data
+    :param numpy.ndarray w: data weights, the diagonal of W
+    :rtype: numpy.ndarray
+    :return: diag(J^T W^T W J)
+    """
+    diag = 0.0
+    istrt = 0
+    for Jt in Jt_blocks:
+        iend = istrt + Jt.shape[1]
+        if w is None:
+            diag += np.einsum("ij,ij->i", Jt, Jt)
+        else:
+            diag += np.einsum("j,ij,ij->i", w[istrt:iend] ** 2, Jt, Jt)
+        istrt = iend
+    return diag
+
+
+def estimate_JtJ_diagonal(Jvec, Jtvec, n, w=None, k=None, approach="Ones"):
+    """
+    Matrix-free estimate of the diagonal of J^T W^T W J with
+    :func:`diagEst`, for when J is too large to be formed.
+
+    :param callable Jvec: multiplies a model vector by J
+    :param callable Jtvec: multiplies a data vector by J^T
+    :param int n: size of the model
+    :param numpy.ndarray w: data weights, the diagonal of W
+    :param int k: number of probing vectors, each costs a Jvec and a Jtvec
+    :param str approach: approach to be used for getting vectors, see diagEst
+    :rtype: numpy.ndarray
+    :return: est_diag(J^T W^T W J)
+    """
+    if w is None:
+        w = 1.0
+
+    def JtJv(v):
+        return Jtvec(w ** 2 * Jvec(v))
+
+    return diagEst(JtJv, n, k=k, approach=approach)
+
+
 def uniqueRows(M):
     b = np.ascontiguousarray(M).view(np.dtype((np.void, M.dtype.itemsize * M.shape[1])))
     _, unqInd = np.unique(b, return_index=True)
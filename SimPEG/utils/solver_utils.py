@@ -1,7 +1,10 @@
 from __future__ import print_function
 import numpy as np
-from scipy.sparse import linalg
+import scipy.sparse as sp
+from scipy.sparse import linalg, csgraph
 from .mat_utils import mkvc
+from .code_utils import parallel_map
+import threading
 import warnings
 import inspect
 
@@ -19,6 +22,21 @@ def _checkAccuracy(A, b, X, accuracyTol):
         warnings.warn(msg, RuntimeWarning)
 
 
+def _solve_columns(solve, b, n_workers=1):
+    """
+    Solve for the columns of b, split in n_workers batches of columns that
+    are solved at once by a pool of threads.
+    """
+    if n_workers <= 1:
+        return solve(b)
+    batches = [
+        cols for cols in np.array_split(np.arange(b.shape[1]), n_workers) if len(cols)
+    ]
+    return np.hstack(
+        parallel_map(lambda cols: solve(b[:, cols]), batches, n_workers=n_workers)
+    )
+
+
 def SolverWrapD(fun, factorize=True, checkAccuracy=True, accuracyTol=1e-6, name=None):
     """
     Wraps a direct Solver.
@@ -29,6 +47,10 @@ def SolverWrapD(fun, factorize=True, checkAccuracy=True, accuracyTol=1e-6, name=
         Solver   = solver_utils.SolverWrapD(sp.linalg.spsolve, factorize=False)
         SolverLU = solver_utils.SolverWrapD(sp.linalg.splu, factorize=True)
 
+    Multiple right hand sides are solved at once, so fun (or the solve method
+    of its factors) must accept a 2D right hand side. They can also be split
+    in batches of columns solved by a pool of threads, with the n_workers
+    keyword argument of the solver.
     """
 
     def __init__(self, A, **kwargs):
@@ -36,6 +58,7 @@ def SolverWrapD(fun, factorize=True, checkAccuracy=True, accuracyTol=1e-6, name=
 
         self.checkAccuracy = kwargs.pop("checkAccuracy", checkAccuracy)
         self.accuracyTol = kwargs.pop("accuracyTol", accuracyTol)
+        self.n_workers = kwargs.pop("n_workers", 1)
 
         func_params = inspect.signature(fun).parameters
         # First test if function excepts **kwargs,
@@ -73,21 +96,12 @@ def SolverWrapD(fun, factorize=True, checkAccuracy=True, accuracyTol=1e-6, name=
             if b.dtype is np.dtype("O"):
                 b = b.astype(type(b[0]))
 
-            if factorize:
-                X = self.solver.solve(b, **self.kwargs)
-            else:
-                X = fun(self.A, b, **self.kwargs)
+            X = self._solve(b)
         else:  # Multiple RHSs
             if b.dtype is np.dtype("O"):
                 b = b.astype(type(b[0, 0]))
 
-            X = np.empty_like(b)
-
-            for i in range(b.shape[1]):
-                if factorize:
-                    X[:, i] = self.solver.solve(b[:, i])
-                else:
-                    X[:, i] = fun(self.A, b[:, i], **self.kwargs)
+            X = _solve_columns(self._solve, b, self.n_workers)
 
         if self.checkAccuracy:
             _checkAccuracy(self.A, b, X, self.accuracyTol)
@@ -96,6 +110,11 @@ def SolverWrapD(fun, factorize=True, checkAccuracy=True, accuracyTol=1e-6, name=
     def __matmul__(self, other):
         return self * other
 
+    def _solve(self, b):
+        if factorize:
+            return self.solver.solve(b, **self.kwargs)
+        return fun(self.A, b, **self.kwargs)
+
     def clean(self):
         if factorize and hasattr(self.solver, "clean"):
             return self.solver.clean()
@@ -106,13 +125,14 @@ def SolverWrapD(fun, factorize=True, checkAccuracy=True, accuracyTol=1e-6, name=
         {
             "__init__": __init__,
             "clean": clean,
+            "_solve": _solve,
             "__mul__": __mul__,
             "__matmul__": __matmul__,
         },
     )
 
 
-def SolverWrapI(fun, checkAccuracy=True, accuracyTol=1e-5, name=None):
+def SolverWrapI(fun, checkAccuracy=True, accuracyTol=1e-5, name=None, block=False):
     """
     Wraps an iterative Solver.
 
@@ -120,7 +140,15 @@ def SolverWrapI(fun, checkAccuracy=True, accuracyTol=1e-5, name=None):
 
         import scipy.sparse as sp
         SolverCG = solver_utils.SolverWrapI(sp.linalg.cg)
+        SolverBlockCG = solver_utils.SolverWrapI(block_cg, block=True)
+
+    With block=True, fun solves for multiple right hand sides at once,
+    otherwise they are solved one column at a time. The columns can also be
+    split in batches solved by a pool of threads, with the n_workers keyword
+    argument of the solver.
 
+    A preconditioner keyword argument, either a Preconditioner or the name of
+    one (e.g. 'ilu'), is built for A and passed to fun as M.
     """
 
     def __init__(self, A, **kwargs):
@@ -128,6 +156,13 @@ def SolverWrapI(fun, checkAccuracy=True, accuracyTol=1e-5, name=None):
 
         self.checkAccuracy = kwargs.pop("checkAccuracy", checkAccuracy)
         self.accuracyTol = kwargs.pop("accuracyTol", accuracyTol)
+        self.n_workers = kwargs.pop("n_workers", 1)
+
+        preconditioner = kwargs.pop("preconditioner", None)
+        if preconditioner is not None:
+            if not isinstance(preconditioner, Preconditioner):
+                preconditioner = Preconditioner(preconditioner)
+            kwargs["M"] = preconditioner(A)
 
         func_params = inspect.signature(fun).parameters
         # First test if function excepts **kwargs,
@@ -158,23 +193,17 @@ def SolverWrapI(fun, checkAccuracy=True, accuracyTol=1e-5, name=None):
         if len(b.shape) == 1 or b.shape[1] == 1:
             b = b.flatten()
             # Just one RHS
-            out = fun(self.A, b, **self.kwargs)
-            if isinstance(out, tuple) and len(out) == 2:
-                # We are dealing with scipy output with an info!
-                X = out[0]
-                self.info = out[1]
-            else:
-                X = out
+            X = self._solve(b)
+        elif block:  # Multiple RHSs sharing one Krylov space
+            X = _solve_columns(self._solve, b, self.n_workers)
         else:  # Multiple RHSs
-            X = np.empty_like(b)
-            for i in range(b.shape[1]):
-                out = fun(self.A, b[:, i], **self.kwargs)
-                if isinstance(out, tuple) and len(out) == 2:
-                    # We are dealing with scipy output with an info!
-                    X[:, i] = out[0]
-                    self.info = out[1]
-                else:
-                    X[:, i] = out
+            X = _solve_columns(
+                lambda b: np.column_stack(
+                    [self._solve(b[:, i]) for i in range(b.shape[1])]
+                ),
+                b,
+                self.n_workers,
+            )
 
         if self.checkAccuracy:
             _checkAccuracy(self.A, b, X, self.accuracyTol)
@@ -183,6 +212,15 @@ def SolverWrapI(fun, checkAccuracy=True, accuracyTol=1e-5, name=None):
     def __matmul__(self, other):
         return self * other
 
+    def _solve(self, b):
+        out = fun(self.A, b, **self.kwargs)
+        if isinstance(out, tuple) and len(out) == 2:
+            # We are dealing with scipy output with an info!
+            X, self.info = out
+        else:
+            X = out
+        return X
+
     def clean(self):
         pass
 
@@ -192,16 +230,468 @@ def SolverWrapI(fun, checkAccuracy=True, accuracyTol=1e-5, name=None):
         {
             "__init__": __init__,
             "clean": clean,
+            "_solve": _solve,
             "__mul__": __mul__,
             "__matmul__": __matmul__,
         },
     )
 
 
+def _column_norms(X):
+    return np.linalg.norm(X, axis=0)
+
+
+def block_cg(A, b, x0=None, tol=1e-05, maxiter=None, M=None):
+    """
+    Block conjugate gradient solve of A x = b, for a Hermitian definite A and
+    the columns of b sharing one Krylov space.
+
+    A column is removed from the block once its residual norm is below tol
+    times the norm of its right hand side, and the search directions are
+    A-orthonormalized, dropping the dependent ones, at every iteration.
+
+    :param A: (n, n) sparse matrix or LinearOperator
+    :param numpy.ndarray b: (n,) or (n, nrhs) right hand sides
+    :param numpy.ndarray x0: starting guess
+    :param float tol: relative tolerance
+    :param int maxiter: maximum number of iterations, by default 10*n
+    :param M: preconditioner, approximating the inverse of A
+    :rtype: tuple
+    :return: x and info, 0 when all the columns converged, else the number
+        of iterations
+    """
+    B = b.reshape((b.shape[0], -1))
+    n = B.shape[0]
+    if maxiter is None:
+        maxiter = 10 * n
+
+    dtype = np.result_type(A.dtype, B.dtype)
+    X = np.zeros(B.shape, dtype=dtype) if x0 is None else x0.reshape(B.shape) + 0
+    R = B - A @ X if x0 is not None else B.astype(dtype)
+    atol = tol * _column_norms(B)
+
+    P = Q = None
+    info = maxiter
+    for _ in range(maxiter):
+        active = _column_norms(R) > atol
+        if not active.any():
+            info = 0
+            break
+        if not active.all():
+            active = np.flatnonzero(active)
+        else:
+            active = slice(None)
+
+        Z = R[:, active] if M is None else M @ R[:, active]
+        if P is not None:
+            # A-conjugate to the previous search directions
+            Z = Z - P @ (sign[:, None] * (Q.conj().T @ Z))
+        # A-orthonormal search directions, without the dependent ones
+        Q = A @ Z
+        s, V = np.linalg.eigh(Z.conj().T @ Q)
+        keep = np.abs(s) > n * np.finfo(float).eps * np.abs(s).max()
+        sign = np.sign(s[keep])
+        V = V[:, keep] / np.sqrt(np.abs(s[keep]))
+        P = Z @ V
+        Q = Q @ V
+
+        alpha = sign[:, None] * (P.conj().T @ R[:, active])
+        X[:, active] += P @ alpha
+        R[:, active] -= Q @ alpha
+
+    return X.reshape(b.shape), info
+
+
+def block_bicgstab(A, b, x0=None, tol=1e-05, maxiter=None, M=None):
+    """
+    Block BiCGStab solve of A x = b, with the columns of b sharing one Krylov
+    space.
+
+    The iterations stop once the residual norm of every column is below tol
+    times the norm of its right hand side.
+
+    :param A: (n, n) sparse matrix or LinearOperator
+    :param numpy.ndarray b: (n,) or (n, nrhs) right hand sides
+    :param numpy.ndarray x0: starting guess
+    :param float tol: relative tolerance
+    :param int maxiter: maximum number of iterations, by default 10*n
+    :param M: preconditioner, approximating the inverse of A
+    :rtype: tuple
+    :return: x and info, 0 when all the columns converged, else the number
+        of iterations
+    """
+    B = b.reshape((b.shape[0], -1))
+    n = B.shape[0]
+    if maxiter is None:
+        maxiter = 10 * n
+
+    dtype = np.result_type(A.dtype, B.dtype)
+    X = np.zeros(B.shape, dtype=dtype)
+    info = 0
+
+    # the columns with a zero right hand side have a zero solution
+    nonzero = _column_norms(B) > 0
+    if x0 is not None:
+        X = x0.reshape(B.shape) + X
+        nonzero[:] = True
+    if nonzero.any():
+        X[:, nonzero], info = _block_bicgstab(
+            A, B[:, nonzero], X[:, nonzero], tol, maxiter, M
+        )
+
+    return X.reshape(b.shape), info
+
+
+def _block_bicgstab(A, B, X, tol, maxiter, M):
+    def lstsq(a, b):
+        return np.linalg.lstsq(a, b, rcond=None)[0]
+
+    atol = tol * _column_norms(B)
+    R = B - A @ X
+    Rt = R.copy()
+    P = R.copy()
+
+    for _ in range(maxiter):
+        if np.all(_column_norms(R) <= atol):
+            return X, 0
+
+        Phat = P if M is None else M @ P
+        V = A @ Phat
+        RtV = Rt.conj().T @ V
+        alpha = lstsq(RtV, Rt.conj().T @ R)
+        S = R - V @ alpha
+        X = X + Phat @ alpha
+        if np.all(_column_norms(S) <= atol):
+            return X, 0
+
+        Shat = S if M is None else M @ S
+        T = A @ Shat
+        TT = np.vdot(T, T)
+        if TT == 0:
+            return X, maxiter
+        omega = np.vdot(T, S) / TT
+        X = X + omega * Shat
+        R = S - omega * T
+
+        beta = lstsq(RtV, -(Rt.conj().T @ T))
+        P = R + (P - omega * V) @ beta
+
+    return X, maxiter
+
+
+def _as_operator(A, solve):
+    return linalg.LinearOperator(A.shape, matvec=solve, matmat=solve, dtype=A.dtype)
+
+
+def jacobi_preconditioner(A):
+    """
+    Jacobi preconditioner, the inverse of the diagonal of A.
+
+    :param scipy.sparse.spmatrix A: matrix
+    :rtype: scipy.sparse.linalg.LinearOperator
+    """
+    d_inv = 1.0 / A.diagonal()
+
+    def solve(x):
+        return d_inv.reshape((-1,) + (1,) * (x.ndim - 1)) * x
+
+    return _as_operator(A, solve)
+
+
+def _triangular_solver(T):
+    # natural ordering and no pivoting, so the factors have no fill in
+    factors = linalg.splu(
+        T.tocsc(),
+        permc_spec="NATURAL",
+        diag_pivot_thresh=0.0,
+        options={"SymmetricMode": True},
+    )
+    return factors.solve
+
+
+def ssor_preconditioner(A, omega=1.0):
+    """
+    Symmetric successive over-relaxation preconditioner of A,
+    omega (2 - omega) (D + omega U)^-1 D (D + omega L)^-1, with D, L and U
+    the diagonal, strictly lower and strictly upper triangles of A.
+
+    :param scipy.sparse.spmatrix A: matrix
+    :param float omega: relaxation parameter, in (0, 2)
+    :rtype: scipy.sparse.linalg.LinearOperator
+    """
+    A = sp.csr_matrix(A)
+    d = A.diagonal()
+    D = sp.diags(d)
+    lower = _triangular_solver(D + omega * sp.tril(A, k=-1))
+    upper = _triangular_solver(D + omega * sp.triu(A, k=1))
+    d = omega * (2.0 - omega) * d
+
+    def solve(x):
+        return upper(d.reshape((-1,) + (1,) * (x.ndim - 1)) * lower(x))
+
+    return _as_operator(A, solve)
+
+
+def ilu_preconditioner(
+    A, drop_tol=1e-4, fill_factor=10, diag_pivot_thresh=0.0, setup=None
+):
+    """
+    Incomplete LU preconditioner of A (scipy.sparse.linalg.spilu).
+
+    Pivoting is disabled by default, as threshold pivoting with dropped
+    entries can produce singular factors of the symmetric systems.
+
+    :param scipy.sparse.spmatrix A: matrix
+    :param float drop_tol: drop tolerance of the factors
+    :param float fill_factor: upper bound on the fill in of the factors
+    :param float diag_pivot_thresh: threshold for pivoting, in [0, 1]
+    :param dict setup: factors of a previous matrix to reuse, filled in if empty
+    :rtype: scipy.sparse.linalg.LinearOperator
+    """
+    setup = {} if setup is None else setup
+    if "factors" not in setup:
+        setup["factors"] = linalg.spilu(
+            sp.csc_matrix(A),
+            drop_tol=drop_tol,
+            fill_factor=fill_factor,
+            diag_pivot_thresh=diag_pivot_thresh,
+        )
+    return _as_operator(A, setup["factors"].solve)
+
+
+def _aggregate(C):
+    """
+    Aggregates of the graph with adjacency matrix C (with its diagonal): the
+    roots are a distance-2 maximal independent set, found in parallel by
+    comparing random weights, and each node joins a root at most two edges
+    away.
+    """
+    n = C.shape[0]
+
+    def neighbour_max(x):
+        return np.maximum.reduceat(x[C.indices], C.indptr[:-1])
+
+    # -1 out, 0 undecided and 1 root nodes, ordered by random weights
+    weight = np.random.RandomState(0).rand(n)
+    state = np.zeros(n)
+    while (state == 0).any():
+        x = 2 * state + weight
+        x_max = neighbour_max(neighbour_max(x))
+        undecided = state == 0
+        state[undecided & (x_max == x)] = 1
+        state[undecided & (x_max >= 2) & (x_max != x)] = -1
+
+    roots = np.flatnonzero(state == 1)
+    aggregate = -np.ones(n, dtype=int)
+    aggregate[roots] = np.arange(len(roots))
+    for _ in range(2):
+        free = aggregate < 0
+        aggregate[free] = neighbour_max(aggregate)[free]
+    return len(roots), aggregate
+
+
+def _aggregation_prolongator(A, theta, omega):
+    """
+    Smoothed aggregation prolongator: the piecewise constant prolongator on
+    the aggregates of the strong connections of A, smoothed by a damped
+    Jacobi step.
+    """
+    if np.iscomplexobj(A):
+        # real matrix with the diagonally dominant structure of A
+        A = A.real + np.sign(A.diagonal().imag.sum()) * A.imag
+    A = sp.csr_matrix(A)
+    n = A.shape[0]
+    d = np.abs(A.diagonal())
+
+    C = sp.coo_matrix(A)
+    strong = (C.row == C.col) | (
+        np.abs(C.data) >= theta * np.sqrt(d[C.row] * d[C.col])
+    )
+    C = sp.csr_matrix(
+        (np.ones(strong.sum()), (C.row[strong], C.col[strong])), shape=(n, n)
+    )
+    n_agg, aggregate = _aggregate(C)
+
+    T = sp.csr_matrix((np.ones(n), (np.arange(n), aggregate)), shape=(n, n_agg))
+    T = T @ sp.diags(1.0 / np.sqrt(np.asarray(T.sum(axis=0)).ravel()))
+    return T - omega * (sp.diags(1.0 / A.diagonal()) @ (A @ T))
+
+
+def amg_preconditioner(
+    A,
+    theta=0.08,
+    max_levels=10,
+    max_coarse=500,
+    n_smooth=1,
+    omega=2.0 / 3.0,
+    setup=None,
+):
+    """
+    Algebraic multigrid preconditioner of A: one V-cycle of a smoothed
+    aggregation hierarchy, with damped Jacobi smoothing and a direct solve on
+    the coarsest level.
+
+    For the complex symmetric frequency domain systems, the prolongators are
+    built from a real matrix combining the real and imaginary parts of A.
+
+    :param scipy.sparse.spmatrix A: matrix
+    :param float theta: strength of connection threshold
+    :param int max_levels: maximum number of levels
+    :param int max_coarse: size of the coarsest level
+    :param int n_smooth: number of pre and post smoothing steps
+    :param float omega: Jacobi damping
+    :param dict setup: prolongators of a previous matrix to reuse, filled in if
+        empty
+    :rtype: scipy.sparse.linalg.LinearOperator
+    """
+    setup = {} if setup is None else setup
+    prolongators = setup.get("prolongators")
+
+    levels = []
+    Ak = sp.csr_matrix(A)
+    for level in range(max_levels - 1):
+        if prolongators is not None:
+            if level == len(prolongators):
+                break
+            P = prolongators[level]
+        else:
+            if Ak.shape[0] <= max_coarse:
+                break
+            P = _aggregation_prolongator(Ak, theta, omega)
+            if P.shape[1] >= Ak.shape[0]:
+                break
+        levels.append((Ak, omega / Ak.diagonal(), P))
+        Ak = sp.csr_matrix(P.T @ Ak @ P)
+    coarse = linalg.splu(sp.csc_matrix(Ak)).solve
+    setup["prolongators"] = [P for _, _, P in levels]
+
+    def cycle(b, level=0):
+        if level == len(levels):
+            return coarse(b)
+        Ak, d_inv, P = levels[level]
+        d_inv = d_inv.reshape((-1,) + (1,) * (b.ndim - 1))
+        x = d_inv * b
+        for _ in range(n_smooth - 1):
+            x += d_inv * (b - Ak @ x)
+        x += P @ cycle(P.T @ (b - Ak @ x), level + 1)
+        for _ in range(n_smooth):
+            x += d_inv * (b - Ak @ x)
+        return x
+
+    return _as_operator(A, cycle)
+
+
+def auxiliary_space_preconditioner(A, gradient, omega=1.0, setup=None, **kwargs):
+    """
+    Auxiliary space preconditioner of a curl curl system A discretized on
+    edges, e.g. the electric field formulation of the frequency domain.
+
+    Point smoothers do not reduce the error in the null space of the curl,
+    the gradients of the nodal potentials, so symmetric Gauss-Seidel (SSOR)
+    smoothing steps of A are combined with a correction in the space of the
+    gradients, solved by algebraic multigrid.
+
+    :param scipy.sparse.spmatrix A: matrix
+    :param scipy.sparse.spmatrix gradient: discrete gradient from the nodes to
+        the edges, e.g. mesh.nodalGrad
+    :param float omega: relaxation parameter of the smoother, in (0, 2)
+    :param dict setup: multigrid prolongators of a previous matrix to reuse,
+        filled in if empty
+    :param kwargs: options of the multigrid preconditioner of the correction
+    :rtype: scipy.sparse.linalg.LinearOperator
+    """
+    S = ssor_preconditioner(A, omega=omega)
+    G = sp.csr_matrix(gradient)
+    correction = amg_preconditioner(G.T @ A @ G, setup=setup, **kwargs)
+
+    def solve(b):
+        x = S @ b
+        x = x + G @ (correction @ (G.T @ (b - A @ x)))
+        return x + S @ (b - A @ x)
+
+    return _as_operator(A, solve)
+
+
+class Preconditioner(object):
+    """
+    Preconditioner of the iterative solvers. The expensive part of its setup,
+    the incomplete factors or the multigrid prolongators, is computed on the
+    first matrix it is applied to and reused for the later ones, while the
+    point smoothers are cheap to build for each matrix.
+
+    When it is given in the solver_opts of a simulation, the setup is shared
+    by the systems of every frequency or time step, and it is rebuilt after a
+    model update.
+
+    ::
+
+        simulation.solver = SolverBiCG
+        simulation.solver_opts = {
+            "preconditioner": Preconditioner("ams", gradient=mesh.nodalGrad),
+            "tol": 1e-8,
+        }
+
+    :param str kind: 'jacobi', 'ssor', 'ilu', 'amg' or 'ams' (auxiliary space)
+    :param bool reuse: reuse the setup for the other matrices, else it is
+        computed for each matrix
+    :param kwargs: options of the preconditioner, e.g. drop_tol for 'ilu'
+    """
+
+    _kinds = {
+        "jacobi": jacobi_preconditioner,
+        "ssor": ssor_preconditioner,
+        "ilu": ilu_preconditioner,
+        "amg": amg_preconditioner,
+        "ams": auxiliary_space_preconditioner,
+    }
+
+    def __init__(self, kind="ilu", reuse=True, **kwargs):
+        if kind not in self._kinds:
+            raise ValueError(
+                "kind must be one of {}, not {}".format(list(self._kinds), kind)
+            )
+        self.kind = kind
+        self.reuse = reuse
+        self.kwargs = kwargs
+        self._setup = None
+        self._lock = threading.Lock()
+
+    def __call__(self, A):
+        build = self._kinds[self.kind]
+        if not self.reuse or "setup" not in inspect.signature(build).parameters:
+            return build(A, **self.kwargs)
+        with self._lock:
+            if self._setup is None or self._shape != A.shape:
+                self._setup = {}
+                self._shape = A.shape
+            return build(A, setup=self._setup, **self.kwargs)
+
+    def clean(self):
+        self._setup = None
+
+
 Solver = SolverWrapD(linalg.spsolve, factorize=False, name="Solver")
 SolverLU = SolverWrapD(linalg.splu, factorize=True, name="SolverLU")
 SolverCG = SolverWrapI(linalg.cg, name="SolverCG")
 SolverBiCG = SolverWrapI(linalg.bicgstab, name="SolverBiCG")
+SolverBlockCG = SolverWrapI(block_cg, name="SolverBlockCG", block=True)
+SolverBlockBiCG = SolverWrapI(block_bicgstab, name="SolverBlockBiCG", block=True)
+
+
+class FactorCache(dict):
+    """
+    Dictionary of matrix factors, e.g. keyed on the time step length, that
+    are all cleaned at once when the model changes.
+
+    ::
+
+        clean_on_model_update = ["_Adiag_factors"]
+    """
+
+    def clean(self):
+        for Ainv in self.values():
+            Ainv.clean()
+        self.clear()
 
 
 class SolverDiag(object):
@@ -153,6 +153,22 @@ class TestPropMaps(unittest.TestCase):
         # PM = pickle.loads(pickle.dumps(PM))
         assert isinstance(PM.sigmaDeriv.todense(), np.ndarray)
 
+    def test_deriv_product(self):
+        expMap = maps.ExpMap(discretize.TensorMesh((3,)))
+
+        PM = ReciprocalMappingExample()
+        self.assertEqual(PM._deriv_product("sigma", np.ones(3)), 0)
+
+        PM.rhoMap = expMap
+        PM.model = np.r_[1.0, 2.0, 3.0]
+        v = np.r_[1.0, -1.0, 0.5]
+        for name in ["rho", "sigma"]:
+            deriv = getattr(PM, name + "Deriv").toarray()
+            np.testing.assert_allclose(PM._deriv_product(name, v), deriv @ v)
+            np.testing.assert_allclose(
+                PM._deriv_product(name, v, adjoint=True), deriv.T @ v
+            )
+
     def test_reciprocal_no_map(self):
         expMap = maps.ExpMap(discretize.TensorMesh((3,)))
 
@@ -1,6 +1,7 @@
 import unittest
 
 from SimPEG import Solver, SolverDiag, SolverCG, SolverLU
+from SimPEG import SolverBlockCG, SolverBlockBiCG
 from discretize import TensorMesh
 from SimPEG.utils import sdiag
 import numpy as np
@@ -55,6 +56,9 @@ class TestSolver(unittest.TestCase):
     def test_direct_splu_M(self):
         self.assertLess(dotest(SolverLU, True), TOLD)
 
+    def test_direct_splu_M_threads(self):
+        self.assertLess(dotest(SolverLU, True, n_workers=2), TOLD)
+
     def test_iterative_diag_1(self):
         self.assertLess(
             dotest(SolverDiag, False, A=sdiag(np.random.rand(10) + 1.0)), TOLI
@@ -71,6 +75,18 @@ class TestSolver(unittest.TestCase):
     def test_iterative_cg_M(self):
         self.assertLess(dotest(SolverCG, True), TOLI)
 
+    def test_iterative_block_cg_1(self):
+        self.assertLess(dotest(SolverBlockCG, False), TOLI)
+
+    def test_iterative_block_cg_M(self):
+        self.assertLess(dotest(SolverBlockCG, True), TOLI)
+
+    def test_iterative_block_bicg_1(self):
+        self.assertLess(dotest(SolverBlockBiCG, False), TOLI)
+
+    def test_iterative_block_bicg_M(self):
+        self.assertLess(dotest(SolverBlockBiCG, True), TOLI)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -8,6 +8,8 @@ import discretize
 
 from SimPEG import maps, utils
 from SimPEG import data_misfit, simulation, survey
+from SimPEG import inverse_problem, objective_function, optimization, regularization
+from SimPEG import directives, inversion
 
 np.random.seed(17)
 
@@ -83,5 +85,118 @@ class DataMisfitTest(unittest.TestCase):
         self.dmis.test(x=self.model)
 
 
+class ParallelComboTest(unittest.TestCase):
+    def setUp(self):
+        mesh = discretize.TensorMesh([30])
+        rng = np.random.RandomState(0)
+        model = 0.1 * rng.randn(mesh.nC)
+
+        # independent misfits, as for the tiles of an inversion
+        misfits = []
+        for n_data in [10, 15, 20]:
+            receivers = survey.BaseRx(n_data * [[0.0]])
+            sim = simulation.ExponentialSinusoidSimulation(
+                mesh=mesh,
+                survey=survey.BaseSurvey([survey.BaseSrc([receivers])]),
+                model_map=maps.ExpMap(mesh),
+                n_kernels=n_data,
+            )
+            data = sim.make_synthetic_data(model, relative_error=0.05, add_noise=True)
+            misfits.append(data_misfit.L2DataMisfit(simulation=sim, data=data))
+
+        self.mesh = mesh
+        self.model = model + 0.1
+        self.v = rng.rand(mesh.nC)
+        self.misfits = misfits
+        self.multipliers = [1.0, 2.0, 0.5]
+        self.serial = objective_function.ComboObjectiveFunction(
+            misfits, self.multipliers
+        )
+
+    def check_combo(self, n_workers):
+        combo = objective_function.ParallelComboObjectiveFunction(
+            self.misfits, list(self.multipliers), n_workers=n_workers
+        )
+        self.addCleanup(combo.close)
+        m, v = self.model, self.v
+
+        for f in [None, combo.fields(m)]:
+            self.assertAlmostEqual(combo(m, f=f), self.serial(m))
+            np.testing.assert_allclose(combo.deriv(m, f=f), self.serial.deriv(m))
+            np.testing.assert_allclose(
+                combo.deriv2(m, v, f=f), self.serial.deriv2(m, v)
+            )
+            for d, misfit in zip(combo.dpred(m, f=f), self.misfits):
+                np.testing.assert_allclose(d, misfit.simulation.dpred(m))
+
+        # the multipliers are passed to the workers
+        combo.multipliers = [0.0, 1.0, 3.0]
+        self.serial.multipliers = [0.0, 1.0, 3.0]
+        np.testing.assert_allclose(combo.deriv(m), self.serial.deriv(m))
+
+        # inversion
+        reg = regularization.Tikhonov(self.mesh)
+        opt = optimization.InexactGaussNewton(maxIter=1)
+        for dmis in [combo, self.serial]:
+            inv_prob = inverse_problem.BaseInvProblem(dmis, reg, opt, beta=1.0)
+            inv_prob.phi_d = inv_prob.phi_m = np.nan
+            phi, g = inv_prob.evalFunction(m, return_H=False)
+            if dmis is combo:
+                phi_combo, g_combo = phi, g
+                dpred_combo = inv_prob.dpred
+        self.assertAlmostEqual(phi, phi_combo)
+        np.testing.assert_allclose(g, g_combo)
+        for d, d_combo in zip(inv_prob.dpred, dpred_combo):
+            np.testing.assert_allclose(d, d_combo)
+
+        # diagonal of JtJ from the misfits held by the workers
+        JtJdiag = sum(
+            np.sum((misfit.W * misfit.simulation.getJ(m)) ** 2, axis=0)
+            for misfit in self.misfits
+        )
+        np.testing.assert_allclose(combo.getJtJdiag(m), JtJdiag)
+        preconditioners = []
+        for dmis in [combo, self.serial]:
+            inv_prob = inverse_problem.BaseInvProblem(dmis, reg, opt, beta=1.0)
+            inv_prob.model = m
+            directive = directives.UpdatePreconditioner()
+            inversion.BaseInversion(inv_prob, directiveList=[directive])
+            directive.initialize()
+            preconditioners.append(opt.approxHinv.diagonal())
+        np.testing.assert_allclose(*preconditioners)
+
+        # attributes are set on the misfits held by the workers
+        combo.set_objfcts_attribute("W", utils.Identity())
+        self.assertAlmostEqual(combo(m), self.serial(m))
+
+    def test_serial(self):
+        self.check_combo(1)
+
+    def test_workers(self):
+        self.check_combo(2)
+
+    def test_spawn(self):
+        combo = objective_function.ParallelComboObjectiveFunction(
+            self.misfits, list(self.multipliers), n_workers=2, context="spawn"
+        )
+        self.addCleanup(combo.close)
+        self.assertAlmostEqual(combo(self.model), self.serial(self.model))
+        np.testing.assert_allclose(
+            combo.deriv(self.model), self.serial.deriv(self.model)
+        )
+
+    def test_worker_error(self):
+        combo = objective_function.ParallelComboObjectiveFunction(
+            self.misfits, n_workers=2
+        )
+        self.addCleanup(combo.close)
+        with self.assertRaises(ValueError):
+            combo.deriv2(self.model, np.ones(self.mesh.nC + 1))
+        # the workers are still running
+        self.assertAlmostEqual(
+            combo(self.model), sum(misfit(self.model) for misfit in self.misfits)
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
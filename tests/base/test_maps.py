@@ -429,6 +429,36 @@ class MapTests(unittest.TestCase):
             )
         )
 
+    def test_combo_deriv_vector(self):
+        M = discretize.TensorMesh([2, 4], "0C")
+        wires = maps.Wires(("a", 2), ("b", 3))
+        actMap = maps.InjectActiveCells(M, M.vectorCCy <= 0, 10, nC=M.nCy)
+        combo = maps.ExpMap(M) * maps.SurjectVertical1D(M) * actMap * wires.a
+        m = np.random.rand(5)
+        v = np.random.rand(5)
+        w = np.random.rand(M.nC)
+
+        J = combo.deriv(m).toarray()
+        self.assertLess(np.linalg.norm(combo.deriv(m, v) - J.dot(v)), TOL)
+        self.assertLess(np.linalg.norm(combo.deriv_T(m, w) - J.T.dot(w)), 1e-12)
+
+        m2 = m + 1.0
+        self.assertLess(
+            np.linalg.norm(combo.deriv(m2, v) - combo.deriv(m2).toarray().dot(v)),
+            1e-12,
+        )
+        self.assertGreater(np.linalg.norm(combo.deriv(m2, v) - J.dot(v)), 0.1)
+
+        # a sub-map changed after a derivative at the same model
+        weighting = maps.Weighting(nP=5)
+        combo = maps.ExpMap(nP=5) * weighting
+        Jv = combo.deriv(m, v)
+        weighting.weights = 2.0 * np.ones(5)
+        J = combo.deriv(m).toarray()
+        self.assertGreater(np.linalg.norm(combo.deriv(m, v) - Jv), 0.1)
+        self.assertLess(np.linalg.norm(combo.deriv(m, v) - J.dot(v)), 1e-12)
+        self.assertLess(np.linalg.norm(combo.deriv_T(m, v) - J.T.dot(v)), 1e-12)
+
     def test_sum(self):
         M2 = discretize.TensorMesh([np.ones(10), np.ones(20)], "CC")
         block = maps.ParametricEllipsoid(M2) * maps.Projection(
@@ -454,6 +484,11 @@ class MapTests(unittest.TestCase):
         self.assertTrue(summap0.test(m0))
         self.assertTrue(summap1.test(m0))
 
+        w = np.random.rand(M2.nC)
+        self.assertLess(
+            np.linalg.norm(summap0.deriv_T(m0, w) - summap0.deriv(m0).T * w), 1e-10
+        )
+
     def test_surject_units(self):
         M2 = discretize.TensorMesh([np.ones(10), np.ones(20)], "CC")
         unit1 = M2.gridCC[:, 0] < 0
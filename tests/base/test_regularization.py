@@ -400,6 +400,69 @@ class RegularizationTests(unittest.TestCase):
         reg = regularization.Simple(mesh, indActive=active)
         self.assertTrue(reg._nC_residual == len(active.nonzero()[0]))
 
+    def test_fused_regularization(self):
+        mesh = discretize.TensorMesh([8, 7, 6])
+        active = mesh.gridCC[:, 2] < 0.7
+        nC = int(active.sum())
+        rng = np.random.RandomState(0)
+        m = rng.randn(nC)
+        v = rng.randn(nC)
+        mref = rng.randn(nC)
+        cell_weights = rng.rand(nC)
+
+        regs = [
+            regularization.Tikhonov(
+                mesh, indActive=active, mapping=maps.ExpMap(nP=nC), alpha_xx=0.5
+            ),
+            regularization.Tikhonov(mesh, indActive=active),
+            regularization.Simple(mesh, indActive=active, cell_weights=cell_weights),
+            regularization.Sparse(
+                mesh,
+                indActive=active,
+                mapping=maps.IdentityMap(nP=nC),
+                cell_weights=cell_weights,
+            ),
+        ]
+        regs[1].mrefInSmooth = True
+        regs[3].mrefInSmooth = True
+        for reg in regs:
+            reg.mref = mref
+
+        sparse = regs[-1]
+        sparse.norms = np.c_[0.0, 1.0, 1.0, 2.0]
+        sparse.eps_p, sparse.eps_q = 0.1, 0.1
+        sparse.model = m
+
+        def check(reg):
+            self.assertIsNotNone(reg._fused_operators())
+            combo = super(regularization.BaseComboRegularization, reg)
+            np.testing.assert_allclose(reg(m), combo.__call__(m), rtol=1e-12)
+            np.testing.assert_allclose(reg.deriv(m), combo.deriv(m), rtol=1e-12)
+            np.testing.assert_allclose(
+                reg.deriv2(m, v=v), combo.deriv2(m, v=v), rtol=1e-12
+            )
+            np.testing.assert_allclose(
+                reg.deriv2(m) * v, combo.deriv2(m, v=v), rtol=1e-12
+            )
+
+        for reg in regs:
+            check(reg)
+
+        # the IRLS update only refreshes the weights
+        stencils = sparse._fused_stencils[1]
+        weights = sparse._fused_weights[1]
+        for objfct in sparse.objfcts:
+            objfct.stashedR = None
+        m = rng.randn(nC)
+        sparse.model = m
+        check(sparse)
+        self.assertIs(sparse._fused_stencils[1], stencils)
+        self.assertIsNot(sparse._fused_weights[1], weights)
+
+        # terms that cannot be fused are evaluated on their own
+        sparse.space = "spherical"
+        self.assertIsNone(sparse._fused_operators())
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -23,6 +23,8 @@ from SimPEG.utils import (
     Counter,
     download,
     surface2ind_topo,
+    parallel_map,
+    parallel_imap,
 )
 import discretize
 from discretize.tests import checkDerivative
@@ -338,6 +340,31 @@ class TestDiagEst(unittest.TestCase):
         self.assertTrue(err < TOL)
 
 
+class TestParallelMap(unittest.TestCase):
+    def test_order(self):
+        items = list(range(20))
+        for n_workers in [1, 3]:
+            self.assertEqual(
+                parallel_map(lambda x: x ** 2, items, n_workers=n_workers),
+                [x ** 2 for x in items],
+            )
+
+    def test_bounded_window(self):
+        started = []
+        results = []
+
+        def fun(x):
+            started.append(x)
+            return x
+
+        # The results are consumed one at a time: no more than max_pending
+        # items are started ahead of the last one yielded
+        for x in parallel_imap(fun, range(30), n_workers=2, max_pending=4):
+            results.append(x)
+            self.assertLessEqual(len(started) - len(results), 4)
+        self.assertEqual(results, list(range(30)))
+
+
 class TestDownload(unittest.TestCase):
     def test_downloads(self):
         url = "https://storage.googleapis.com/simpeg/Chile_GRAV_4_Miller/"
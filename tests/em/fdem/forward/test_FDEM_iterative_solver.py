@@ -0,0 +1,69 @@
+import unittest
+import numpy as np
+import discretize
+from SimPEG import maps, SolverBiCG, SolverLU, Preconditioner
+from SimPEG.electromagnetics import frequency_domain as fdem
+
+
+def get_simulation(**kwargs):
+    cs = 10.0
+    h = [(cs, 4, -1.3), (cs, 4), (cs, 4, 1.3)]
+    mesh = discretize.TensorMesh([h, h, h], "CCC")
+    rx_locations = np.c_[np.linspace(-15.0, 15.0, 4), np.zeros(4), np.ones(4) * 5.0]
+    source_list = [
+        fdem.Src.MagDipole(
+            [
+                fdem.Rx.PointMagneticFluxDensitySecondary(rx_locations, "z", "real"),
+                fdem.Rx.PointMagneticFluxDensitySecondary(rx_locations, "z", "imag"),
+            ],
+            frequency=freq,
+            location=np.r_[0.0, 0.0, 17.0],
+        )
+        for freq in [10.0, 100.0, 1000.0]
+    ]
+    return fdem.Simulation3DElectricField(
+        mesh,
+        survey=fdem.Survey(source_list),
+        sigmaMap=maps.ExpMap(mesh),
+        **kwargs
+    )
+
+
+class FDEMIterativeSolverTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.RandomState(0)
+        direct = get_simulation(solver=SolverLU)
+        cls.gradient = direct.mesh.nodalGrad
+        cls.m = np.log(1e-2) + 0.1 * rng.randn(direct.mesh.nC)
+        cls.v = rng.rand(direct.mesh.nC)
+
+        f = direct.fields(cls.m)
+        cls.d = direct.dpred(cls.m, f=f)
+        cls.Jv = direct.Jvec(cls.m, cls.v, f=f)
+
+    def test_auxiliary_space_preconditioner(self):
+        preconditioner = Preconditioner("ams", gradient=self.gradient)
+        sim = get_simulation(
+            solver=SolverBiCG,
+            solver_opts={"preconditioner": preconditioner, "tol": 1e-10},
+        )
+
+        f = sim.fields(self.m)
+        np.testing.assert_allclose(sim.dpred(self.m, f=f), self.d, rtol=1e-3)
+        np.testing.assert_allclose(sim.Jvec(self.m, self.v, f=f), self.Jv, rtol=1e-3)
+        # one multigrid setup for every frequency
+        setup = preconditioner._setup
+        self.assertIn("prolongators", setup)
+        sim.fields(self.m)
+        self.assertIs(preconditioner._setup, setup)
+
+        # rebuilt after a model update
+        sim.model = self.m + 0.1
+        self.assertIsNone(preconditioner._setup)
+        sim.fields()
+        self.assertIsNot(preconditioner._setup, setup)
+
+
+if __name__ == "__main__":
+    unittest.main()
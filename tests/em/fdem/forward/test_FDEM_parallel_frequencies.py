@@ -0,0 +1,73 @@
+import unittest
+import numpy as np
+import discretize
+from SimPEG import maps
+from SimPEG.electromagnetics import frequency_domain as fdem
+
+
+def get_simulation(**kwargs):
+    cs = 10.0
+    h = [(cs, 4, -1.3), (cs, 4), (cs, 4, 1.3)]
+    mesh = discretize.TensorMesh([h, h, h], "CCC")
+    rx_locations = np.c_[np.linspace(-15.0, 15.0, 4), np.zeros(4), np.ones(4) * 5.0]
+    source_list = [
+        fdem.Src.MagDipole(
+            [
+                fdem.Rx.PointMagneticFluxDensitySecondary(rx_locations, "z", "real"),
+                fdem.Rx.PointMagneticFluxDensitySecondary(rx_locations, "z", "imag"),
+            ],
+            frequency=freq,
+            location=np.r_[0.0, 0.0, 15.0],
+        )
+        for freq in [10.0, 100.0, 1000.0]
+    ]
+    return fdem.Simulation3DElectricField(
+        mesh,
+        survey=fdem.Survey(source_list),
+        sigmaMap=maps.ExpMap(mesh),
+        **kwargs
+    )
+
+
+class FDEMParallelFrequencyTest(unittest.TestCase):
+    def setUp(self):
+        np.random.seed(0)
+        self.serial = get_simulation()
+        self.m = np.log(1e-2) + 0.1 * np.random.randn(self.serial.mesh.nC)
+        self.v = np.random.rand(self.serial.mesh.nC)
+        self.w = np.random.rand(self.serial.survey.nD)
+
+    def check_simulation(self, sim):
+        f = sim.fields(self.m)
+        f_serial = self.serial.fields(self.m)
+
+        np.testing.assert_allclose(
+            sim.dpred(self.m, f=f), self.serial.dpred(self.m, f=f_serial)
+        )
+        np.testing.assert_allclose(
+            sim.Jvec(self.m, self.v, f=f), self.serial.Jvec(self.m, self.v, f=f_serial)
+        )
+        np.testing.assert_allclose(
+            sim.Jtvec(self.m, self.w, f=f),
+            self.serial.Jtvec(self.m, self.w, f=f_serial),
+        )
+
+    def test_threads(self):
+        self.check_simulation(get_simulation(n_cpu=3))
+
+    def test_max_factors(self):
+        sim = get_simulation(n_cpu=2, max_factors=1)
+        sim.fields(self.m)
+        self.assertEqual(sum(Ainv is not None for Ainv in sim.Ainv), 1)
+        self.check_simulation(sim)
+
+    def test_forward_only(self):
+        d = self.serial.dpred(self.m)
+        for n_cpu in [1, 2]:
+            sim = get_simulation(n_cpu=n_cpu, forward_only=True)
+            np.testing.assert_allclose(sim.dpred(self.m), d)
+            self.assertTrue(all(Ainv is None for Ainv in getattr(sim, "Ainv", [])))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -107,5 +107,96 @@ class DC1DSimulation(unittest.TestCase):
         self.assertTrue(passed)
 
 
+class DC1DStitchedSimulation(unittest.TestCase):
+    def setUp(self):
+        n_sounding = 3
+        n_layer = 4
+        ab = np.logspace(1, 3, 11)
+
+        def get_source_list(x):
+            return [
+                dc.sources.Dipole(
+                    [dc.receivers.Dipole(np.r_[x - 5, 0, 0], np.r_[x + 5, 0, 0])],
+                    np.r_[x + a, 0, 0],
+                    np.r_[x - a, 0, 0],
+                )
+                for a in ab
+            ]
+
+        self.soundings = [get_source_list(x) for x in [0.0, 500.0, 1000.0]]
+        survey = dc.survey.Survey(sum(self.soundings, []))
+
+        self.rho = np.exp(np.random.randn(n_sounding, n_layer) + 3)
+        self.thicknesses = np.r_[5.0, 10.0, 20.0]
+        self.wires = maps.Wires(
+            ("rho", n_sounding * n_layer), ("thicknesses", n_layer - 1)
+        )
+        self.p = dc.simulation_1d.Simulation1DLayers(
+            survey=survey,
+            rhoMap=maps.ExpMap(nP=n_sounding * n_layer) * self.wires.rho,
+            thicknessesMap=self.wires.thicknesses,
+            sounding_index=np.repeat(np.arange(n_sounding), len(ab)),
+            data_type="apparent_resistivity",
+        )
+        self.m0 = np.r_[np.log(self.rho).ravel(), self.thicknesses]
+
+    def test_soundings(self):
+        d = self.p.dpred(self.m0)
+        J = self.p.getJ(self.m0)
+        for ii, source_list in enumerate(self.soundings):
+            sim = dc.simulation_1d.Simulation1DLayers(
+                survey=dc.survey.Survey(source_list),
+                rhoMap=maps.ExpMap(nP=4),
+                thicknesses=self.thicknesses,
+                data_type="apparent_resistivity",
+            )
+            m = np.log(self.rho[ii])
+            inds = slice(ii * len(source_list), (ii + 1) * len(source_list))
+            np.testing.assert_allclose(d[inds], sim.dpred(m))
+            np.testing.assert_allclose(
+                J[inds, 4 * ii : 4 * (ii + 1)].toarray(), sim.getJ(m)
+            )
+
+    def test_kernel_rows(self):
+        # the kernel of a few rows at a time
+        sim = dc.simulation_1d.Simulation1DLayers(
+            survey=self.p.survey,
+            rhoMap=self.p.rhoMap,
+            thicknessesMap=self.p.thicknessesMap,
+            sounding_index=self.p.sounding_index,
+            data_type="apparent_resistivity",
+            max_kernel_rows=7,
+        )
+        np.testing.assert_allclose(sim.dpred(self.m0), self.p.dpred(self.m0))
+        np.testing.assert_allclose(
+            sim.getJ(self.m0).toarray(), self.p.getJ(self.m0).toarray()
+        )
+
+    def test_lagged_convolution(self):
+        with self.assertRaises(NotImplementedError):
+            dc.simulation_1d.Simulation1DLayers(
+                survey=self.p.survey,
+                rhoMap=self.p.rhoMap,
+                thicknesses=self.thicknesses,
+                hankel_pts_per_dec=-1,
+            )
+
+    def test_misfit(self):
+        passed = tests.checkDerivative(
+            lambda m: [self.p.dpred(m), lambda mx: self.p.Jvec(self.m0, mx)],
+            self.m0,
+            plotIt=False,
+            num=3,
+        )
+        self.assertTrue(passed)
+
+    def test_adjoint(self):
+        v = np.random.rand(len(self.m0))
+        w = np.random.rand(self.p.survey.nD)
+        wtJv = w.dot(self.p.Jvec(self.m0, v))
+        vtJtw = v.dot(self.p.Jtvec(self.m0, w))
+        self.assertLess(np.abs(wtJv - vtJtw), 1e-10 * np.abs(vtJtw))
+
+
 if __name__ == "__main__":
     unittest.main()
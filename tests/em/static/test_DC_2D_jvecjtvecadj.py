@@ -13,6 +13,7 @@ from SimPEG import (
     inverse_problem,
 )
 from SimPEG.electromagnetics import resistivity as dc
+from SimPEG.electromagnetics.static.resistivity.utils import _electrode_coefficients
 
 try:
     from pymatsolver import Pardiso as Solver
@@ -143,5 +144,123 @@ class DCProblemTestsN_Robin_storeJ(DCProblem_2DTests):
     bc_type = "Robin"
 
 
+class DCProblem_2DParallelKyTests(unittest.TestCase):
+    def setUp(self):
+        cs = 12.5
+        hx = [(cs, 2, -1.3), (cs, 41), (cs, 2, 1.3)]
+        hy = [(cs, 2, -1.3), (cs, 15)]
+        self.mesh = discretize.TensorMesh([hx, hy], x0="CN")
+        x = np.linspace(-135, 250.0, 10)
+        M = utils.ndgrid(x - 12.5, np.r_[0.0])
+        N = utils.ndgrid(x + 12.5, np.r_[0.0])
+        rx = dc.receivers.Dipole(M, N)
+        self.survey = dc.survey.Survey(
+            [
+                dc.sources.Pole([rx], np.r_[-150, 0.0]),
+                dc.sources.Pole([rx], np.r_[-130, 0.0]),
+            ]
+        )
+        self.m = 1.0 + 0.1 * np.random.rand(self.mesh.nC)
+        self.v = np.random.rand(self.mesh.nC)
+        self.w = np.random.rand(self.survey.nD)
+
+    def get_simulation(self, **kwargs):
+        return dc.Simulation2DNodal(
+            self.mesh,
+            rhoMap=maps.IdentityMap(self.mesh),
+            solver=Solver,
+            survey=self.survey,
+            **kwargs
+        )
+
+    def test_parallel_kys(self):
+        serial = self.get_simulation()
+        d = serial.dpred(self.m)
+        Jv = serial.Jvec(self.m, self.v)
+        Jtw = serial.Jtvec(self.m, self.w)
+
+        for kwargs in [
+            dict(n_cpu=3),
+            dict(n_cpu=2, max_factors=4),
+            dict(n_cpu=2, max_factors=0, storeJ=True),
+        ]:
+            sim = self.get_simulation(**kwargs)
+            np.testing.assert_allclose(sim.dpred(self.m), d)
+            np.testing.assert_allclose(sim.Jvec(self.m, self.v), Jv)
+            np.testing.assert_allclose(sim.Jtvec(self.m, self.w), Jtw)
+
+    def test_ky_tolerance(self):
+        serial = self.get_simulation()
+        Jv = serial.Jvec(self.m, self.v)
+
+        sim = self.get_simulation(ky_tolerance=1e-2)
+        f = sim.fields(self.m)
+        self.assertLess(f._active_kys.sum(), sim.nky)
+        error = np.linalg.norm(sim.Jvec(self.m, self.v, f=f) - Jv)
+        self.assertLess(error, 5e-2 * np.linalg.norm(Jv))
+
+        # fields computed elsewhere use all of their wavenumbers
+        f_all = serial.fields(self.m)
+        np.testing.assert_allclose(sim.Jvec(self.m, self.v, f=f_all), Jv)
+
+        # the data drop the same wavenumbers, so J is their derivative
+        d = serial.dpred(self.m)
+        error = np.linalg.norm(sim.dpred(self.m, f=f) - d)
+        self.assertLess(error, 5e-2 * np.linalg.norm(d))
+        passed = tests.checkDerivative(
+            lambda m: [sim.dpred(m), lambda v: sim.Jvec(m, v)],
+            self.m,
+            num=3,
+            plotIt=False,
+        )
+        self.assertTrue(passed)
+
+    def test_reciprocity(self):
+        # mixed potential receivers, stored J from the unique electrodes
+        x = np.linspace(-135, 250.0, 10)
+        M = utils.ndgrid(x - 12.5, np.r_[0.0])
+        N = utils.ndgrid(x + 12.5, np.r_[0.0])
+        self.survey = dc.survey.Survey(
+            [
+                dc.sources.Dipole(
+                    [
+                        dc.receivers.Dipole(M, N, data_type="apparent_resistivity"),
+                        dc.receivers.Pole(M[::2]),
+                    ],
+                    np.r_[-160, 0.0],
+                    np.r_[-150, 0.0],
+                ),
+                dc.sources.Pole([dc.receivers.Dipole(M[3:], N[3:])], np.r_[-130, 0.0]),
+            ]
+        )
+        self.survey.set_geometric_factor()
+        w = np.random.rand(self.survey.nD)
+
+        serial = self.get_simulation()
+        Jv = serial.Jvec(self.m, self.v)
+        Jtw = serial.Jtvec(self.m, w)
+        # all the electrodes at once, then a few at a time
+        for max_electrodes in [100, 1, 7]:
+            sim = self.get_simulation(storeJ=True, max_electrodes=max_electrodes)
+            np.testing.assert_allclose(sim.Jvec(self.m, self.v), Jv)
+            np.testing.assert_allclose(sim.Jtvec(self.m, w), Jtw)
+
+        # one adjoint solve per unique electrode and wavenumber
+        n_columns = []
+
+        class CountingSolver(Solver):
+            def __mul__(self, b):
+                n_columns.append(1 if b.ndim == 1 else b.shape[1])
+                return super(CountingSolver, self).__mul__(b)
+
+        sim = self.get_simulation(storeJ=True, max_electrodes=7)
+        sim.solver = CountingSolver
+        f = sim.fields(self.m)
+        del n_columns[:]
+        sim.getJ(self.m, f=f)
+        electrodes, _ = _electrode_coefficients(self.survey)
+        self.assertEqual(sum(n_columns), sim.nky * electrodes.shape[0])
+
+
 if __name__ == "__main__":
     unittest.main()
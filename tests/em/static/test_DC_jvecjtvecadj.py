@@ -14,6 +14,7 @@ from SimPEG import (
 )
 from SimPEG.utils import mkvc
 from SimPEG.electromagnetics import resistivity as dc
+from SimPEG.electromagnetics.static.resistivity.utils import _electrode_coefficients
 from pymatsolver import Pardiso
 import shutil
 
@@ -549,5 +550,103 @@ class DCProblemTestsN_storeJ_Robin(unittest.TestCase):
             pass
 
 
+class DCProblemTestsReciprocity(unittest.TestCase):
+    def setUp(self):
+        cs = 10.0
+        h = [(cs, 3, -1.3), (cs, 8), (cs, 3, 1.3)]
+        self.mesh = discretize.TensorMesh([h, h, [(cs, 3, -1.3), (cs, 6)]], "CCN")
+        x = np.linspace(-35.0, 35.0, 8)
+        M = np.c_[x[:-1], np.zeros(7), np.zeros(7)]
+        N = np.c_[x[1:], np.zeros(7), np.zeros(7)]
+        self.source_list = [
+            dc.sources.Dipole(
+                [
+                    dc.receivers.Dipole(M[2:], N[2:], data_type="apparent_resistivity"),
+                    dc.receivers.Pole(N),
+                ],
+                np.r_[-45.0, 0.0, 0.0],
+                np.r_[-40.0, 0.0, 0.0],
+            ),
+            dc.sources.Pole([dc.receivers.Dipole(M, N)], np.r_[45.0, 0.0, 0.0]),
+        ]
+        self.m = 1.0 + 0.1 * np.random.rand(self.mesh.nC)
+        self.v = np.random.rand(self.mesh.nC)
+
+    def check_reciprocity(self, formulation):
+        survey = dc.survey.Survey(self.source_list)
+        survey.set_geometric_factor(space_type="whole-space")
+        w = np.random.rand(survey.nD)
+
+        simulations = [
+            getattr(dc.simulation, formulation)(
+                self.mesh,
+                survey=survey,
+                rhoMap=maps.IdentityMap(self.mesh),
+                solver=Pardiso,
+                storeJ=storeJ,
+                max_electrodes=max_electrodes,
+            )
+            # all the electrodes at once, then a few at a time
+            for storeJ, max_electrodes in [(False, 100), (True, 100), (True, 3)]
+        ]
+        Jv = simulations[0].Jvec(self.m, self.v)
+        Jtw = simulations[0].Jtvec(self.m, w)
+        for sim in simulations[1:]:
+            np.testing.assert_allclose(sim.Jvec(self.m, self.v), Jv)
+            np.testing.assert_allclose(sim.Jtvec(self.m, w), Jtw)
+
+    def test_cell_centered(self):
+        self.check_reciprocity("Simulation3DCellCentered")
+
+    def test_jtj_diag(self):
+        survey = dc.survey.Survey(self.source_list)
+        survey.set_geometric_factor(space_type="whole-space")
+        W = utils.sdiag(np.random.rand(survey.nD))
+        J = None
+        for storeJ in [True, False]:
+            simulation = dc.simulation.Simulation3DNodal(
+                self.mesh,
+                survey=survey,
+                rhoMap=maps.IdentityMap(self.mesh),
+                solver=Pardiso,
+                storeJ=storeJ,
+            )
+            if J is None:
+                J = simulation.getJ(self.m)
+            np.testing.assert_allclose(
+                simulation.getJtJdiag(self.m, W=W), np.sum((W * J) ** 2, axis=0)
+            )
+
+    def test_nodal(self):
+        self.check_reciprocity("Simulation3DNodal")
+
+    def test_adjoint_solves(self):
+        n_columns = []
+
+        class CountingSolver(Pardiso):
+            def __mul__(self, b):
+                n_columns.append(1 if b.ndim == 1 else b.shape[1])
+                return super(CountingSolver, self).__mul__(b)
+
+        survey = dc.survey.Survey(self.source_list)
+        survey.set_geometric_factor(space_type="whole-space")
+        simulation = dc.simulation.Simulation3DNodal(
+            self.mesh,
+            survey=survey,
+            rhoMap=maps.IdentityMap(self.mesh),
+            solver=CountingSolver,
+            storeJ=True,
+            max_electrodes=3,
+        )
+        f = simulation.fields(self.m)
+        del n_columns[:]
+        simulation.getJ(self.m, f=f)
+
+        # one adjoint solve per unique electrode, although the sources share
+        # electrodes across the chunks
+        electrodes, _ = _electrode_coefficients(survey)
+        self.assertEqual(sum(n_columns), electrodes.shape[0])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -320,5 +320,39 @@ class SIPProblemTestsN_air(unittest.TestCase):
         self.assertTrue(passed)
 
 
+class SIPJtJdiagTests(unittest.TestCase):
+    def test_jtj_diag(self):
+        cs = 25.0
+        hx = [(cs, 2, -1.3), (cs, 8), (cs, 2, 1.3)]
+        hy = [(cs, 2, -1.3), (cs, 6), (cs, 2, 1.3)]
+        hz = [(cs, 2, -1.3), (cs, 5)]
+        mesh = discretize.TensorMesh([hx, hy, hz], x0="CCN")
+        x = np.linspace(-75.0, 75.0, 5)
+        M = utils.ndgrid(x - 25.0, np.r_[0.0], np.r_[0.0])
+        N = utils.ndgrid(x + 25.0, np.r_[0.0], np.r_[0.0])
+        rx = sip.receivers.Dipole(M, N, np.r_[1e-3, 3e-3, 1e-2])
+        src = sip.sources.Dipole([rx], np.r_[-150.0, 0.0, 0.0], np.r_[150.0, 0.0, 0.0])
+        wires = maps.Wires(("eta", mesh.nC), ("taui", mesh.nC))
+        problem = sip.Simulation3DNodal(
+            mesh,
+            survey=sip.Survey([src]),
+            rho=100.0 * np.ones(mesh.nC),
+            etaMap=wires.eta,
+            tauiMap=wires.taui,
+            storeJ=True,
+            solver=Solver,
+        )
+        m = np.r_[0.1 * np.random.rand(mesh.nC), 10.0 + np.random.rand(mesh.nC)]
+        problem.model = m
+        problem.fields(m)
+
+        # explicit sensitivities, one column at a time
+        J = np.column_stack([problem.Jvec(m, e) for e in np.eye(m.size)])
+        W = utils.sdiag(np.random.rand(J.shape[0]))
+        np.testing.assert_allclose(
+            problem.getJtJdiag(m, W=W), np.sum((W * J) ** 2, axis=0)
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import numpy as np
+import discretize
+from SimPEG import maps
+from SimPEG.electromagnetics import time_domain as tdem
+from SimPEG.utils.solver_utils import SolverLU
+
+
+def get_sources(formulation):
+    def receivers():
+        return [
+            tdem.Rx.PointMagneticFluxTimeDerivative(
+                np.r_[5.0, 5.0, 0.0], np.logspace(-5, -4, 3), "z"
+            )
+        ]
+
+    sources = [
+        tdem.Src.MagDipole(receivers(), location=np.r_[0.0, 0.0, 10.0]),
+        tdem.Src.MagDipole(
+            receivers(), location=np.r_[10.0, -10.0, 10.0], orientation="x"
+        ),
+    ]
+    # grounded, with initial DC fields for the electric field and an
+    # electric source term for the magnetic flux density
+    waveforms = {
+        "ElectricField": tdem.Src.StepOffWaveform(),
+        "MagneticFluxDensity": tdem.Src.TriangularWaveform(
+            peakTime=2e-5, offTime=4e-5
+        ),
+    }
+    if formulation in waveforms:
+        sources.append(
+            tdem.Src.LineCurrent(
+                receivers(),
+                location=np.array([[-20.0, 0.0, 0.0], [20.0, 0.0, 0.0]]),
+                waveform=waveforms[formulation],
+            )
+        )
+    return sources
+
+
+def get_simulation(formulation, sources):
+    mesh = discretize.TensorMesh([[(10.0, 6)], [(10.0, 6)], [(10.0, 6)]], "CCC")
+    sim = getattr(tdem, "Simulation3D{}".format(formulation))(
+        mesh,
+        survey=tdem.Survey(sources),
+        sigmaMap=maps.ExpMap(mesh),
+        solver=SolverLU,
+    )
+    sim.time_steps = [(1e-5, 4), (5e-5, 2)]
+    return sim
+
+
+class TDEMBatchedAdjointTest(unittest.TestCase):
+    def check_sources(self, formulation):
+        rng = np.random.RandomState(0)
+        sim = get_simulation(formulation, get_sources(formulation))
+        m = np.log(1e-2) + 0.1 * rng.rand(sim.mesh.nC)
+        v = rng.rand(sim.survey.nD)
+        Jtv = sim.Jtvec(m, v)
+
+        # the sum of the products of each source on its own
+        Jtv_sources = 0
+        start = 0
+        for i_src in range(sim.survey.nSrc):
+            sim_src = get_simulation(formulation, [get_sources(formulation)[i_src]])
+            end = start + sim_src.survey.nD
+            Jtv_sources = Jtv_sources + sim_src.Jtvec(m, v[start:end])
+            start = end
+        np.testing.assert_allclose(Jtv, Jtv_sources, rtol=1e-8, atol=0)
+
+    def test_magnetic_flux_density(self):
+        self.check_sources("MagneticFluxDensity")
+
+    def test_electric_field(self):
+        self.check_sources("ElectricField")
+
+    def test_magnetic_field(self):
+        self.check_sources("MagneticField")
+
+    def test_current_density(self):
+        self.check_sources("CurrentDensity")
+
+
+if __name__ == "__main__":
+    unittest.main()
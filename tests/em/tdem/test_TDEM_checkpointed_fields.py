@@ -0,0 +1,101 @@
+import unittest
+import numpy as np
+import discretize
+from SimPEG import maps
+from SimPEG.electromagnetics import time_domain as tdem
+from SimPEG.electromagnetics.time_domain.fields import CheckpointedSolution
+
+
+def get_simulation(formulation, **kwargs):
+    mesh = discretize.TensorMesh([[(10.0, 6)], [(10.0, 6)], [(10.0, 6)]], "CCC")
+    times = np.logspace(-4.5, -3.5, 4)
+    survey = tdem.Survey(
+        [
+            tdem.Src.MagDipole(
+                [
+                    tdem.Rx.PointMagneticFluxTimeDerivative(
+                        np.r_[[[5.0, 5.0, 5.0], [-5.0, 5.0, 5.0]]], times, "z"
+                    ),
+                    tdem.Rx.PointElectricField(np.r_[5.0, -5.0, 5.0], times, "x"),
+                ],
+                location=np.r_[0.0, 0.0, z],
+            )
+            for z in [12.0, 17.0]
+        ]
+    )
+    sim = getattr(tdem, "Simulation3D{}".format(formulation))(
+        mesh, survey=survey, sigmaMap=maps.ExpMap(mesh), **kwargs
+    )
+    sim.time_steps = [(1e-5, 10), (5e-5, 6), (1e-4, 4)]
+    return sim
+
+
+class TDEMCheckpointedFieldsTest(unittest.TestCase):
+    def check_checkpoints(self, formulation):
+        sim = get_simulation(formulation)
+        n = sim.mesh.nE if formulation == "ElectricField" else sim.mesh.nF
+        step_size = 8.0 * n * sim.survey.nSrc / 1024 ** 3
+
+        # room for 12 of the 21 time steps
+        checkpointed = get_simulation(formulation, max_fields_memory=12 * step_size)
+
+        np.random.seed(0)
+        m = np.log(1e-2) + 0.1 * np.random.randn(sim.mesh.nC)
+        v = np.random.rand(sim.mesh.nC)
+        w = np.random.rand(sim.survey.nD)
+
+        f = sim.fields(m)
+        f_checkpointed = checkpointed.fields(m)
+        solution = f_checkpointed._fields[sim._fieldType + "Solution"]
+        self.assertIsInstance(solution, CheckpointedSolution)
+        self.assertLess(len(solution._stored), sim.nT + 1)
+
+        np.testing.assert_allclose(
+            checkpointed.dpred(m, f=f_checkpointed), sim.dpred(m, f=f)
+        )
+        np.testing.assert_allclose(
+            checkpointed.Jvec(m, v, f=f_checkpointed), sim.Jvec(m, v, f=f)
+        )
+        np.testing.assert_allclose(
+            checkpointed.Jtvec(m, w, f=f_checkpointed), sim.Jtvec(m, w, f=f)
+        )
+
+        # the solution held at once: the checkpoints and one segment
+        stored = len(solution._stored) + solution._segment.shape[2]
+        self.assertLessEqual(stored, 12)
+
+    def test_magnetic_flux_density(self):
+        self.check_checkpoints("MagneticFluxDensity")
+
+    def test_electric_field(self):
+        self.check_checkpoints("ElectricField")
+
+    def test_forward_only(self):
+        for formulation in ["MagneticFluxDensity", "ElectricField"]:
+            sim = get_simulation(formulation)
+            streamed = get_simulation(formulation, forward_only=True)
+            m = np.log(1e-2) * np.ones(sim.mesh.nC)
+            np.testing.assert_allclose(streamed.dpred(m), sim.dpred(m))
+
+    def test_model_changed(self):
+        sim = get_simulation("MagneticFluxDensity", max_fields_memory=2e-4)
+        m = np.log(1e-2) * np.ones(sim.mesh.nC)
+        f = sim.fields(m)
+        solution = f._fields["bSolution"]
+        self.assertIsNotNone(sim._checkpoints())
+
+        # the checkpoints are still available, not the steps in between
+        sim.model = m + 1.0
+        step = solution.checkpoints[1]
+        solution[:, :, step]
+        with self.assertRaises(ValueError):
+            solution[:, :, step + 1]
+
+    def test_no_checkpoints(self):
+        # every time step fits in the budget
+        sim = get_simulation("MagneticFluxDensity", max_fields_memory=1.0)
+        self.assertIsNone(sim._checkpoints())
+
+
+if __name__ == "__main__":
+    unittest.main()
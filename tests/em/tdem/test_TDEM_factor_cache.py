@@ -0,0 +1,75 @@
+import unittest
+import numpy as np
+import discretize
+from SimPEG import maps
+from SimPEG.electromagnetics import time_domain as tdem
+from SimPEG.utils.solver_utils import SolverLU
+
+
+class CountingSolver(SolverLU):
+    n_factors = 0
+
+    def __init__(self, A, **kwargs):
+        CountingSolver.n_factors += 1
+        super().__init__(A, **kwargs)
+
+
+def get_simulation(formulation):
+    mesh = discretize.TensorMesh([[(10.0, 6)], [(10.0, 6)], [(10.0, 6)]], "CCC")
+    survey = tdem.Survey(
+        [
+            tdem.Src.MagDipole(
+                [
+                    tdem.Rx.PointMagneticFluxTimeDerivative(
+                        np.r_[5.0, 5.0, 5.0], [1e-4], "z"
+                    )
+                ],
+                location=np.r_[0.0, 0.0, 10.0],
+            )
+        ]
+    )
+    sim = getattr(tdem, "Simulation3D{}".format(formulation))(
+        mesh, survey=survey, sigmaMap=maps.ExpMap(mesh), solver=CountingSolver
+    )
+    sim.time_steps = [(1e-5, 4), (5e-5, 2), (1e-5, 2)]
+    return sim
+
+
+class TDEMFactorCacheTest(unittest.TestCase):
+    def check_factors(self, formulation, n_adjoint):
+        sim = get_simulation(formulation)
+        m = np.log(1e-2) * np.ones(sim.mesh.nC)
+        v = np.random.rand(sim.survey.nD)
+
+        CountingSolver.n_factors = 0
+        f = sim.fields(m)
+        # one factorization per distinct time step length
+        self.assertEqual(CountingSolver.n_factors, 2)
+
+        sim.Jvec(m, np.random.rand(sim.mesh.nC), f=f)
+        sim.Jtvec(m, v, f=f)
+        self.assertEqual(CountingSolver.n_factors, 2 + n_adjoint)
+
+        # new factors once the model changes
+        sim.fields(m + 1.0)
+        self.assertEqual(CountingSolver.n_factors, 4 + n_adjoint)
+
+    def test_symmetric(self):
+        self.check_factors("ElectricField", 0)
+        self.check_factors("MagneticFluxDensity", 0)
+
+    def test_cached_matches_refactored(self):
+        sim = get_simulation("ElectricField")
+        m = np.log(1e-2) * np.ones(sim.mesh.nC)
+        v = np.random.rand(sim.survey.nD)
+        d = sim.dpred(m)
+        Jtv = sim.Jtvec(m, v)
+
+        # drop the factors, the same products are recovered
+        sim._Adiag_factors.clean()
+        np.testing.assert_allclose(sim.dpred(m), d)
+        np.testing.assert_allclose(sim.Jtvec(m, v), Jtv)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+import numpy as np
+import discretize
+from SimPEG import maps
+from SimPEG.electromagnetics import time_domain as tdem
+
+
+def get_simulation(formulation, survey=None):
+    mesh = discretize.TensorMesh([[(10.0, 6)], [(10.0, 6)], [(10.0, 6)]], "CCC")
+    rx_locations = np.r_[[[5.0, 5.0, 5.0], [-5.0, 5.0, 5.0]]]
+    # every source shares the same receiver geometry, as in an airborne survey
+    survey = survey or tdem.Survey(
+        [
+            tdem.Src.MagDipole(
+                [
+                    tdem.Rx.PointMagneticFluxTimeDerivative(
+                        rx_locations, np.logspace(-4.5, -3.5, 4), "z"
+                    ),
+                    tdem.Rx.PointMagneticFluxTimeDerivative(
+                        rx_locations, np.logspace(-4, -3.5, 3), "x"
+                    ),
+                    tdem.Rx.PointElectricField(np.r_[5.0, -5.0, 5.0], [2e-4], "y"),
+                ],
+                location=np.r_[x, 0.0, 17.0],
+            )
+            for x in [-10.0, 0.0, 10.0]
+        ]
+    )
+    sim = getattr(tdem, "Simulation3D{}".format(formulation))(
+        mesh, survey=survey, sigmaMap=maps.ExpMap(mesh)
+    )
+    sim.time_steps = [(1e-5, 10), (5e-5, 6), (1e-4, 4)]
+    return sim
+
+
+class TDEMReceiverProjectionsTest(unittest.TestCase):
+    def check_projections(self, formulation):
+        sim = get_simulation(formulation)
+        np.random.seed(0)
+        m = np.log(1e-2) + 0.1 * np.random.randn(sim.mesh.nC)
+        f = sim.fields(m)
+
+        projections = sim.survey.get_receiver_projections(
+            sim.mesh, sim.time_mesh, f
+        )
+        # the shared locations are only projected once, for each component
+        self.assertEqual(projections.Ps["dbdt"].shape[0], 4)
+        self.assertEqual(projections.Ps["e"].shape[0], 1)
+        self.assertIs(
+            sim.survey.get_receiver_projections(sim.mesh, sim.time_mesh, f),
+            projections,
+        )
+        self.check_data(sim, m, f)
+
+    def check_data(self, sim, m, f):
+        # same data as projecting each receiver
+        d = np.hstack(
+            [
+                rx.eval(src, sim.mesh, sim.time_mesh, f)
+                for src in sim.survey.source_list
+                for rx in src.receiver_list
+            ]
+        )
+        np.testing.assert_allclose(sim.dpred(m, f=f), d)
+
+        # adjoint
+        v = np.random.rand(sim.mesh.nC)
+        w = np.random.rand(sim.survey.nD)
+        wJv = w.dot(sim.Jvec(m, v, f=f))
+        vJtw = v.dot(sim.Jtvec(m, w, f=f))
+        self.assertLess(np.abs(wJv - vJtw), 1e-10 * np.abs(vJtw))
+
+    def test_separate_locations(self):
+        # every source has its own receiver, the sources only gather theirs
+        survey = tdem.Survey(
+            [
+                tdem.Src.MagDipole(
+                    [
+                        tdem.Rx.PointMagneticFluxTimeDerivative(
+                            np.r_[x, 5.0, 5.0], np.logspace(-4.5, -3.5, 4), "z"
+                        )
+                    ],
+                    location=np.r_[x, 0.0, 17.0],
+                )
+                for x in np.linspace(-20.0, 20.0, 8)
+            ]
+        )
+        sim = get_simulation("MagneticFluxDensity", survey=survey)
+        np.random.seed(0)
+        m = np.log(1e-2) + 0.1 * np.random.randn(sim.mesh.nC)
+        f = sim.fields(m)
+
+        projections = survey.get_receiver_projections(sim.mesh, sim.time_mesh, f)
+        # one row of Ps per source, each only gathered from its own fields
+        self.assertEqual(projections.Ps["dbdt"].shape[0], survey.nSrc)
+        row, _, isrc, _ = projections.gather["dbdt"]
+        self.assertEqual(len(row), projections.Ps["dbdt"].nnz)
+        np.testing.assert_array_equal(isrc, row)
+        self.check_data(sim, m, f)
+
+    def test_magnetic_flux_density(self):
+        self.check_projections("MagneticFluxDensity")
+
+    def test_electric_field(self):
+        self.check_projections("ElectricField")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,6 +2,10 @@ import unittest
 import numpy as np
 import discretize
 from SimPEG.electromagnetics import viscous_remanent_magnetization as vrm
+from SimPEG.electromagnetics.viscous_remanent_magnetization.simulation import (
+    _GeometryCache,
+    _receiver_key,
+)
 
 
 class VRM_fwd_tests(unittest.TestCase):
@@ -529,6 +533,93 @@ class VRM_fwd_tests(unittest.TestCase):
 
         self.assertTrue(Test)
 
+    def test_shared_receivers_parallel(self):
+        """
+        Test ensures the A matrix is the same when the geometry is shared by
+        the sources, computed in blocks and for several sources at once.
+        """
+
+        np.random.seed(self.seed)
+
+        h = [(1.0, 4)]
+        meshObj = discretize.TensorMesh((h, h, h), x0="CCN")
+
+        times = np.array([1e-3])
+        waveObj = vrm.waveforms.SquarePulse(delt=0.02)
+        loc_rx = np.c_[np.random.uniform(-2, 2, (4, 2)), 0.5 * np.ones(4)]
+
+        def get_receiver_list():
+            return [
+                vrm.receivers.Point(
+                    loc_rx, times=times, fieldType="dhdt", orientation="z"
+                ),
+                vrm.receivers.SquareLoop(
+                    loc_rx,
+                    times=times,
+                    width=0.5,
+                    nTurns=2,
+                    fieldType="dhdt",
+                    orientation="x",
+                ),
+            ]
+
+        receiver_list = get_receiver_list()
+        locs_tx = [np.r_[0.3, -0.2, 0.6], np.r_[-1.0, 1.0, 1.0]]
+
+        A = []
+        for pp, loc_tx in enumerate(locs_tx):
+            survey = vrm.Survey(
+                [vrm.sources.MagDipole(get_receiver_list(), loc_tx, [0, 0, 1], waveObj)]
+            )
+            Problem = vrm.Simulation3DLinear(
+                meshObj, survey=survey, refinement_factor=2, n_cpu=1
+            )
+            A.append(Problem.A)
+
+        survey = vrm.Survey(
+            [
+                vrm.sources.MagDipole(receiver_list, loc_tx, [0, 0, 1], waveObj)
+                for loc_tx in locs_tx
+            ]
+        )
+        Problem = vrm.Simulation3DLinear(
+            meshObj, survey=survey, refinement_factor=2, n_cpu=2, max_block_size=1e-3
+        )
+
+        np.testing.assert_allclose(Problem.A, np.vstack(A), rtol=1e-10)
+
+    def test_geometry_cache(self):
+        """
+        Test ensures only the geometry of the receivers shared by the sources
+        is kept, until the last source using it.
+        """
+
+        waveObj = vrm.waveforms.SquarePulse(delt=0.02)
+        times = np.array([1e-3])
+        shared = vrm.receivers.Point(
+            np.c_[0.0, 0.0, 0.5], times=times, fieldType="dhdt", orientation="z"
+        )
+        single = vrm.receivers.Point(
+            np.c_[1.0, 0.0, 0.5], times=times, fieldType="dhdt", orientation="z"
+        )
+        source_list = [
+            vrm.sources.MagDipole(receiver_list, np.r_[x, 0.0, 1.0], [0, 0, 1], waveObj)
+            for x, receiver_list in [(0.0, [shared, single]), (1.0, [shared])]
+        ]
+        geometry = _GeometryCache(source_list)
+
+        calls = []
+        for srcObj in source_list:
+            for rxObj in srcObj.receiver_list:
+                rows = geometry.get(
+                    _receiver_key(rxObj), lambda: calls.append(rxObj) or np.ones(3)
+                )
+                np.testing.assert_array_equal(rows, np.ones(3))
+            if srcObj is source_list[0]:
+                self.assertEqual(len(geometry), 1)
+        self.assertEqual(len(geometry), 0)
+        self.assertEqual(calls, [shared, single])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -113,6 +113,45 @@ class BaseRichardsTest(unittest.TestCase):
         )
         self.assertTrue(passed, True)
 
+    def _dotest_jacobian_cache(self):
+        n_factors = []
+
+        class CountingSolver(Solver):
+            def __init__(self, A, **kwargs):
+                n_factors.append(A.shape[0])
+                super(CountingSolver, self).__init__(A, **kwargs)
+
+        self.prob.solver = CountingSolver
+        # leave the global random state of the other tests untouched
+        rng = np.random.RandomState(0)
+        v = rng.rand(self.survey.nD)
+        z = rng.rand(len(self.mtrue))
+        Hs = self.prob.fields(self.mtrue)
+
+        # one factorization of Adiag and Adiag.T per time step, for any
+        # number of calls
+        n_root = len(n_factors)
+        Jz = self.prob.Jvec(self.mtrue, z, f=Hs)
+        Jtv = self.prob.Jtvec(self.mtrue, v, f=Hs)
+        for _ in range(2):
+            np.testing.assert_allclose(self.prob.Jvec(self.mtrue, z, f=Hs), Jz)
+            np.testing.assert_allclose(self.prob.Jtvec(self.mtrue, v, f=Hs), Jtv)
+        self.assertEqual(len(n_factors) - n_root, 2 * self.prob.nT)
+
+        # the same without keeping them, the cache is cleared for new fields
+        self.prob.max_jacobian_steps = 0
+        Hs = self.prob.fields(self.mtrue)
+        np.testing.assert_allclose(self.prob.Jvec(self.mtrue, z, f=Hs), Jz)
+        np.testing.assert_allclose(self.prob.Jtvec(self.mtrue, v, f=Hs), Jtv)
+        self.assertEqual(len(self.prob._jacobian_factors), 0)
+
+        # cleared on a model update
+        self.prob.max_jacobian_steps = self.prob.nT
+        self.prob.Jvec(self.mtrue, z, f=Hs)
+        self.assertEqual(len(self.prob._jacobian_factors), self.prob.nT)
+        self.prob.model = 1.1 * self.mtrue
+        self.assertIsNone(self.prob._jacobian_factors)
+
 
 class RichardsTests1D(BaseRichardsTest):
     def get_mesh(self):
@@ -153,6 +192,9 @@ class RichardsTests1D(BaseRichardsTest):
     def test_sensitivity_full(self):
         self._dotest_sensitivity_full()
 
+    def test_jacobian_cache(self):
+        self._dotest_jacobian_cache()
+
 
 class RichardsTests1D_Saturation(RichardsTests1D):
     def setup_maps(self, mesh, k_fun, theta_fun):
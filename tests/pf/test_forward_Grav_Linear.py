@@ -2,9 +2,12 @@ import unittest
 import discretize
 from SimPEG import utils, maps
 from SimPEG.utils.model_builder import getIndicesSphere
-from SimPEG.potential_fields import gravity
+from SimPEG.potential_fields import gravity, get_dist_wgt
+from SimPEG.utils.hmatrix_utils import HierarchicalMatrix
 import numpy as np
+import scipy.sparse as sp
 import shutil
+import json
 
 nx = 5
 ny = 5
@@ -88,6 +91,150 @@ class GravFwdProblemTests(unittest.TestCase):
         self.assertLess(err_y, 0.005)
         self.assertLess(err_z, 0.005)
 
+    def test_parallel_blocks(self):
+
+        # Process pool over blocks of receivers gives the same kernel
+        sim = gravity.Simulation3DIntegral(
+            self.sim.mesh,
+            survey=self.survey,
+            rhoMap=self.sim.rhoMap,
+            actInd=self.sim.actInd,
+            n_cpu=2,
+            parallel_backend="process",
+            max_block_size=0.05,
+        )
+        components = list(self.survey.components.keys())
+        rows = np.vstack(
+            [sim.evaluate_integral(loc, components) for loc in self.locXyz]
+        )
+        np.testing.assert_allclose(sim.G, rows, rtol=1e-10, atol=1e-14)
+
+    def test_disk_resume(self):
+
+        def make_simulation():
+            return gravity.Simulation3DIntegral(
+                self.sim.mesh,
+                survey=self.survey,
+                rhoMap=self.sim.rhoMap,
+                actInd=self.sim.actInd,
+                store_sensitivities="disk",
+                max_block_size=0.05,
+            )
+
+        # Sensitivities are streamed to disk, then read out-of-core
+        G = make_simulation().G
+        self.assertIsInstance(G, np.memmap)
+        kernel = G.copy()
+
+        # Interrupt the calculation after the first block and resume
+        sens_name = self.sim.sensitivity_path + "sensitivity.npy"
+        manifest_name = self.sim.sensitivity_path + "sensitivity.json"
+        with open(manifest_name, "r") as file:
+            manifest = json.load(file)
+        start = manifest["completed"][0][1]
+        manifest["completed"] = manifest["completed"][:1]
+        with open(manifest_name, "w") as file:
+            json.dump(manifest, file)
+        G = np.load(sens_name, mmap_mode="r+")
+        G[start:] = 0.0
+        G.flush()
+        del G
+
+        sim = make_simulation()
+        np.testing.assert_array_equal(sim.G, kernel)
+
+        sim.model = self.model
+        v = np.random.randn(self.survey.nD)
+        np.testing.assert_allclose(
+            sim.Jtvec(self.model, v), kernel.T @ v, rtol=1e-10
+        )
+
+    def test_sensitivity_dtype(self):
+
+        sim = gravity.Simulation3DIntegral(
+            self.sim.mesh,
+            survey=self.survey,
+            rhoMap=self.sim.rhoMap,
+            actInd=self.sim.actInd,
+        )
+        data = sim.dpred(self.model)
+        v = np.random.randn(self.survey.nD)
+        jtvec = sim.Jtvec(self.model, v)
+
+        # Reduced storage precision, with float64 products
+        for dtype, tol in [("float32", 1e-6), ("int16", 1e-4)]:
+            sim = gravity.Simulation3DIntegral(
+                self.sim.mesh,
+                survey=self.survey,
+                rhoMap=self.sim.rhoMap,
+                actInd=self.sim.actInd,
+                sensitivity_dtype=dtype,
+                max_block_size=0.05,
+            )
+            self.assertEqual(sim.G.dtype, dtype)
+            d = sim.dpred(self.model)
+            self.assertEqual(d.dtype, np.float64)
+            self.assertLess(np.linalg.norm(d - data) / np.linalg.norm(data), tol)
+            self.assertLess(
+                np.linalg.norm(sim.Jtvec(self.model, v) - jtvec)
+                / np.linalg.norm(jtvec),
+                tol,
+            )
+
+    def test_compact_sensitivities(self):
+
+        sim = gravity.Simulation3DIntegral(
+            self.sim.mesh,
+            survey=self.survey,
+            rhoMap=self.sim.rhoMap,
+            actInd=self.sim.actInd,
+        )
+        data = sim.dpred(self.model)
+
+        # Drop the contributions of far away cells into a sparse G
+        sim = gravity.Simulation3DIntegral(
+            self.sim.mesh,
+            survey=self.survey,
+            rhoMap=self.sim.rhoMap,
+            actInd=self.sim.actInd,
+            sensitivity_cutoff=12.0,
+            sensitivity_tolerance=1e-3,
+        )
+        self.assertTrue(sp.isspmatrix_csr(sim.G))
+        self.assertLess(sim.G.nnz, np.prod(sim.G.shape))
+
+        error = np.abs(sim.dpred(self.model) - data)
+        bound = sim.sensitivity_error_bound(self.model)
+        self.assertTrue(np.all(error <= bound + 1e-12))
+
+        v = np.random.randn(self.survey.nD)
+        sim.model = self.model
+        np.testing.assert_allclose(sim.Jtvec(self.model, v), sim.G.T @ v)
+
+    def test_hierarchical_sensitivities(self):
+
+        sim = gravity.Simulation3DIntegral(
+            self.sim.mesh,
+            survey=self.survey,
+            rhoMap=self.sim.rhoMap,
+            actInd=self.sim.actInd,
+        )
+        data = sim.dpred(self.model)
+
+        # Far-field blocks of G as low-rank factors
+        sim = gravity.Simulation3DIntegral(
+            self.sim.mesh,
+            survey=self.survey,
+            rhoMap=self.sim.rhoMap,
+            actInd=self.sim.actInd,
+            hierarchical_tolerance=1e-5,
+            hierarchical_leaf_size=16,
+        )
+        self.assertIsInstance(sim.G, HierarchicalMatrix)
+
+        d = sim.dpred(self.model)
+        self.assertLess(np.linalg.norm(d - data) / np.linalg.norm(data), 1e-4)
+
     def tearDown(self):
         # Clean up the working directory
         try:
@@ -186,5 +333,51 @@ class GravityGradientFwdProblemTests(unittest.TestCase):
         self.assertLess(err_zz, 0.005)
 
 
+class DistanceWeightingTests(unittest.TestCase):
+    def setUp(self):
+        np.random.seed(0)
+        self.locations = np.c_[np.random.uniform(-5, 5, (30, 2)), np.ones(30)]
+
+    def reference(self, mesh, actv, R, R0):
+        # Weights summed over every station and inner point, one at a time
+        p = 1 / np.sqrt(3)
+        centers, h = mesh.gridCC[actv], mesh.h_gridded[actv]
+        V = mesh.vol[actv]
+        wr = np.zeros(len(V))
+        for loc in self.locations:
+            temp = 0.0
+            for signs in np.array(np.meshgrid(*[[-1, 1]] * 3)).reshape(3, -1).T:
+                r = np.linalg.norm(centers + signs * p * h - loc, axis=1)
+                temp += (r + R0) ** -R
+            wr += (V * temp / 8.0) ** 2.0
+        wr = np.sqrt(wr) / V
+        return np.sqrt(wr / wr.max())
+
+    def test_blocks(self):
+        mesh = discretize.TensorMesh([[(1.0, 10)], [(1.0, 12)], [(0.5, 8)]], "CCN")
+        actv = mesh.gridCC[:, 2] < -1.0
+
+        wr = get_dist_wgt(mesh, self.locations, actv, 3.0, 0.5, max_block_size=1e-3)
+        np.testing.assert_allclose(wr, self.reference(mesh, actv, 3.0, 0.5))
+
+        # Active cells given as indices, non-integer decay
+        wr = get_dist_wgt(mesh, self.locations, np.where(actv)[0], 1.5, 0.5)
+        np.testing.assert_allclose(wr, self.reference(mesh, actv, 1.5, 0.5))
+
+    def test_tree_mesh_neighbors(self):
+        mesh = discretize.TreeMesh([[(1.0, 16)], [(1.0, 16)], [(1.0, 16)]], "CCN")
+        mesh.insert_cells(np.c_[0.0, 0.0, -1.0], [mesh.max_level])
+        mesh.finalize()
+        actv = mesh.gridCC[:, 2] < 0.0
+
+        wr = get_dist_wgt(mesh, self.locations, actv, 2.0, 0.5)
+        np.testing.assert_allclose(wr, self.reference(mesh, actv, 2.0, 0.5))
+
+        # Sum restricted to the nearest stations of each cell
+        wr_near = get_dist_wgt(mesh, self.locations, actv, 2.0, 0.5, n_neighbors=10)
+        self.assertEqual(wr_near.shape, wr.shape)
+        self.assertGreater(np.corrcoef(wr, wr_near)[0, 1], 0.99)
+
+
 if __name__ == "__main__":
     unittest.main()
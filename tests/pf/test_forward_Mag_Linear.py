@@ -93,6 +93,70 @@ class MagFwdProblemTests(unittest.TestCase):
         self.assertLess(err_z, 0.005)
         self.assertLess(err_t, 0.005)
 
+    def test_parallel_blocks(self):
+
+        # Parallel blocks of receivers must match the per-receiver rows
+        sim = mag.Simulation3DIntegral(
+            self.sim.mesh,
+            survey=self.survey,
+            chiMap=self.sim.chiMap,
+            actInd=self.sim.actInd,
+            n_cpu=2,
+            max_block_size=0.05,
+        )
+        components = list(self.survey.components.keys())
+        rows = np.vstack(
+            [sim.evaluate_integral(loc, components) for loc in self.locXyz]
+        )
+        np.testing.assert_allclose(sim.G, rows, rtol=1e-10, atol=1e-14)
+        np.testing.assert_allclose(
+            sim.dpred(self.model), self.sim.dpred(self.model), rtol=1e-5
+        )
+
+    def test_cell_subsets(self):
+
+        # Columns of a subset of cells, as evaluated for hierarchical blocks
+        cells = np.r_[0, 3, 7, 20]
+        n_cells = self.sim.chiMap.nP
+        components = list(self.survey.components.keys())
+        for model_type, n_model in [("scalar", 1), ("vector", 3)]:
+            sim = mag.Simulation3DIntegral(
+                self.sim.mesh,
+                survey=self.survey,
+                chiMap=maps.IdentityMap(nP=n_model * n_cells),
+                actInd=self.sim.actInd,
+                model_type=model_type,
+            )
+            rows = sim.G[: 3 * len(components)]
+            columns = np.hstack([cells + ii * n_cells for ii in range(n_model)])
+            np.testing.assert_allclose(
+                sim.evaluate_integral(self.locXyz[:3], components, cells=cells),
+                rows[:, columns],
+                rtol=1e-12,
+            )
+
+    def test_hierarchical_amplitude(self):
+
+        # Amplitude data combine the rows of each receiver in getJtJdiag
+        receivers = mag.Point(self.locXyz, components=["bx", "by", "bz"])
+        survey = mag.Survey(
+            mag.SourceField([receivers], parameters=self.survey.source_field.parameters)
+        )
+        W = utils.sdiag(np.random.RandomState(0).rand(survey.nD // 3))
+        diags = []
+        for tolerance in [0.0, 1e-8]:
+            sim = mag.Simulation3DIntegral(
+                self.sim.mesh,
+                survey=survey,
+                chiMap=self.sim.chiMap,
+                actInd=self.sim.actInd,
+                is_amplitude_data=True,
+                hierarchical_tolerance=tolerance,
+                hierarchical_leaf_size=32,
+            )
+            diags.append(sim.getJtJdiag(self.model, W=W))
+        np.testing.assert_allclose(diags[1], diags[0], rtol=1e-5)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,199 @@
+import unittest
+import numpy as np
+import discretize
+from discretize.utils import mesh_builder_xyz, refine_tree_xyz
+from SimPEG import maps, data, objective_function
+from SimPEG.potential_fields import (
+    gravity,
+    magnetics,
+    tile_locations,
+    create_local_mesh,
+    create_tiled_misfit,
+)
+
+
+def get_mesh(locations):
+    mesh = mesh_builder_xyz(
+        locations,
+        [5.0, 5.0, 5.0],
+        depth_core=40.0,
+        padding_distance=[[40.0, 40.0]] * 3,
+        mesh_type="tree",
+    )
+    return refine_tree_xyz(
+        mesh, locations, method="surface", octree_levels=[2, 2], finalize=True
+    )
+
+
+class TilingTest(unittest.TestCase):
+    def setUp(self):
+        x = np.linspace(-40.0, 40.0, 9)
+        X, Y = np.meshgrid(x, x[:6])
+        self.locations = np.c_[X.ravel(), Y.ravel(), np.full(X.size, 2.5)]
+        self.mesh = get_mesh(self.locations)
+        self.active = self.mesh.gridCC[:, 2] < 0
+        self.nC = int(self.active.sum())
+
+    def test_tile_locations(self):
+        tiles = tile_locations(self.locations, n_tiles=3)
+        self.assertEqual(len(tiles), 3)
+        np.testing.assert_array_equal(
+            np.sort(np.hstack(tiles)), np.arange(self.locations.shape[0])
+        )
+        # the largest tile is split in halves along its widest (x) axis
+        self.assertEqual(sorted(len(tile) for tile in tiles), [13, 14, 27])
+        half = max(tiles, key=len)
+        self.assertTrue(
+            np.all(self.locations[half, 0] <= 0)
+            or np.all(self.locations[half, 0] >= 0)
+        )
+
+        tiles = tile_locations(self.locations, max_locations=10)
+        self.assertTrue(all(len(tile) <= 10 for tile in tiles))
+
+    def test_tile_map(self):
+        local_mesh = create_local_mesh(
+            self.mesh, self.locations[self.locations[:, 0] < 0], 20.0
+        )
+        self.assertLess(local_mesh.nC, self.mesh.nC)
+
+        # the local cell of each global cell, from their levels and indices
+        cells = np.arange(self.mesh.nC)
+        np.testing.assert_array_equal(
+            maps._containing_tree_cells(local_mesh, self.mesh, cells),
+            local_mesh._get_containing_cell_indexes(self.mesh.gridCC),
+        )
+
+        tile_map = maps.TileMap(self.mesh, self.active, local_mesh)
+        P = tile_map.P.tocsr()
+
+        # volume averaging of whole global cells, partial across the surface
+        weights = P * np.ones(self.nC)
+        top = local_mesh.gridCC[:, 2] + local_mesh.h_gridded[:, 2] / 2
+        below = top[tile_map.local_active] < 0
+        np.testing.assert_allclose(weights[below], 1.0)
+        self.assertTrue(np.all(weights <= 1.0 + 1e-12))
+        np.testing.assert_allclose(
+            P.T * local_mesh.vol[tile_map.local_active],
+            self.mesh.vol[self.active],
+        )
+
+        # global cells near the receivers are kept unchanged
+        m = np.random.RandomState(0).rand(self.nC)
+        local_model = tile_map * m
+        centers = local_mesh.gridCC[tile_map.local_active]
+        near = np.linalg.norm(
+            centers[:, None, :2] - self.locations[None, :, :2], axis=2
+        ).min(axis=1) < 5.0
+        in_global = self.mesh._get_containing_cell_indexes(centers[near])
+        global_model = np.zeros(self.mesh.nC)
+        global_model[self.active] = m
+        np.testing.assert_allclose(local_model[near], global_model[in_global])
+
+    def test_tile_map_finer_local_mesh(self):
+        # local cells finer than the global ones below the receivers
+        levels = self.mesh.cell_levels_by_index(np.arange(self.mesh.nC))
+        local_mesh = discretize.TreeMesh(self.mesh.h, x0=self.mesh.x0)
+        local_mesh.insert_cells(self.mesh.gridCC, levels, finalize=False)
+        local_mesh.insert_cells(
+            np.c_[self.locations[:, :2], np.full(len(self.locations), -30.0)],
+            np.full(len(self.locations), self.mesh.max_level),
+            finalize=True,
+        )
+        self.assertGreater(local_mesh.nC, self.mesh.nC)
+        self.assertIsNone(
+            maps._containing_tree_cells(
+                local_mesh, self.mesh, np.arange(self.mesh.nC)
+            )
+        )
+
+        # the global cells are located on the local mesh instead
+        tile_map = maps.TileMap(self.mesh, self.active, local_mesh)
+        in_local = local_mesh._get_containing_cell_indexes(
+            self.mesh.gridCC[self.active]
+        )
+        np.testing.assert_array_equal(
+            np.where(tile_map.local_active)[0], np.unique(in_local)
+        )
+        m = np.random.RandomState(0).rand(self.nC)
+        local_model = np.zeros(local_mesh.nC)
+        local_model[tile_map.local_active] = tile_map * m
+        np.testing.assert_allclose(
+            np.bincount(
+                in_local,
+                weights=self.mesh.vol[self.active] * m,
+                minlength=local_mesh.nC,
+            ),
+            local_model * local_mesh.vol,
+        )
+
+        # trees on different base meshes are not compared by their levels
+        shifted = discretize.TreeMesh(self.mesh.h, x0=self.mesh.x0 + 5.0)
+        shifted.insert_cells(self.mesh.gridCC - 5.0, levels, finalize=True)
+        self.assertIsNone(
+            maps._containing_tree_cells(shifted, self.mesh, np.arange(self.mesh.nC))
+        )
+
+    def test_gravity(self):
+        components = ["gz", "gx"]
+        receivers = gravity.Point(self.locations, components=components)
+        survey = gravity.Survey(gravity.SourceField([receivers]))
+        simulation = gravity.Simulation3DIntegral(
+            self.mesh,
+            survey=survey,
+            rhoMap=maps.IdentityMap(nP=self.nC),
+            actInd=self.active,
+            store_sensitivities="ram",
+            n_cpu=1,
+        )
+
+        model = np.zeros(self.nC)
+        model[np.linalg.norm(self.mesh.gridCC[self.active], axis=1) < 15.0] = 0.5
+        dobs = simulation.dpred(model)
+        survey_data = data.Data(survey, dobs=dobs, standard_deviation=0.01)
+
+        misfit = create_tiled_misfit(
+            simulation, survey_data, n_tiles=2, padding_distance=1e3
+        )
+        self.assertIsInstance(misfit, objective_function.ComboObjectiveFunction)
+        self.assertEqual(len(misfit.objfcts), 2)
+        self.assertEqual(
+            sum(dmis.nD for dmis in misfit.objfcts), survey_data.nD
+        )
+
+        # with the whole mesh kept, the tiles reproduce the global data
+        self.assertLess(misfit(model), 1e-12)
+        self.assertGreater(misfit(2 * model), 1.0)
+
+    def test_vector_magnetics(self):
+        receivers = magnetics.Point(self.locations, components=["bx", "bz"])
+        survey = magnetics.Survey(
+            magnetics.SourceField([receivers], parameters=[50000, 90, 0])
+        )
+        simulation = magnetics.Simulation3DIntegral(
+            self.mesh,
+            survey=survey,
+            chiMap=maps.IdentityMap(nP=3 * self.nC),
+            actInd=self.active,
+            model_type="vector",
+            store_sensitivities="forward_only",
+            n_cpu=1,
+        )
+        misfit = create_tiled_misfit(
+            simulation,
+            data.Data(survey, dobs=np.zeros(survey.nD), standard_deviation=1.0),
+            max_locations=20,
+            padding_distance=20.0,
+            store_sensitivities="ram",
+        )
+        self.assertEqual(len(misfit.objfcts), 4)
+        for dmis in misfit.objfcts:
+            sim = dmis.simulation
+            self.assertEqual(sim.model_type, "vector")
+            self.assertEqual(sim.store_sensitivities, "ram")
+            self.assertEqual(sim.chiMap.shape, (3 * sim.nC, 3 * self.nC))
+        self.assertEqual(misfit.deriv(np.zeros(3 * self.nC)).shape, (3 * self.nC,))
+
+
+if __name__ == "__main__":
+    unittest.main()
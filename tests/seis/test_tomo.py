@@ -38,6 +38,43 @@ class TomoTest(unittest.TestCase):
 
         return tests.checkDerivative(fun, s, num=4, plotIt=False, eps=FLR)
 
+    def test_line_integral_matrix(self):
+        # same lengths as intersecting the rays with each cell
+        A = self.problem.A
+        row = 0
+        for src in self.survey.source_list:
+            for rx in src.receiver_list:
+                for loc in rx.locations:
+                    lengths = np.zeros(self.M.nC)
+                    for ind in range(self.M.nC):
+                        i, j = np.unravel_index(ind, self.M.vnC, order="F")
+                        length = tomo.lengthInCell(
+                            src.location,
+                            loc - src.location,
+                            self.M.vectorNx[[i, i + 1]],
+                            self.M.vectorNy[[j, j + 1]],
+                        )
+                        if length is not None:
+                            lengths[ind] = length
+                    np.testing.assert_allclose(
+                        A[row].toarray().ravel(), lengths, atol=1e-12
+                    )
+                    row += 1
+
+    def test_line_integral_matrix_3D(self):
+        mesh = discretize.TensorMesh([4, 5, 6])
+        sources = np.r_[[[-0.5, 0.5, 0.5], [0.2, 0.3, -1.0], [0.1, 0.2, 0.3]]]
+        receivers = np.r_[[[1.5, 0.5, 0.5], [0.2, 0.3, 2.0], [0.9, 0.8, 0.7]]]
+        A = tomo.line_integral_matrix(mesh, sources, receivers)
+
+        # total length within the unit cube
+        np.testing.assert_allclose(
+            A.sum(axis=1).A1, [1.0, 1.0, np.linalg.norm(receivers[2] - sources[2])]
+        )
+        # the first ray runs along x through the middle of the cells
+        row = A[0].toarray().reshape(mesh.vnC, order="F")
+        np.testing.assert_allclose(row[:, 2, 3], 0.25)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import numpy as np
+from SimPEG.utils.hmatrix_utils import HierarchicalMatrix, adaptive_cross_approximation
+
+
+class TestHierarchicalMatrix(unittest.TestCase):
+    def setUp(self):
+        np.random.seed(0)
+
+        # Potential of point sources on a plane, observed above
+        self.sources = np.c_[np.random.rand(800, 2) * 10.0, -np.random.rand(800)]
+        self.receivers = np.c_[np.random.rand(600, 2) * 10.0, np.ones(600)]
+
+        def get_block(rows, columns):
+            distance = np.linalg.norm(
+                self.receivers[rows, None, :] - self.sources[None, columns, :],
+                axis=2,
+            )
+            return 1.0 / distance
+
+        self.get_block = get_block
+        self.A = get_block(np.arange(600), np.arange(800))
+
+    def test_aca(self):
+        # Well separated clusters are of low rank
+        rows = np.where(self.receivers[:, 0] < 2.0)[0]
+        columns = np.where(self.sources[:, 0] > 8.0)[0]
+        U, V = adaptive_cross_approximation(
+            lambda i: self.get_block(rows[[i]], columns)[0],
+            lambda j: self.get_block(rows, columns[[j]])[:, 0],
+            (len(rows), len(columns)),
+            tol=1e-6,
+        )
+        block = self.A[rows][:, columns]
+        self.assertLess(U.shape[1], 40)
+        self.assertLess(
+            np.linalg.norm(U @ V - block) / np.linalg.norm(block), 1e-5
+        )
+
+    def test_products(self):
+        H = HierarchicalMatrix(
+            self.get_block, self.receivers, self.sources, tol=1e-6, leaf_size=32
+        )
+        self.assertLess(H.n_stored, self.A.size)
+
+        x = np.random.randn(800)
+        y = np.random.randn(600)
+        self.assertLess(
+            np.linalg.norm(H @ x - self.A @ x) / np.linalg.norm(self.A @ x), 1e-5
+        )
+        self.assertLess(
+            np.linalg.norm(H.T @ y - self.A.T @ y) / np.linalg.norm(self.A.T @ y),
+            1e-5,
+        )
+
+        W = np.random.rand(600)
+        diag = W @ self.A ** 2
+        self.assertLess(
+            np.linalg.norm(H.squared_column_sum(W) - diag) / np.linalg.norm(diag),
+            1e-5,
+        )
+
+    def test_grouped_rows(self):
+        # Rows in groups of three sharing a receiver, combined by weights
+        groups = np.repeat(np.arange(200), 3)
+        H = HierarchicalMatrix(
+            self.get_block,
+            self.receivers[:600],
+            self.sources,
+            tol=1e-6,
+            leaf_size=16,
+            row_groups=groups,
+        )
+        for rows, _, _ in H.dense_blocks:
+            self.assertTrue(np.all(np.bincount(groups[rows])[groups[rows]] == 3))
+
+        row_weights = np.random.randn(600)
+        W = np.random.rand(200)
+        combined = (row_weights[:, None] * self.A).reshape((200, 3, -1)).sum(axis=1)
+        diag = W @ combined ** 2
+        self.assertLess(
+            np.linalg.norm(H.squared_column_sum(W, row_weights=row_weights) - diag)
+            / np.linalg.norm(diag),
+            1e-5,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
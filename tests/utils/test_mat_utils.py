@@ -7,7 +7,11 @@ from discretize import TensorMesh
 from SimPEG import simulation, data_misfit
 from SimPEG.maps import IdentityMap
 from SimPEG.regularization import Tikhonov
-from SimPEG.utils.mat_utils import eigenvalue_by_power_iteration
+from SimPEG.utils.mat_utils import (
+    eigenvalue_by_power_iteration,
+    JtJ_diagonal,
+    estimate_JtJ_diagonal,
+)
 
 
 class TestEigenvalues(unittest.TestCase):
@@ -125,5 +129,30 @@ class TestEigenvalues(unittest.TestCase):
         print("Eigenvalue Utils for a mixed ComboObjectiveFunction is validated.")
 
 
+class TestJtJDiagonal(unittest.TestCase):
+    def setUp(self):
+        np.random.seed(0)
+        self.J = np.random.randn(50, 30)
+        self.w = np.random.rand(50)
+        self.true_diag = np.sum((self.w[:, None] * self.J) ** 2, axis=0)
+
+    def test_blocks(self):
+        blocks = [self.J[i : i + 7].T for i in range(0, 50, 7)]
+        np.testing.assert_allclose(JtJ_diagonal(blocks, self.w), self.true_diag)
+        np.testing.assert_allclose(
+            JtJ_diagonal([self.J.T]), np.sum(self.J ** 2, axis=0)
+        )
+
+    def test_estimate(self):
+        # one probing vector per parameter recovers the diagonal exactly
+        diag = estimate_JtJ_diagonal(
+            self.J.dot, self.J.T.dot, 30, w=self.w, k=30, approach="Probing"
+        )
+        np.testing.assert_allclose(diag, self.true_diag)
+
+        diag = estimate_JtJ_diagonal(self.J.dot, self.J.T.dot, 30, w=self.w, k=5000)
+        np.testing.assert_allclose(diag, self.true_diag, rtol=0.2)
+
+
 if __name__ == "__main__":
     unittest.main()
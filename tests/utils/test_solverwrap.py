@@ -1,5 +1,6 @@
 import unittest
 from SimPEG.utils.solver_utils import Solver, SolverLU, SolverCG, SolverBiCG, SolverDiag
+from SimPEG.utils.solver_utils import SolverBlockCG, SolverBlockBiCG, Preconditioner
 import scipy.sparse as sp
 import numpy as np
 
@@ -59,6 +60,46 @@ class TestSolve(unittest.TestCase):
         x2 = Ainv @ b
         np.testing.assert_almost_equal(x, x2)
 
+    def test_multiple_rhs(self):
+        x = np.random.rand(self.n, 6)
+        x[:, -1] = x[:, 0]  # dependent columns
+        x[:, -2] = 0.0  # zero right hand side
+        b = self.A @ x
+
+        for solver, decimal in [
+            (Solver, 7),
+            (SolverLU, 7),
+            (SolverCG, 4),
+            (SolverBlockCG, 4),
+            (SolverBlockBiCG, 4),
+        ]:
+            for n_workers in [1, 3]:
+                Ainv = solver(self.A, n_workers=n_workers)
+                x2 = Ainv @ b
+                self.assertEqual(x2.shape, x.shape)
+                np.testing.assert_almost_equal(x, x2, decimal=decimal)
+
+    def test_preconditioners(self):
+        x = np.random.rand(self.n, 2)
+        b = self.A @ x
+
+        for kind in ["jacobi", "ssor", "ilu", "amg"]:
+            preconditioner = Preconditioner(kind)
+            for solver in [SolverCG, SolverBiCG, SolverBlockCG]:
+                Ainv = solver(self.A, preconditioner=preconditioner, tol=1e-8)
+                np.testing.assert_almost_equal(x, Ainv @ b, decimal=6)
+            preconditioner.clean()
+            self.assertIsNone(preconditioner._setup)
+
+        # the incomplete factors are reused for the other matrices
+        preconditioner = Preconditioner("ilu")
+        M = preconditioner(self.A)
+        np.testing.assert_equal(M @ b, preconditioner(2 * self.A) @ b)
+        self.assertFalse(np.allclose(M @ b, Preconditioner("ilu")(2 * self.A) @ b))
+
+        with self.assertRaises(ValueError):
+            Preconditioner("not_a_preconditioner")
+
 
 if __name__ == "__main__":
     unittest.main()